@@ -18,6 +18,38 @@ class Settings(BaseSettings):
     # Twilio credentials
     twilio_account_sid: str = Field("", env="TWILIO_ACCOUNT_SID")
     twilio_auth_token: str = Field("", env="TWILIO_AUTH_TOKEN")
+    twilio_phone_number: str = Field("", env="TWILIO_PHONE_NUMBER")
+    
+    # Twilio REST transport: one keep-alive connection pool per process
+    twilio_http_timeout: float = Field(default=15.0, env="TWILIO_HTTP_TIMEOUT")
+    twilio_http_connect_timeout: float = Field(default=5.0, env="TWILIO_HTTP_CONNECT_TIMEOUT")
+    twilio_http_max_connections: int = Field(default=20, env="TWILIO_HTTP_MAX_CONNECTIONS")
+    twilio_http_keepalive: float = Field(default=60.0, env="TWILIO_HTTP_KEEPALIVE")
+    
+    # Bulk dialer; the calls-per-second limit must match the Twilio account's (1 CPS by default)
+    dialer_calls_per_second: float = Field(default=1.0, env="DIALER_CALLS_PER_SECOND")
+    dialer_max_live_calls: int = Field(default=50, env="DIALER_MAX_LIVE_CALLS")
+    dialer_workers: int = Field(default=10, env="DIALER_WORKERS")
+    dialer_max_attempts: int = Field(default=3, env="DIALER_MAX_ATTEMPTS")
+    dialer_retry_delay: float = Field(default=5.0, env="DIALER_RETRY_DELAY")
+    dialer_max_call_seconds: float = Field(default=3600.0, env="DIALER_MAX_CALL_SECONDS")
+    
+    # Outbound campaign scheduler; agent capacity is the number of concurrent Ultravox sessions
+    campaign_scheduler_enabled: bool = Field(default=True, env="CAMPAIGN_SCHEDULER_ENABLED")
+    campaign_tick_seconds: float = Field(default=2.0, env="CAMPAIGN_TICK_SECONDS")
+    campaign_agent_capacity: int = Field(default=20, env="CAMPAIGN_AGENT_CAPACITY")
+    campaign_max_dial_ratio: float = Field(default=2.5, env="CAMPAIGN_MAX_DIAL_RATIO")
+    campaign_lease_seconds: int = Field(default=300, env="CAMPAIGN_LEASE_SECONDS")
+    campaign_lease_batch: int = Field(default=50, env="CAMPAIGN_LEASE_BATCH")
+    campaign_answer_rate_min_samples: int = Field(default=20, env="CAMPAIGN_ANSWER_RATE_MIN_SAMPLES")
+    campaign_throughput_window: int = Field(default=300, env="CAMPAIGN_THROUGHPUT_WINDOW")
+    
+    # Call metrics rollups; the price reconciler pulls call prices from Twilio, which sets them after the call ends
+    call_metrics_flush_seconds: float = Field(default=10.0, env="CALL_METRICS_FLUSH_SECONDS")
+    call_metrics_rebuild_hours: int = Field(default=48, env="CALL_METRICS_REBUILD_HOURS")
+    call_price_reconcile_enabled: bool = Field(default=False, env="CALL_PRICE_RECONCILE_ENABLED")
+    call_price_reconcile_interval: float = Field(default=900.0, env="CALL_PRICE_RECONCILE_INTERVAL")
+    call_price_reconcile_lookback_hours: int = Field(default=48, env="CALL_PRICE_RECONCILE_LOOKBACK_HOURS")
     
     # Supabase credentials
     supabase_url: str = Field("", env="SUPABASE_URL")
@@ -26,10 +58,100 @@ class Settings(BaseSettings):
     # Google OAuth credentials
     google_client_id: str = Field("", env="GOOGLE_CLIENT_ID")
     google_client_secret: str = Field("", env="GOOGLE_CLIENT_SECRET")
+    google_client_cache_size: int = Field(default=256, env="GOOGLE_CLIENT_CACHE_SIZE")
+    google_api_workers: int = Field(default=8, env="GOOGLE_API_WORKERS")
+    google_api_timeout: float = Field(default=60.0, env="GOOGLE_API_TIMEOUT")
+    google_batch_size: int = Field(default=50, env="GOOGLE_BATCH_SIZE")
+    google_batch_max_attempts: int = Field(default=3, env="GOOGLE_BATCH_MAX_ATTEMPTS")
+    google_store_rows: int = Field(default=500, env="GOOGLE_STORE_ROWS")
+    
+    # Parsed service credentials cached per (user, service)
+    credential_cache_size: int = Field(default=2048, env="CREDENTIAL_CACHE_SIZE")
+    credential_cache_ttl: float = Field(default=30.0, env="CREDENTIAL_CACHE_TTL")
+    # Fernet keys, one per line, newest first; unset derives the key from SECRET_KEY
+    credential_key_file: str = Field(default="", env="CREDENTIAL_KEY_FILE")
+    
+    # Background health checks of the configured external services
+    service_health_enabled: bool = Field(default=True, env="SERVICE_HEALTH_ENABLED")
+    service_health_interval: float = Field(default=120.0, env="SERVICE_HEALTH_INTERVAL")
+    service_health_ttl: float = Field(default=300.0, env="SERVICE_HEALTH_TTL")
+    service_health_timeout: float = Field(default=5.0, env="SERVICE_HEALTH_TIMEOUT")
     
     # Ultravox API
     ultravox_api_key: str = Field("", env="ULTRAVOX_API_KEY")
     
+    # Embedding models
+    embedding_model: str = Field(default="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2", env="EMBEDDING_MODEL")
+    embedding_fallback_model: str = Field(default="all-MiniLM-L6-v2", env="EMBEDDING_FALLBACK_MODEL")
+    embedding_warmup: bool = Field(default=True, env="EMBEDDING_WARMUP")
+    embedding_batch_size: int = Field(default=64, env="EMBEDDING_BATCH_SIZE")
+    embedding_backend: str = Field(default="torch", env="EMBEDDING_BACKEND")
+    embedding_onnx_dir: str = Field(default="/tmp/onnx_models", env="EMBEDDING_ONNX_DIR")
+    embedding_onnx_threads: int = Field(default=0, env="EMBEDDING_ONNX_THREADS")
+    embedding_cache_enabled: bool = Field(default=True, env="EMBEDDING_CACHE_ENABLED")
+    embedding_cache_path: str = Field(default="/tmp/embedding_cache/embeddings.sqlite3", env="EMBEDDING_CACHE_PATH")
+    embedding_cache_max_bytes: int = Field(default=1024 * 1024 * 1024, env="EMBEDDING_CACHE_MAX_BYTES")
+    
+    # Supabase embedding uploads
+    supabase_upload_batch_bytes: int = Field(default=1024 * 1024, env="SUPABASE_UPLOAD_BATCH_BYTES")
+    supabase_upload_batch_rows: int = Field(default=500, env="SUPABASE_UPLOAD_BATCH_ROWS")
+    supabase_upload_concurrency: int = Field(default=4, env="SUPABASE_UPLOAD_CONCURRENCY")
+    supabase_upload_max_attempts: int = Field(default=4, env="SUPABASE_UPLOAD_MAX_ATTEMPTS")
+    supabase_upload_retry_delay: float = Field(default=0.5, env="SUPABASE_UPLOAD_RETRY_DELAY")
+    
+    # Shared Supabase HTTP client pool (one client per project + API key)
+    supabase_pool_max_clients: int = Field(default=64, env="SUPABASE_POOL_MAX_CLIENTS")
+    supabase_pool_idle_ttl: float = Field(default=600.0, env="SUPABASE_POOL_IDLE_TTL")
+    supabase_pool_max_connections: int = Field(default=20, env="SUPABASE_POOL_MAX_CONNECTIONS")
+    supabase_pool_max_keepalive: int = Field(default=10, env="SUPABASE_POOL_MAX_KEEPALIVE")
+    supabase_pool_keepalive_expiry: float = Field(default=60.0, env="SUPABASE_POOL_KEEPALIVE_EXPIRY")
+    supabase_pool_http2: bool = Field(default=True, env="SUPABASE_POOL_HTTP2")
+    
+    # Knowledge base search caches
+    search_query_cache_size: int = Field(default=10000, env="SEARCH_QUERY_CACHE_SIZE")
+    search_query_cache_ttl: float = Field(default=3600.0, env="SEARCH_QUERY_CACHE_TTL")
+    search_result_cache_size: int = Field(default=5000, env="SEARCH_RESULT_CACHE_SIZE")
+    search_result_cache_ttl: float = Field(default=300.0, env="SEARCH_RESULT_CACHE_TTL")
+    
+    # Vector search backend: "supabase" or "local" (in-process index synced from Supabase)
+    search_backend: str = Field(default="supabase", env="SEARCH_BACKEND")
+    # Hybrid search needs each table's hybrid_search_documents SQL re-run, and is always served by Supabase
+    search_hybrid: bool = Field(default=False, env="SEARCH_HYBRID")
+    search_candidate_count: int = Field(default=50, env="SEARCH_CANDIDATE_COUNT")
+    vector_index_dir: str = Field(default="/tmp/vector_index", env="VECTOR_INDEX_DIR")
+    vector_index_sync_interval: float = Field(default=60.0, env="VECTOR_INDEX_SYNC_INTERVAL")
+    vector_index_ivf_min_rows: int = Field(default=20000, env="VECTOR_INDEX_IVF_MIN_ROWS")
+    vector_index_nprobe: int = Field(default=16, env="VECTOR_INDEX_NPROBE")
+    
+    # Document ingestion
+    ingestion_workers: int = Field(default=2, env="INGESTION_WORKERS")
+    ingestion_max_concurrent_jobs: int = Field(default=4, env="INGESTION_MAX_CONCURRENT_JOBS")
+    ingestion_embed_chunk_size: int = Field(default=256, env="INGESTION_EMBED_CHUNK_SIZE")
+    ingestion_pdf_pages_per_task: int = Field(default=20, env="INGESTION_PDF_PAGES_PER_TASK")
+    ingestion_preload_model: bool = Field(default=True, env="INGESTION_PRELOAD_MODEL")
+    ingestion_job_workers: int = Field(default=2, env="INGESTION_JOB_WORKERS")
+    ingestion_max_jobs_per_tenant: int = Field(default=1, env="INGESTION_MAX_JOBS_PER_TENANT")
+    ingestion_batch_max_attempts: int = Field(default=3, env="INGESTION_BATCH_MAX_ATTEMPTS")
+    ingestion_job_poll_interval: float = Field(default=2.0, env="INGESTION_JOB_POLL_INTERVAL")
+    ingestion_job_stale_seconds: int = Field(default=300, env="INGESTION_JOB_STALE_SECONDS")
+    ingestion_job_max_attempts: int = Field(default=3, env="INGESTION_JOB_MAX_ATTEMPTS")
+    ingestion_staging_timeout: int = Field(default=3600, env="INGESTION_STAGING_TIMEOUT")
+    ingestion_failed_retention_seconds: int = Field(default=86400, env="INGESTION_FAILED_RETENTION_SECONDS")
+    ingestion_staging_dir: str = Field(default="/tmp/ingestion_jobs", env="INGESTION_STAGING_DIR")
+    
+    # Incremental Google Drive sync
+    drive_sync_enabled: bool = Field(default=True, env="DRIVE_SYNC_ENABLED")
+    drive_sync_interval: float = Field(default=300.0, env="DRIVE_SYNC_INTERVAL")
+    drive_sync_page_size: int = Field(default=1000, env="DRIVE_SYNC_PAGE_SIZE")
+    drive_sync_stale_seconds: int = Field(default=900, env="DRIVE_SYNC_STALE_SECONDS")
+    
+    # Google Drive downloads
+    drive_download_chunk_bytes: int = Field(default=8 * 1024 * 1024, env="DRIVE_DOWNLOAD_CHUNK_BYTES")
+    drive_download_parallelism: int = Field(default=4, env="DRIVE_DOWNLOAD_PARALLELISM")
+    drive_download_concurrency: int = Field(default=3, env="DRIVE_DOWNLOAD_CONCURRENCY")
+    drive_download_memory_bytes: int = Field(default=16 * 1024 * 1024, env="DRIVE_DOWNLOAD_MEMORY_BYTES")
+    drive_download_max_attempts: int = Field(default=4, env="DRIVE_DOWNLOAD_MAX_ATTEMPTS")
+    
     # JWT configuration
     jwt_secret: str = Field(default="", env="JWT_SECRET")
     jwt_algorithm: str = Field(default="HS256", env="JWT_ALGORITHM")
@@ -2,6 +2,7 @@ import logging
 import aiomysql
 import asyncio
 import os
+from contextlib import asynccontextmanager
 from mysql.connector import Error
 from typing import List, Dict, Any, Optional
 from .config import settings
@@ -139,6 +140,27 @@ class Database:
                     # Wait before retrying with exponential backoff
                     await asyncio.sleep(self.retry_delay * (2 ** (retries - 1)))
 
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        Run statements on one connection in a transaction, for locking reads and
+        row counts. Yields a dict cursor; commits on success, rolls back on error.
+        """
+        if not self.connected or not self.pool:
+            await self.connect()
+            if not self.connected:
+                raise DatabaseError("Database connection failed, cannot start transaction")
+
+        async with self.pool.acquire() as conn:
+            await conn.begin()
+            try:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    yield cursor
+                await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
+
     async def execute_migration(self, migration_file: str) -> bool:
         """
         Execute a SQL migration file
@@ -275,6 +297,32 @@ async def create_tables():
             if os.path.exists(service_tables_migration):
                 await db.execute_migration(service_tables_migration)
                 
+            ingestion_job_migration = os.path.join(migrations_path, 'create_ingestion_job_tables.sql')
+            if os.path.exists(ingestion_job_migration):
+                await db.execute_migration(ingestion_job_migration)
+                
+            drive_sync_migration = os.path.join(migrations_path, 'create_drive_sync_tables.sql')
+            if os.path.exists(drive_sync_migration):
+                await db.execute_migration(drive_sync_migration)
+                
+            google_activity_migration = os.path.join(migrations_path, 'create_google_activity_tables.sql')
+            if os.path.exists(google_activity_migration):
+                await db.execute_migration(google_activity_migration)
+                
+            campaign_migration = os.path.join(migrations_path, 'create_campaign_tables.sql')
+            if os.path.exists(campaign_migration):
+                await db.execute_migration(campaign_migration)
+                
+            call_metrics_migration = os.path.join(migrations_path, 'create_call_metrics_tables.sql')
+            if os.path.exists(call_metrics_migration):
+                await db.execute_migration(call_metrics_migration)
+                
+            # Status callbacks look calls up by SID and rollups scan them by start time
+            call_indexes = {row['Key_name'] for row in await db.execute("SHOW INDEX FROM calls")}
+            for index_name, column in (('idx_call_sid', 'call_sid'), ('idx_start_time', 'start_time')):
+                if index_name not in call_indexes:
+                    await db.execute(f"CREATE INDEX {index_name} ON calls ({column})")
+                
             logger.info("Database tables created successfully")
             return True
     except Exception as e:
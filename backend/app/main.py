@@ -2,6 +2,7 @@ from fastapi import FastAPI, Request, HTTPException, status, Body, Depends, Head
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import os
+import asyncio
 import logging
 import traceback
 from datetime import datetime, timedelta
@@ -9,7 +10,21 @@ from typing import Optional, List, Dict, Any
 from pydantic import BaseModel
 
 # Import route modules
-from .routes import auth, health, calls, credentials, dashboard, knowledge_base
+from .routes import auth, health, calls, campaigns, credentials, dashboard, knowledge_base, vectorization
+from .config import settings
+from .services.embedding_models import model_registry
+from .services.ingestion_executor import ingestion_executor
+from .services.ingestion_jobs import ingestion_job_queue
+from .services.vector_index import local_vector_index
+from .services.http_client_pool import supabase_client_pool
+from .services.drive_sync import drive_sync_service
+from .services.google_clients import google_client_factory
+from .services.google_drive_service import drive_download_pool
+from .services.credential_validator import credential_validator
+from .services.service_health import service_health
+from .services.twilio_service import twilio_service
+from .services.campaign_scheduler import campaign_scheduler
+from .services.call_metrics import call_metrics
 
 # Configure detailed logging
 logging.basicConfig(
@@ -33,9 +48,104 @@ app = FastAPI(
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(health.router, prefix="/api/health", tags=["health"])
 app.include_router(calls.router, prefix="/api/calls", tags=["calls"])
+app.include_router(campaigns.router, prefix="/api/campaigns", tags=["campaigns"])
 app.include_router(credentials.router, prefix="/api/credentials", tags=["credentials"])
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
 app.include_router(knowledge_base.router, prefix="/api/knowledge", tags=["knowledge_base"])
+app.include_router(vectorization.router, prefix="/api/vectorization", tags=["vectorization"])
+
+# --- Lifecycle hooks ---
+def _warmup_embedding_model():
+    try:
+        model_registry.warmup()
+    except Exception as e:
+        logger.error(f"Embedding model warmup failed: {str(e)}")
+
+@app.on_event("startup")
+async def warmup_models():
+    """Load the shared embedding model in a background thread so startup is not blocked"""
+    if settings.embedding_warmup:
+        asyncio.get_running_loop().run_in_executor(None, _warmup_embedding_model)
+
+def _warmup_credential_keys():
+    try:
+        credential_validator.fernet
+    except Exception as e:
+        logger.error(f"Credential key warmup failed: {str(e)}")
+
+@app.on_event("startup")
+async def warmup_credential_keys():
+    """Derive or load the credential encryption keys in a background thread"""
+    asyncio.get_running_loop().run_in_executor(None, _warmup_credential_keys)
+
+@app.on_event("startup")
+async def start_service_health():
+    """Check the configured external services in the background for the status endpoints"""
+    if settings.service_health_enabled:
+        service_health.start()
+
+@app.on_event("shutdown")
+async def stop_service_health():
+    await service_health.stop()
+
+@app.on_event("startup")
+async def start_call_metrics():
+    """Keep the call metrics rollups current and, if enabled, pull call prices from Twilio"""
+    reconcile = settings.call_price_reconcile_enabled and twilio_service.credentials_valid
+    call_metrics.start(twilio_service.list_call_prices if reconcile else None)
+
+@app.on_event("shutdown")
+async def stop_call_metrics():
+    await call_metrics.stop()
+
+@app.on_event("startup")
+async def start_campaign_scheduler():
+    """Dial running campaigns; leases left by a previous process expire and are dialed again"""
+    if settings.campaign_scheduler_enabled:
+        campaign_scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_campaign_scheduler():
+    await campaign_scheduler.stop()
+
+@app.on_event("startup")
+async def start_ingestion_workers():
+    """Start the background document ingestion workers"""
+    ingestion_job_queue.start()
+
+@app.on_event("startup")
+async def start_vector_index_sync():
+    """Keep local vector indexes in step with Supabase when they serve searches"""
+    if settings.search_backend == 'local':
+        local_vector_index.start()
+
+@app.on_event("startup")
+async def start_drive_sync():
+    """Periodically pull Google Drive changes for users with sync enabled"""
+    if settings.drive_sync_enabled:
+        drive_sync_service.start()
+
+@app.on_event("shutdown")
+async def stop_drive_sync():
+    await drive_sync_service.stop()
+
+@app.on_event("shutdown")
+async def stop_vector_index_sync():
+    await local_vector_index.stop()
+
+@app.on_event("shutdown")
+async def shutdown_ingestion():
+    """Stop ingestion workers (jobs resume from their checkpoints) and the worker processes"""
+    await ingestion_job_queue.stop()
+    ingestion_executor.shutdown(wait=False)
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    """Close pooled Supabase, Drive and Twilio connections and the Google API workers once nothing else will use them"""
+    await supabase_client_pool.aclose()
+    await drive_download_pool.aclose()
+    google_client_factory.shutdown()
+    await twilio_service.aclose()
 
 # CORS middleware setup - Allow all origins to fix cross-domain issues
 app.add_middleware(
@@ -171,28 +281,7 @@ async def get_service_status(service: str):
     logger.info(f"[FALLBACK ENDPOINT] Checking status for service: {service}")
     
     try:
-        # This is a hardcoded list for dev/test environments
-        services_connected = {
-            "Twilio": True,
-            "Supabase": True,
-            "Google Calendar": True,
-            "Ultravox": True,
-            "SERP API": True,
-            "Airtable": True,
-            "Gmail": True,
-            "Google Drive": True
-        }
-        
-        is_connected = services_connected.get(service, False)
-        
-        # Return the status with more complete info the frontend expects
-        return {
-            "service": service,
-            "connected": is_connected,
-            "status": "configured" if is_connected else "not_configured",
-            "message": f"{service} is {'successfully configured' if is_connected else 'not configured'}",
-            "last_checked": datetime.utcnow().isoformat()
-        }
+        return service_health.get_status(service)
     except Exception as e:
         logger.error(f"Error in fallback service status for {service}: {str(e)}")
         # Return a 200 with connected=false rather than an error
@@ -0,0 +1,25 @@
+-- Hourly call rollups, recomputed from the calls table whenever calls in the hour change
+CREATE TABLE IF NOT EXISTS call_metrics_hourly (
+    bucket_start DATETIME NOT NULL,
+    direction VARCHAR(10) NOT NULL,
+    total_calls INT NOT NULL DEFAULT 0,
+    completed_calls INT NOT NULL DEFAULT 0,
+    total_duration BIGINT NOT NULL DEFAULT 0,
+    total_cost DECIMAL(14, 4) NOT NULL DEFAULT 0,
+    priced_calls INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (bucket_start, direction)
+);
+
+-- Daily call rollups, summed from the hourly ones
+CREATE TABLE IF NOT EXISTS call_metrics_daily (
+    bucket_date DATE NOT NULL,
+    direction VARCHAR(10) NOT NULL,
+    total_calls INT NOT NULL DEFAULT 0,
+    completed_calls INT NOT NULL DEFAULT 0,
+    total_duration BIGINT NOT NULL DEFAULT 0,
+    total_cost DECIMAL(14, 4) NOT NULL DEFAULT 0,
+    priced_calls INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (bucket_date, direction)
+);
@@ -0,0 +1,57 @@
+-- Outbound calling campaigns
+CREATE TABLE IF NOT EXISTS campaigns (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    campaign_key CHAR(32) NOT NULL,
+    user_id INT NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    from_number VARCHAR(20) NOT NULL,
+    ultravox_url VARCHAR(1024) NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'draft',
+    timezone VARCHAR(64) NOT NULL DEFAULT 'UTC',
+    window_start TIME NOT NULL DEFAULT '09:00:00',
+    window_end TIME NOT NULL DEFAULT '18:00:00',
+    -- Comma-separated weekdays on which calls are placed, Monday = 0
+    call_days VARCHAR(20) NOT NULL DEFAULT '0,1,2,3,4',
+    max_attempts INT NOT NULL DEFAULT 2,
+    retry_delay_seconds INT NOT NULL DEFAULT 3600,
+    total_targets INT NOT NULL DEFAULT 0,
+    -- Call attempts placed, finished and answered; the answer rate paces dialing
+    calls_placed INT NOT NULL DEFAULT 0,
+    calls_finished INT NOT NULL DEFAULT 0,
+    calls_answered INT NOT NULL DEFAULT 0,
+    -- Highest target position leased so far; leasing resumes from here after a restart
+    leased_offset INT NOT NULL DEFAULT -1,
+    started_at TIMESTAMP NULL,
+    finished_at TIMESTAMP NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE KEY unique_campaign_key (campaign_key),
+    INDEX idx_status (status),
+    INDEX idx_user_id (user_id)
+);
+
+-- Numbers to call in a campaign, leased in batches by the scheduler
+CREATE TABLE IF NOT EXISTS campaign_targets (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    campaign_id INT NOT NULL,
+    position INT NOT NULL,
+    phone_number VARCHAR(20) NOT NULL,
+    timezone VARCHAR(64) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INT NOT NULL DEFAULT 0,
+    call_sid VARCHAR(64) NULL,
+    outcome VARCHAR(20) NULL,
+    answered BOOLEAN NOT NULL DEFAULT FALSE,
+    lease_owner CHAR(32) NULL,
+    leased_until TIMESTAMP NULL,
+    next_attempt_at TIMESTAMP NULL,
+    dialed_at TIMESTAMP NULL,
+    finished_at TIMESTAMP NULL,
+    last_error TEXT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE KEY unique_campaign_position (campaign_id, position),
+    UNIQUE KEY unique_campaign_number (campaign_id, phone_number),
+    INDEX idx_campaign_status (campaign_id, status, position),
+    INDEX idx_call_sid (call_sid),
+    INDEX idx_campaign_dialed (campaign_id, dialed_at)
+);
@@ -0,0 +1,38 @@
+-- Per-user Google Drive sync state: the Changes API page token to resume from
+CREATE TABLE IF NOT EXISTS drive_sync_state (
+    user_id INT PRIMARY KEY,
+    supabase_table VARCHAR(255) NOT NULL,
+    chunk_size INT NOT NULL DEFAULT 256,
+    chunk_overlap INT NOT NULL DEFAULT 32,
+    enabled BOOLEAN NOT NULL DEFAULT TRUE,
+    page_token VARCHAR(255) NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'idle',
+    sync_owner VARCHAR(64) NULL,
+    last_error TEXT NULL,
+    changes_seen INT NOT NULL DEFAULT 0,
+    jobs_queued INT NOT NULL DEFAULT 0,
+    documents_removed INT NOT NULL DEFAULT 0,
+    last_full_scan_at TIMESTAMP NULL,
+    last_synced_at TIMESTAMP NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_enabled (enabled)
+);
+
+-- Last seen and last ingested version of every synced Drive file
+CREATE TABLE IF NOT EXISTS drive_sync_files (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    file_id VARCHAR(255) NOT NULL,
+    name VARCHAR(255) NULL,
+    mime_type VARCHAR(255) NULL,
+    size BIGINT NULL,
+    md5_checksum CHAR(32) NULL,
+    modified_time VARCHAR(40) NULL,
+    removed BOOLEAN NOT NULL DEFAULT FALSE,
+    queued_version VARCHAR(64) NULL,
+    ingested_version VARCHAR(64) NULL,
+    last_job_id INT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE KEY unique_user_file (user_id, file_id)
+);
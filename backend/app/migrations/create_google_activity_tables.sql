@@ -0,0 +1,26 @@
+-- Calendar events created for users through the Google integration
+CREATE TABLE IF NOT EXISTS calendar_events (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    event_id VARCHAR(1024) NOT NULL,
+    title VARCHAR(255) NULL,
+    start_time DATETIME NOT NULL,
+    end_time DATETIME NOT NULL,
+    meet_link VARCHAR(255) NULL,
+    status VARCHAR(50) NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY unique_user_event (user_id, event_id(191)),
+    INDEX idx_start_time (start_time)
+);
+
+-- Emails sent for users through Gmail
+CREATE TABLE IF NOT EXISTS sent_emails (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    message_id VARCHAR(255) NOT NULL,
+    thread_id VARCHAR(255) NULL,
+    recipient VARCHAR(255) NOT NULL,
+    subject VARCHAR(998) NULL,
+    sent_at DATETIME NOT NULL,
+    INDEX idx_user_sent (user_id, sent_at)
+);
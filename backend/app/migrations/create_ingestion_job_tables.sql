@@ -0,0 +1,43 @@
+-- Create table for background document ingestion jobs
+CREATE TABLE IF NOT EXISTS ingestion_jobs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    job_key CHAR(32) NOT NULL,
+    user_id INT NOT NULL,
+    source VARCHAR(50) NOT NULL,
+    document_id VARCHAR(255) NULL,
+    filename VARCHAR(255) NULL,
+    supabase_table VARCHAR(255) NOT NULL,
+    chunk_size INT NOT NULL DEFAULT 256,
+    chunk_overlap INT NOT NULL DEFAULT 32,
+    size BIGINT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    stage VARCHAR(20) NOT NULL DEFAULT 'download',
+    chunk_count INT NULL,
+    total_batches INT NOT NULL DEFAULT 0,
+    completed_batches INT NOT NULL DEFAULT 0,
+    attempts INT NOT NULL DEFAULT 0,
+    error_message TEXT NULL,
+    worker_id VARCHAR(64) NULL,
+    heartbeat_at TIMESTAMP NULL,
+    started_at TIMESTAMP NULL,
+    finished_at TIMESTAMP NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE KEY unique_job_key (job_key),
+    INDEX idx_status (status),
+    INDEX idx_user_status (user_id, status)
+);
+
+-- Per-batch checkpoints so failed batches can be retried on their own
+CREATE TABLE IF NOT EXISTS ingestion_job_batches (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    job_id INT NOT NULL,
+    batch_index INT NOT NULL,
+    chunk_start INT NOT NULL,
+    chunk_end INT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INT NOT NULL DEFAULT 0,
+    error_message TEXT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE KEY unique_job_batch (job_id, batch_index)
+);
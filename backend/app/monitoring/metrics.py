@@ -33,6 +33,159 @@ call_duration_seconds = Histogram(
     'Call duration in seconds'
 )
 
+ingestion_queue_depth = Gauge(
+    'ingestion_queue_depth',
+    'Ingestion tasks waiting for a worker process'
+)
+
+ingestion_stage_duration_seconds = Histogram(
+    'ingestion_stage_duration_seconds',
+    'Duration of CPU-bound ingestion stages',
+    ['stage']
+)
+
+embedding_cache_hits_total = Counter(
+    'embedding_cache_hits_total',
+    'Chunks whose embedding was served from the embedding cache'
+)
+
+embedding_cache_misses_total = Counter(
+    'embedding_cache_misses_total',
+    'Chunks that had to be embedded by the model'
+)
+
+embedding_cache_bytes = Gauge(
+    'embedding_cache_bytes',
+    'Size of the vectors held in the embedding cache'
+)
+
+search_cache_hits_total = Counter(
+    'search_cache_hits_total',
+    'Knowledge base search cache hits',
+    ['cache']
+)
+
+vector_search_duration_seconds = Histogram(
+    'vector_search_duration_seconds',
+    'Duration of knowledge base vector searches',
+    ['backend']
+)
+
+search_cache_misses_total = Counter(
+    'search_cache_misses_total',
+    'Knowledge base search cache misses',
+    ['cache']
+)
+
+http_pool_clients = Gauge(
+    'http_pool_clients',
+    'Open clients in a shared HTTP client pool',
+    ['pool']
+)
+
+http_pool_clients_created_total = Counter(
+    'http_pool_clients_created_total',
+    'HTTP clients created by a shared client pool',
+    ['pool']
+)
+
+http_pool_clients_evicted_total = Counter(
+    'http_pool_clients_evicted_total',
+    'HTTP clients evicted from a shared client pool',
+    ['pool', 'reason']
+)
+
+http_pool_lookups_total = Counter(
+    'http_pool_lookups_total',
+    'Client lookups in a shared HTTP client pool',
+    ['pool', 'result']
+)
+
+drive_sync_changes_total = Counter(
+    'drive_sync_changes_total',
+    'Google Drive changes processed by the sync engine',
+    ['action']
+)
+
+drive_sync_duration_seconds = Histogram(
+    'drive_sync_duration_seconds',
+    'Duration of one Google Drive sync pass for a user',
+    ['mode']
+)
+
+google_api_request_duration_seconds = Histogram(
+    'google_api_request_duration_seconds',
+    'Google API call latency',
+    ['method']
+)
+
+google_api_errors_total = Counter(
+    'google_api_errors_total',
+    'Failed Google API calls',
+    ['method', 'status']
+)
+
+credential_cache_lookups_total = Counter(
+    'credential_cache_lookups_total',
+    'Service credential lookups served from or missed by the credential cache',
+    ['service', 'result']
+)
+
+service_health_up = Gauge(
+    'service_health_up',
+    'Whether the last health check of an external service succeeded',
+    ['service']
+)
+
+service_health_check_duration_seconds = Histogram(
+    'service_health_check_duration_seconds',
+    'Duration of one external service health check',
+    ['service']
+)
+
+dialer_calls_total = Counter(
+    'dialer_calls_total',
+    'Outbound calls handled by the bulk dialer',
+    ['result']
+)
+
+dialer_live_calls = Gauge(
+    'dialer_live_calls',
+    'Dialer calls currently ringing or in progress'
+)
+
+campaign_dial_budget = Gauge(
+    'campaign_dial_budget',
+    'Calls the campaign scheduler may place in its current tick'
+)
+
+campaign_targets_leased_total = Counter(
+    'campaign_targets_leased_total',
+    'Campaign targets leased by the scheduler for dialing'
+)
+
+twilio_request_duration_seconds = Histogram(
+    'twilio_request_duration_seconds',
+    'Twilio REST API request latency',
+    ['method', 'endpoint']
+)
+
+twilio_requests_total = Counter(
+    'twilio_requests_total',
+    'Twilio REST API requests by response status',
+    ['method', 'endpoint', 'status']
+)
+
+call_metrics_recomputed_hours_total = Counter(
+    'call_metrics_recomputed_hours_total',
+    'Hourly call metrics buckets recomputed from the calls table'
+)
+
+call_prices_reconciled_total = Counter(
+    'call_prices_reconciled_total',
+    'Call prices pulled from Twilio by the price reconciler'
+)
+
 class MetricsCollector:
     def __init__(self):
         self.start_time = time.time()
@@ -78,4 +231,4 @@ class MetricsCollector:
     def record_call_duration(self, duration: float):
         call_duration_seconds.observe(duration)
 
-metrics_collector = MetricsCollector()
+metrics_collector = MetricsCollector()
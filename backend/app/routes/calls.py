@@ -2,12 +2,16 @@ from fastapi import APIRouter, HTTPException, Request, Depends, Query
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
+import json
 from ..database import db  # Import the database connection
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
+from twilio.request_validator import RequestValidator
 from twilio.twiml.voice_response import VoiceResponse, Connect, Stream
 from ..middleware.auth import verify_token
 import logging
 from ..services.twilio_service import twilio_service
+from ..services.campaign_scheduler import campaign_scheduler
+from ..services.call_metrics import call_metrics
 from ..services.ultravox_service import ultravox_service
 from ..config import settings
 
@@ -36,6 +40,11 @@ class CallLog(BaseModel):
 class BulkCallRequest(BaseModel):
     phone_numbers: List[str]
     message_template: Optional[str] = None
+    # Defaults to TWILIO_PHONE_NUMBER
+    from_number: Optional[str] = None
+    ultravox_url: Optional[str] = None
+    # Stream per-call results as newline-delimited JSON
+    stream: bool = False
 
 class Client(BaseModel):
     id: Optional[int] = None
@@ -144,6 +153,7 @@ async def initiate_call(
                 )
                 
                 await db.execute(query, values)
+                call_metrics.mark_dirty(now)
                 logger.info(f"Call record saved to database with SID: {call_sid}")
                 
                 # Add confirmation to call_details
@@ -193,23 +203,50 @@ async def initiate_call(
 @router.post("/bulk")
 async def bulk_call_campaign(request: BulkCallRequest, user=Depends(verify_token)):
     """
-    Initiate bulk calls to multiple phone numbers
+    Initiate bulk calls to multiple phone numbers, concurrently within the dialer's
+    calls-per-second and live-call limits. With stream=true, results are streamed as
+    newline-delimited JSON while the calls are placed.
     """
-    results = []
-    for number in request.phone_numbers:
+    if not twilio_service.credentials_valid:
+        raise HTTPException(
+            status_code=503,
+            detail="Twilio service is not properly configured. Please check your Twilio credentials."
+        )
+    from_number = request.from_number or settings.twilio_phone_number
+    if not from_number:
+        raise HTTPException(status_code=400, detail="A 'from_number' or TWILIO_PHONE_NUMBER is required")
+    if request.ultravox_url and not ultravox_service.is_valid_url(request.ultravox_url):
+        raise HTTPException(status_code=400, detail="Invalid Ultravox URL format. Please use a valid Ultravox media URL.")
+
+    total = len(request.phone_numbers)
+    dial = twilio_service.dialer.dial(request.phone_numbers, from_number, request.ultravox_url)
+
+    async def progress():
+        completed, succeeded, batch = 0, 0, []
         try:
-            # Simulate or actually initiate call for each number
-            result = await initiate_call(number, "+1234567890")
-            results.append(result)
-        except Exception as e:
-            results.append({
-                "number": number, 
-                "status": "failed", 
-                "error": str(e)
-            })
+            async for result in dial:
+                completed += 1
+                succeeded += result["status"] == "success"
+                batch.append(result)
+                if len(batch) >= 50:
+                    await twilio_service.record_outbound_calls(batch, from_number)
+                    batch = []
+                yield {**result, "completed": completed, "succeeded": succeeded, "total": total}
+        finally:
+            await twilio_service.record_outbound_calls(batch, from_number)
+
+    if request.stream:
+        return StreamingResponse(
+            (json.dumps(result) + "\n" async for result in progress()),
+            media_type="application/x-ndjson"
+        )
+
+    results = [None] * total
+    async for result in progress():
+        results[result["index"]] = result
     
     return {
-        "total_numbers": len(request.phone_numbers),
+        "total_numbers": total,
         "results": results
     }
 
@@ -252,6 +289,23 @@ async def get_call_history(
         logger.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/metrics")
+async def get_call_metrics(
+    start_date: datetime,
+    end_date: datetime,
+    user=Depends(verify_token)
+):
+    """
+    Call count, duration and cost over a date range, from the hourly and daily call rollups.
+    """
+    if end_date <= start_date:
+        raise HTTPException(status_code=400, detail="end_date must be after start_date")
+    try:
+        return await twilio_service.get_call_metrics(start_date, end_date)
+    except Exception as e:
+        logger.error(f"Error fetching call metrics: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/clients")
 async def create_client(client: Client, user=Depends(verify_token)):
     """
@@ -343,6 +397,33 @@ async def get_call_details(call_sid: str, user=Depends(verify_token)):
         logger.error(f"Error fetching call details: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/status")
+async def call_status_callback(request: Request):
+    """
+    Twilio status callback for outbound calls (initiated, ringing, answered, completed)
+    """
+    form_data = await request.form()
+    twilio_params = dict(form_data)
+    # The callback moves campaign targets and frees live-call slots, so only Twilio may call it.
+    # Twilio signs the public URL it was given, not the one this process sees behind a proxy.
+    signature = request.headers.get('X-Twilio-Signature', '')
+    if not settings.twilio_auth_token or not RequestValidator(settings.twilio_auth_token).validate(
+        twilio_service.status_callback, twilio_params, signature
+    ):
+        logger.warning(f"Rejected status callback with an invalid Twilio signature for {twilio_params.get('CallSid')}")
+        raise HTTPException(status_code=403, detail="Invalid Twilio signature")
+    call_sid = twilio_params.get('CallSid')
+    if not call_sid:
+        raise HTTPException(status_code=400, detail="Missing CallSid parameter")
+    try:
+        await twilio_service.handle_status_callback(twilio_params)
+        await campaign_scheduler.record_call_status(call_sid, twilio_params.get('CallStatus'))
+        await call_metrics.touch_call(call_sid)
+    except Exception as e:
+        # Twilio does not retry status callbacks, so log and acknowledge
+        logger.error(f"Error handling status callback for {call_sid}: {str(e)}")
+    return Response(status_code=204)
+
 @router.post("/incoming-call")
 async def incoming_call(request: Request):
     """
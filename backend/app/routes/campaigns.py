@@ -0,0 +1,143 @@
+from fastapi import APIRouter, HTTPException, Depends
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import time
+from zoneinfo import ZoneInfo
+import logging
+from ..config import settings
+from ..middleware.auth import verify_token
+from ..services.call_dialer import E164_PATTERN
+from ..services.campaign_scheduler import campaign_scheduler
+from ..services.twilio_service import twilio_service
+from ..services.ultravox_service import ultravox_service
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+class CampaignTarget(BaseModel):
+    phone_number: str
+    # Defaults to the campaign's time zone
+    timezone: Optional[str] = None
+
+class CampaignCreateRequest(BaseModel):
+    name: str
+    phone_numbers: List[str] = []
+    targets: List[CampaignTarget] = []
+    # Defaults to TWILIO_PHONE_NUMBER
+    from_number: Optional[str] = None
+    ultravox_url: Optional[str] = None
+    # Calls are placed between window_start and window_end, local to each target
+    timezone: str = "UTC"
+    window_start: time = time(9, 0)
+    window_end: time = time(18, 0)
+    call_days: List[int] = [0, 1, 2, 3, 4]
+    max_attempts: int = 2
+    retry_delay_seconds: int = 3600
+    start: bool = False
+
+def _valid_zone(zone: str) -> bool:
+    try:
+        ZoneInfo(zone)
+        return True
+    except Exception:
+        return False
+
+async def _campaign_response(campaign: dict) -> dict:
+    return {**campaign, "progress": await campaign_scheduler.progress(campaign)}
+
+@router.post("")
+async def create_campaign(request: CampaignCreateRequest, user=Depends(verify_token)):
+    """
+    Create an outbound calling campaign, optionally starting it right away
+    """
+    from_number = request.from_number or settings.twilio_phone_number
+    if not from_number:
+        raise HTTPException(status_code=400, detail="A 'from_number' or TWILIO_PHONE_NUMBER is required")
+    if request.ultravox_url and not ultravox_service.is_valid_url(request.ultravox_url):
+        raise HTTPException(status_code=400, detail="Invalid Ultravox URL format. Please use a valid Ultravox media URL.")
+    if not _valid_zone(request.timezone):
+        raise HTTPException(status_code=400, detail=f"Unknown time zone: {request.timezone}")
+    if not request.call_days or any(day < 0 or day > 6 for day in request.call_days):
+        raise HTTPException(status_code=400, detail="call_days must be weekdays from 0 (Monday) to 6 (Sunday)")
+
+    targets, rejected, seen = [], [], set()
+    requested = [CampaignTarget(phone_number=number) for number in request.phone_numbers] + request.targets
+    for target in requested:
+        zone = target.timezone or request.timezone
+        if not E164_PATTERN.match(target.phone_number) or not _valid_zone(zone):
+            rejected.append(target.phone_number)
+        elif target.phone_number not in seen:
+            seen.add(target.phone_number)
+            targets.append((target.phone_number, zone))
+    if not targets:
+        raise HTTPException(status_code=400, detail="The campaign has no valid phone numbers")
+
+    try:
+        campaign = await campaign_scheduler.create_campaign(
+            user.get('id'),
+            request.name,
+            from_number,
+            targets,
+            ultravox_url=request.ultravox_url,
+            timezone_name=request.timezone,
+            window_start=request.window_start,
+            window_end=request.window_end,
+            call_days=request.call_days,
+            max_attempts=request.max_attempts,
+            retry_delay_seconds=request.retry_delay_seconds
+        )
+        if request.start:
+            await campaign_scheduler.set_status(user.get('id'), campaign['id'], 'running')
+            campaign = await campaign_scheduler.get_campaign(user.get('id'), campaign['id'])
+        return {**await _campaign_response(campaign), "rejected_numbers": rejected}
+    except Exception as e:
+        logger.error(f"Error creating campaign: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("")
+async def list_campaigns(user=Depends(verify_token)):
+    """
+    List the user's campaigns
+    """
+    return {"campaigns": await campaign_scheduler.list_campaigns(user.get('id'))}
+
+@router.get("/{campaign_id}")
+async def get_campaign(campaign_id: int, user=Depends(verify_token)):
+    """
+    A campaign with its progress: target counts, answer rate, throughput and ETA
+    """
+    campaign = await campaign_scheduler.get_campaign(user.get('id'), campaign_id)
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return await _campaign_response(campaign)
+
+async def _transition(campaign_id: int, status: str, user: dict) -> dict:
+    campaign = await campaign_scheduler.get_campaign(user.get('id'), campaign_id)
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    if not await campaign_scheduler.set_status(user.get('id'), campaign_id, status):
+        raise HTTPException(status_code=409, detail=f"Cannot change a {campaign['status']} campaign to {status}")
+    return await _campaign_response(await campaign_scheduler.get_campaign(user.get('id'), campaign_id))
+
+@router.post("/{campaign_id}/start")
+async def start_campaign(campaign_id: int, user=Depends(verify_token)):
+    """
+    Start a draft campaign or resume a paused one
+    """
+    if not twilio_service.credentials_valid:
+        raise HTTPException(
+            status_code=503,
+            detail="Twilio service is not properly configured. Please check your Twilio credentials."
+        )
+    return await _transition(campaign_id, 'running', user)
+
+@router.post("/{campaign_id}/pause")
+async def pause_campaign(campaign_id: int, user=Depends(verify_token)):
+    """
+    Stop placing new calls; calls already up are not affected
+    """
+    return await _transition(campaign_id, 'paused', user)
+
+@router.post("/{campaign_id}/cancel")
+async def cancel_campaign(campaign_id: int, user=Depends(verify_token)):
+    return await _transition(campaign_id, 'cancelled', user)
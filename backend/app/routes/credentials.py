@@ -2,6 +2,8 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Dict, Any
 from ..services.credential_validator import credential_validator
+from ..services.service_health import service_health
+import httpx
 import logging
 
 router = APIRouter()
@@ -14,8 +16,11 @@ class CredentialValidationRequest(BaseModel):
 @router.post("/validate")
 async def validate_credentials(request: CredentialValidationRequest):
     try:
-        encrypted_credentials = credential_validator.encrypt_credentials(request.credentials)
-        validation_result = credential_validator.validate_credentials(request.service, request.credentials)
+        encrypted_credentials = await credential_validator.encrypt_credentials_async(request.credentials)
+        async with httpx.AsyncClient() as client:
+            validation_result = await credential_validator.validate_credentials_async(
+                request.service, request.credentials, client
+            )
         if not validation_result['valid']:
             raise HTTPException(status_code=400, detail=validation_result['error'])
         return {
@@ -29,44 +34,28 @@ async def validate_credentials(request: CredentialValidationRequest):
 @router.post("/decrypt")
 async def decrypt_credentials(encrypted_credentials: Dict[str, Any]):
     try:
-        decrypted_credentials = credential_validator.decrypt_credentials(encrypted_credentials)
+        decrypted_credentials = await credential_validator.decrypt_credentials_async(encrypted_credentials)
         if decrypted_credentials is None:
             raise HTTPException(status_code=400, detail="Decryption failed")
         return decrypted_credentials
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Credential decryption error: {str(e)}")
         
+@router.get("/status")
+async def get_all_credential_statuses():
+    """
+    Cached health of every service, for the status grid in one request
+    """
+    return {"services": service_health.get_all()}
+
 @router.get("/status/{service_name}")
 async def get_credential_status(service_name: str):
     """
-    Check if credentials for a service are valid and the service is connected
+    Check if credentials for a service are valid and the service is connected.
+    Served from the background health prober's cache, never from a live check.
     """
     try:
-        # In a real implementation, you would check if the service is actually connected
-        # For example, by making a test API call to the service
-        
-        # This is a hardcoded list for dev/test environments
-        services_connected = {
-            "Twilio": True,
-            "Supabase": True,
-            "Google Calendar": True,
-            "Ultravox": True,
-            "SERP API": True,
-            "Airtable": True,
-            "Gmail": True,
-            "Google Drive": True
-        }
-        
-        is_connected = services_connected.get(service_name, False)
-        
-        # Return the status with more complete info the frontend expects
-        return {
-            "service": service_name,
-            "connected": is_connected,
-            "status": "configured" if is_connected else "not_configured",
-            "message": f"{service_name} is {'successfully configured' if is_connected else 'not configured'}",
-            "last_checked": "just now"
-        }
+        return service_health.get_status(service_name)
     except Exception as e:
         logger.error(f"Error checking status for {service_name}: {str(e)}")
         # Return a 200 with connected=false rather than an error
@@ -77,7 +66,7 @@ async def get_credential_status(service_name: str):
             "status": "error",
             "message": f"Error checking {service_name} connection",
             "error": str(e),
-            "last_checked": "just now"
+            "last_checked": None
         }
 
 @router.get("/api/status/{service_name}")
@@ -2,6 +2,11 @@
 
 from fastapi import APIRouter, HTTPException
 from ..database import db
+from ..services.embedding_models import model_registry
+from ..services.credential_cache import credential_cache
+from ..services.google_clients import google_client_factory
+from ..services.http_client_pool import supabase_client_pool
+from ..services.twilio_service import twilio_service
 from typing import Dict
 import logging
 
@@ -36,4 +41,23 @@ async def health_check() -> Dict:
     if health_status["status"] != "healthy":
         raise HTTPException(status_code=503, detail=health_status)
 
-    return health_status
+    return health_status
+
+@router.get("/models")
+async def model_status() -> Dict:
+    """
+    Load state and memory accounting for the shared embedding model
+    """
+    return model_registry.stats()
+
+@router.get("/clients")
+async def client_status() -> Dict:
+    """
+    Cached Google API clients, pooled Supabase and Twilio HTTP connections and cached service credentials
+    """
+    return {
+        "google": google_client_factory.stats(),
+        "supabase": supabase_client_pool.stats(),
+        "twilio": twilio_service.http_client.stats(),
+        "credentials": credential_cache.stats()
+    }
@@ -3,8 +3,10 @@ from typing import List
 import os
 import logging
 from ..services.google_drive_service import GoogleDriveService
-from ..services.supabase_service import SupabaseService
-from ..services.vectorization_service import VectorizationService
+from ..middleware.auth import verify_token
+from ..services.ingestion_jobs import get_service_credentials
+from ..services.supabase_service import SupabaseService, get_supabase_service
+from ..services.vectorization_service import VectorizationService, get_vectorization_service
 
 router = APIRouter()
 
@@ -62,7 +64,7 @@ async def list_drive_files(
 @router.post("/upload")
 async def upload_file(
     file: UploadFile = File(...),
-    vectorization_service: VectorizationService = Depends(VectorizationService)
+    vectorization_service: VectorizationService = Depends(get_vectorization_service)
 ):
     try:
         # Create uploads directory if it doesn't exist
@@ -89,11 +91,17 @@ async def upload_file(
 
 @router.get("/supabase/tables")
 async def list_supabase_tables(
-    supabase_service: SupabaseService = Depends(SupabaseService)
+    user=Depends(verify_token),
+    supabase_service: SupabaseService = Depends(get_supabase_service)
 ):
     try:
-        tables = supabase_service.list_tables()
+        credentials = await get_service_credentials(user.get('id'), 'Supabase')
+        if not credentials:
+            raise HTTPException(status_code=400, detail="Supabase is not connected")
+        tables = await supabase_service.list_tables(credentials)
         return {"tables": tables}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to list Supabase tables: {e}")
         raise HTTPException(status_code=500, detail="Failed to retrieve Supabase tables")
@@ -102,8 +110,8 @@ async def list_supabase_tables(
 async def vectorize_documents(
     files: List[str], 
     supabase_table: str,
-    vectorization_service: VectorizationService = Depends(VectorizationService),
-    supabase_service: SupabaseService = Depends(SupabaseService)
+    vectorization_service: VectorizationService = Depends(get_vectorization_service),
+    supabase_service: SupabaseService = Depends(get_supabase_service)
 ):
     try:
         vectorization_results = []
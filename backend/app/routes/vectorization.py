@@ -1,23 +1,23 @@
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
+import asyncio
 import logging
-import os
-import tempfile
+from ..config import settings
 from ..database import db
 from ..middleware.auth import verify_token
-from ..services.vectorization_service import VectorizationService
-from ..services.google_drive_service import GoogleDriveService
-from ..services.supabase_service import SupabaseService
+from ..services.vectorization_service import vectorization_service
+from ..services.ingestion_executor import ingestion_executor
+from ..services.ingestion_jobs import ingestion_job_queue, get_service_credentials
+from ..services.google_drive_service import google_drive_service
+from ..services.drive_sync import drive_sync_service
+from ..services.search_cache import search_cache
+from ..services.http_client_pool import supabase_client_pool
+from ..services.vector_index import get_search_backend, local_vector_index
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Initialize services
-vectorization_service = VectorizationService()
-google_drive_service = GoogleDriveService()
-supabase_service = SupabaseService()
-
 class DocumentMetadata(BaseModel):
     document_id: str
     title: str
@@ -30,20 +30,37 @@ class VectorizationRequest(BaseModel):
     document_id: str
     supabase_table: str
     embedding_model: Optional[str] = "default"
-    chunk_size: Optional[int] = 1000
-    chunk_overlap: Optional[int] = 200
+    # In model tokens; chunk_size is capped at the embedding model's input limit
+    chunk_size: Optional[int] = 256
+    chunk_overlap: Optional[int] = 32
+
+class BatchVectorizationRequest(BaseModel):
+    document_ids: List[str]
+    supabase_table: str
+    # In model tokens; chunk_size is capped at the embedding model's input limit
+    chunk_size: Optional[int] = 256
+    chunk_overlap: Optional[int] = 32
 
 class FileVectorizationRequest(BaseModel):
     supabase_table: str
     embedding_model: Optional[str] = "default"
-    chunk_size: Optional[int] = 1000
-    chunk_overlap: Optional[int] = 200
+    # In model tokens; chunk_size is capped at the embedding model's input limit
+    chunk_size: Optional[int] = 256
+    chunk_overlap: Optional[int] = 32
+
+class DriveSyncRequest(BaseModel):
+    supabase_table: str
+    # In model tokens, as for VectorizationRequest
+    chunk_size: Optional[int] = 256
+    chunk_overlap: Optional[int] = 32
 
 class VectorSearchRequest(BaseModel):
     query: str
     top_k: int = 5
     supabase_table: str
     similarity_threshold: Optional[float] = 0.7
+    # Combine vector and full-text search; defaults to SEARCH_HYBRID
+    use_hybrid_search: Optional[bool] = None
 
 @router.get("/documents")
 async def list_drive_documents(user=Depends(verify_token)):
@@ -52,17 +69,10 @@ async def list_drive_documents(user=Depends(verify_token)):
     """
     try:
         # Get user's credentials for Google Drive
-        credentials_query = """
-            SELECT credentials 
-            FROM service_credentials 
-            WHERE service = 'Google Drive' AND user_id = %s AND is_connected = TRUE
-        """
-        credentials_result = await db.execute(credentials_query, (user.get('id'),))
-        
-        if not credentials_result:
+        credentials = await get_service_credentials(user.get('id'), 'Google Drive')
+        if credentials is None:
             raise HTTPException(status_code=400, detail="Google Drive not connected for this user")
         
-        credentials = credentials_result[0].get('credentials')
         if not credentials:
             raise HTTPException(status_code=400, detail="Invalid Google Drive credentials")
         
@@ -74,190 +84,209 @@ async def list_drive_documents(user=Depends(verify_token)):
         logger.error(f"Error listing Google Drive documents: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/upload")
+@router.post("/drive/sync", status_code=202)
+async def start_drive_sync(request: DriveSyncRequest, user=Depends(verify_token)):
+    """
+    Keep a Supabase table in sync with the user's Google Drive and start a sync pass now
+    """
+    try:
+        if not await get_service_credentials(user.get('id'), 'Google Drive'):
+            raise HTTPException(status_code=400, detail="Google Drive not connected for this user")
+            
+        if not await get_service_credentials(user.get('id'), 'Supabase'):
+            raise HTTPException(status_code=400, detail="Supabase not connected for this user")
+        
+        await drive_sync_service.enable(
+            user.get('id'),
+            request.supabase_table,
+            request.chunk_size,
+            request.chunk_overlap
+        )
+        drive_sync_service.sync_in_background(user.get('id'))
+        return {"status": "syncing", "supabase_table": request.supabase_table}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error starting Google Drive sync: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/drive/sync")
+async def get_drive_sync_state(user=Depends(verify_token)):
+    """
+    Drive sync settings, status and counters
+    """
+    state = await drive_sync_service.get_state(user.get('id'))
+    if not state:
+        raise HTTPException(status_code=404, detail="Google Drive sync is not enabled")
+    state.pop('sync_owner', None)
+    return state
+
+@router.delete("/drive/sync")
+async def stop_drive_sync(user=Depends(verify_token)):
+    """
+    Stop syncing; documents already ingested are kept
+    """
+    await drive_sync_service.disable(user.get('id'))
+    return {"status": "disabled"}
+
+@router.post("/upload", status_code=202)
 async def upload_file_for_vectorization(
     file: UploadFile = File(...),
     supabase_table: str = None,
     user=Depends(verify_token)
 ):
     """
-    Upload a file and vectorize it
+    Upload a file and queue it for vectorization
     """
     if not supabase_table:
         raise HTTPException(status_code=400, detail="supabase_table is required")
         
     try:
-        # Create a temporary file to store the uploaded content
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            # Write the uploaded file content to the temporary file
-            content = await file.read()
-            temp_file.write(content)
-            temp_path = temp_file.name
-        
-        # Extract text from the file
-        try:
-            text_content = vectorization_service.extract_content(temp_path)
-        finally:
-            # Clean up the temporary file
-            os.unlink(temp_path)
-            
-        if not text_content:
-            raise HTTPException(status_code=400, detail="Failed to extract text from file")
-            
-        # Get chunks of text
-        chunks = await split_text_into_chunks(text_content, 1000, 200)
-        
-        # Get embeddings for each chunk
-        embeddings = [vectorization_service.vectorize(chunk) for chunk in chunks]
-        
-        # Store in Supabase
-        # Get user's Supabase credentials
-        supabase_query = """
-            SELECT credentials 
-            FROM service_credentials 
-            WHERE service = 'Supabase' AND user_id = %s AND is_connected = TRUE
-        """
-        supabase_result = await db.execute(supabase_query, (user.get('id'),))
-        
-        if not supabase_result:
+        # Fail fast if the job could never store its vectors
+        if not await get_service_credentials(user.get('id'), 'Supabase'):
             raise HTTPException(status_code=400, detail="Supabase not connected for this user")
-            
-        supabase_credentials = supabase_result[0].get('credentials')
         
-        # Store vectors in Supabase
-        result = await supabase_service.store_embeddings(
-            supabase_credentials,
+        job_id = await ingestion_job_queue.create_job(
+            user.get('id'),
+            "upload",
             supabase_table,
-            chunks,
-            embeddings,
-            {"filename": file.filename, "size": len(content)}
+            filename=file.filename
         )
         
-        # Log the vectorization in the database
-        log_query = """
-            INSERT INTO knowledge_base_documents 
-            (filename, source, user_id, supabase_table, size, chunk_count) 
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """
-        await db.execute(
-            log_query, 
-            (file.filename, "upload", user.get('id'), supabase_table, len(content), len(chunks))
-        )
+        # Stage the upload for the workers in 1 MB pieces rather than holding it in memory
+        try:
+            size = 0
+            with open(ingestion_job_queue.staging_path(job_id, "source"), 'wb') as staged_file:
+                while True:
+                    piece = await file.read(1024 * 1024)
+                    if not piece:
+                        break
+                    staged_file.write(piece)
+                    size += len(piece)
+            
+            await db.execute("UPDATE ingestion_jobs SET size = %s WHERE id = %s", (size, job_id))
+        except BaseException as e:
+            await asyncio.shield(ingestion_job_queue.fail_staging(job_id, f"Upload could not be staged: {str(e) or type(e).__name__}"))
+            raise
+        await ingestion_job_queue.enqueue(job_id)
         
         return {
-            "status": "vectorization_complete",
+            "status": "queued",
+            "job_id": job_id,
             "filename": file.filename,
-            "vector_count": len(chunks),
             "supabase_table": supabase_table
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error vectorizing uploaded file: {str(e)}")
+        logger.error(f"Error queueing uploaded file for vectorization: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/vectorize")
+@router.post("/vectorize", status_code=202)
 async def vectorize_document(request: VectorizationRequest, user=Depends(verify_token)):
     """
-    Vectorize a document and store in Supabase
+    Queue a Google Drive document for vectorization into Supabase
     """
     try:
-        # Get user's credentials for Google Drive
-        google_drive_query = """
-            SELECT credentials 
-            FROM service_credentials 
-            WHERE service = 'Google Drive' AND user_id = %s AND is_connected = TRUE
-        """
-        google_drive_result = await db.execute(google_drive_query, (user.get('id'),))
-        
-        if not google_drive_result:
+        if not await get_service_credentials(user.get('id'), 'Google Drive'):
             raise HTTPException(status_code=400, detail="Google Drive not connected for this user")
             
-        google_drive_credentials = google_drive_result[0].get('credentials')
-        
-        # Get user's Supabase credentials
-        supabase_query = """
-            SELECT credentials 
-            FROM service_credentials 
-            WHERE service = 'Supabase' AND user_id = %s AND is_connected = TRUE
-        """
-        supabase_result = await db.execute(supabase_query, (user.get('id'),))
-        
-        if not supabase_result:
+        if not await get_service_credentials(user.get('id'), 'Supabase'):
             raise HTTPException(status_code=400, detail="Supabase not connected for this user")
-            
-        supabase_credentials = supabase_result[0].get('credentials')
         
-        # Download the document from Google Drive
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            document_metadata = await google_drive_service.download_document(
-                google_drive_credentials, 
-                request.document_id,
-                temp_file.name
-            )
-            temp_path = temp_file.name
+        job_id = await ingestion_job_queue.create_job(
+            user.get('id'),
+            "google_drive",
+            request.supabase_table,
+            document_id=request.document_id,
+            chunk_size=request.chunk_size,
+            chunk_overlap=request.chunk_overlap
+        )
+        await ingestion_job_queue.enqueue(job_id)
         
-        try:
-            # Extract text from document
-            text_content = vectorization_service.extract_content(temp_path)
-            
-            if not text_content:
-                raise HTTPException(status_code=400, detail="Failed to extract text from document")
+        return {
+            "status": "queued",
+            "job_id": job_id,
+            "document_id": request.document_id,
+            "supabase_table": request.supabase_table
+        }
                 
-            # Split text into chunks
-            chunks = await split_text_into_chunks(
-                text_content, 
-                request.chunk_size, 
-                request.chunk_overlap
-            )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error queueing document for vectorization: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/vectorize/batch", status_code=202)
+async def vectorize_documents(request: BatchVectorizationRequest, user=Depends(verify_token)):
+    """
+    Queue several Google Drive documents; they are downloaded concurrently while
+    earlier documents are already being embedded
+    """
+    try:
+        if not request.document_ids:
+            raise HTTPException(status_code=400, detail="document_ids is required")
             
-            # Get embeddings for each chunk
-            embeddings = [vectorization_service.vectorize(chunk) for chunk in chunks]
+        if not await get_service_credentials(user.get('id'), 'Google Drive'):
+            raise HTTPException(status_code=400, detail="Google Drive not connected for this user")
             
-            # Store in Supabase
-            result = await supabase_service.store_embeddings(
-                supabase_credentials,
+        if not await get_service_credentials(user.get('id'), 'Supabase'):
+            raise HTTPException(status_code=400, detail="Supabase not connected for this user")
+        
+        jobs = {}
+        for document_id in dict.fromkeys(request.document_ids):
+            job_id = await ingestion_job_queue.create_job(
+                user.get('id'),
+                "google_drive",
                 request.supabase_table,
-                chunks,
-                embeddings,
-                {"document_id": request.document_id, "title": document_metadata.get("title")}
-            )
-            
-            # Log the vectorization in the database
-            log_query = """
-                INSERT INTO knowledge_base_documents 
-                (document_id, filename, source, user_id, supabase_table, size, chunk_count) 
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """
-            await db.execute(
-                log_query, 
-                (
-                    request.document_id, 
-                    document_metadata.get("title"), 
-                    "google_drive", 
-                    user.get('id'), 
-                    request.supabase_table, 
-                    document_metadata.get("size"), 
-                    len(chunks)
-                )
+                document_id=document_id,
+                chunk_size=request.chunk_size,
+                chunk_overlap=request.chunk_overlap
             )
-            
-            return {
-                "status": "vectorization_complete",
-                "document_id": request.document_id,
-                "title": document_metadata.get("title"),
-                "vector_count": len(chunks),
-                "supabase_table": request.supabase_table
-            }
-            
-        finally:
-            # Clean up the temporary file
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+            jobs[job_id] = document_id
+        # Jobs are queued one by one as their documents finish downloading
+        ingestion_job_queue.prefetch_drive_documents(user.get('id'), jobs)
+        
+        return {
+            "status": "queued",
+            "jobs": [{"job_id": job_id, "document_id": document_id} for job_id, document_id in jobs.items()],
+            "supabase_table": request.supabase_table
+        }
                 
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error vectorizing document: {str(e)}")
+        logger.error(f"Error queueing documents for vectorization: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/jobs")
+async def list_ingestion_jobs(limit: int = 20, user=Depends(verify_token)):
+    """
+    List the user's most recent ingestion jobs
+    """
+    return {"jobs": await ingestion_job_queue.list_jobs(user.get('id'), limit)}
+
+@router.get("/jobs/{job_id}")
+async def get_ingestion_job(job_id: int, user=Depends(verify_token)):
+    """
+    Progress of an ingestion job
+    """
+    progress = await ingestion_job_queue.get_progress(job_id, user.get('id'))
+    if not progress:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    return progress
+
+@router.post("/jobs/{job_id}/retry", status_code=202)
+async def retry_ingestion_job(job_id: int, user=Depends(verify_token)):
+    """
+    Retry a failed ingestion job; batches that were already stored are skipped
+    """
+    if not await ingestion_job_queue.retry_job(job_id, user.get('id')):
+        raise HTTPException(status_code=409, detail="Only failed jobs can be retried")
+    return {"status": "queued", "job_id": job_id}
+
 @router.post("/search")
 async def search_knowledge_base(request: VectorSearchRequest, user=Depends(verify_token)):
     """
@@ -265,28 +294,43 @@ async def search_knowledge_base(request: VectorSearchRequest, user=Depends(verif
     """
     try:
         # Get user's Supabase credentials
-        supabase_query = """
-            SELECT credentials 
-            FROM service_credentials 
-            WHERE service = 'Supabase' AND user_id = %s AND is_connected = TRUE
-        """
-        supabase_result = await db.execute(supabase_query, (user.get('id'),))
-        
-        if not supabase_result:
+        supabase_credentials = await get_service_credentials(user.get('id'), 'Supabase')
+        if not supabase_credentials:
             raise HTTPException(status_code=400, detail="Supabase not connected for this user")
-            
-        supabase_credentials = supabase_result[0].get('credentials')
         
-        # Generate embedding for the query
-        query_embedding = vectorization_service.vectorize(request.query)
+        use_hybrid_search = settings.search_hybrid if request.use_hybrid_search is None else request.use_hybrid_search
+        
+        async def embed_query():
+            # Generate embedding for the query off the event loop
+            return await asyncio.get_running_loop().run_in_executor(
+                None, vectorization_service.vectorize, request.query
+            )
         
-        # Search in Supabase
-        search_results = await supabase_service.search_embeddings(
-            supabase_credentials,
+        async def search():
+            query_embedding = await search_cache.get_query_embedding(
+                vectorization_service.configured_model_name,
+                request.query,
+                embed_query
+            )
+            return await get_search_backend().search_embeddings(
+                supabase_credentials,
+                request.supabase_table,
+                query_embedding,
+                request.top_k,
+                request.similarity_threshold,
+                use_hybrid_search=use_hybrid_search,
+                query_text=request.query
+            )
+        
+        # Repeated and concurrent identical searches are served from the cache
+        search_results = await search_cache.get_results(
+            user.get('id'),
             request.supabase_table,
-            query_embedding,
+            request.query,
             request.top_k,
-            request.similarity_threshold
+            request.similarity_threshold,
+            search,
+            use_hybrid_search=use_hybrid_search
         )
         
         return {
@@ -294,36 +338,26 @@ async def search_knowledge_base(request: VectorSearchRequest, user=Depends(verif
             "results": search_results
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error searching knowledge base: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-async def split_text_into_chunks(text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
+@router.get("/ingestion/stats")
+async def get_ingestion_stats(user=Depends(verify_token)):
     """
-    Split text into overlapping chunks for better embedding
+    Queue depth and per-stage timing of the ingestion executor
     """
-    if not text:
-        return []
-        
-    chunks = []
-    start = 0
-    text_length = len(text)
-    
-    while start < text_length:
-        end = min(start + chunk_size, text_length)
-        
-        # If we're not at the beginning, adjust the start to create overlap
-        if start > 0:
-            start = start - chunk_overlap
-            
-        # Extract the chunk and add to our list
-        chunk = text[start:end]
-        
-        # Don't add empty chunks
-        if chunk.strip():
-            chunks.append(chunk)
-            
-        # Move to the next chunk
-        start = end
-        
-    return chunks
+    return {
+        **ingestion_executor.stats(),
+        "search_cache": search_cache.stats(),
+        "supabase_client_pool": supabase_client_pool.stats()
+    }
+
+@router.get("/index/stats")
+async def get_vector_index_stats(user=Depends(verify_token)):
+    """
+    Size, IVF layout and sync state of the local vector indexes
+    """
+    return {"search_backend": settings.search_backend, **local_vector_index.stats()}
@@ -0,0 +1,194 @@
+# backend/app/services/call_dialer.py
+
+import asyncio
+import logging
+import re
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import aiohttp
+from ..monitoring.metrics import dialer_calls_total, dialer_live_calls
+from .twilio_http import TwilioRequestTimeout
+
+logger = logging.getLogger(__name__)
+
+E164_PATTERN = re.compile(r'^\+[1-9]\d{6,14}$')
+
+# Twilio call statuses after which the call no longer holds a line
+TERMINAL_CALL_STATUSES = {'completed', 'busy', 'failed', 'no-answer', 'canceled'}
+
+# Failures raised before the request reached Twilio
+_UNSENT_ERRORS = (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError, ConnectionRefusedError)
+
+def is_retryable_call_error(error: Exception) -> bool:
+    """
+    Only retry when Twilio cannot have created the call: a 429, or a request that
+    never got through. Creating a call is not idempotent, so a 5xx, a read timeout
+    or a dropped connection after sending may already have the person's phone ringing.
+    """
+    status = getattr(error, 'status', None)
+    if isinstance(status, int):
+        return status == 429
+    if isinstance(error, TwilioRequestTimeout):
+        return not error.request_sent
+    return isinstance(error, _UNSENT_ERRORS)
+
+class TokenBucket:
+    """Lets through `rate` acquisitions per second on average, with bursts of up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # The lock queues waiters in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class LiveCallLimiter:
+    """
+    Caps the calls that are ringing or in progress. A slot is taken before a call
+    is placed and given back when Twilio reports the call finished, or after
+    max_call_seconds if that status callback never arrives.
+    """
+
+    def __init__(self, max_live: int, max_call_seconds: float):
+        self.max_live = max_live
+        self.max_call_seconds = max_call_seconds
+        self._slots = asyncio.Semaphore(max_live)
+        self._live: Dict[str, asyncio.TimerHandle] = {}
+
+    @property
+    def live(self) -> int:
+        return len(self._live)
+
+    async def acquire(self):
+        await self._slots.acquire()
+
+    def cancel(self):
+        """Give back a slot whose call was never placed"""
+        self._slots.release()
+
+    def bind(self, call_sid: str):
+        """Hold the slot until the call with this SID finishes"""
+        handle = asyncio.get_running_loop().call_later(self.max_call_seconds, self.finish, call_sid)
+        self._live[call_sid] = handle
+        dialer_live_calls.set(len(self._live))
+
+    def finish(self, call_sid: str):
+        handle = self._live.pop(call_sid, None)
+        if handle is None:
+            return
+        handle.cancel()
+        self._slots.release()
+        dialer_live_calls.set(len(self._live))
+
+class CallDialer:
+    """
+    Places many outbound calls concurrently. Calls start no faster than the
+    account's calls-per-second limit, no more than max_live calls are up at
+    once, and calls rejected for rate limits or server errors are retried with
+    backoff. Results are yielded as calls are placed, so callers can stream progress.
+    """
+
+    def __init__(
+        self,
+        place_call: Callable[[str, str, Optional[str]], Awaitable[Dict[str, Any]]],
+        calls_per_second: float,
+        max_live: int,
+        workers: int,
+        max_attempts: int,
+        retry_delay: float,
+        max_call_seconds: float,
+        is_retryable: Callable[[Exception], bool] = is_retryable_call_error
+    ):
+        self.place_call = place_call
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.is_retryable = is_retryable
+        # Shared by every campaign: the limits are per Twilio account
+        self.bucket = TokenBucket(calls_per_second)
+        self.live_calls = LiveCallLimiter(max_live, max_call_seconds)
+
+    async def dial(
+        self,
+        numbers: List[str],
+        from_number: str,
+        ultravox_url: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield one result per number, in completion order; each carries its index in numbers"""
+        results: asyncio.Queue = asyncio.Queue()
+        pending: asyncio.Queue = asyncio.Queue()
+        seen = set()
+        for index, number in enumerate(numbers):
+            if not E164_PATTERN.match(number or ''):
+                results.put_nowait(self._result(index, number, "failed", 0, error="Not an E.164 phone number"))
+            elif number in seen:
+                results.put_nowait(self._result(index, number, "skipped", 0, error="Duplicate number"))
+            else:
+                seen.add(number)
+                pending.put_nowait((index, number, 1))
+
+        loop = asyncio.get_running_loop()
+
+        async def worker():
+            while True:
+                index, number, attempt = await pending.get()
+                result = await self._attempt(index, number, attempt, from_number, ultravox_url)
+                if result is None:
+                    delay = self.retry_delay * 2 ** (attempt - 1)
+                    loop.call_later(delay, pending.put_nowait, (index, number, attempt + 1))
+                else:
+                    results.put_nowait(result)
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.workers, len(seen)))]
+        try:
+            for _ in range(len(numbers)):
+                result = await results.get()
+                dialer_calls_total.labels(result=result["status"]).inc()
+                yield result
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _attempt(
+        self,
+        index: int,
+        number: str,
+        attempt: int,
+        from_number: str,
+        ultravox_url: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        """Place one call; None means it should be retried later"""
+        await self.live_calls.acquire()
+        try:
+            await self.bucket.acquire()
+            call = await self.place_call(number, from_number, ultravox_url)
+        except asyncio.CancelledError:
+            self.live_calls.cancel()
+            raise
+        except Exception as e:
+            self.live_calls.cancel()
+            if attempt < self.max_attempts and self.is_retryable(e):
+                logger.warning(f"Retrying call to {number} after attempt {attempt}: {str(e)}")
+                dialer_calls_total.labels(result="retried").inc()
+                return None
+            return self._result(index, number, "failed", attempt, error=str(e))
+
+        self.live_calls.bind(call["call_sid"])
+        return self._result(index, number, "success", attempt, call_sid=call["call_sid"], call_status=call.get("call_status"))
+
+    @staticmethod
+    def _result(index: int, number: str, status: str, attempts: int, **fields) -> Dict[str, Any]:
+        return {"index": index, "number": number, "status": status, "attempts": attempts, **fields}
@@ -0,0 +1,276 @@
+# backend/app/services/call_metrics.py
+
+import asyncio
+import logging
+from datetime import datetime, time as dt_time, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from ..config import settings
+from ..database import db
+from ..monitoring.metrics import call_metrics_recomputed_hours_total, call_prices_reconciled_total
+
+logger = logging.getLogger(__name__)
+
+HOUR = timedelta(hours=1)
+
+_ROLLUP_COLUMNS = "total_calls, completed_calls, total_duration, total_cost, priced_calls"
+
+def _naive(value: datetime) -> datetime:
+    # Call start times are stored without a time zone
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def hour_floor(value: datetime) -> datetime:
+    return _naive(value).replace(minute=0, second=0, microsecond=0)
+
+def hour_ceil(value: datetime) -> datetime:
+    floor = hour_floor(value)
+    return floor if floor == _naive(value) else floor + HOUR
+
+def bucket_ranges(start: datetime, end: datetime) -> List[Tuple[str, Any, Any]]:
+    """
+    Split [start, end) into (table, from, to) ranges: whole days from the daily
+    rollup and the partial days at either end from the hourly one. The range is
+    widened to whole hours.
+    """
+    start, end = hour_floor(start), hour_ceil(end)
+    if start >= end:
+        return []
+    first_midnight = datetime.combine((start + timedelta(hours=23)).date(), dt_time.min)
+    last_midnight = datetime.combine(end.date(), dt_time.min)
+    if first_midnight >= last_midnight:
+        return [('call_metrics_hourly', start, end)]
+    ranges = []
+    if start < first_midnight:
+        ranges.append(('call_metrics_hourly', start, first_midnight))
+    ranges.append(('call_metrics_daily', first_midnight.date(), last_midnight.date()))
+    if last_midnight < end:
+        ranges.append(('call_metrics_hourly', last_midnight, end))
+    return ranges
+
+def contiguous_runs(hours: List[datetime]) -> List[Tuple[datetime, datetime]]:
+    """Group hour buckets into [start, end) runs of consecutive hours"""
+    runs: List[Tuple[datetime, datetime]] = []
+    for hour in sorted(set(hours)):
+        if runs and runs[-1][1] == hour:
+            runs[-1] = (runs[-1][0], hour + HOUR)
+        else:
+            runs.append((hour, hour + HOUR))
+    return runs
+
+class CallMetricsService:
+    """
+    Call metrics from hourly and daily rollups of the calls table, so a query
+    reads one row per bucket instead of every call and never calls Twilio.
+    Changes to calls mark their hour dirty; dirty hours are recomputed from the
+    calls table (delete and re-insert, so recomputing is idempotent) and their
+    days re-summed from the hourly rows. Recent days are rebuilt on startup to
+    cover changes a previous process did not flush, and the whole calls table is
+    backfilled when the rollups are still empty.
+    """
+
+    def __init__(self):
+        self.flush_seconds = settings.call_metrics_flush_seconds
+        self.rebuild_hours = settings.call_metrics_rebuild_hours
+        self.reconcile_interval = settings.call_price_reconcile_interval
+        self.reconcile_lookback = timedelta(hours=settings.call_price_reconcile_lookback_hours)
+        self._dirty: Set[datetime] = set()
+        self._lock = asyncio.Lock()
+        self._tasks: List[asyncio.Task] = []
+
+    # ----- Change tracking -----
+
+    def mark_dirty(self, start_time: Optional[datetime] = None):
+        """Mark the hour of a call's start time (now by default) for recomputation"""
+        self._dirty.add(hour_floor(start_time or datetime.now()))
+
+    async def touch_call(self, call_sid: str):
+        """Mark the hour of an existing call after its status, duration or cost changed"""
+        result = await db.execute("SELECT start_time FROM calls WHERE call_sid = %s LIMIT 1", (call_sid,))
+        if result and result[0]['start_time']:
+            self.mark_dirty(result[0]['start_time'])
+
+    async def flush(self):
+        """Recompute every dirty hour"""
+        async with self._lock:
+            if not self._dirty:
+                return
+            hours, self._dirty = list(self._dirty), set()
+            try:
+                for start, end in contiguous_runs(hours):
+                    await self.recompute(start, end)
+            except Exception:
+                # Try again on the next flush
+                self._dirty.update(hours)
+                raise
+
+    async def recompute(self, start: datetime, end: datetime):
+        """Rebuild the hourly buckets in [start, end) from the calls table, then their days"""
+        start, end = hour_floor(start), hour_ceil(end)
+        day_start = datetime.combine(start.date(), dt_time.min)
+        day_end = datetime.combine(end.date(), dt_time.min)
+        if day_end < end:
+            day_end += timedelta(days=1)
+        queries = [
+            {
+                'query': "DELETE FROM call_metrics_hourly WHERE bucket_start >= %s AND bucket_start < %s",
+                'params': (start, end)
+            },
+            {
+                'query': f"""
+                    INSERT INTO call_metrics_hourly (bucket_start, direction, {_ROLLUP_COLUMNS})
+                    SELECT TIMESTAMP(DATE(start_time), MAKETIME(HOUR(start_time), 0, 0)) AS bucket, direction,
+                           COUNT(*), SUM(status = 'completed'), COALESCE(SUM(duration), 0),
+                           COALESCE(SUM(cost), 0), COUNT(cost)
+                    FROM calls
+                    WHERE start_time >= %s AND start_time < %s
+                    GROUP BY bucket, direction
+                """,
+                'params': (start, end)
+            },
+            {
+                'query': "DELETE FROM call_metrics_daily WHERE bucket_date >= %s AND bucket_date < %s",
+                'params': (day_start.date(), day_end.date())
+            },
+            {
+                'query': f"""
+                    INSERT INTO call_metrics_daily (bucket_date, direction, {_ROLLUP_COLUMNS})
+                    SELECT DATE(bucket_start) AS bucket, direction,
+                           SUM(total_calls), SUM(completed_calls), SUM(total_duration),
+                           SUM(total_cost), SUM(priced_calls)
+                    FROM call_metrics_hourly
+                    WHERE bucket_start >= %s AND bucket_start < %s
+                    GROUP BY bucket, direction
+                """,
+                'params': (day_start, day_end)
+            }
+        ]
+        if not await db.execute_transaction(queries):
+            raise Exception(f"Failed to recompute call metrics from {start} to {end}")
+        call_metrics_recomputed_hours_total.inc(int((end - start) / HOUR))
+
+    # ----- Queries -----
+
+    async def get_metrics(self, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+        """Aggregated call metrics (count, duration, cost, etc.) over a date range, to the hour"""
+        await self.flush()
+        ranges = bucket_ranges(start_date, end_date)
+        totals = {'total_calls': 0, 'completed_calls': 0, 'total_duration': 0, 'total_cost': 0.0, 'priced_calls': 0}
+        if ranges:
+            column = {'call_metrics_hourly': 'bucket_start', 'call_metrics_daily': 'bucket_date'}
+            query = " UNION ALL ".join(
+                f"SELECT {_ROLLUP_COLUMNS} FROM {table} WHERE {column[table]} >= %s AND {column[table]} < %s"
+                for table, _, _ in ranges
+            )
+            result = await db.execute(
+                f"""
+                SELECT SUM(total_calls) AS total_calls, SUM(completed_calls) AS completed_calls,
+                       SUM(total_duration) AS total_duration, SUM(total_cost) AS total_cost,
+                       SUM(priced_calls) AS priced_calls
+                FROM ({query}) AS buckets
+                """,
+                [value for _, range_start, range_end in ranges for value in (range_start, range_end)]
+            )
+            if result:
+                for name, value in result[0].items():
+                    if value is not None:
+                        totals[name] = float(value) if name == 'total_cost' else int(value)
+
+        total_calls = totals['total_calls']
+        return {
+            "total_calls": total_calls,
+            "completed_calls": totals['completed_calls'],
+            "total_duration": totals['total_duration'],
+            "total_cost": round(totals['total_cost'], 4),
+            "priced_calls": totals['priced_calls'],
+            "average_duration": (totals['total_duration'] / total_calls) if total_calls > 0 else 0.0,
+            "average_cost": (totals['total_cost'] / totals['priced_calls']) if totals['priced_calls'] > 0 else 0.0
+        }
+
+    # ----- Price reconciliation -----
+
+    async def reconcile_prices(self, fetch_prices: Callable[[datetime], Awaitable[List[Tuple[str, float]]]]):
+        """Store the prices Twilio has set since the lookback window on calls that have none yet"""
+        since = datetime.now() - self.reconcile_lookback
+        prices = await fetch_prices(since)
+        updated = 0
+        for start in range(0, len(prices), 500):
+            chunk = prices[start:start + 500]
+            rows = " UNION ALL ".join(["SELECT %s AS call_sid, %s AS cost"] * len(chunk))
+            async with db.transaction() as cursor:
+                await cursor.execute(
+                    f"""
+                    UPDATE calls JOIN ({rows}) AS prices ON prices.call_sid = calls.call_sid
+                    SET calls.cost = prices.cost
+                    WHERE calls.cost IS NULL
+                    """,
+                    [value for price in chunk for value in price]
+                )
+                # Only calls that had no price yet count; the rest were reconciled earlier
+                updated += cursor.rowcount
+        if updated:
+            call_prices_reconciled_total.inc(updated)
+            await self.recompute(since, datetime.now() + HOUR)
+        logger.info(f"Reconciled {updated} Twilio call prices since {since}")
+
+    # ----- Background work -----
+
+    def start(self, fetch_prices: Optional[Callable[[datetime], Awaitable[List[Tuple[str, float]]]]] = None):
+        if self._tasks:
+            return
+        self._tasks.append(asyncio.create_task(self._flush_loop()))
+        if fetch_prices is not None:
+            self._tasks.append(asyncio.create_task(self._reconcile_loop(fetch_prices)))
+        logger.info(f"Call metrics rollups started (flush every {self.flush_seconds}s)")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Error flushing call metrics on shutdown: {str(e)}")
+
+    async def rebuild(self):
+        """
+        Roll up the whole calls table the first time, and the recent days afterwards.
+        Days are rebuilt whole, so no daily row is summed from a partial set of hours.
+        """
+        end = hour_floor(datetime.now()) + HOUR
+        if await db.execute("SELECT 1 FROM call_metrics_hourly LIMIT 1"):
+            start = datetime.now() - timedelta(hours=self.rebuild_hours)
+        else:
+            first = await db.execute("SELECT MIN(start_time) AS first_call FROM calls")
+            if not first or first[0]['first_call'] is None:
+                return
+            start = first[0]['first_call']
+            logger.info(f"Backfilling call metrics rollups from {start}")
+        day = datetime.combine(_naive(start).date(), dt_time.min)
+        # A week per transaction keeps backfills of large call tables from holding locks for long
+        while day < end:
+            await self.recompute(day, min(day + timedelta(days=7), end))
+            day += timedelta(days=7)
+
+    async def _flush_loop(self):
+        try:
+            await self.rebuild()
+        except Exception as e:
+            logger.error(f"Error rebuilding call metrics: {str(e)}")
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing call metrics: {str(e)}")
+
+    async def _reconcile_loop(self, fetch_prices: Callable[[datetime], Awaitable[List[Tuple[str, float]]]]):
+        while True:
+            try:
+                await self.reconcile_prices(fetch_prices)
+            except Exception as e:
+                logger.error(f"Error reconciling Twilio call prices: {str(e)}")
+            await asyncio.sleep(self.reconcile_interval)
+
+call_metrics = CallMetricsService()
@@ -0,0 +1,440 @@
+# backend/app/services/campaign_scheduler.py
+
+import asyncio
+import logging
+import math
+import uuid
+from datetime import datetime, time as dt_time, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+from ..config import settings
+from ..database import db
+from ..monitoring.metrics import campaign_dial_budget, campaign_targets_leased_total
+from .call_dialer import TERMINAL_CALL_STATUSES
+from .twilio_service import twilio_service
+from .ultravox_service import ultravox_service
+
+logger = logging.getLogger(__name__)
+
+# Final call statuses after which a target is worth another attempt
+RETRY_CALL_STATUSES = {'busy', 'no-answer', 'failed'}
+
+# Targets that still need work; a campaign with none of these left is complete
+OPEN_TARGET_STATUSES = ('pending', 'leased', 'dialing', 'answered')
+
+CAMPAIGN_TRANSITIONS = {
+    'running': {'draft', 'paused'},
+    'paused': {'running'},
+    'cancelled': {'draft', 'running', 'paused'}
+}
+
+def _as_time(value: Any) -> dt_time:
+    """TIME columns come back from aiomysql as timedeltas"""
+    if isinstance(value, timedelta):
+        return (datetime.min + value).time()
+    if isinstance(value, str):
+        return dt_time.fromisoformat(value)
+    return value
+
+def in_call_window(campaign: Dict[str, Any], zone: str, now: Optional[datetime] = None) -> bool:
+    """Whether it is currently a calling day and hour for a target in the given time zone"""
+    local = (now or datetime.now(timezone.utc)).astimezone(ZoneInfo(zone))
+    days = {int(day) for day in str(campaign['call_days']).split(',') if day.strip()}
+    start, end = _as_time(campaign['window_start']), _as_time(campaign['window_end'])
+    if local.weekday() not in days:
+        return False
+    if start <= end:
+        return start <= local.time() < end
+    # The window crosses midnight
+    return local.time() >= start or local.time() < end
+
+def dial_budget(free_agents: int, ringing: int, answer_rate: float, max_dial_ratio: float) -> int:
+    """
+    How many more calls to place so that, at the observed answer rate, the calls
+    expected to be answered fill the free agents: free_agents / answer_rate calls
+    should be ringing. The dial ratio is capped so a low answer rate cannot flood agents.
+    """
+    rate = max(answer_rate, 1 / max_dial_ratio)
+    return max(0, math.floor(free_agents / rate) - ringing)
+
+class CampaignScheduler:
+    """
+    Dials the targets of running campaigns. Each tick leases a batch of pending
+    targets that are inside their calling window, sized by free agent capacity (live
+    Ultravox sessions) and the campaign's answer rate, and places them through the
+    shared dialer. Leases expire, so targets leased by a crashed worker are dialed
+    again after a restart, in position order from where leasing left off.
+    """
+
+    def __init__(self):
+        self.tick_seconds = settings.campaign_tick_seconds
+        self.agent_capacity = settings.campaign_agent_capacity
+        self.max_dial_ratio = settings.campaign_max_dial_ratio
+        self.lease_seconds = settings.campaign_lease_seconds
+        self.lease_batch = settings.campaign_lease_batch
+        self.min_answer_samples = settings.campaign_answer_rate_min_samples
+        self.throughput_window = settings.campaign_throughput_window
+        self._task: Optional[asyncio.Task] = None
+        # campaign id -> dial batches running in this process
+        self._batches: Dict[int, Set[asyncio.Task]] = {}
+        # campaign id -> targets leased here and not placed yet
+        self._in_flight: Dict[int, int] = {}
+        self._zones: Dict[int, List[str]] = {}
+
+    # ----- Campaigns -----
+
+    async def create_campaign(
+        self,
+        user_id: int,
+        name: str,
+        from_number: str,
+        targets: List[Tuple[str, str]],
+        ultravox_url: Optional[str] = None,
+        timezone_name: str = 'UTC',
+        window_start: dt_time = dt_time(9, 0),
+        window_end: dt_time = dt_time(18, 0),
+        call_days: Optional[List[int]] = None,
+        max_attempts: int = 2,
+        retry_delay_seconds: int = 3600
+    ) -> Dict[str, Any]:
+        """Create a draft campaign; targets are (phone number, time zone) pairs, dialed in order"""
+        campaign_key = uuid.uuid4().hex
+        await db.execute(
+            """
+            INSERT INTO campaigns (
+                campaign_key, user_id, name, from_number, ultravox_url, timezone,
+                window_start, window_end, call_days, max_attempts, retry_delay_seconds, total_targets
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """,
+            (
+                campaign_key, user_id, name, from_number, ultravox_url, timezone_name,
+                window_start, window_end, ','.join(str(day) for day in (call_days or [0, 1, 2, 3, 4])),
+                max_attempts, retry_delay_seconds, len(targets)
+            )
+        )
+        campaign = (await db.execute("SELECT * FROM campaigns WHERE campaign_key = %s", (campaign_key,)))[0]
+
+        for start in range(0, len(targets), 1000):
+            rows = targets[start:start + 1000]
+            placeholders = ", ".join(["(%s, %s, %s, %s)"] * len(rows))
+            values = []
+            for position, (phone_number, zone) in enumerate(rows, start):
+                values.extend((campaign['id'], position, phone_number, zone))
+            await db.execute(
+                f"INSERT IGNORE INTO campaign_targets (campaign_id, position, phone_number, timezone) VALUES {placeholders}",
+                values
+            )
+        logger.info(f"Created campaign {campaign['id']} with {len(targets)} targets for user {user_id}")
+        return campaign
+
+    async def get_campaign(self, user_id: int, campaign_id: int) -> Optional[Dict[str, Any]]:
+        result = await db.execute(
+            "SELECT * FROM campaigns WHERE id = %s AND user_id = %s",
+            (campaign_id, user_id)
+        )
+        return result[0] if result else None
+
+    async def list_campaigns(self, user_id: int) -> List[Dict[str, Any]]:
+        return await db.execute(
+            "SELECT * FROM campaigns WHERE user_id = %s ORDER BY created_at DESC",
+            (user_id,)
+        )
+
+    async def set_status(self, user_id: int, campaign_id: int, status: str) -> bool:
+        """Start, resume, pause or cancel a campaign; False if the transition is not allowed"""
+        allowed = CAMPAIGN_TRANSITIONS.get(status)
+        if not allowed:
+            return False
+        placeholders = ", ".join(["%s"] * len(allowed))
+        await db.execute(
+            f"""
+            UPDATE campaigns
+            SET status = %s,
+                started_at = IF(%s = 'running' AND started_at IS NULL, NOW(), started_at),
+                finished_at = IF(%s = 'cancelled', NOW(), finished_at)
+            WHERE id = %s AND user_id = %s AND status IN ({placeholders})
+            """,
+            (status, status, status, campaign_id, user_id, *allowed)
+        )
+        campaign = await self.get_campaign(user_id, campaign_id)
+        return bool(campaign) and campaign['status'] == status
+
+    async def progress(self, campaign: Dict[str, Any]) -> Dict[str, Any]:
+        """Target counts, answer rate, recent throughput and the estimated time to finish"""
+        rows = await db.execute(
+            "SELECT status, COUNT(*) AS count FROM campaign_targets WHERE campaign_id = %s GROUP BY status",
+            (campaign['id'],)
+        )
+        counts = {row['status']: int(row['count']) for row in rows}
+        recent = await db.execute(
+            """
+            SELECT COUNT(*) AS count FROM campaign_targets
+            WHERE campaign_id = %s AND dialed_at >= NOW() - INTERVAL %s SECOND
+            """,
+            (campaign['id'], self.throughput_window)
+        )
+        per_second = int(recent[0]['count']) / self.throughput_window if recent else 0.0
+        remaining = counts.get('pending', 0) + counts.get('leased', 0)
+        total = sum(counts.values())
+        done = counts.get('completed', 0) + counts.get('failed', 0)
+        return {
+            "targets": counts,
+            "total": total,
+            "done": done,
+            "percent_complete": round(100 * done / total, 1) if total else 0.0,
+            "leased_offset": campaign['leased_offset'],
+            "calls_placed": campaign['calls_placed'],
+            "answer_rate": self._answer_rate(campaign),
+            "throughput_per_minute": round(per_second * 60, 2),
+            "eta_seconds": round(remaining / per_second) if per_second else None
+        }
+
+    def _answer_rate(self, campaign: Dict[str, Any]) -> float:
+        # Until enough calls finished, assume every call is answered: never over-dial on no data
+        if campaign['calls_finished'] < self.min_answer_samples:
+            return 1.0
+        return campaign['calls_answered'] / campaign['calls_finished']
+
+    # ----- Call status callbacks -----
+
+    async def record_call_status(self, call_sid: str, status: str):
+        """Move a campaign target along with its call; busy and unanswered targets are retried later"""
+        if status == 'in-progress':
+            await db.execute(
+                "UPDATE campaign_targets SET status = 'answered', answered = TRUE WHERE call_sid = %s AND status = 'dialing'",
+                (call_sid,)
+            )
+            return
+        if status not in TERMINAL_CALL_STATUSES:
+            return
+
+        result = await db.execute(
+            """
+            SELECT t.id, t.campaign_id, t.attempts, t.answered, c.max_attempts, c.retry_delay_seconds
+            FROM campaign_targets t JOIN campaigns c ON c.id = t.campaign_id
+            WHERE t.call_sid = %s AND t.status IN ('dialing', 'answered')
+            """,
+            (call_sid,)
+        )
+        if not result:
+            return
+        target = result[0]
+        answered = bool(target['answered']) or status == 'completed'
+        retry = status in RETRY_CALL_STATUSES and target['attempts'] < target['max_attempts']
+        next_status = 'pending' if retry else ('completed' if status == 'completed' else 'failed')
+
+        await db.execute(
+            """
+            UPDATE campaign_targets
+            SET status = %s, outcome = %s, answered = %s,
+                next_attempt_at = IF(%s, NOW() + INTERVAL %s SECOND, NULL),
+                finished_at = IF(%s, NULL, NOW())
+            WHERE id = %s AND status IN ('dialing', 'answered')
+            """,
+            (next_status, status, answered, retry, target['retry_delay_seconds'], retry, target['id'])
+        )
+        await db.execute(
+            "UPDATE campaigns SET calls_finished = calls_finished + 1, calls_answered = calls_answered + %s WHERE id = %s",
+            (1 if answered else 0, target['campaign_id'])
+        )
+
+    # ----- Scheduling -----
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._schedule_loop())
+            logger.info(f"Campaign scheduler started (every {self.tick_seconds}s)")
+
+    async def stop(self):
+        tasks = [task for task in (self._task, *self._all_batches()) if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+    def _all_batches(self) -> List[asyncio.Task]:
+        return [task for batches in self._batches.values() for task in batches]
+
+    async def _schedule_loop(self):
+        while True:
+            try:
+                await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Campaign scheduler error: {str(e)}")
+            await asyncio.sleep(self.tick_seconds)
+
+    async def tick(self):
+        """Lease and start dialing the next batch of every running campaign"""
+        campaigns = await db.execute("SELECT * FROM campaigns WHERE status = 'running' ORDER BY id")
+        running = {campaign['id'] for campaign in campaigns}
+        # Paused or cancelled campaigns stop dialing; their unplaced leases are released
+        for campaign_id in list(self._batches):
+            if campaign_id not in running:
+                for task in self._batches.pop(campaign_id):
+                    task.cancel()
+        if not campaigns or not twilio_service.credentials_valid:
+            return
+
+        ids = list(running)
+        placeholders = ", ".join(["%s"] * len(ids))
+        await db.execute(
+            f"""
+            UPDATE campaign_targets SET status = 'failed', outcome = 'unknown', finished_at = NOW()
+            WHERE campaign_id IN ({placeholders}) AND status IN ('dialing', 'answered')
+              AND dialed_at < NOW() - INTERVAL %s SECOND
+            """,
+            (*ids, int(settings.dialer_max_call_seconds))
+        )
+        load = await db.execute(
+            f"""
+            SELECT status, COUNT(*) AS count FROM campaign_targets
+            WHERE campaign_id IN ({placeholders}) AND status IN ('dialing', 'answered')
+            GROUP BY status
+            """,
+            ids
+        )
+        counts = {row['status']: int(row['count']) for row in load}
+        talking = max(ultravox_service.active_sessions, counts.get('answered', 0))
+        ringing = counts.get('dialing', 0) + sum(self._in_flight.values())
+        free_agents = self.agent_capacity - talking
+
+        for campaign in campaigns:
+            budget = min(
+                self.lease_batch,
+                dial_budget(free_agents, ringing, self._answer_rate(campaign), self.max_dial_ratio)
+            )
+            campaign_dial_budget.set(budget)
+            if budget <= 0:
+                continue
+            zones = [zone for zone in await self._campaign_zones(campaign['id']) if in_call_window(campaign, zone)]
+            if not zones:
+                continue
+            owner, targets = await self._lease(campaign, zones, budget)
+            if not targets:
+                if not self._batches.get(campaign['id']):
+                    await self._complete_if_done(campaign)
+                continue
+            ringing += len(targets)
+            task = asyncio.create_task(self._dial_batch(campaign, owner, targets))
+            batches = self._batches.setdefault(campaign['id'], set())
+            batches.add(task)
+            task.add_done_callback(batches.discard)
+
+    async def _campaign_zones(self, campaign_id: int) -> List[str]:
+        if campaign_id not in self._zones:
+            rows = await db.execute(
+                "SELECT DISTINCT timezone FROM campaign_targets WHERE campaign_id = %s",
+                (campaign_id,)
+            )
+            self._zones[campaign_id] = [row['timezone'] for row in rows]
+        return self._zones[campaign_id]
+
+    async def _lease(
+        self,
+        campaign: Dict[str, Any],
+        zones: List[str],
+        count: int
+    ) -> Tuple[str, List[Dict[str, Any]]]:
+        owner = uuid.uuid4().hex
+        placeholders = ", ".join(["%s"] * len(zones))
+        # Expired leases are targets of a worker that stopped before dialing them
+        await db.execute(
+            f"""
+            UPDATE campaign_targets
+            SET status = 'leased', lease_owner = %s, leased_until = NOW() + INTERVAL %s SECOND,
+                attempts = attempts + 1
+            WHERE campaign_id = %s AND timezone IN ({placeholders})
+              AND ((status = 'pending' AND (next_attempt_at IS NULL OR next_attempt_at <= NOW()))
+                   OR (status = 'leased' AND leased_until < NOW()))
+            ORDER BY position
+            LIMIT %s
+            """,
+            (owner, self.lease_seconds, campaign['id'], *zones, count)
+        )
+        targets = await db.execute(
+            """
+            SELECT id, position, phone_number, attempts FROM campaign_targets
+            WHERE lease_owner = %s AND status = 'leased'
+            ORDER BY position
+            """,
+            (owner,)
+        )
+        if targets:
+            await db.execute(
+                "UPDATE campaigns SET leased_offset = GREATEST(leased_offset, %s) WHERE id = %s",
+                (targets[-1]['position'], campaign['id'])
+            )
+            campaign_targets_leased_total.inc(len(targets))
+        return owner, targets
+
+    async def _dial_batch(self, campaign: Dict[str, Any], owner: str, targets: List[Dict[str, Any]]):
+        campaign_id = campaign['id']
+        self._in_flight[campaign_id] = self._in_flight.get(campaign_id, 0) + len(targets)
+        placed = 0
+        try:
+            dial = twilio_service.dialer.dial(
+                [target['phone_number'] for target in targets],
+                campaign['from_number'],
+                campaign['ultravox_url']
+            )
+            async for result in dial:
+                target = targets[result['index']]
+                placed += 1
+                self._in_flight[campaign_id] -= 1
+                if result['status'] == 'success':
+                    await db.execute(
+                        """
+                        UPDATE campaign_targets
+                        SET status = 'dialing', call_sid = %s, dialed_at = NOW(),
+                            lease_owner = NULL, leased_until = NULL, last_error = NULL
+                        WHERE id = %s AND lease_owner = %s
+                        """,
+                        (result['call_sid'], target['id'], owner)
+                    )
+                    await db.execute("UPDATE campaigns SET calls_placed = calls_placed + 1 WHERE id = %s", (campaign_id,))
+                    await twilio_service.record_outbound_calls([result], campaign['from_number'])
+                else:
+                    # The dialer already retried transient errors: the number was rejected
+                    await db.execute(
+                        """
+                        UPDATE campaign_targets
+                        SET status = 'failed', last_error = %s, finished_at = NOW(),
+                            lease_owner = NULL, leased_until = NULL
+                        WHERE id = %s AND lease_owner = %s
+                        """,
+                        (result.get('error'), target['id'], owner)
+                    )
+        except asyncio.CancelledError:
+            logger.info(f"Stopped dialing campaign {campaign_id}; releasing {len(targets) - placed} leased targets")
+            raise
+        except Exception as e:
+            logger.error(f"Error dialing campaign {campaign_id}: {str(e)}")
+        finally:
+            self._in_flight[campaign_id] -= len(targets) - placed
+            # Unplaced targets go back to the queue without using up an attempt
+            await asyncio.shield(db.execute(
+                """
+                UPDATE campaign_targets
+                SET status = 'pending', lease_owner = NULL, leased_until = NULL, attempts = attempts - 1
+                WHERE lease_owner = %s AND status = 'leased'
+                """,
+                (owner,)
+            ))
+
+    async def _complete_if_done(self, campaign: Dict[str, Any]):
+        placeholders = ", ".join(["%s"] * len(OPEN_TARGET_STATUSES))
+        open_targets = await db.execute(
+            f"SELECT id FROM campaign_targets WHERE campaign_id = %s AND status IN ({placeholders}) LIMIT 1",
+            (campaign['id'], *OPEN_TARGET_STATUSES)
+        )
+        if not open_targets:
+            await db.execute(
+                "UPDATE campaigns SET status = 'completed', finished_at = NOW() WHERE id = %s AND status = 'running'",
+                (campaign['id'],)
+            )
+            self._zones.pop(campaign['id'], None)
+            logger.info(f"Campaign {campaign['id']} completed")
+
+campaign_scheduler = CampaignScheduler()
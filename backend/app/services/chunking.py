@@ -0,0 +1,168 @@
+# backend/app/services/chunking.py
+
+import re
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+# Counts tokens for a list of texts in one call so tokenizers can batch
+TokenCounter = Callable[[List[str]], List[int]]
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+LINE_BREAK = re.compile(r"\n")
+SENTENCE_END = re.compile(r"(?<=[.!?;:…。！？])\s+")
+WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+def approximate_token_counter(texts: List[str]) -> List[int]:
+    """Word and punctuation count; a close lower bound for WordPiece tokenizers"""
+    return [len(WORD_PATTERN.findall(text)) for text in texts]
+
+def model_token_counter(tokenizer) -> TokenCounter:
+    """Token counter backed by a Hugging Face tokenizer, excluding special tokens"""
+    def count(texts: List[str]) -> List[int]:
+        encoded = tokenizer(
+            texts,
+            add_special_tokens=False,
+            return_attention_mask=False,
+            return_token_type_ids=False
+        )
+        return [len(ids) for ids in encoded["input_ids"]]
+    return count
+
+class TextChunker:
+    """
+    Streaming chunker that packs paragraphs, lines, sentences and, as a last
+    resort, words into chunks of at most max_tokens tokens. Text blocks are
+    consumed one at a time and chunks are yielded as soon as they are full, so
+    memory stays proportional to a single block rather than the whole document.
+    """
+
+    def __init__(self, max_tokens: int, overlap_tokens: int = 0, count_tokens: Optional[TokenCounter] = None):
+        if max_tokens <= 0:
+            raise ValueError("max_tokens must be positive")
+        self.max_tokens = max_tokens
+        # Overlap can never take up more than half a chunk
+        self.overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+        self.count_tokens = count_tokens or approximate_token_counter
+
+    def chunks(self, blocks: Iterable[str]) -> Iterator[str]:
+        """Yield chunks for an iterable of text blocks (pages, sheets, paragraphs...)"""
+        # Pending units as (separator, text, tokens)
+        current: List[Tuple[str, str, int]] = []
+        current_tokens = 0
+
+        for block in blocks:
+            if not block or not block.strip():
+                continue
+            for separator, text, tokens in self._units(block):
+                if current and current_tokens + tokens > self.max_tokens:
+                    yield self._join(current)
+                    current = self._overlap(current)
+                    current_tokens = sum(unit[2] for unit in current)
+                    # Drop the overlap if it would not leave room for the new unit
+                    while current and current_tokens + tokens > self.max_tokens:
+                        current_tokens -= current.pop(0)[2]
+
+                current.append((separator, text, tokens))
+                current_tokens += tokens
+
+        if current:
+            yield self._join(current)
+
+    def _units(self, block: str) -> Iterator[Tuple[str, str, int]]:
+        """Split a block into units that each fit in a chunk, coarsest boundary first"""
+        levels = ((PARAGRAPH_BREAK, "\n\n"), (LINE_BREAK, "\n"), (SENTENCE_END, " "))
+        yield from self._split(block.strip(), levels, "\n\n")
+
+    def _split(self, text: str, levels, separator: str) -> Iterator[Tuple[str, str, int]]:
+        pieces = [piece.strip() for piece in levels[0][0].split(text)] if levels else [text]
+        pieces = [piece for piece in pieces if piece]
+        if not pieces:
+            return
+        piece_separator = levels[0][1] if levels else separator
+
+        for i, (piece, tokens) in enumerate(zip(pieces, self.count_tokens(pieces))):
+            unit_separator = separator if i == 0 else piece_separator
+            if tokens <= self.max_tokens:
+                yield unit_separator, piece, tokens
+            elif len(levels) > 1:
+                yield from self._split(piece, levels[1:], unit_separator)
+            else:
+                yield from self._split_words(piece, unit_separator)
+
+    def _split_words(self, text: str, separator: str) -> Iterator[Tuple[str, str, int]]:
+        """
+        Pack words of an over-long sentence into pieces that leave room for the
+        overlap, so consecutive chunks can share words; a single huge word is left
+        to model truncation
+        """
+        words = text.split()
+        limit = self.max_tokens - self.overlap_tokens
+        pending: List[str] = []
+        pending_tokens = 0
+        for word, tokens in zip(words, self.count_tokens(words)):
+            if pending and pending_tokens + tokens > limit:
+                yield separator, " ".join(pending), pending_tokens
+                separator = " "
+                pending, pending_tokens = [], 0
+            pending.append(word)
+            pending_tokens += tokens
+        if pending:
+            yield separator, " ".join(pending), pending_tokens
+
+    def _overlap(self, units: List[Tuple[str, str, int]]) -> List[Tuple[str, str, int]]:
+        """
+        Trailing text of the previous chunk to repeat at the start of the next one:
+        whole units while they fit, then the last sentences or words of the unit
+        that does not
+        """
+        kept: List[Tuple[str, str, int]] = []
+        tokens = 0
+        for unit in reversed(units):
+            if tokens + unit[2] > self.overlap_tokens:
+                tail = self._tail(unit, self.overlap_tokens - tokens)
+                if tail:
+                    kept.insert(0, tail)
+                break
+            kept.insert(0, unit)
+            tokens += unit[2]
+        return kept
+
+    def _tail(self, unit: Tuple[str, str, int], budget: int) -> Optional[Tuple[str, str, int]]:
+        """The longest run of trailing sentences, or else words, of a unit within budget tokens"""
+        if budget <= 0:
+            return None
+        separator, text, _ = unit
+        for pieces in (SENTENCE_END.split(text), text.split()):
+            pieces = [piece.strip() for piece in pieces if piece.strip()]
+            if len(pieces) < 2:
+                continue
+            kept: List[str] = []
+            tokens = 0
+            for piece, count in zip(reversed(pieces), reversed(self.count_tokens(pieces))):
+                if tokens + count > budget:
+                    break
+                kept.insert(0, piece)
+                tokens += count
+            if kept:
+                return separator, " ".join(kept), tokens
+        return None
+
+    @staticmethod
+    def _join(units: List[Tuple[str, str, int]]) -> str:
+        parts = [units[0][1]]
+        for separator, text, _ in units[1:]:
+            parts.append(separator)
+            parts.append(text)
+        return "".join(parts)
+
+def split_text_into_chunks(
+    text: str,
+    max_tokens: int,
+    overlap_tokens: int = 0,
+    count_tokens: Optional[TokenCounter] = None
+) -> List[str]:
+    """
+    Split a single text into token-bounded chunks on paragraph and sentence boundaries
+    """
+    if not text:
+        return []
+    return list(TextChunker(max_tokens, overlap_tokens, count_tokens).chunks([text]))
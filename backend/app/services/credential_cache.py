@@ -0,0 +1,91 @@
+# backend/app/services/credential_cache.py
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from ..config import settings
+from ..monitoring.metrics import credential_cache_lookups_total
+from .search_cache import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+class CredentialCache:
+    """
+    Short-lived cache of parsed credentials per (user, service), so authenticated
+    hot paths skip the service_credentials query and its JSON parsing.
+    Concurrent misses for the same key share one load. Writers call invalidate;
+    every invalidation bumps the key's generation so a load that was already
+    running when the credentials changed is never cached.
+    Missing credentials are not cached: a service connected outside this
+    process must be seen on the next request.
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # (user_id, service) -> (expires at, value), least recently used first
+        self._entries: "OrderedDict[Tuple[Any, str], Tuple[float, Any]]" = OrderedDict()
+        self._generations: Dict[Tuple[Any, str], int] = {}
+        self._flights = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, user_id: Any, service: str, load: Callable[[], Awaitable[Optional[Any]]]) -> Optional[Any]:
+        key = (user_id, service)
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                credential_cache_lookups_total.labels(service=service, result="hit").inc()
+                return value
+            del self._entries[key]
+        self.misses += 1
+        credential_cache_lookups_total.labels(service=service, result="miss").inc()
+
+        generation = self._generations.get(key, 0)
+
+        async def fetch():
+            value = await load()
+            if value is not None and self._generations.get(key, 0) == generation:
+                self._set(key, value)
+            return value
+
+        flight_key: Hashable = (user_id, service, generation)
+        return await self._flights.do(flight_key, fetch)
+
+    def _set(self, key: Tuple[Any, str], value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: Any, service: str):
+        """Drop cached credentials after they were written, disconnected or revoked"""
+        key = (user_id, service)
+        self._entries.pop(key, None)
+        self._generations[key] = self._generations.get(key, 0) + 1
+        logger.debug(f"Invalidated cached {service} credentials of user {user_id}")
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self._flights.coalesced,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+credential_cache = CredentialCache(
+    max_entries=settings.credential_cache_size,
+    ttl=settings.credential_cache_ttl
+)
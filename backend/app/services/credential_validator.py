@@ -1,28 +1,70 @@
 import os
+import asyncio
 import base64
-from cryptography.fernet import Fernet
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+from cryptography.fernet import Fernet, MultiFernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import re
+import httpx
 import requests
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+def derive_encryption_key() -> bytes:
+    """Fernet key derived from SECRET_KEY and ENCRYPTION_SALT (100,000 PBKDF2 rounds, ~50ms of CPU)"""
+    salt = os.environ.get('ENCRYPTION_SALT', 'default_salt').encode()
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        iterations=100000
+    )
+    return base64.urlsafe_b64encode(kdf.derive(os.environ.get('SECRET_KEY', 'fallback_secret').encode()))
+
+def read_key_file(path: str) -> List[bytes]:
+    """Fernet keys from a key file: one per line, newest first; blank lines and # comments are skipped"""
+    if not os.path.exists(path):
+        raise Exception(f"Credential key file {path} not found")
+    with open(path) as key_file:
+        keys = [line.strip().encode() for line in key_file if line.strip() and not line.strip().startswith('#')]
+    if not keys:
+        raise Exception(f"Credential key file {path} has no keys")
+    return keys
 
 class CredentialValidator:
-    def __init__(self):
-        self.encryption_key = self._generate_encryption_key()
-
-    def _generate_encryption_key(self):
-        salt = os.environ.get('ENCRYPTION_SALT', 'default_salt').encode()
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(os.environ.get('SECRET_KEY', 'fallback_secret').encode()))
-        return key
+    def __init__(self, key_file: Optional[str] = None):
+        # Keys are loaded on first use, not at import time
+        self.key_file = key_file if key_file is not None else settings.credential_key_file
+        self._fernet: Optional[MultiFernet] = None
+        self._lock = threading.Lock()
+        # Services validated with a test request; each check returns the request to make, or a failed result
+        self._http_checks = {
+            'Supabase': self._supabase_check,
+            'SERP API': self._serp_api_check,
+            'Airtable': self._airtable_check
+        }
+
+    @property
+    def fernet(self) -> MultiFernet:
+        """
+        Encrypts with the first key and decrypts with any of them, so keys can be rotated
+        by putting a new key first in CREDENTIAL_KEY_FILE. Without a key file the key is
+        derived from SECRET_KEY once per process.
+        """
+        if self._fernet is None:
+            with self._lock:
+                if self._fernet is None:
+                    keys = read_key_file(self.key_file) if self.key_file else [derive_encryption_key()]
+                    self._fernet = MultiFernet([Fernet(key) for key in keys])
+                    logger.info(f"Loaded {len(keys)} credential encryption key(s)")
+        return self._fernet
 
     def encrypt_credentials(self, credentials):
-        f = Fernet(self.encryption_key)
+        f = self.fernet
         encrypted_creds = {}
         for key, value in credentials.items():
             if self._is_sensitive_field(key):
@@ -33,7 +75,7 @@ class CredentialValidator:
         return encrypted_creds
 
     def decrypt_credentials(self, encrypted_credentials):
-        f = Fernet(self.encryption_key)
+        f = self.fernet
         decrypted_creds = {}
         for key, value in encrypted_credentials.items():
             try:
@@ -43,21 +85,57 @@ class CredentialValidator:
                 else:
                     decrypted_creds[key] = value
             except Exception as e:
-                print(f"Decryption error for {key}: {e}")
+                logger.warning(f"Decryption error for {key}: {e}")
                 return None
         return decrypted_creds
 
+    def rotate_credentials(self, encrypted_credentials):
+        """Re-encrypt sensitive fields with the current primary key"""
+        f = self.fernet
+        rotated_creds = {}
+        for key, value in encrypted_credentials.items():
+            if self._is_sensitive_field(key):
+                rotated_creds[key] = f.rotate(str(value).encode()).decode()
+            else:
+                rotated_creds[key] = value
+        return rotated_creds
+
+    def encrypt_many(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [self.encrypt_credentials(record) for record in records]
+
+    def decrypt_many(self, records: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Decrypt many credential records; records that fail to decrypt come back as None"""
+        return [self.decrypt_credentials(record) for record in records]
+
+    def rotate_many(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [self.rotate_credentials(record) for record in records]
+
+    # Async variants run in the default executor: key derivation and bulk crypto stay off the event loop
+    async def encrypt_credentials_async(self, credentials: Dict[str, Any]) -> Dict[str, Any]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.encrypt_credentials, credentials)
+
+    async def decrypt_credentials_async(self, encrypted_credentials: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.decrypt_credentials, encrypted_credentials)
+
+    async def encrypt_many_async(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.encrypt_many, records)
+
+    async def decrypt_many_async(self, records: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.decrypt_many, records)
+
+    async def rotate_many_async(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.rotate_many, records)
+
     def _is_sensitive_field(self, field_name):
         sensitive_patterns = ['password', 'token', 'key', 'secret', 'auth', 'credentials', 'access_token']
         return any(pattern in field_name.lower() for pattern in sensitive_patterns)
 
     def validate_credentials(self, service, credentials):
+        if service in self._http_checks:
+            return self._validate_http(service, credentials)
         validation_methods = {
-            'Supabase': self._validate_supabase,
             'Twilio': self._validate_twilio,
             'Ultravox': self._validate_ultravox,
-            'SERP API': self._validate_serp_api,
-            'Airtable': self._validate_airtable,
             'Google Calendar': self._validate_google_calendar,
             'Gmail': self._validate_gmail,
             'Google Drive': self._validate_google_drive
@@ -67,21 +145,59 @@ class CredentialValidator:
             return {'valid': False, 'error': f'No validation method for {service}'}
         return validator(credentials)
 
-    def _validate_supabase(self, credentials):
+    async def validate_credentials_async(self, service, credentials, client: httpx.AsyncClient, timeout: float = 5):
+        """validate_credentials with non-blocking HTTP; format-only validators run inline"""
+        if service not in self._http_checks:
+            return self.validate_credentials(service, credentials)
         try:
-            if not credentials.get('url') or not credentials.get('apiKey'):
-                return {'valid': False, 'error': 'Missing Supabase URL or API Key'}
-            url_pattern = re.compile(r'^https://[a-zA-Z0-9-]+\.supabase\.co$')
-            if not url_pattern.match(credentials['url']):
-                return {'valid': False, 'error': 'Invalid Supabase URL format'}
-            response = requests.get(
-                f"{credentials['url']}/rest/v1/",
-                headers={'apikey': credentials['apiKey'], 'Authorization': f'Bearer {credentials["apiKey"]}'},
-                timeout=5
-            )
-            return {'valid': response.status_code == 200, 'error': None if response.status_code == 200 else 'Invalid Supabase credentials'}
+            check = self._http_checks[service](credentials)
+            if 'valid' in check:
+                return check
+            response = await client.get(check['url'], headers=check.get('headers'), params=check.get('params'), timeout=timeout)
+            return {'valid': response.status_code == 200, 'error': None if response.status_code == 200 else check['invalid']}
         except Exception as e:
-            return {'valid': False, 'error': f'Supabase validation error: {str(e)}'}
+            return {'valid': False, 'error': f'{service} validation error: {str(e)}'}
+
+    def _validate_http(self, service, credentials):
+        try:
+            check = self._http_checks[service](credentials)
+            if 'valid' in check:
+                return check
+            response = requests.get(check['url'], headers=check.get('headers'), params=check.get('params'), timeout=5)
+            return {'valid': response.status_code == 200, 'error': None if response.status_code == 200 else check['invalid']}
+        except Exception as e:
+            return {'valid': False, 'error': f'{service} validation error: {str(e)}'}
+
+    def _supabase_check(self, credentials):
+        if not credentials.get('url') or not credentials.get('apiKey'):
+            return {'valid': False, 'error': 'Missing Supabase URL or API Key'}
+        url_pattern = re.compile(r'^https://[a-zA-Z0-9-]+\.supabase\.co$')
+        if not url_pattern.match(credentials['url']):
+            return {'valid': False, 'error': 'Invalid Supabase URL format'}
+        return {
+            'url': f"{credentials['url']}/rest/v1/",
+            'headers': {'apikey': credentials['apiKey'], 'Authorization': f'Bearer {credentials["apiKey"]}'},
+            'invalid': 'Invalid Supabase credentials'
+        }
+
+    def _serp_api_check(self, credentials):
+        if not credentials.get('apiKey'):
+            return {'valid': False, 'error': 'Missing SERP API Key'}
+        # The account endpoint is free; a test search would be billed on every health probe
+        return {
+            'url': 'https://serpapi.com/account',
+            'params': {'api_key': credentials['apiKey']},
+            'invalid': 'Invalid SERP API Key'
+        }
+
+    def _airtable_check(self, credentials):
+        if not credentials.get('apiKey') or not credentials.get('baseId'):
+            return {'valid': False, 'error': 'Missing Airtable API Key or Base ID'}
+        return {
+            'url': f'https://api.airtable.com/v0/{credentials["baseId"]}',
+            'headers': {'Authorization': f'Bearer {credentials["apiKey"]}'},
+            'invalid': 'Invalid Airtable credentials'
+        }
 
     def _validate_twilio(self, credentials):
         try:
@@ -98,28 +214,6 @@ class CredentialValidator:
         except Exception as e:
             return {'valid': False, 'error': f'Twilio validation error: {str(e)}'}
 
-    def _validate_serp_api(self, credentials):
-        try:
-            if not credentials.get('apiKey'):
-                return {'valid': False, 'error': 'Missing SERP API Key'}
-            response = requests.get('https://serpapi.com/search',
-                                    params={'q': 'test', 'api_key': credentials['apiKey']},
-                                    timeout=5)
-            return {'valid': response.status_code == 200, 'error': None if response.status_code == 200 else 'Invalid SERP API Key'}
-        except Exception as e:
-            return {'valid': False, 'error': f'SERP API validation error: {str(e)}'}
-
-    def _validate_airtable(self, credentials):
-        try:
-            if not credentials.get('apiKey') or not credentials.get('baseId'):
-                return {'valid': False, 'error': 'Missing Airtable API Key or Base ID'}
-            response = requests.get(f'https://api.airtable.com/v0/{credentials["baseId"]}',
-                                    headers={'Authorization': f'Bearer {credentials["apiKey"]}'},
-                                    timeout=5)
-            return {'valid': response.status_code == 200, 'error': None if response.status_code == 200 else 'Invalid Airtable credentials'}
-        except Exception as e:
-            return {'valid': False, 'error': f'Airtable validation error: {str(e)}'}
-
     def _validate_google_calendar(self, credentials):
         try:
             if not credentials.get('apiKey') or not credentials.get('clientId'):
@@ -175,3 +269,8 @@ class CredentialValidator:
             return {'valid': False, 'error': f'Google Drive validation error: {str(e)}'}
 
 credential_validator = CredentialValidator()
+
+if __name__ == "__main__":
+    # Pre-derive the SECRET_KEY-based key into a key file, e.g. before rotating to a new key:
+    #   python -m app.services.credential_validator > credential.keys
+    print(derive_encryption_key().decode())
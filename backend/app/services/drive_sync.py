@@ -0,0 +1,395 @@
+# backend/app/services/drive_sync.py
+
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from googleapiclient.errors import HttpError
+from ..config import settings
+from ..database import db
+from ..monitoring.metrics import drive_sync_changes_total, drive_sync_duration_seconds
+from .google_drive_service import SUPPORTED_MIME_TYPES, document_version, google_drive_service
+from .ingestion_jobs import ingestion_job_queue, get_service_credentials
+from .search_cache import search_cache
+from .supabase_service import supabase_service
+from .vector_index import local_vector_index
+
+logger = logging.getLogger(__name__)
+
+# A job in one of these states will still download the file, so no second job is queued
+ACTIVE_JOB_STATUSES = ('staging', 'queued', 'running')
+
+# Bound the size of IN (...) lists when looking up known files
+LOOKUP_BATCH = 500
+
+def _parse_drive_time(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+def classify_change(change: Dict[str, Any], known: Optional[Dict[str, Any]]) -> str:
+    """
+    Decide what a Drive change means for the knowledge base.
+    known is the synced state of the file, or None for a file never seen before.
+    Returns 'ingest', 'remove', 'adopt' (already indexed and current) or 'skip'.
+    """
+    file = change.get('file') or {}
+    indexed = bool(known and known.get('indexed_at'))
+    if change.get('removed') or file.get('trashed') or file.get('mimeType') not in SUPPORTED_MIME_TYPES:
+        return 'remove' if indexed or (known and known.get('queued_version')) else 'skip'
+
+    if known:
+        if known.get('job_status') in ACTIVE_JOB_STATUSES:
+            # Picked up by the reconcile pass once the running job completes
+            return 'skip'
+        version = document_version(file)
+        if indexed and known.get('ingested_version') == version:
+            return 'skip'
+        if indexed and not known.get('ingested_version'):
+            # Indexed before sync was enabled: current if the file has not changed since
+            modified_at = _parse_drive_time(file.get('modifiedTime'))
+            indexed_at = known['indexed_at'].replace(tzinfo=timezone.utc)
+            if modified_at and modified_at <= indexed_at:
+                return 'adopt'
+    return 'ingest'
+
+class DriveSyncService:
+    """
+    Incremental Google Drive sync. The first pass lists every supported file; later
+    passes read only the Changes API since the stored page token, so the cost of a
+    sync is proportional to what changed rather than to the size of the Drive.
+    Added or modified files are queued for ingestion, removed ones are deleted
+    from the user's Supabase table.
+    """
+
+    def __init__(self):
+        self.interval = settings.drive_sync_interval
+        self.page_size = settings.drive_sync_page_size
+        self.stale_seconds = settings.drive_sync_stale_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._manual_syncs = set()
+
+    # ----- Sync settings -----
+
+    async def enable(self, user_id: int, supabase_table: str, chunk_size: int = 256, chunk_overlap: int = 32):
+        # page_token is assigned first: MySQL evaluates the assignments in order, and a
+        # new target table needs a full scan
+        await db.execute(
+            """
+            INSERT INTO drive_sync_state (user_id, supabase_table, chunk_size, chunk_overlap, enabled)
+            VALUES (%s, %s, %s, %s, TRUE)
+            ON DUPLICATE KEY UPDATE
+                page_token = IF(supabase_table = VALUES(supabase_table), page_token, NULL),
+                supabase_table = VALUES(supabase_table),
+                chunk_size = VALUES(chunk_size),
+                chunk_overlap = VALUES(chunk_overlap),
+                enabled = TRUE
+            """,
+            (user_id, supabase_table, chunk_size, chunk_overlap)
+        )
+
+    async def disable(self, user_id: int):
+        await db.execute("UPDATE drive_sync_state SET enabled = FALSE WHERE user_id = %s", (user_id,))
+
+    async def get_state(self, user_id: int) -> Optional[Dict[str, Any]]:
+        result = await db.execute("SELECT * FROM drive_sync_state WHERE user_id = %s", (user_id,))
+        return result[0] if result else None
+
+    def sync_in_background(self, user_id: int):
+        task = asyncio.create_task(self.sync_user(user_id))
+        self._manual_syncs.add(task)
+        task.add_done_callback(self._manual_syncs.discard)
+
+    # ----- Sync passes -----
+
+    async def sync_user(self, user_id: int) -> Dict[str, Any]:
+        """Run one sync pass for a user; returns counts of what was done"""
+        owner = uuid.uuid4().hex
+        # The conditional update lets only one pass per user run across workers
+        await db.execute(
+            """
+            UPDATE drive_sync_state SET status = 'syncing', sync_owner = %s
+            WHERE user_id = %s AND enabled = TRUE
+              AND (status <> 'syncing' OR updated_at < NOW() - INTERVAL %s SECOND)
+            """,
+            (owner, user_id, self.stale_seconds)
+        )
+        state = await self.get_state(user_id)
+        if not state or state['sync_owner'] != owner or state['status'] != 'syncing':
+            return {"status": "skipped"}
+
+        mode = 'incremental' if state.get('page_token') else 'full'
+        started = time.monotonic()
+        try:
+            drive_credentials = await get_service_credentials(user_id, 'Google Drive')
+            if not drive_credentials:
+                raise Exception("Google Drive not connected for this user")
+
+            if mode == 'incremental':
+                try:
+                    summary = await self._incremental_sync(state, drive_credentials)
+                except HttpError as e:
+                    if e.resp.status not in (404, 410):
+                        raise
+                    # The page token expired: fall back to a full scan
+                    logger.warning(f"Drive page token for user {user_id} is no longer valid; running a full sync")
+                    mode = 'full'
+            if mode == 'full':
+                summary = await self._full_sync(state, drive_credentials)
+
+            summary['ingest'] += await self._reconcile(state)
+            await db.execute(
+                """
+                UPDATE drive_sync_state
+                SET status = 'idle', sync_owner = NULL, last_error = NULL, last_synced_at = NOW(),
+                    changes_seen = changes_seen + %s, jobs_queued = jobs_queued + %s,
+                    documents_removed = documents_removed + %s
+                WHERE user_id = %s
+                """,
+                (summary['changes'], summary['ingest'], summary['remove'], user_id)
+            )
+            logger.info(f"Drive {mode} sync for user {user_id}: {summary}")
+            return {"status": "completed", "mode": mode, **summary}
+        except asyncio.CancelledError:
+            await db.execute(
+                "UPDATE drive_sync_state SET status = 'idle', sync_owner = NULL WHERE user_id = %s",
+                (user_id,)
+            )
+            raise
+        except Exception as e:
+            logger.error(f"Drive sync for user {user_id} failed: {str(e)}")
+            await db.execute(
+                "UPDATE drive_sync_state SET status = 'failed', sync_owner = NULL, last_error = %s WHERE user_id = %s",
+                (str(e), user_id)
+            )
+            return {"status": "failed", "mode": mode, "error": str(e)}
+        finally:
+            drive_sync_duration_seconds.labels(mode=mode).observe(time.monotonic() - started)
+
+    async def _full_sync(self, state: Dict[str, Any], drive_credentials: Dict[str, Any]) -> Dict[str, int]:
+        user_id = state['user_id']
+        # Take the token before listing so changes made during the scan are seen next time
+        start_token = await google_drive_service.get_start_page_token(drive_credentials)
+        files = await google_drive_service.list_all_files(drive_credentials)
+        changes = [{"fileId": file['id'], "removed": False, "file": file} for file in files]
+
+        # Files synced earlier but gone from the listing were deleted or lost access
+        seen = {file['id'] for file in files}
+        synced = await db.execute(
+            "SELECT file_id FROM drive_sync_files WHERE user_id = %s AND removed = FALSE",
+            (user_id,)
+        )
+        changes.extend({"fileId": row['file_id'], "removed": True} for row in synced if row['file_id'] not in seen)
+
+        summary = await self._apply_changes(state, changes)
+        await db.execute(
+            "UPDATE drive_sync_state SET page_token = %s, last_full_scan_at = NOW() WHERE user_id = %s",
+            (start_token, user_id)
+        )
+        return summary
+
+    async def _incremental_sync(self, state: Dict[str, Any], drive_credentials: Dict[str, Any]) -> Dict[str, int]:
+        summary = self._empty_summary()
+        page_token = state['page_token']
+        while True:
+            page = await google_drive_service.list_changes(drive_credentials, page_token, self.page_size)
+            for action, count in (await self._apply_changes(state, page.get('changes', []))).items():
+                summary[action] += count
+
+            # Checkpoint after every page so an interrupted pass resumes where it stopped
+            page_token = page.get('nextPageToken') or page.get('newStartPageToken')
+            await db.execute(
+                "UPDATE drive_sync_state SET page_token = %s WHERE user_id = %s",
+                (page_token, state['user_id'])
+            )
+            if 'nextPageToken' not in page:
+                return summary
+
+    @staticmethod
+    def _empty_summary() -> Dict[str, int]:
+        return {"changes": 0, "ingest": 0, "remove": 0, "adopt": 0, "skip": 0}
+
+    async def _apply_changes(self, state: Dict[str, Any], changes: List[Dict[str, Any]]) -> Dict[str, int]:
+        summary = self._empty_summary()
+        # A file can appear more than once in a page; its last change wins
+        changes = list({change['fileId']: change for change in changes}.values())
+        for start in range(0, len(changes), LOOKUP_BATCH):
+            batch = changes[start:start + LOOKUP_BATCH]
+            known = await self._known_files(state, [change['fileId'] for change in batch])
+            actions = {}
+            for change in batch:
+                action = classify_change(change, known.get(change['fileId']))
+                actions[change['fileId']] = action
+                summary[action] += 1
+                drive_sync_changes_total.labels(action=action).inc()
+            summary['changes'] += len(batch)
+
+            await self._record_files(state['user_id'], batch, known)
+            for change in batch:
+                action = actions[change['fileId']]
+                if action == 'ingest':
+                    await self._queue_ingestion(state, change['fileId'], change['file'])
+                elif action == 'adopt':
+                    await db.execute(
+                        "UPDATE drive_sync_files SET ingested_version = %s WHERE user_id = %s AND file_id = %s",
+                        (document_version(change['file']), state['user_id'], change['fileId'])
+                    )
+            removed = [file_id for file_id, action in actions.items() if action == 'remove']
+            if removed:
+                await self._remove_documents(state, removed)
+        return summary
+
+    async def _known_files(self, state: Dict[str, Any], file_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Synced state and index time of each file, keyed by file id"""
+        if not file_ids:
+            return {}
+        placeholders = ", ".join(["%s"] * len(file_ids))
+        known: Dict[str, Dict[str, Any]] = {}
+        rows = await db.execute(
+            f"""
+            SELECT f.file_id, f.queued_version, f.ingested_version, j.status AS job_status
+            FROM drive_sync_files f
+            LEFT JOIN ingestion_jobs j ON j.id = f.last_job_id
+            WHERE f.user_id = %s AND f.file_id IN ({placeholders})
+            """,
+            (state['user_id'], *file_ids)
+        )
+        for row in rows:
+            known[row['file_id']] = dict(row)
+        indexed = await db.execute(
+            f"""
+            SELECT document_id, MAX(created_at) AS indexed_at
+            FROM knowledge_base_documents
+            WHERE user_id = %s AND supabase_table = %s AND document_id IN ({placeholders})
+            GROUP BY document_id
+            """,
+            (state['user_id'], state['supabase_table'], *file_ids)
+        )
+        for row in indexed:
+            known.setdefault(row['document_id'], {})['indexed_at'] = row['indexed_at']
+        return known
+
+    async def _record_files(self, user_id: int, changes: List[Dict[str, Any]], known: Dict[str, Dict[str, Any]]):
+        """Upsert the latest metadata of supported or already-tracked files in one statement"""
+        rows = []
+        for change in changes:
+            file = change.get('file') or {}
+            removed = bool(change.get('removed') or file.get('trashed'))
+            if change['fileId'] not in known and (removed or file.get('mimeType') not in SUPPORTED_MIME_TYPES):
+                continue
+            rows.append((
+                user_id, change['fileId'], file.get('name'), file.get('mimeType'), file.get('size'),
+                file.get('md5Checksum'), file.get('modifiedTime'), removed
+            ))
+        if not rows:
+            return
+        placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s)"] * len(rows))
+        await db.execute(
+            f"""
+            INSERT INTO drive_sync_files
+            (user_id, file_id, name, mime_type, size, md5_checksum, modified_time, removed)
+            VALUES {placeholders}
+            ON DUPLICATE KEY UPDATE
+                name = COALESCE(VALUES(name), name),
+                mime_type = COALESCE(VALUES(mime_type), mime_type),
+                size = COALESCE(VALUES(size), size),
+                md5_checksum = VALUES(md5_checksum),
+                modified_time = COALESCE(VALUES(modified_time), modified_time),
+                removed = VALUES(removed)
+            """,
+            [value for row in rows for value in row]
+        )
+
+    async def _queue_ingestion(self, state: Dict[str, Any], file_id: str, file: Dict[str, Any]):
+        job_id = await ingestion_job_queue.create_job(
+            state['user_id'],
+            "google_drive",
+            state['supabase_table'],
+            document_id=file_id,
+            filename=file.get('name'),
+            size=file.get('size'),
+            chunk_size=state['chunk_size'],
+            chunk_overlap=state['chunk_overlap']
+        )
+        await db.execute(
+            "UPDATE drive_sync_files SET queued_version = %s, last_job_id = %s WHERE user_id = %s AND file_id = %s",
+            (document_version(file), job_id, state['user_id'], file_id)
+        )
+        await ingestion_job_queue.enqueue(job_id)
+
+    async def _remove_documents(self, state: Dict[str, Any], file_ids: List[str]):
+        user_id = state['user_id']
+        supabase_credentials = await get_service_credentials(user_id, 'Supabase')
+        if not supabase_credentials:
+            raise Exception("Supabase not connected for this user")
+
+        for file_id in file_ids:
+            await supabase_service.delete_document(supabase_credentials, state['supabase_table'], file_id)
+        placeholders = ", ".join(["%s"] * len(file_ids))
+        await db.execute(
+            f"DELETE FROM knowledge_base_documents WHERE user_id = %s AND supabase_table = %s "
+            f"AND document_id IN ({placeholders})",
+            (user_id, state['supabase_table'], *file_ids)
+        )
+        await db.execute(
+            f"UPDATE drive_sync_files SET queued_version = NULL, ingested_version = NULL "
+            f"WHERE user_id = %s AND file_id IN ({placeholders})",
+            (user_id, *file_ids)
+        )
+        search_cache.invalidate_table(user_id, state['supabase_table'])
+        local_vector_index.mark_stale(supabase_credentials, state['supabase_table'])
+
+    async def _reconcile(self, state: Dict[str, Any]) -> int:
+        """Queue files that changed again while their previous ingestion job was running"""
+        rows = await db.execute(
+            """
+            SELECT f.file_id AS id, f.name, f.size, f.md5_checksum AS md5Checksum, f.modified_time AS modifiedTime
+            FROM drive_sync_files f
+            JOIN ingestion_jobs j ON j.id = f.last_job_id
+            WHERE f.user_id = %s AND f.removed = FALSE AND j.status = 'completed'
+              AND NOT (f.ingested_version <=> COALESCE(f.md5_checksum, f.modified_time))
+            """,
+            (state['user_id'],)
+        )
+        for row in rows:
+            await self._queue_ingestion(state, row['id'], row)
+        return len(rows)
+
+    # ----- Background loop -----
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._sync_loop())
+            logger.info(f"Drive sync loop started (every {self.interval}s)")
+
+    async def stop(self):
+        tasks = [task for task in (self._task, *self._manual_syncs) if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+    async def _sync_loop(self):
+        while True:
+            try:
+                due = await db.execute(
+                    """
+                    SELECT user_id FROM drive_sync_state
+                    WHERE enabled = TRUE AND (last_synced_at IS NULL OR last_synced_at < NOW() - INTERVAL %s SECOND)
+                    """,
+                    (self.interval,)
+                )
+                for row in due:
+                    await self.sync_user(row['user_id'])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Drive sync loop error: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+drive_sync_service = DriveSyncService()
@@ -0,0 +1,164 @@
+# backend/app/services/embedding_cache.py
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, List
+import numpy as np
+from ..config import settings
+from ..monitoring.metrics import embedding_cache_bytes, embedding_cache_hits_total, embedding_cache_misses_total
+
+logger = logging.getLogger(__name__)
+
+def normalize_text(text: str) -> str:
+    """Normalize chunk text so whitespace and unicode-form differences hit the same entry"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+def cache_key(model_name: str, text: str) -> bytes:
+    return hashlib.sha256(f"{model_name}\0{normalize_text(text)}".encode("utf-8")).digest()
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache keyed by (model name, normalized chunk text hash).
+    Vectors are stored as float32 blobs in a local SQLite database and evicted
+    least-recently-used first once the cache grows past its size limit.
+    """
+
+    def __init__(self, path: str = None, max_bytes: int = None):
+        self.path = path or settings.embedding_cache_path
+        self.max_bytes = max_bytes or settings.embedding_cache_max_bytes
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections must not be shared across forked processes
+        if self._conn is None or self._conn_pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key BLOB PRIMARY KEY,
+                    model_name TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)")
+            conn.commit()
+            self._conn = conn
+            self._conn_pid = os.getpid()
+            self._total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+            embedding_cache_bytes.set(self._total_bytes)
+        return self._conn
+
+    def get_many(self, model_name: str, texts: List[str]) -> Dict[int, np.ndarray]:
+        """Look up many chunks at once; returns {position in texts: vector} for the hits"""
+        if not texts:
+            return {}
+        keys = [cache_key(model_name, text) for text in texts]
+        found: Dict[bytes, np.ndarray] = {}
+
+        with self._lock:
+            conn = self._connection()
+            unique_keys = list(set(keys))
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(unique_keys), 500):
+                part = unique_keys[i:i + 500]
+                placeholders = ", ".join("?" * len(part))
+                for key, vector in conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", part
+                ):
+                    found[key] = np.frombuffer(vector, dtype=np.float32)
+
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                conn.commit()
+
+        results = {i: found[key] for i, key in enumerate(keys) if key in found}
+        hits = len(results)
+        self.hits += hits
+        self.misses += len(texts) - hits
+        embedding_cache_hits_total.inc(hits)
+        embedding_cache_misses_total.inc(len(texts) - hits)
+        return results
+
+    def put_many(self, model_name: str, texts: List[str], vectors: np.ndarray):
+        """Store one float32 vector per chunk, evicting old entries if over the size limit"""
+        if not texts:
+            return
+        now = time.time()
+        rows = {}
+        for text, vector in zip(texts, vectors):
+            blob = np.ascontiguousarray(vector, dtype=np.float32).tobytes()
+            rows[cache_key(model_name, text)] = (model_name, blob, len(blob), now)
+
+        with self._lock:
+            conn = self._connection()
+            # The key covers the model and text, so a stored entry already holds this vector
+            existing = set()
+            keys = list(rows)
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                placeholders = ", ".join("?" * len(part))
+                existing.update(key for key, in conn.execute(
+                    f"SELECT key FROM embeddings WHERE key IN ({placeholders})", part
+                ))
+            conn.executemany(
+                "INSERT INTO embeddings (key, model_name, vector, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                [(key, *row) for key, row in rows.items() if key not in existing]
+            )
+            conn.executemany("UPDATE embeddings SET last_access = ? WHERE key = ?", [(now, key) for key in existing])
+            conn.commit()
+            # Kept incrementally; other processes' writes are counted when the connection is reopened
+            self._total_bytes += sum(row[2] for key, row in rows.items() if key not in existing)
+            if self._total_bytes > self.max_bytes:
+                self._evict(conn)
+            embedding_cache_bytes.set(self._total_bytes)
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop least recently used entries until the cache is at 90% of its limit"""
+        target = int(self.max_bytes * 0.9)
+        excess = self._total_bytes - target
+        cursor = conn.execute("SELECT key, size FROM embeddings ORDER BY last_access")
+        evicted = []
+        freed = 0
+        for key, size in cursor:
+            if freed >= excess:
+                break
+            evicted.append((key,))
+            freed += size
+        cursor.close()
+        conn.executemany("DELETE FROM embeddings WHERE key = ?", evicted)
+        conn.commit()
+        self._total_bytes -= freed
+        logger.info(f"Evicted {len(evicted)} entries from the embedding cache")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+embedding_cache = EmbeddingCache()
@@ -0,0 +1,143 @@
+# backend/app/services/embedding_models.py
+
+import logging
+import os
+import resource
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDING_DIMENSION = 384
+
+def _current_rss_bytes() -> int:
+    """Resident set size of this process in bytes"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is the peak RSS in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class ModelRegistry:
+    """
+    Process-wide registry of embedding models.
+    Models are loaded lazily on first use (or explicitly via warmup) and shared
+    by every caller in the process.
+    """
+
+    def __init__(self, model_names: Optional[List[str]] = None, backend: Optional[str] = None):
+        # Preferred model first, followed by fallbacks
+        self.model_names = model_names or [settings.embedding_model, settings.embedding_fallback_model]
+        # "torch" (SentenceTransformer) or "onnx" (int8 quantized, onnxruntime)
+        self.backend = backend or settings.embedding_backend
+        self._active_backend: Optional[str] = None
+        self._model = None
+        self._model_name: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {}
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    @property
+    def model_name(self) -> Optional[str]:
+        return self._model_name
+
+    @property
+    def embedding_dimension(self) -> int:
+        if self._model is None:
+            return DEFAULT_EMBEDDING_DIMENSION
+        return self._model.get_sentence_embedding_dimension()
+
+    def get_model(self):
+        """Return the shared model, loading it on first use"""
+        if self._model is None:
+            with self._lock:
+                # Another thread may have finished loading while we waited
+                if self._model is None:
+                    self._load()
+        return self._model
+
+    def warmup(self) -> Dict[str, Any]:
+        """Load the model and run a single inference so the first request is not slow"""
+        model = self.get_model()
+        start = time.perf_counter()
+        model.encode("warmup")
+        self._stats["warmup_seconds"] = round(time.perf_counter() - start, 4)
+        logger.info(f"Embedding model {self._model_name} warmed up")
+        return self.stats()
+
+    def _load_backend(self, name: str):
+        """Load one model, preferring the configured backend and falling back to torch"""
+        if self.backend == 'onnx':
+            try:
+                from .onnx_embedding import OnnxEmbeddingModel
+                model = OnnxEmbeddingModel.load(name, settings.embedding_onnx_dir, settings.embedding_onnx_threads)
+                return model, 'onnx'
+            except Exception as e:
+                logger.warning(f"Failed to load ONNX embedding model {name}: {e}. Using the torch backend.")
+
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(name, device='cpu'), 'torch'
+
+    def _load(self):
+        last_error = None
+        for name in self.model_names:
+            rss_before = _current_rss_bytes()
+            start = time.perf_counter()
+            try:
+                model, backend = self._load_backend(name)
+            except Exception as e:
+                logger.warning(f"Failed to load embedding model {name}: {e}. Trying fallback.")
+                last_error = e
+                continue
+
+            self._model = model
+            self._active_backend = backend
+            # Quantized vectors differ slightly, so they are never mixed with full-precision ones in caches
+            self._model_name = name.split('/')[-1] + ('-onnx-int8' if backend == 'onnx' else '')
+            if backend == 'onnx':
+                parameter_bytes = model.size_bytes
+            else:
+                parameter_bytes = sum(p.numel() * p.element_size() for p in model.parameters())
+            self._stats = {
+                "load_seconds": round(time.perf_counter() - start, 4),
+                "rss_delta_bytes": _current_rss_bytes() - rss_before,
+                "parameter_bytes": parameter_bytes,
+                "loaded_at": time.time()
+            }
+            logger.info(
+                f"Loaded embedding model {self._model_name} with {self.embedding_dimension} dimensions "
+                f"in {self._stats['load_seconds']}s"
+            )
+            return
+
+        raise RuntimeError(f"Could not load any embedding model: {last_error}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Memory and load-time accounting for the shared model"""
+        return {
+            "loaded": self.is_loaded,
+            "model_name": self._model_name,
+            "backend": self._active_backend or self.backend,
+            "embedding_dimension": self.embedding_dimension,
+            "process_rss_bytes": _current_rss_bytes(),
+            **self._stats
+        }
+
+model_registry = ModelRegistry()
+
+_backend_registries: Dict[str, ModelRegistry] = {}
+
+def get_model_registry(backend: Optional[str] = None) -> ModelRegistry:
+    """Shared registry for an inference backend; the default backend uses model_registry"""
+    backend = backend or model_registry.backend
+    if backend == model_registry.backend:
+        return model_registry
+    if backend not in _backend_registries:
+        _backend_registries[backend] = ModelRegistry(backend=backend)
+    return _backend_registries[backend]
@@ -0,0 +1,194 @@
+# backend/app/services/extractors.py
+
+import io
+import logging
+import os
+import zipfile
+from typing import BinaryIO, Iterator, Optional, Union
+import magic
+
+logger = logging.getLogger(__name__)
+
+# A path on disk or a binary file-like object positioned at the start of the document
+Source = Union[str, os.PathLike, BinaryIO]
+
+# Target size of the blocks handed to the chunker
+TEXT_BLOCK_BYTES = 64 * 1024
+DOCX_PARAGRAPHS_PER_BLOCK = 50
+SHEET_ROWS_PER_BLOCK = 500
+
+def _is_path(source: Source) -> bool:
+    return isinstance(source, (str, os.PathLike))
+
+def detect_file_type(source: Source) -> str:
+    """
+    Detect MIME type from the first bytes of a file
+    """
+    mime = magic.Magic(mime=True)
+    if _is_path(source):
+        file_type = mime.from_file(os.fspath(source))
+    else:
+        position = source.tell()
+        header = source.read(2048)
+        source.seek(position)
+        file_type = mime.from_buffer(header)
+
+    if file_type == 'application/zip':
+        file_type = _office_zip_type(source) or file_type
+    return file_type
+
+def _office_zip_type(source: Source) -> Optional[str]:
+    """Word and Excel files are zip archives; libmagic cannot always tell from the header alone"""
+    position = None if _is_path(source) else source.tell()
+    try:
+        with zipfile.ZipFile(source) as archive:
+            names = set(archive.namelist())
+    except zipfile.BadZipFile:
+        return None
+    finally:
+        if position is not None:
+            source.seek(position)
+
+    if 'word/document.xml' in names:
+        return 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+    if 'xl/workbook.xml' in names:
+        return 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    return None
+
+def file_kind(file_type: str) -> Optional[str]:
+    """Map a MIME type to one of the extractor backends"""
+    if 'pdf' in file_type:
+        return 'pdf'
+    # Checked before 'document': xlsx MIME types contain "officedocument"
+    if 'sheet' in file_type or 'excel' in file_type:
+        return 'excel'
+    if 'word' in file_type or 'document' in file_type:
+        return 'docx'
+    if 'text' in file_type:
+        return 'text'
+    return None
+
+def pdf_page_count(source: Source) -> int:
+    import PyPDF2
+    return len(PyPDF2.PdfReader(source).pages)
+
+def iter_pdf_pages(source: Source, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+    """
+    Yield the text of each page in [start, stop)
+    """
+    import PyPDF2
+    reader = PyPDF2.PdfReader(source)
+    pages = reader.pages
+    stop = len(pages) if stop is None else min(stop, len(pages))
+    for index in range(start, stop):
+        try:
+            text = pages[index].extract_text()
+        except Exception as e:
+            logger.warning(f"Failed to extract text from PDF page {index + 1}: {str(e)}")
+            continue
+        if text:
+            yield text
+
+def iter_docx_blocks(source: Source) -> Iterator[str]:
+    """
+    Yield groups of paragraphs from a Word document
+    """
+    import docx
+    document = docx.Document(source)
+    paragraphs = []
+    for paragraph in document.paragraphs:
+        if paragraph.text.strip():
+            paragraphs.append(paragraph.text)
+        if len(paragraphs) >= DOCX_PARAGRAPHS_PER_BLOCK:
+            yield "\n\n".join(paragraphs)
+            paragraphs = []
+    if paragraphs:
+        yield "\n\n".join(paragraphs)
+
+def _format_row(values) -> str:
+    return " | ".join("" if value is None else str(value) for value in values)
+
+def iter_excel_blocks(source: Source) -> Iterator[str]:
+    """
+    Yield spreadsheet rows in blocks of SHEET_ROWS_PER_BLOCK, one sheet after another.
+    Workbooks are streamed in read-only mode so only the current rows are in memory.
+    """
+    import openpyxl
+    try:
+        workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    except Exception:
+        # Legacy .xls files are not supported by openpyxl
+        if not _is_path(source):
+            source.seek(0)
+        yield from _iter_legacy_excel_blocks(source)
+        return
+
+    try:
+        for sheet in workbook.worksheets:
+            rows = [f"Sheet: {sheet.title}"]
+            for values in sheet.iter_rows(values_only=True):
+                if any(value is not None for value in values):
+                    rows.append(_format_row(values))
+                if len(rows) >= SHEET_ROWS_PER_BLOCK:
+                    yield "\n".join(rows)
+                    rows = []
+            if rows:
+                yield "\n".join(rows)
+    finally:
+        workbook.close()
+
+def _iter_legacy_excel_blocks(source: Source) -> Iterator[str]:
+    import pandas as pd
+    with pd.ExcelFile(source) as workbook:
+        for sheet_name in workbook.sheet_names:
+            df = workbook.parse(sheet_name, header=None)
+            yield f"Sheet: {sheet_name}"
+            for start in range(0, len(df), SHEET_ROWS_PER_BLOCK):
+                rows = df.iloc[start:start + SHEET_ROWS_PER_BLOCK]
+                yield "\n".join(_format_row(v for v in row if not pd.isna(v)) for row in rows.itertuples(index=False))
+
+def iter_text_blocks(source: Source) -> Iterator[str]:
+    """
+    Yield a text file in blocks of roughly TEXT_BLOCK_BYTES, cut at blank lines where possible
+    """
+    if _is_path(source):
+        with open(source, 'r', encoding='utf-8', errors='replace') as stream:
+            yield from _iter_line_blocks(stream)
+    else:
+        stream = io.TextIOWrapper(source, encoding='utf-8', errors='replace')
+        try:
+            yield from _iter_line_blocks(stream)
+        finally:
+            # Leave the caller's file object open
+            stream.detach()
+
+def _iter_line_blocks(stream) -> Iterator[str]:
+    lines = []
+    size = 0
+    for line in stream:
+        lines.append(line)
+        size += len(line)
+        # Prefer paragraph boundaries, but never let a block grow past twice the target
+        if size >= TEXT_BLOCK_BYTES and (not line.strip() or size >= 2 * TEXT_BLOCK_BYTES):
+            yield "".join(lines)
+            lines = []
+            size = 0
+    if lines:
+        yield "".join(lines)
+
+EXTRACTORS = {
+    'pdf': iter_pdf_pages,
+    'docx': iter_docx_blocks,
+    'excel': iter_excel_blocks,
+    'text': iter_text_blocks,
+}
+
+def iter_blocks(source: Source, file_type: Optional[str] = None) -> Iterator[str]:
+    """
+    Yield text blocks (pages, paragraph groups, row groups) from a document
+    """
+    file_type = file_type or detect_file_type(source)
+    kind = file_kind(file_type)
+    if kind is None:
+        raise ValueError(f"Unsupported file type: {file_type}")
+    return EXTRACTORS[kind](source)
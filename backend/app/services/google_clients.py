@@ -0,0 +1,146 @@
+# backend/app/services/google_clients.py
+
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+import httplib2
+from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from ..config import settings
+from ..monitoring.metrics import google_api_errors_total, google_api_request_duration_seconds
+
+logger = logging.getLogger(__name__)
+
+def credential_identity(credentials: Credentials) -> str:
+    """Stable, non-secret key for the account behind a set of OAuth credentials"""
+    secret = credentials.refresh_token or credentials.token or ""
+    return hashlib.sha256(f"{credentials.client_id}:{secret}".encode("utf-8")).hexdigest()[:16]
+
+class GoogleApiClient:
+    """
+    A built discovery service bound to one set of credentials.
+    Resource methods are reached as on the service itself (client.files().list(...));
+    requests are run with client.execute so they never block the event loop.
+    """
+
+    def __init__(self, factory: "GoogleClientFactory", api: str, resource: Any, credentials: Credentials):
+        self._factory = factory
+        self.api = api
+        self.resource = resource
+        self.credentials = credentials
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.resource, name)
+
+    def http(self) -> AuthorizedHttp:
+        """A fresh authorized transport: httplib2 connections must not be shared between threads"""
+        return AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=self._factory.timeout))
+
+    async def execute(self, request: Any) -> Any:
+        """Run an API request in the Google worker pool"""
+        method = getattr(request, 'methodId', None) or self.api
+        return await self.run(method, lambda: request.execute(http=self.http(), num_retries=self._factory.num_retries))
+
+    async def run(self, method: str, fn: Callable[[], Any]) -> Any:
+        """Run a blocking callable (e.g. a chunked download loop) in the Google worker pool"""
+        return await self._factory.run(method, fn)
+
+    async def execute_batch(self, requests: List[Any]) -> List[Tuple[Any, Optional[Exception]]]:
+        """
+        Send requests as one Google batch HTTP request.
+        Returns a (response, error) pair per request, in order; one failed item does not fail the others.
+        """
+        outcomes: List[Tuple[Any, Optional[Exception]]] = [(None, None)] * len(requests)
+
+        def collect(request_id: str, response: Any, exception: Optional[Exception]):
+            outcomes[int(request_id)] = (response, exception)
+
+        batch = self.resource.new_batch_http_request(callback=collect)
+        for index, request in enumerate(requests):
+            batch.add(request, request_id=str(index))
+        method = f"{getattr(requests[0], 'methodId', None) or self.api}.batch"
+        await self.run(method, lambda: batch.execute(http=self.http()))
+        for response, exception in outcomes:
+            if isinstance(exception, HttpError):
+                google_api_errors_total.labels(method=method, status=str(exception.resp.status)).inc()
+        return outcomes
+
+class GoogleClientFactory:
+    """
+    Builds Google API clients from the discovery documents bundled with
+    google-api-python-client (no discovery fetch or re-parse per request) and
+    caches them per (API, version, credential identity) in a bounded LRU. Calls
+    run in a bounded thread pool, with per-method latency and error metrics.
+    Cached credentials keep their refreshed access tokens between requests.
+    """
+
+    def __init__(self, max_clients: int, max_workers: int, timeout: float, num_retries: int = 1):
+        self.max_clients = max_clients
+        self.timeout = timeout
+        self.num_retries = num_retries
+        self._clients: "OrderedDict[Hashable, GoogleApiClient]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="google-api")
+        self.hits = 0
+        self.misses = 0
+
+    def client(self, api: str, version: str, credentials: Credentials) -> GoogleApiClient:
+        key: Tuple[str, str, str] = (api, version, credential_identity(credentials))
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                self.hits += 1
+                return client
+            self.misses += 1
+
+        started = time.monotonic()
+        resource = build(api, version, credentials=credentials, static_discovery=True, cache_discovery=False)
+        logger.debug(f"Built Google {api} {version} client in {(time.monotonic() - started) * 1000:.1f}ms")
+
+        with self._lock:
+            # Another caller may have built the same client meanwhile; keep the first
+            client = self._clients.setdefault(key, GoogleApiClient(self, api, resource, credentials))
+            self._clients.move_to_end(key)
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+        return client
+
+    async def run(self, method: str, fn: Callable[[], Any]) -> Any:
+        started = time.monotonic()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn)
+        except HttpError as e:
+            google_api_errors_total.labels(method=method, status=str(e.resp.status)).inc()
+            raise
+        except Exception:
+            google_api_errors_total.labels(method=method, status="error").inc()
+            raise
+        finally:
+            google_api_request_duration_seconds.labels(method=method).observe(time.monotonic() - started)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "clients": len(self._clients),
+            "max_clients": self.max_clients,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+google_client_factory = GoogleClientFactory(
+    max_clients=settings.google_client_cache_size,
+    max_workers=settings.google_api_workers,
+    timeout=settings.google_api_timeout
+)
@@ -1,15 +1,56 @@
 import logging
 import os
 import json
-from typing import Dict, List, Any, Optional
+import asyncio
+import tempfile
+import time
+from typing import Awaitable, BinaryIO, Callable, Dict, List, Any, Optional, Tuple, Union
+import httpx
+from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
 from datetime import datetime
 import io
+from ..config import settings
+from ..monitoring.metrics import google_api_errors_total, google_api_request_duration_seconds
+from .google_clients import GoogleApiClient, google_client_factory
+from .http_client_pool import HttpClientPool
 
 logger = logging.getLogger(__name__)
 
+# Document types the ingestion pipeline can extract text from
+SUPPORTED_MIME_TYPES = (
+    'application/pdf',
+    'application/vnd.google-apps.document',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+)
+
+FILE_FIELDS = "id, name, mimeType, size, modifiedTime, md5Checksum, trashed"
+
+# Google-native files have no binary content; they are exported to these formats instead
+EXPORT_MIME_TYPES = {
+    'application/vnd.google-apps.document': 'text/plain',
+    'application/vnd.google-apps.presentation': 'text/plain',
+    'application/vnd.google-apps.spreadsheet': 'text/csv'
+}
+
+DRIVE_FILES_URL = "https://www.googleapis.com/drive/v3/files"
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Downloads share one HTTP/2 client; the access token is sent per request
+drive_download_pool = HttpClientPool(
+    "google_drive",
+    max_clients=1,
+    idle_ttl=600.0,
+    max_connections_per_host=settings.drive_download_parallelism * settings.drive_download_concurrency,
+    max_keepalive_connections=settings.drive_download_parallelism,
+    keepalive_expiry=60.0,
+    timeout=httpx.Timeout(settings.google_api_timeout, connect=10.0)
+)
+
+def document_version(file: Dict[str, Any]) -> Optional[str]:
+    """Content version of a Drive file: its md5, or modifiedTime for Google-native docs that have none"""
+    return file.get('md5Checksum') or file.get('modifiedTime')
+
 class GoogleDriveService:
     def __init__(self):
         self.scopes = [
@@ -22,32 +63,8 @@ class GoogleDriveService:
         List documents from Google Drive
         """
         try:
-            # Create credentials from dictionary
-            credentials = self._create_credentials(credentials_dict)
-            
-            # Build the Drive API client
-            service = build('drive', 'v3', credentials=credentials)
-            
-            # Call the Drive v3 API to list files
-            results = service.files().list(
-                q="mimeType='application/pdf' or mimeType='application/vnd.google-apps.document' or mimeType='application/vnd.openxmlformats-officedocument.wordprocessingml.document'",
-                pageSize=100,
-                fields="nextPageToken, files(id, name, mimeType, size, modifiedTime)"
-            ).execute()
-            
-            documents = []
-            for file in results.get('files', []):
-                doc_metadata = {
-                    'document_id': file.get('id'),
-                    'title': file.get('name'),
-                    'source': 'google_drive',
-                    'mime_type': file.get('mimeType'),
-                    'size': file.get('size', 0),
-                    'last_modified': file.get('modifiedTime')
-                }
-                documents.append(doc_metadata)
-                
-            return documents
+            files = await self.list_all_files(credentials_dict)
+            return [self._document_metadata(file) for file in files]
             
         except Exception as e:
             logger.error(f"Error listing documents from Google Drive: {str(e)}")
@@ -55,39 +72,243 @@ class GoogleDriveService:
     
     async def download_document(self, credentials_dict: Dict[str, Any], document_id: str, local_path: str) -> Dict[str, Any]:
         """
-        Download a document from Google Drive to a local path
+        Download a document from Google Drive to a local path.
+        The file only appears at local_path once it is complete.
         """
         try:
-            # Create credentials from dictionary
-            credentials = self._create_credentials(credentials_dict)
-            
-            # Build the Drive API client
-            service = build('drive', 'v3', credentials=credentials)
-            
-            # Get file metadata
-            file_metadata = service.files().get(fileId=document_id, fields="id, name, mimeType, size, modifiedTime").execute()
-            
-            # Download the file content
-            request = service.files().get_media(fileId=document_id)
-            
-            with open(local_path, 'wb') as f:
-                downloader = MediaIoBaseDownload(f, request)
-                done = False
-                while not done:
-                    status, done = downloader.next_chunk()
-                
-            return {
-                'document_id': file_metadata.get('id'),
-                'title': file_metadata.get('name'),
-                'mime_type': file_metadata.get('mimeType'),
-                'size': file_metadata.get('size', 0),
-                'last_modified': file_metadata.get('modifiedTime')
-            }
+            drive = self._client(credentials_dict)
+            file = await self.get_file(drive, document_id)
+            partial_path = f"{local_path}.part"
+            with open(partial_path, 'wb') as sink:
+                file = await self.fetch_content(drive, file, sink)
+            os.replace(partial_path, local_path)
+            return self._document_metadata(file)
             
         except Exception as e:
             logger.error(f"Error downloading document from Google Drive: {str(e)}")
             raise Exception(f"Google Drive API error: {str(e)}")
+
+    async def open_document(
+        self,
+        credentials_dict: Dict[str, Any],
+        document_id: str,
+        spill_dir: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], Union[bytes, str]]:
+        """
+        Fetch a document for extraction without staging it on disk when it is small.
+        Returns its metadata and either the content itself (documents up to
+        DRIVE_DOWNLOAD_MEMORY_BYTES, buffered in memory) or the path of a temporary
+        file holding it, which the caller must delete. Temporary files go to spill_dir
+        (the system temp dir by default), so a caller can rename them within it.
+        """
+        try:
+            drive = self._client(credentials_dict)
+            file = await self.get_file(drive, document_id)
+            limit = settings.drive_download_memory_bytes
+            # Sizes of exports are unknown up front; the spool moves to disk past the limit
+            with tempfile.SpooledTemporaryFile(max_size=limit, dir=spill_dir) as spool:
+                file = await self.fetch_content(drive, file, spool)
+                size = spool.seek(0, io.SEEK_END)
+                spool.seek(0)
+                if size <= limit:
+                    return self._document_metadata(file), spool.read()
+                with tempfile.NamedTemporaryFile(prefix="drive_", dir=spill_dir, delete=False) as staged:
+                    await asyncio.to_thread(_copy_stream, spool, staged)
+                    return self._document_metadata(file), staged.name
+                    
+        except Exception as e:
+            logger.error(f"Error downloading document from Google Drive: {str(e)}")
+            raise Exception(f"Google Drive API error: {str(e)}")
+
+    async def download_many(
+        self,
+        credentials_dict: Dict[str, Any],
+        targets: Dict[str, str],
+        on_done: Optional[Callable[[str, Optional[Dict[str, Any]], Optional[Exception]], Awaitable[None]]] = None
+    ) -> Dict[str, Union[Dict[str, Any], Exception]]:
+        """
+        Download several documents (document id -> local path), at most
+        DRIVE_DOWNLOAD_CONCURRENCY at a time. on_done is awaited as each one finishes.
+        Returns the metadata or the error of every document.
+        """
+        slots = asyncio.Semaphore(settings.drive_download_concurrency)
+        results: Dict[str, Union[Dict[str, Any], Exception]] = {}
+
+        async def download(document_id: str, local_path: str):
+            async with slots:
+                try:
+                    metadata, error = await self.download_document(credentials_dict, document_id, local_path), None
+                except Exception as e:
+                    metadata, error = None, e
+            results[document_id] = metadata if error is None else error
+            if on_done:
+                await on_done(document_id, metadata, error)
+
+        await asyncio.gather(*(download(document_id, path) for document_id, path in targets.items()))
+        return results
+
+    async def get_file(self, drive: GoogleApiClient, document_id: str) -> Dict[str, Any]:
+        return await drive.execute(drive.files().get(fileId=document_id, fields=FILE_FIELDS))
+
+    async def fetch_content(self, drive: GoogleApiClient, file: Dict[str, Any], sink: BinaryIO) -> Dict[str, Any]:
+        """
+        Write a file's content to a seekable sink: Google-native documents are
+        exported as text, other files are downloaded in ranges fetched in parallel.
+        Returns the metadata describing what was written.
+        """
+        mime_type = file.get('mimeType', '')
+        token = await self._access_token(drive)
+        started = time.monotonic()
+        # Large downloads can outlast the pool's idle TTL, so the client is leased
+        async with drive_download_pool.lease("drive") as client:
+            if mime_type in EXPORT_MIME_TYPES:
+                method = 'drive.files.export'
+                export_type = EXPORT_MIME_TYPES[mime_type]
+                url = f"{DRIVE_FILES_URL}/{file['id']}/export"
+                size = await self._fetch_range(client, url, {"mimeType": export_type}, token, sink, method)
+                file = {**file, 'mimeType': export_type, 'size': size}
+            elif mime_type.startswith('application/vnd.google-apps.'):
+                raise Exception(f"Google Drive file type {mime_type} cannot be downloaded")
+            else:
+                method = 'drive.files.download'
+                await self._download_ranges(client, file, token, sink, method)
+        google_api_request_duration_seconds.labels(method=method).observe(time.monotonic() - started)
+        return file
+
+    async def _access_token(self, drive: GoogleApiClient) -> str:
+        credentials = drive.credentials
+        if not credentials.valid:
+            await drive.run('oauth2.token.refresh', lambda: credentials.refresh(Request()))
+        return credentials.token
+
+    async def _download_ranges(self, client: httpx.AsyncClient, file: Dict[str, Any], token: str, sink: BinaryIO, method: str):
+        url = f"{DRIVE_FILES_URL}/{file['id']}"
+        params = {"alt": "media"}
+        size = int(file.get('size') or 0)
+        chunk_bytes = settings.drive_download_chunk_bytes
+        if size <= chunk_bytes:
+            await self._fetch_range(client, url, params, token, sink, method)
+            return
+
+        slots = asyncio.Semaphore(settings.drive_download_parallelism)
+
+        async def fetch(start: int, end: int):
+            async with slots:
+                await self._fetch_range(client, url, params, token, sink, method, start, end)
+
+        await asyncio.gather(*(
+            fetch(start, min(start + chunk_bytes, size) - 1)
+            for start in range(0, size, chunk_bytes)
+        ))
+
+    async def _fetch_range(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        params: Dict[str, str],
+        token: str,
+        sink: BinaryIO,
+        method: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None
+    ) -> int:
+        """
+        Stream bytes [start, end] (the whole body when start is None) into sink at
+        their offset, resuming from the last byte received after a transient error.
+        Returns the number of bytes written.
+        """
+        position = start or 0
+        attempts = settings.drive_download_max_attempts
+        for attempt in range(1, attempts + 1):
+            headers = {"Authorization": f"Bearer {token}"}
+            if start is not None:
+                headers["Range"] = f"bytes={position}-{end}"
+            try:
+                async with client.stream("GET", url, params=params, headers=headers) as response:
+                    if response.status_code in RETRYABLE_STATUS and attempt < attempts:
+                        google_api_errors_total.labels(method=method, status=str(response.status_code)).inc()
+                        await asyncio.sleep(2 ** (attempt - 1))
+                        continue
+                    response.raise_for_status()
+                    async for piece in response.aiter_bytes():
+                        # Ranges finish in any order; each writes at its own offset
+                        sink.seek(position)
+                        sink.write(piece)
+                        position += len(piece)
+                if end is not None and position != end + 1:
+                    raise httpx.ReadError(f"Range ended at byte {position}, expected {end + 1}")
+                return position - (start or 0)
+            except httpx.TransportError as e:
+                google_api_errors_total.labels(method=method, status="transport").inc()
+                if attempt == attempts:
+                    raise
+                logger.warning(f"Drive download of {url} interrupted at byte {position} ({str(e)}); resuming")
+                if start is None:
+                    # Without a range the body can only be fetched again from the start
+                    position = 0
+                    sink.seek(0)
+                    sink.truncate()
+                await asyncio.sleep(2 ** (attempt - 1))
+        raise Exception(f"Drive download of {url} failed after {attempts} attempts")
     
+    def _client(self, credentials_dict: Dict[str, Any]) -> GoogleApiClient:
+        return google_client_factory.client('drive', 'v3', self._create_credentials(credentials_dict))
+
+    async def _list_all_files(self, drive: GoogleApiClient, page_size: int = 1000) -> List[Dict[str, Any]]:
+        mime_filter = " or ".join(f"mimeType='{mime_type}'" for mime_type in SUPPORTED_MIME_TYPES)
+        files = []
+        page_token = None
+        while True:
+            results = await drive.execute(drive.files().list(
+                q=f"({mime_filter}) and trashed = false",
+                pageSize=page_size,
+                pageToken=page_token,
+                fields=f"nextPageToken, files({FILE_FIELDS})"
+            ))
+            files.extend(results.get('files', []))
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                return files
+
+    def _document_metadata(self, file: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'document_id': file.get('id'),
+            'title': file.get('name'),
+            'source': 'google_drive',
+            'mime_type': file.get('mimeType'),
+            'size': file.get('size', 0),
+            'last_modified': file.get('modifiedTime'),
+            'md5_checksum': file.get('md5Checksum')
+        }
+
+    async def list_all_files(self, credentials_dict: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Raw metadata of every supported, non-trashed file; used for a full sync
+        """
+        return await self._list_all_files(self._client(credentials_dict))
+
+    async def get_start_page_token(self, credentials_dict: Dict[str, Any]) -> str:
+        """
+        Token marking "now" in the user's change log
+        """
+        drive = self._client(credentials_dict)
+        result = await drive.execute(drive.changes().getStartPageToken())
+        return result['startPageToken']
+
+    async def list_changes(self, credentials_dict: Dict[str, Any], page_token: str, page_size: int = 1000) -> Dict[str, Any]:
+        """
+        One page of changes since page_token. The response has nextPageToken while
+        more pages follow and newStartPageToken on the last page.
+        """
+        drive = self._client(credentials_dict)
+        return await drive.execute(drive.changes().list(
+            pageToken=page_token,
+            pageSize=page_size,
+            spaces='drive',
+            includeRemoved=True,
+            fields=f"nextPageToken, newStartPageToken, changes(fileId, removed, file({FILE_FIELDS}))"
+        ))
+
     def _create_credentials(self, credentials_dict: Dict[str, Any]) -> Credentials:
         """
         Create Google OAuth2 credentials from a dictionary
@@ -101,3 +322,12 @@ class GoogleDriveService:
             client_secret=credentials_dict.get('client_secret'),
             scopes=self.scopes
         )
+
+def _copy_stream(source: BinaryIO, target: BinaryIO):
+    while True:
+        block = source.read(1024 * 1024)
+        if not block:
+            return
+        target.write(block)
+
+google_drive_service = GoogleDriveService()
@@ -2,28 +2,44 @@
 
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from email.mime.text import MIMEText
+import asyncio
 import base64
 import json
 import logging
-from typing import Dict, List, Optional, Any
-from datetime import datetime, timedelta
+import uuid
+from typing import Callable, Dict, List, Optional, Any, Tuple
+from datetime import datetime, timedelta, timezone
 from ..config import settings
 from ..database import db
+from .credential_cache import credential_cache
+from .google_clients import GoogleApiClient, google_client_factory
 
 logger = logging.getLogger(__name__)
 
+# Item errors worth sending again in a follow-up batch (403 only for quota reasons, see _retryable)
+RETRYABLE_BATCH_STATUS = {429, 500, 502, 503, 504}
+
+def _http_status(error: Exception) -> Optional[int]:
+    return getattr(getattr(error, 'resp', None), 'status', None)
+
+def _utc_datetime(value: str) -> datetime:
+    """RFC 3339 timestamp from the Calendar API as a naive UTC datetime for MySQL"""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
 class GoogleService:
     def __init__(self):
         self.client_config = {
             "web": {
-                "client_id": settings.GOOGLE_CLIENT_ID,
-                "client_secret": settings.GOOGLE_CLIENT_SECRET,
+                "client_id": settings.google_client_id,
+                "client_secret": settings.google_client_secret,
                 "auth_uri": "https://accounts.google.com/o/oauth2/auth",
                 "token_uri": "https://oauth2.googleapis.com/token",
-                "redirect_uris": [f"https://{settings.SERVER_DOMAIN}/api/auth/google/callback"]
+                "redirect_uris": [f"https://{settings.server_domain}/api/auth/google/callback"]
             }
         }
         self.scopes = [
@@ -33,29 +49,37 @@ class GoogleService:
         ]
 
     async def get_credentials(self, user_id: int) -> Optional[Credentials]:
-        """Get stored credentials for user"""
+        """Get stored credentials for user, through the credential cache"""
         try:
-            query = "SELECT credentials FROM service_credentials WHERE user_id = %s AND service_name = 'google'"
-            result = await db.fetchone(query, (user_id,))
-            
-            if result and result['credentials']:
-                creds_data = json.loads(result['credentials'])
-                return Credentials.from_authorized_user_info(creds_data, self.scopes)
-            return None
+            return await credential_cache.get(user_id, 'google', lambda: self._load_credentials(user_id))
         except Exception as e:
             logger.error(f"Error getting credentials: {str(e)}")
             return None
 
+    async def _load_credentials(self, user_id: int) -> Optional[Credentials]:
+        query = "SELECT credentials FROM service_credentials WHERE user_id = %s AND service = 'google'"
+        result = await db.execute(query, (user_id,))
+        
+        if result and result[0]['credentials']:
+            creds_data = result[0]['credentials']
+            # JSON columns come back from aiomysql as strings
+            if isinstance(creds_data, str):
+                creds_data = json.loads(creds_data)
+            # Cached, so refreshed access tokens are reused until the entry expires
+            return Credentials.from_authorized_user_info(creds_data, self.scopes)
+        return None
+
     async def store_credentials(self, user_id: int, credentials: Dict):
         """Store Google credentials"""
         try:
             query = """
-                INSERT INTO service_credentials (user_id, service_name, credentials)
-                VALUES (%s, 'google', %s)
-                ON DUPLICATE KEY UPDATE credentials = %s
+                INSERT INTO service_credentials (user_id, service, credentials, is_connected, last_connected)
+                VALUES (%s, 'google', %s, TRUE, NOW())
+                ON DUPLICATE KEY UPDATE credentials = %s, is_connected = TRUE, last_connected = NOW()
             """
             creds_json = json.dumps(credentials)
             await db.execute(query, (user_id, creds_json, creds_json))
+            credential_cache.invalidate(user_id, 'google')
         except Exception as e:
             logger.error(f"Error storing credentials: {str(e)}")
             raise
@@ -77,40 +101,13 @@ class GoogleService:
             if not credentials:
                 raise Exception("No valid credentials found")
 
-            service = build('calendar', 'v3', credentials=credentials)
+            calendar = google_client_factory.client('calendar', 'v3', credentials)
             
-            event = {
-                'summary': title,
-                'location': location,
-                'description': description,
-                'start': {
-                    'dateTime': start_time.isoformat(),
-                    'timeZone': 'UTC',
-                },
-                'end': {
-                    'dateTime': end_time.isoformat(),
-                    'timeZone': 'UTC',
-                },
-                'attendees': [{'email': email} for email in attendees],
-                'reminders': {
-                    'useDefault': True
-                },
-                'conferenceData': {
-                    'createRequest': {
-                        'requestId': f"meeting_{datetime.now().timestamp()}",
-                        'conferenceSolutionKey': {'type': 'hangoutsMeet'}
-                    }
-                }
-            }
-
-            event = service.events().insert(
-                calendarId='primary',
-                body=event,
-                conferenceDataVersion=1
-            ).execute()
+            event = self._event_body(title, start_time, end_time, attendees, description, location)
+            event = await calendar.execute(self._insert_event_request(calendar, event))
 
             # Store meeting details in database
-            await self._store_meeting(user_id, event)
+            await self._store_meetings(user_id, [event])
 
             return {
                 'event_id': event['id'],
@@ -136,22 +133,12 @@ class GoogleService:
             if not credentials:
                 raise Exception("No valid credentials found")
 
-            service = build('gmail', 'v1', credentials=credentials)
-            
-            message = MIMEText(body, 'html' if html else 'plain')
-            message['to'] = to
-            message['subject'] = subject
-
-            raw = base64.urlsafe_b64encode(message.as_bytes())
-            raw = raw.decode()
+            gmail = google_client_factory.client('gmail', 'v1', credentials)
             
-            message = service.users().messages().send(
-                userId='me',
-                body={'raw': raw}
-            ).execute()
+            message = await gmail.execute(self._send_email_request(gmail, to, subject, body, html))
 
             # Store email details in database
-            await self._store_email(user_id, message, to, subject)
+            await self._store_emails(user_id, [(message, to, subject)])
 
             return {
                 'message_id': message['id'],
@@ -162,6 +149,215 @@ class GoogleService:
             logger.error(f"Error sending email: {str(e)}")
             raise
 
+    async def create_meetings(self, user_id: int, meetings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Create many Calendar events through batch requests, e.g. after a calling campaign.
+        Each meeting has the create_meeting arguments (title, start_time, end_time,
+        attendees, description, location). Returns one result per meeting, in order;
+        failed meetings carry an error and do not fail the others.
+        """
+        if not meetings:
+            return []
+        credentials = await self.get_credentials(user_id)
+        if not credentials:
+            raise Exception("No valid credentials found")
+
+        calendar = google_client_factory.client('calendar', 'v3', credentials)
+        events = []
+        for meeting in meetings:
+            event = self._event_body(
+                meeting['title'],
+                meeting['start_time'],
+                meeting['end_time'],
+                meeting.get('attendees', []),
+                meeting.get('description', ""),
+                meeting.get('location', "")
+            )
+            # A client-chosen id makes retried inserts idempotent: a duplicate fails with 409
+            event['id'] = uuid.uuid4().hex
+            events.append(event)
+
+        outcomes = await self._execute_batched(
+            calendar,
+            [lambda event=event: self._insert_event_request(calendar, event) for event in events]
+        )
+
+        results, created = [], []
+        for index, (event, (response, error, attempts)) in enumerate(zip(events, outcomes)):
+            if error is not None and _http_status(error) == 409 and attempts > 1:
+                # An earlier attempt created the event but its response was lost
+                response, error = event, None
+            if error is None:
+                created.append(response)
+                results.append({
+                    'index': index,
+                    'success': True,
+                    'event_id': response['id'],
+                    'meet_link': response.get('hangoutLink'),
+                    'status': response.get('status', 'confirmed')
+                })
+            else:
+                results.append({'index': index, 'success': False, 'error': str(error)})
+
+        await self._store_meetings(user_id, created)
+        self._log_batch("meetings", results)
+        return results
+
+    async def send_emails(self, user_id: int, emails: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Send many emails through Gmail batch requests, e.g. post-call follow-ups.
+        Each email has the send_email arguments (to, subject, body, html). Returns one
+        result per email, in order; failed emails carry an error and do not fail the others.
+        """
+        if not emails:
+            return []
+        credentials = await self.get_credentials(user_id)
+        if not credentials:
+            raise Exception("No valid credentials found")
+
+        gmail = google_client_factory.client('gmail', 'v1', credentials)
+        outcomes = await self._execute_batched(
+            gmail,
+            [
+                lambda email=email: self._send_email_request(
+                    gmail, email['to'], email['subject'], email['body'], email.get('html', False)
+                )
+                for email in emails
+            ],
+            # Sends have no dedupe key: a 5xx or transport error may have sent the email already
+            retryable=self._rate_limited
+        )
+
+        results, sent = [], []
+        for index, (email, (message, error, _)) in enumerate(zip(emails, outcomes)):
+            if error is None:
+                sent.append((message, email['to'], email['subject']))
+                results.append({
+                    'index': index,
+                    'success': True,
+                    'message_id': message['id'],
+                    'thread_id': message['threadId']
+                })
+            else:
+                results.append({'index': index, 'success': False, 'error': str(error)})
+
+        await self._store_emails(user_id, sent)
+        self._log_batch("emails", results)
+        return results
+
+    def _event_body(
+        self,
+        title: str,
+        start_time: datetime,
+        end_time: datetime,
+        attendees: List[str],
+        description: str = "",
+        location: str = ""
+    ) -> Dict[str, Any]:
+        return {
+            'summary': title,
+            'location': location,
+            'description': description,
+            'start': {
+                'dateTime': start_time.isoformat(),
+                'timeZone': 'UTC',
+            },
+            'end': {
+                'dateTime': end_time.isoformat(),
+                'timeZone': 'UTC',
+            },
+            'attendees': [{'email': email} for email in attendees],
+            'reminders': {
+                'useDefault': True
+            },
+            'conferenceData': {
+                'createRequest': {
+                    'requestId': uuid.uuid4().hex,
+                    'conferenceSolutionKey': {'type': 'hangoutsMeet'}
+                }
+            }
+        }
+
+    def _insert_event_request(self, calendar: GoogleApiClient, event: Dict[str, Any]):
+        return calendar.events().insert(
+            calendarId='primary',
+            body=event,
+            conferenceDataVersion=1
+        )
+
+    def _send_email_request(self, gmail: GoogleApiClient, to: str, subject: str, body: str, html: bool = False):
+        message = MIMEText(body, 'html' if html else 'plain')
+        message['to'] = to
+        message['subject'] = subject
+        raw = base64.urlsafe_b64encode(message.as_bytes()).decode()
+        return gmail.users().messages().send(userId='me', body={'raw': raw})
+
+    async def _execute_batched(
+        self,
+        client: GoogleApiClient,
+        request_factories: List[Callable[[], Any]],
+        retryable: Optional[Callable[[Exception], bool]] = None
+    ) -> List[Tuple[Any, Optional[Exception], int]]:
+        """
+        Run requests as Google batch HTTP requests of GOOGLE_BATCH_SIZE items, sending
+        the batches concurrently. Items rejected by rate limits or server errors go
+        out again in a later batch after a backoff.
+        Returns (response, error, attempts) for every request, in order.
+        """
+        batch_size = settings.google_batch_size
+        max_attempts = settings.google_batch_max_attempts
+        retryable = retryable or self._retryable
+        outcomes: List[Tuple[Any, Optional[Exception], int]] = [(None, None, 0)] * len(request_factories)
+        pending = list(range(len(request_factories)))
+
+        for attempt in range(1, max_attempts + 1):
+            groups = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+            # Requests are built per attempt: an HttpRequest belongs to a single batch
+            batches = await asyncio.gather(
+                *(client.execute_batch([request_factories[index]() for index in group]) for group in groups),
+                return_exceptions=True
+            )
+            retry = []
+            for group, batch in zip(groups, batches):
+                for position, index in enumerate(group):
+                    # A failed batch call fails every item in it
+                    response, error = (None, batch) if isinstance(batch, Exception) else batch[position]
+                    outcomes[index] = (response, error, attempt)
+                    if error is not None and retryable(error):
+                        retry.append(index)
+            if not retry or attempt == max_attempts:
+                break
+            logger.warning(f"Retrying {len(retry)} of {len(request_factories)} batched Google API calls")
+            await asyncio.sleep(2 ** (attempt - 1))
+            pending = retry
+        return outcomes
+
+    @staticmethod
+    def _retryable(error: Exception) -> bool:
+        status = _http_status(error)
+        if status is None:
+            return not isinstance(error, HttpError)
+        if status == 403:
+            return GoogleService._rate_limited(error)
+        return status in RETRYABLE_BATCH_STATUS
+
+    @staticmethod
+    def _rate_limited(error: Exception) -> bool:
+        """Rejected by a rate limit, so certainly not carried out"""
+        status = _http_status(error)
+        if status == 403:
+            # Quota errors are 403 with a rateLimitExceeded reason; other 403s are permanent
+            return b'ateLimitExceeded' in (getattr(error, 'content', b'') or b'')
+        return status == 429
+
+    @staticmethod
+    def _log_batch(kind: str, results: List[Dict[str, Any]]):
+        failed = [result for result in results if not result['success']]
+        if failed:
+            logger.error(f"{len(failed)} of {len(results)} batched {kind} failed; first error: {failed[0]['error']}")
+        else:
+            logger.info(f"Created {len(results)} {kind} in batches")
+
     async def list_drive_files(
         self,
         user_id: int,
@@ -174,7 +370,7 @@ class GoogleService:
             if not credentials:
                 raise Exception("No valid credentials found")
 
-            service = build('drive', 'v3', credentials=credentials)
+            drive = google_client_factory.client('drive', 'v3', credentials)
             
             query = []
             if folder_id:
@@ -188,12 +384,12 @@ class GoogleService:
             results = []
             page_token = None
             while True:
-                response = service.files().list(
+                response = await drive.execute(drive.files().list(
                     q=query_string,
                     spaces='drive',
                     fields='nextPageToken, files(id, name, mimeType, size, modifiedTime)',
                     pageToken=page_token
-                ).execute()
+                ))
 
                 results.extend(response.get('files', []))
                 page_token = response.get('nextPageToken')
@@ -213,10 +409,9 @@ class GoogleService:
             if not credentials:
                 raise Exception("No valid credentials found")
 
-            service = build('drive', 'v3', credentials=credentials)
+            drive = google_client_factory.client('drive', 'v3', credentials)
             
-            file = service.files().get(fileId=file_id).execute()
-            content = service.files().get_media(fileId=file_id).execute()
+            content = await drive.execute(drive.files().get_media(fileId=file_id))
             
             return content.decode('utf-8')
 
@@ -224,60 +419,64 @@ class GoogleService:
             logger.error(f"Error getting file content: {str(e)}")
             raise
 
-    async def _store_meeting(self, user_id: int, event: Dict):
-        """Store meeting details in database"""
+    async def _store_meetings(self, user_id: int, events: List[Dict]):
+        """Store meeting details in database with multi-row inserts"""
         try:
-            query = """
-                INSERT INTO calendar_events (
-                    user_id, event_id, title, start_time, 
-                    end_time, meet_link, status
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """
-            values = (
-                user_id,
-                event['id'],
-                event['summary'],
-                event['start']['dateTime'],
-                event['end']['dateTime'],
-                event.get('hangoutLink'),
-                event['status']
-            )
-            await db.execute(query, values)
+            for start in range(0, len(events), settings.google_store_rows):
+                rows = events[start:start + settings.google_store_rows]
+                placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(rows))
+                values = []
+                for event in rows:
+                    values.extend((
+                        user_id,
+                        event['id'],
+                        event.get('summary'),
+                        _utc_datetime(event['start']['dateTime']),
+                        _utc_datetime(event['end']['dateTime']),
+                        event.get('hangoutLink'),
+                        event.get('status', 'confirmed')
+                    ))
+                # IGNORE: a retried insert may record the same event twice
+                await db.execute(
+                    f"""
+                    INSERT IGNORE INTO calendar_events (
+                        user_id, event_id, title, start_time,
+                        end_time, meet_link, status
+                    ) VALUES {placeholders}
+                    """,
+                    values
+                )
         except Exception as e:
-            logger.error(f"Error storing meeting: {str(e)}")
+            logger.error(f"Error storing meetings: {str(e)}")
 
-    async def _store_email(
-        self,
-        user_id: int,
-        message: Dict,
-        recipient: str,
-        subject: str
-    ):
-        """Store email details in database"""
+    async def _store_emails(self, user_id: int, emails: List[Tuple[Dict, str, str]]):
+        """Store (message, recipient, subject) email details in database with multi-row inserts"""
         try:
-            query = """
-                INSERT INTO sent_emails (
-                    user_id, message_id, thread_id, 
-                    recipient, subject, sent_at
-                ) VALUES (%s, %s, %s, %s, %s, %s)
-            """
-            values = (
-                user_id,
-                message['id'],
-                message['threadId'],
-                recipient,
-                subject,
-                datetime.now()
-            )
-            await db.execute(query, values)
+            sent_at = datetime.now()
+            for start in range(0, len(emails), settings.google_store_rows):
+                rows = emails[start:start + settings.google_store_rows]
+                placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(rows))
+                values = []
+                for message, recipient, subject in rows:
+                    values.extend((user_id, message['id'], message['threadId'], recipient, subject, sent_at))
+                await db.execute(
+                    f"""
+                    INSERT INTO sent_emails (
+                        user_id, message_id, thread_id,
+                        recipient, subject, sent_at
+                    ) VALUES {placeholders}
+                    """,
+                    values
+                )
         except Exception as e:
-            logger.error(f"Error storing email: {str(e)}")
+            logger.error(f"Error storing emails: {str(e)}")
 
     async def revoke_credentials(self, user_id: int):
         """Revoke Google credentials"""
         try:
-            query = "DELETE FROM service_credentials WHERE user_id = %s AND service_name = 'google'"
+            query = "DELETE FROM service_credentials WHERE user_id = %s AND service = 'google'"
             await db.execute(query, (user_id,))
+            credential_cache.invalidate(user_id, 'google')
         except Exception as e:
             logger.error(f"Error revoking credentials: {str(e)}")
             raise
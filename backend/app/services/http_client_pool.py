@@ -0,0 +1,196 @@
+# backend/app/services/http_client_pool.py
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Hashable, Optional, Set
+import httpx
+from ..config import settings
+from ..monitoring.metrics import (
+    http_pool_clients,
+    http_pool_clients_created_total,
+    http_pool_clients_evicted_total,
+    http_pool_lookups_total
+)
+
+logger = logging.getLogger(__name__)
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def credential_fingerprint(secret: str) -> str:
+    """Short digest of a secret, so pool keys never hold the secret itself"""
+    return hashlib.sha256(secret.encode("utf-8")).hexdigest()[:16]
+
+class HttpClientPool:
+    """
+    App-lifetime pool of httpx.AsyncClients, one per upstream tenant (base URL +
+    credential). Clients keep their connections warm between requests; the pool
+    is bounded, least recently used clients are evicted first, and clients left
+    idle longer than idle_ttl are closed. Evicted clients are closed after a grace
+    period so requests already running on them can finish. Code that keeps a
+    client across many requests takes it through lease(); a leased client is
+    never evicted as idle and is only closed once every lease is released.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_clients: int,
+        idle_ttl: float,
+        max_connections_per_host: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float,
+        timeout: httpx.Timeout,
+        http2: bool = True
+    ):
+        self.name = name
+        self.max_clients = max_clients
+        self.idle_ttl = idle_ttl
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections_per_host,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.http2 = http2 and _http2_available()
+        if http2 and not self.http2:
+            logger.warning(f"HTTP/2 requested for {name} client pool but the h2 package is not installed; using HTTP/1.1")
+
+        # key -> (client, last used at), least recently used first
+        self._clients: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._retiring: Set[asyncio.Task] = set()
+        self._leases: Dict[httpx.AsyncClient, int] = {}
+        self._released: Optional[asyncio.Condition] = None
+        self._closed = False
+        self.created = 0
+        self.evicted = 0
+
+    def get(self, key: Hashable, headers: Optional[Dict[str, str]] = None) -> httpx.AsyncClient:
+        """Return the pooled client for key, creating it with the given default headers"""
+        if self._closed:
+            raise Exception(f"HTTP client pool {self.name} is closed")
+
+        now = time.monotonic()
+        self._evict_idle(now)
+
+        entry = self._clients.get(key)
+        if entry is not None and not entry[0].is_closed:
+            self._clients[key] = (entry[0], now)
+            self._clients.move_to_end(key)
+            http_pool_lookups_total.labels(pool=self.name, result="hit").inc()
+            return entry[0]
+
+        http_pool_lookups_total.labels(pool=self.name, result="miss").inc()
+        client = httpx.AsyncClient(
+            headers=headers,
+            timeout=self.timeout,
+            limits=self.limits,
+            http2=self.http2
+        )
+        self._clients[key] = (client, now)
+        self._clients.move_to_end(key)
+        self.created += 1
+        http_pool_clients_created_total.labels(pool=self.name).inc()
+        logger.debug(f"Created pooled HTTP client in {self.name} ({len(self._clients)} clients)")
+
+        while len(self._clients) > self.max_clients:
+            _, (oldest, _) = self._clients.popitem(last=False)
+            self._retire(oldest, "capacity")
+        http_pool_clients.labels(pool=self.name).set(len(self._clients))
+        return client
+
+    @asynccontextmanager
+    async def lease(self, key: Hashable, headers: Optional[Dict[str, str]] = None) -> AsyncIterator[httpx.AsyncClient]:
+        """The pooled client for key, kept open until the block exits"""
+        client = self.get(key, headers)
+        self._leases[client] = self._leases.get(client, 0) + 1
+        try:
+            yield client
+        finally:
+            self._leases[client] -= 1
+            if not self._leases[client]:
+                del self._leases[client]
+                entry = self._clients.get(key)
+                if entry is not None and entry[0] is client:
+                    self._clients[key] = (client, time.monotonic())
+                    self._clients.move_to_end(key)
+                if self._released is not None:
+                    async with self._released:
+                        self._released.notify_all()
+
+    def _evict_idle(self, now: float):
+        for key, (client, last_used) in list(self._clients.items()):
+            if now - last_used < self.idle_ttl:
+                break
+            if client in self._leases:
+                continue
+            del self._clients[key]
+            self._retire(client, "idle")
+        http_pool_clients.labels(pool=self.name).set(len(self._clients))
+
+    def _retire(self, client: httpx.AsyncClient, reason: str):
+        self.evicted += 1
+        http_pool_clients_evicted_total.labels(pool=self.name, reason=reason).inc()
+        # An idle client has nothing in flight; a capacity eviction may, so wait out the request timeout
+        delay = 0 if reason == "idle" else (self.timeout.read or 30.0)
+        task = asyncio.ensure_future(self._close_later(client, delay))
+        self._retiring.add(task)
+        task.add_done_callback(self._retiring.discard)
+
+    async def _close_later(self, client: httpx.AsyncClient, delay: float):
+        if delay:
+            await asyncio.sleep(delay)
+        if client in self._leases:
+            if self._released is None:
+                self._released = asyncio.Condition()
+            async with self._released:
+                await self._released.wait_for(lambda: client not in self._leases)
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing pooled HTTP client in {self.name}: {str(e)}")
+
+    async def aclose(self):
+        """Close every client; called on application shutdown"""
+        self._closed = True
+        clients = [client for client, _ in self._clients.values()]
+        self._clients.clear()
+        for task in list(self._retiring):
+            task.cancel()
+        await asyncio.gather(*self._retiring, return_exceptions=True)
+        await asyncio.gather(*(client.aclose() for client in clients), return_exceptions=True)
+        http_pool_clients.labels(pool=self.name).set(0)
+        logger.info(f"Closed {len(clients)} pooled HTTP clients in {self.name}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clients": len(self._clients),
+            "max_clients": self.max_clients,
+            "retiring": len(self._retiring),
+            "leased": len(self._leases),
+            "created": self.created,
+            "evicted": self.evicted,
+            "http2": self.http2,
+            "max_connections_per_host": self.limits.max_connections,
+            "idle_ttl_seconds": self.idle_ttl
+        }
+
+supabase_client_pool = HttpClientPool(
+    "supabase",
+    max_clients=settings.supabase_pool_max_clients,
+    idle_ttl=settings.supabase_pool_idle_ttl,
+    max_connections_per_host=settings.supabase_pool_max_connections,
+    max_keepalive_connections=settings.supabase_pool_max_keepalive,
+    keepalive_expiry=settings.supabase_pool_keepalive_expiry,
+    # Longer read timeout for large vector operations
+    timeout=httpx.Timeout(30.0, connect=10.0),
+    http2=settings.supabase_pool_http2
+)
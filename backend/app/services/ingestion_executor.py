@@ -0,0 +1,293 @@
+# backend/app/services/ingestion_executor.py
+
+import asyncio
+import io
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+import numpy as np
+from ..config import settings
+from ..monitoring.metrics import ingestion_queue_depth, ingestion_stage_duration_seconds
+from .embedding_cache import embedding_cache
+from .embedding_models import model_registry
+from .extractors import detect_file_type, file_kind, iter_pdf_pages, pdf_page_count
+from .vectorization_service import vectorization_service
+
+logger = logging.getLogger(__name__)
+
+# Called as progress(stage, completed, total) after each unit of work finishes
+ProgressCallback = Callable[[str, int, int], Optional[Awaitable[None]]]
+
+# A staged file path, or the document content itself for documents small enough to keep in memory
+DocumentSource = Union[str, bytes]
+
+def _open_source(source: DocumentSource):
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+def _init_worker(preload_model: bool):
+    """Worker process initializer: load the embedding model before the first task arrives"""
+    if preload_model:
+        try:
+            model_registry.warmup()
+        except Exception as e:
+            logger.error(f"Embedding model preload failed in ingestion worker: {str(e)}")
+
+def _chunk_in_worker(source: DocumentSource, chunk_size: Optional[int], chunk_overlap: int) -> List[str]:
+    return list(vectorization_service.chunk_file(_open_source(source), chunk_size, chunk_overlap))
+
+def _chunk_pdf_pages_in_worker(
+    source: DocumentSource,
+    start: int,
+    stop: int,
+    chunk_size: Optional[int],
+    chunk_overlap: int
+) -> List[str]:
+    pages = iter_pdf_pages(_open_source(source), start, stop)
+    return list(vectorization_service.chunk_blocks(pages, chunk_size, chunk_overlap))
+
+def _pdf_pages(source: DocumentSource) -> int:
+    """Page count of a PDF, or 0 for any other file type"""
+    source = _open_source(source)
+    if file_kind(detect_file_type(source)) != 'pdf':
+        return 0
+    return pdf_page_count(source)
+
+def _embed_in_worker(chunks: List[str]) -> np.ndarray:
+    return vectorization_service.vectorize_batch(chunks)
+
+def _model_name_in_worker() -> str:
+    vectorization_service.model
+    return vectorization_service.model_name
+
+class IngestionExecutor:
+    """
+    Runs CPU-bound ingestion stages (text extraction and embedding) in a pool of
+    worker processes so async handlers can await them without blocking the event loop.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = None,
+        max_concurrent_jobs: int = None,
+        embed_chunk_size: int = None,
+        pdf_pages_per_task: int = None
+    ):
+        self.max_workers = settings.ingestion_workers if max_workers is None else max_workers
+        self.max_concurrent_jobs = max_concurrent_jobs or settings.ingestion_max_concurrent_jobs
+        self.embed_chunk_size = embed_chunk_size or settings.ingestion_embed_chunk_size
+        self.pdf_pages_per_task = pdf_pages_per_task or settings.ingestion_pdf_pages_per_task
+        self._pool: Optional[Executor] = None
+        self._job_slots: Optional[asyncio.Semaphore] = None
+        self._worker_slots: Optional[asyncio.Semaphore] = None
+        self._queued = 0
+        self._running = 0
+        self._waiting_jobs = 0
+        self._active_jobs = 0
+        self._stage_timings: Dict[str, Dict[str, float]] = {}
+        self._model_name: Optional[str] = None
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.max_workers > 0:
+                # spawn rather than fork: forking a process that already holds torch threads can deadlock
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(settings.ingestion_preload_model,)
+                )
+            else:
+                # In-process fallback for low-memory deployments: one model, threads only
+                self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='ingestion')
+            logger.info(f"Started ingestion executor with {self.max_workers} worker processes")
+        return self._pool
+
+    @asynccontextmanager
+    async def job(self):
+        """Bound the number of documents being ingested concurrently"""
+        if self._job_slots is None:
+            self._job_slots = asyncio.Semaphore(self.max_concurrent_jobs)
+        self._waiting_jobs += 1
+        try:
+            await self._job_slots.acquire()
+        finally:
+            self._waiting_jobs -= 1
+        self._active_jobs += 1
+        try:
+            yield
+        finally:
+            self._active_jobs -= 1
+            self._job_slots.release()
+
+    async def _run(self, stage: str, fn: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        if self._worker_slots is None:
+            # One slot per pool worker, so tasks wait here, where the queue depth can see them start
+            self._worker_slots = asyncio.Semaphore(self.max_workers if self.max_workers > 0 else 2)
+        self._queued += 1
+        ingestion_queue_depth.inc()
+        start = time.perf_counter()
+        try:
+            try:
+                await self._worker_slots.acquire()
+            finally:
+                self._queued -= 1
+                ingestion_queue_depth.dec()
+            self._running += 1
+            try:
+                return await loop.run_in_executor(self._get_pool(), fn, *args)
+            finally:
+                self._running -= 1
+                self._worker_slots.release()
+        finally:
+            self._record_timing(stage, time.perf_counter() - start)
+
+    def _record_timing(self, stage: str, seconds: float):
+        ingestion_stage_duration_seconds.labels(stage=stage).observe(seconds)
+        timing = self._stage_timings.setdefault(stage, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+        timing["count"] += 1
+        timing["total_seconds"] += seconds
+        timing["max_seconds"] = max(timing["max_seconds"], seconds)
+
+    async def extract_chunks(
+        self,
+        source: DocumentSource,
+        chunk_size: Optional[int] = None,
+        chunk_overlap: int = 0,
+        progress: ProgressCallback = None
+    ) -> List[str]:
+        """
+        Extract and chunk a file in worker processes, where the model tokenizer is loaded.
+        source is a file path or, for documents fetched into memory, the content bytes.
+        Large PDFs are split into page ranges that are extracted and chunked in parallel.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            page_count = await loop.run_in_executor(None, _pdf_pages, source)
+        except Exception as e:
+            # Let the worker surface the real extraction error
+            logger.warning(f"Could not read page count of {source if isinstance(source, str) else 'document'}: {str(e)}")
+            page_count = 0
+
+        if page_count <= self.pdf_pages_per_task:
+            chunks = await self._run("extract", _chunk_in_worker, source, chunk_size, chunk_overlap)
+            await self._report(progress, "extract", 1, 1)
+            return chunks
+
+        tasks = [
+            asyncio.ensure_future(self._run(
+                "extract", _chunk_pdf_pages_in_worker,
+                source, start, start + self.pdf_pages_per_task, chunk_size, chunk_overlap
+            ))
+            for start in range(0, page_count, self.pdf_pages_per_task)
+        ]
+        await self._gather_in_order(tasks, "extract", progress)
+        return [chunk for task in tasks for chunk in task.result()]
+
+    async def _get_model_name(self) -> str:
+        """Name of the model the workers actually loaded (the preferred one or its fallback)"""
+        if self._model_name is None:
+            self._model_name = await self._run("model_info", _model_name_in_worker)
+        return self._model_name
+
+    async def embed(self, chunks: List[str], progress: ProgressCallback = None) -> np.ndarray:
+        """
+        Embed chunks in worker processes, splitting large documents into slices so
+        they spread across workers and progress can be reported per slice.
+        Chunks already in the embedding cache are not sent to the model.
+        """
+        if not chunks:
+            return np.zeros((0, vectorization_service.embedding_dimension), dtype=np.float32)
+
+        loop = asyncio.get_running_loop()
+        cached = {}
+        if settings.embedding_cache_enabled:
+            model_name = await self._get_model_name()
+            try:
+                cached = await loop.run_in_executor(None, embedding_cache.get_many, model_name, chunks)
+            except Exception as e:
+                logger.warning(f"Embedding cache lookup failed: {str(e)}")
+
+        missing = [i for i in range(len(chunks)) if i not in cached]
+        if not missing:
+            await self._report(progress, "embed", 1, 1)
+            return np.ascontiguousarray(np.vstack([cached[i] for i in range(len(chunks))]))
+
+        missing_chunks = [chunks[i] for i in missing]
+        computed = await self._embed_uncached(missing_chunks, progress)
+
+        if settings.embedding_cache_enabled:
+            try:
+                await loop.run_in_executor(None, embedding_cache.put_many, model_name, missing_chunks, computed)
+            except Exception as e:
+                logger.warning(f"Embedding cache update failed: {str(e)}")
+
+        if not cached:
+            return computed
+        matrix = np.empty((len(chunks), computed.shape[1]), dtype=np.float32)
+        matrix[missing] = computed
+        for i, vector in cached.items():
+            matrix[i] = vector
+        return matrix
+
+    async def _embed_uncached(self, chunks: List[str], progress: ProgressCallback) -> np.ndarray:
+        slices = [chunks[i:i + self.embed_chunk_size] for i in range(0, len(chunks), self.embed_chunk_size)]
+        tasks = [asyncio.ensure_future(self._run("embed", _embed_in_worker, part)) for part in slices]
+        await self._gather_in_order(tasks, "embed", progress)
+        return np.ascontiguousarray(np.vstack([task.result() for task in tasks]))
+
+    async def _gather_in_order(self, tasks: List[asyncio.Future], stage: str, progress: ProgressCallback):
+        """Wait for all tasks, reporting progress as each finishes; results stay on the tasks"""
+        completed = 0
+        try:
+            for finished in asyncio.as_completed(tasks):
+                await finished
+                completed += 1
+                await self._report(progress, stage, completed, len(tasks))
+        except BaseException:
+            # Cancellation or a failed task: drop the tasks that have not started yet
+            for task in tasks:
+                task.cancel()
+            raise
+
+    async def _report(self, progress: ProgressCallback, stage: str, completed: int, total: int):
+        if progress is None:
+            return
+        try:
+            result = progress(stage, completed, total)
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            logger.warning(f"Ingestion progress callback failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, job concurrency and per-stage timing"""
+        return {
+            "workers": self.max_workers,
+            "queue_depth": self._queued,
+            "running_tasks": self._running,
+            "waiting_jobs": self._waiting_jobs,
+            "active_jobs": self._active_jobs,
+            "max_concurrent_jobs": self.max_concurrent_jobs,
+            "pdf_pages_per_task": self.pdf_pages_per_task,
+            "embedding_cache": embedding_cache.stats() if settings.embedding_cache_enabled else None,
+            "stages": {
+                stage: {
+                    "count": timing["count"],
+                    "avg_seconds": round(timing["total_seconds"] / timing["count"], 4),
+                    "max_seconds": round(timing["max_seconds"], 4)
+                }
+                for stage, timing in self._stage_timings.items()
+            }
+        }
+
+    def shutdown(self, wait: bool = True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+            logger.info("Ingestion executor shut down")
+
+ingestion_executor = IngestionExecutor()
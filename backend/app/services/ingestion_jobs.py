@@ -0,0 +1,656 @@
+# backend/app/services/ingestion_jobs.py
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+import socket
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Union
+import numpy as np
+from ..config import settings
+from ..database import db
+from .credential_cache import credential_cache
+from .google_drive_service import google_drive_service
+from .ingestion_executor import ingestion_executor
+from .search_cache import search_cache
+from .vector_index import local_vector_index
+from .supabase_service import supabase_service
+
+logger = logging.getLogger(__name__)
+
+# Marker for _update_job fields that should be set to the database's current time
+NOW = object()
+
+async def get_service_credentials(user_id: int, service: str) -> Optional[Dict[str, Any]]:
+    """Load a user's connected credentials for a service, through the credential cache"""
+    return await credential_cache.get(user_id, service, lambda: _load_service_credentials(user_id, service))
+
+async def _load_service_credentials(user_id: int, service: str) -> Optional[Dict[str, Any]]:
+    query = """
+        SELECT credentials
+        FROM service_credentials
+        WHERE service = %s AND user_id = %s AND is_connected = TRUE
+    """
+    result = await db.execute(query, (service, user_id))
+    if not result:
+        return None
+    credentials = result[0].get('credentials')
+    # JSON columns come back from aiomysql as strings
+    if isinstance(credentials, str):
+        credentials = json.loads(credentials)
+    return credentials
+
+class IngestionJobQueue:
+    """
+    MySQL-backed queue of document ingestion jobs processed by local async workers.
+    Every stage is checkpointed to a per-job staging directory and every batch of
+    chunks to ingestion_job_batches, so a failed or interrupted job resumes where it
+    stopped and only failed batches are retried.
+    """
+
+    def __init__(self):
+        self.worker_count = settings.ingestion_job_workers
+        self.max_jobs_per_tenant = settings.ingestion_max_jobs_per_tenant
+        self.batch_size = settings.ingestion_embed_chunk_size
+        self.batch_max_attempts = settings.ingestion_batch_max_attempts
+        self.poll_interval = settings.ingestion_job_poll_interval
+        self.stale_seconds = settings.ingestion_job_stale_seconds
+        # Heartbeat often enough that a running job is never mistaken for a stale one
+        self.heartbeat_interval = max(1.0, self.stale_seconds / 3)
+        self.max_attempts = settings.ingestion_job_max_attempts
+        self.staging_timeout = settings.ingestion_staging_timeout
+        self.failed_retention = settings.ingestion_failed_retention_seconds
+        self.staging_dir = settings.ingestion_staging_dir
+        self._last_cleanup = 0.0
+        self.worker_prefix = f"{socket.gethostname()}-{os.getpid()}"
+        self._workers: List[asyncio.Task] = []
+        self._prefetches = set()
+
+    # ----- Job submission and progress -----
+
+    def staging_path(self, job_id: int, name: str = "") -> str:
+        return os.path.join(self.staging_dir, f"job_{job_id}", name)
+
+    async def create_job(
+        self,
+        user_id: int,
+        source: str,
+        supabase_table: str,
+        document_id: Optional[str] = None,
+        filename: Optional[str] = None,
+        size: Optional[int] = None,
+        chunk_size: int = 256,
+        chunk_overlap: int = 32
+    ) -> int:
+        """Insert a job row without queueing it; the caller stages its input and then calls enqueue"""
+        # Pooled connections make LAST_INSERT_ID unreliable, so look the row up by a unique key
+        job_key = uuid.uuid4().hex
+        await db.execute(
+            """
+            INSERT INTO ingestion_jobs
+            (job_key, user_id, source, document_id, filename, size, supabase_table, chunk_size, chunk_overlap, status)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, 'staging')
+            """,
+            (job_key, user_id, source, document_id, filename, size, supabase_table, chunk_size, chunk_overlap)
+        )
+        result = await db.execute("SELECT id FROM ingestion_jobs WHERE job_key = %s", (job_key,))
+        job_id = result[0]['id'] if result else None
+        if not job_id:
+            raise Exception("Failed to create ingestion job")
+        os.makedirs(self.staging_path(job_id), exist_ok=True)
+        return job_id
+
+    async def enqueue(self, job_id: int):
+        await db.execute(
+            "UPDATE ingestion_jobs SET status = 'queued' WHERE id = %s AND status = 'staging'",
+            (job_id,)
+        )
+
+    async def fail_staging(self, job_id: int, error: str):
+        """Fail a job whose input could not be staged; it can never run"""
+        await db.execute(
+            "UPDATE ingestion_jobs SET status = 'failed', error_message = %s, finished_at = NOW() "
+            "WHERE id = %s AND status = 'staging'",
+            (error, job_id)
+        )
+        shutil.rmtree(self.staging_path(job_id), ignore_errors=True)
+
+    async def get_job(self, job_id: int, user_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        query = "SELECT * FROM ingestion_jobs WHERE id = %s"
+        params = [job_id]
+        if user_id is not None:
+            query += " AND user_id = %s"
+            params.append(user_id)
+        result = await db.execute(query, params)
+        return result[0] if result else None
+
+    async def get_progress(self, job_id: int, user_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Job status with per-batch counts"""
+        job = await self.get_job(job_id, user_id)
+        if not job:
+            return None
+        batches = await db.execute(
+            """
+            SELECT status, COUNT(*) AS count
+            FROM ingestion_job_batches
+            WHERE job_id = %s
+            GROUP BY status
+            """,
+            (job_id,)
+        )
+        total = job.get('total_batches') or 0
+        completed = job.get('completed_batches') or 0
+        return {
+            "job_id": job['id'],
+            "status": job['status'],
+            "stage": job['stage'],
+            "filename": job.get('filename'),
+            "document_id": job.get('document_id'),
+            "supabase_table": job['supabase_table'],
+            "chunk_count": job.get('chunk_count'),
+            "total_batches": total,
+            "completed_batches": completed,
+            "progress": round(completed / total, 4) if total else 0.0,
+            "batches": {row['status']: row['count'] for row in batches},
+            "attempts": job.get('attempts'),
+            "error": job.get('error_message'),
+            "created_at": job.get('created_at'),
+            "started_at": job.get('started_at'),
+            "finished_at": job.get('finished_at')
+        }
+
+    async def list_jobs(self, user_id: int, limit: int = 20) -> List[Dict[str, Any]]:
+        return await db.execute(
+            """
+            SELECT id, source, document_id, filename, supabase_table, status, stage,
+                   total_batches, completed_batches, error_message, created_at, finished_at
+            FROM ingestion_jobs
+            WHERE user_id = %s
+            ORDER BY id DESC
+            LIMIT %s
+            """,
+            (user_id, limit)
+        )
+
+    async def retry_job(self, job_id: int, user_id: Optional[int] = None) -> bool:
+        """Requeue a failed job; batches already stored are kept and skipped"""
+        job = await self.get_job(job_id, user_id)
+        if not job or job['status'] != 'failed':
+            return False
+        await db.execute(
+            "UPDATE ingestion_job_batches SET status = 'pending', attempts = 0, error_message = NULL "
+            "WHERE job_id = %s AND status = 'failed'",
+            (job_id,)
+        )
+        await db.execute(
+            "UPDATE ingestion_jobs SET status = 'queued', attempts = 0, error_message = NULL, finished_at = NULL "
+            "WHERE id = %s AND status = 'failed'",
+            (job_id,)
+        )
+        return True
+
+    # ----- Worker pool -----
+
+    def start(self):
+        """Start the local worker tasks"""
+        if self._workers:
+            return
+        os.makedirs(self.staging_dir, exist_ok=True)
+        for i in range(self.worker_count):
+            worker_id = f"{self.worker_prefix}-{i}"
+            self._workers.append(asyncio.create_task(self._worker_loop(worker_id)))
+        logger.info(f"Started {self.worker_count} ingestion job workers")
+
+    async def stop(self):
+        tasks = [*self._workers, *self._prefetches]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        logger.info("Ingestion job workers stopped")
+
+    async def _worker_loop(self, worker_id: str):
+        while True:
+            try:
+                await self._requeue_stale_jobs()
+                job = await self._claim_job(worker_id)
+                if job is None:
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                await self._run_job(job, worker_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ingestion worker {worker_id} error: {str(e)}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _requeue_stale_jobs(self):
+        """
+        Return jobs whose worker stopped heartbeating (e.g. a crashed process) to the
+        queue, unless they already used up their attempts: a job that keeps taking its
+        worker down must not be retried forever. Jobs whose input never finished
+        staging are failed.
+        """
+        await db.execute(
+            """
+            UPDATE ingestion_jobs
+            SET status = 'failed', worker_id = NULL, finished_at = NOW(),
+                error_message = CONCAT('Worker stopped responding on each of ', attempts, ' attempts')
+            WHERE status = 'running' AND heartbeat_at < NOW() - INTERVAL %s SECOND AND attempts >= %s
+            """,
+            (self.stale_seconds, self.max_attempts)
+        )
+        await db.execute(
+            """
+            UPDATE ingestion_jobs
+            SET status = 'queued', worker_id = NULL
+            WHERE status = 'running' AND heartbeat_at < NOW() - INTERVAL %s SECOND
+            """,
+            (self.stale_seconds,)
+        )
+        await db.execute(
+            """
+            UPDATE ingestion_jobs
+            SET status = 'failed', finished_at = NOW(), error_message = 'Input was never staged'
+            WHERE status = 'staging' AND created_at < NOW() - INTERVAL %s SECOND
+            """,
+            (self.staging_timeout,)
+        )
+        if time.monotonic() - self._last_cleanup >= self.stale_seconds:
+            self._last_cleanup = time.monotonic()
+            await self._cleanup_staging()
+
+    async def _cleanup_staging(self):
+        """Remove staging directories of finished jobs and of failed jobs past their retention"""
+        if not db.connected:
+            # Without job statuses every directory would look orphaned
+            return
+        job_ids = []
+        for name in os.listdir(self.staging_dir) if os.path.isdir(self.staging_dir) else []:
+            if name.startswith("job_") and name[4:].isdigit():
+                job_ids.append(int(name[4:]))
+        if not job_ids:
+            return
+        placeholders = ", ".join(["%s"] * len(job_ids))
+        keep = await db.execute(
+            f"""
+            SELECT id FROM ingestion_jobs
+            WHERE id IN ({placeholders})
+              AND (status IN ('staging', 'queued', 'running')
+                   OR (status = 'failed' AND finished_at >= NOW() - INTERVAL %s SECOND))
+            """,
+            (*job_ids, self.failed_retention)
+        )
+        kept = {row['id'] for row in keep}
+        for job_id in job_ids:
+            if job_id not in kept:
+                shutil.rmtree(self.staging_path(job_id), ignore_errors=True)
+        if len(job_ids) > len(kept):
+            logger.info(f"Removed {len(job_ids) - len(kept)} ingestion staging directories")
+
+    async def _claim_job(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Claim the oldest queued job whose tenant is below its concurrency limit"""
+        candidates = await db.execute(
+            "SELECT id, user_id FROM ingestion_jobs WHERE status = 'queued' ORDER BY id LIMIT 5"
+        )
+        for candidate in candidates:
+            async with db.transaction() as cursor:
+                # Lock the tenant's open jobs, the candidate among them: concurrent claims for
+                # one tenant are serialized, so the running count below cannot be stale
+                await cursor.execute(
+                    "SELECT id, status FROM ingestion_jobs "
+                    "WHERE user_id = %s AND status IN ('queued', 'running') FOR UPDATE",
+                    (candidate['user_id'],)
+                )
+                open_jobs = await cursor.fetchall()
+                if sum(1 for row in open_jobs if row['status'] == 'running') >= self.max_jobs_per_tenant:
+                    continue
+                await cursor.execute(
+                    """
+                    UPDATE ingestion_jobs
+                    SET status = 'running', worker_id = %s, attempts = attempts + 1,
+                        heartbeat_at = NOW(), started_at = COALESCE(started_at, NOW())
+                    WHERE id = %s AND status = 'queued'
+                    """,
+                    (worker_id, candidate['id'])
+                )
+                claimed = cursor.rowcount == 1
+            if claimed:
+                return await self.get_job(candidate['id'])
+        return None
+
+    async def _heartbeat(self, job_id: int, worker_id: str):
+        """Keep a running job's heartbeat fresh through long extraction and embedding stages"""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await db.execute(
+                    "UPDATE ingestion_jobs SET heartbeat_at = NOW() "
+                    "WHERE id = %s AND worker_id = %s AND status = 'running'",
+                    (job_id, worker_id)
+                )
+            except Exception as e:
+                logger.warning(f"Heartbeat for ingestion job {job_id} failed: {str(e)}")
+
+    async def _update_job(self, job_id: int, **fields):
+        fields_sql = ", ".join(f"{name} = NOW()" if value is NOW else f"{name} = %s" for name, value in fields.items())
+        values = [value for value in fields.values() if value is not NOW]
+        await db.execute(
+            f"UPDATE ingestion_jobs SET {fields_sql}, heartbeat_at = NOW() WHERE id = %s",
+            (*values, job_id)
+        )
+
+    # ----- Job processing -----
+
+    async def _run_job(self, job: Dict[str, Any], worker_id: str):
+        job_id = job['id']
+        logger.info(f"Worker {worker_id} processing ingestion job {job_id} from stage {job['stage']}")
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, worker_id))
+        try:
+            async with ingestion_executor.job():
+                failed_batches = await self._process(job)
+            if failed_batches:
+                await self._update_job(
+                    job_id,
+                    status='failed',
+                    error_message=f"{failed_batches} batch(es) failed to store; retry to resume",
+                    finished_at=NOW
+                )
+                return
+            await self._finalize(job)
+        except asyncio.CancelledError:
+            # Shutting down: let another worker pick the job up from its checkpoints,
+            # without counting the interrupted run against its attempts
+            await db.execute(
+                "UPDATE ingestion_jobs SET status = 'queued', worker_id = NULL, attempts = GREATEST(attempts - 1, 0) "
+                "WHERE id = %s",
+                (job_id,)
+            )
+            raise
+        except Exception as e:
+            logger.error(f"Ingestion job {job_id} failed: {str(e)}")
+            await self._update_job(job_id, status='failed', error_message=str(e), finished_at=NOW)
+        finally:
+            heartbeat.cancel()
+
+    async def _process(self, job: Dict[str, Any]) -> int:
+        """Run every remaining stage of a job and return the number of failed batches"""
+        job_id = job['id']
+        source_path = self.staging_path(job_id, "source")
+        chunks_path = self.staging_path(job_id, "chunks.json")
+
+        supabase_credentials = await get_service_credentials(job['user_id'], 'Supabase')
+        if not supabase_credentials:
+            raise Exception("Supabase not connected for this user")
+
+        if os.path.exists(chunks_path):
+            with open(chunks_path) as f:
+                chunks = json.load(f)
+        else:
+            # Uploads and prefetched Drive documents are staged; others are fetched now
+            source = source_path if os.path.exists(source_path) else await self._download(job, source_path)
+
+            await self._update_job(job_id, stage='extract')
+            chunks = await ingestion_executor.extract_chunks(source, job['chunk_size'], job['chunk_overlap'])
+            if not chunks:
+                raise Exception("Failed to extract text from document")
+
+            await self._update_job(job_id, stage='chunk')
+            await self._checkpoint_chunks(job_id, chunks, chunks_path)
+
+        await self._update_job(job_id, stage='embed')
+        batches = await db.execute(
+            "SELECT * FROM ingestion_job_batches WHERE job_id = %s ORDER BY batch_index",
+            (job_id,)
+        )
+
+        failed = 0
+        for batch in batches:
+            if batch['status'] == 'stored':
+                continue
+            if not await self._process_batch(job, batch, chunks, supabase_credentials):
+                failed += 1
+        return failed
+
+    async def _download(self, job: Dict[str, Any], source_path: str) -> Union[bytes, str]:
+        """
+        Fetch a Drive document for extraction. Small documents stay in memory and go
+        straight to the extractor; larger ones are staged at source_path.
+        """
+        if job['source'] != 'google_drive':
+            raise Exception("Staged upload is missing; the file must be uploaded again")
+
+        google_drive_credentials = await get_service_credentials(job['user_id'], 'Google Drive')
+        if not google_drive_credentials:
+            raise Exception("Google Drive not connected for this user")
+
+        # Spilled in the job's staging dir, so the rename below never crosses filesystems
+        os.makedirs(os.path.dirname(source_path), exist_ok=True)
+        document_metadata, source = await google_drive_service.open_document(
+            google_drive_credentials,
+            job['document_id'],
+            spill_dir=os.path.dirname(source_path)
+        )
+        if not isinstance(source, bytes):
+            os.replace(source, source_path)
+            source = source_path
+        await self._record_document_metadata(job, document_metadata)
+        return source
+
+    async def _record_document_metadata(self, job: Dict[str, Any], document_metadata: Dict[str, Any]):
+        job['filename'] = document_metadata.get('title')
+        job['size'] = document_metadata.get('size')
+        await self._update_job(job['id'], filename=job['filename'], size=job['size'])
+
+    def prefetch_drive_documents(self, user_id: int, jobs: Dict[int, str]):
+        """
+        Download the Drive documents of staging jobs (job id -> document id) concurrently
+        and queue each job as soon as its document is staged. A failed download is
+        queued anyway, and the worker fetches the document itself.
+        """
+        task = asyncio.create_task(self._prefetch(user_id, jobs))
+        self._prefetches.add(task)
+        task.add_done_callback(self._prefetches.discard)
+
+    async def _prefetch(self, user_id: int, jobs: Dict[int, str]):
+        job_ids = {document_id: job_id for job_id, document_id in jobs.items()}
+        try:
+            google_drive_credentials = await get_service_credentials(user_id, 'Google Drive')
+            if not google_drive_credentials:
+                raise Exception("Google Drive not connected for this user")
+
+            async def staged(document_id: str, document_metadata: Optional[Dict[str, Any]], error: Optional[Exception]):
+                job_id = job_ids.pop(document_id)
+                if error is None:
+                    await self._record_document_metadata({"id": job_id}, document_metadata)
+                else:
+                    logger.warning(f"Prefetch of Drive document {document_id} for job {job_id} failed: {str(error)}")
+                await self.enqueue(job_id)
+
+            await google_drive_service.download_many(
+                google_drive_credentials,
+                {document_id: self.staging_path(job_id, "source") for job_id, document_id in jobs.items()},
+                on_done=staged
+            )
+        except Exception as e:
+            logger.error(f"Prefetching Drive documents failed: {str(e)}")
+        finally:
+            # Whatever was not staged is downloaded by the worker
+            for job_id in job_ids.values():
+                await self.enqueue(job_id)
+
+    async def _checkpoint_chunks(self, job_id: int, chunks: List[str], chunks_path: str):
+        """Persist chunks and create one batch row per slice of chunks"""
+        partial_path = f"{chunks_path}.part"
+        with open(partial_path, 'w') as f:
+            json.dump(chunks, f)
+
+        ranges = [(start, min(start + self.batch_size, len(chunks)))
+                  for start in range(0, len(chunks), self.batch_size)]
+        if ranges:
+            placeholders = ", ".join(["(%s, %s, %s, %s)"] * len(ranges))
+            values = []
+            for index, (start, end) in enumerate(ranges):
+                values.extend((job_id, index, start, end))
+            await db.execute(
+                f"INSERT IGNORE INTO ingestion_job_batches (job_id, batch_index, chunk_start, chunk_end) "
+                f"VALUES {placeholders}",
+                values
+            )
+        await self._update_job(job_id, chunk_count=len(chunks), total_batches=len(ranges))
+        # Only mark the chunk stage done once its batch rows exist
+        os.replace(partial_path, chunks_path)
+
+    async def _process_batch(
+        self,
+        job: Dict[str, Any],
+        batch: Dict[str, Any],
+        chunks: List[str],
+        supabase_credentials: Dict[str, Any]
+    ) -> bool:
+        """Embed and store one batch, retrying with backoff; returns False if it ultimately failed"""
+        job_id = job['id']
+        batch_chunks = chunks[batch['chunk_start']:batch['chunk_end']]
+        embeddings_path = self.staging_path(job_id, f"batch_{batch['batch_index']}.npy")
+        unsent_path = self.staging_path(job_id, f"batch_{batch['batch_index']}.unsent.json")
+
+        for attempt in range(1, self.batch_max_attempts + 1):
+            try:
+                # Embeddings checkpointed by an earlier attempt are reused as-is
+                if os.path.exists(embeddings_path):
+                    embeddings = np.load(embeddings_path)
+                else:
+                    embeddings = await ingestion_executor.embed(batch_chunks)
+                    with open(f"{embeddings_path}.part", 'wb') as f:
+                        np.save(f, embeddings)
+                    os.replace(f"{embeddings_path}.part", embeddings_path)
+                    await self._update_batch(batch['id'], 'embedded')
+
+                # Only the chunks an earlier attempt could not store are sent again: tables
+                # without the chunk_id upsert key take plain inserts, which would duplicate the rest
+                if os.path.exists(unsent_path):
+                    with open(unsent_path) as f:
+                        ranges = [tuple(chunk_range) for chunk_range in json.load(f)]
+                else:
+                    ranges = [(batch['chunk_start'], batch['chunk_end'])]
+                failed_ranges, errors = [], []
+                for start, end in ranges:
+                    result = await supabase_service.store_embeddings(
+                        supabase_credentials,
+                        job['supabase_table'],
+                        chunks[start:end],
+                        embeddings[start - batch['chunk_start']:end - batch['chunk_start']],
+                        self._document_metadata(job),
+                        chunk_offset=start,
+                        document_key=job.get('document_id') or job['job_key']
+                    )
+                    failed_ranges.extend(result['failed_ranges'])
+                    errors.extend(result['errors'])
+                if failed_ranges:
+                    # Kept in the staging dir, so a retried job resumes from it as well
+                    with open(f"{unsent_path}.part", 'w') as f:
+                        json.dump(failed_ranges, f)
+                    os.replace(f"{unsent_path}.part", unsent_path)
+                    raise Exception(
+                        f"{sum(end - start for start, end in failed_ranges)} of {len(batch_chunks)} chunks "
+                        f"were not stored: {'; '.join(errors[:5])}"
+                    )
+                # New rows are searchable now; cached results for the table are stale
+                search_cache.invalidate_table(job['user_id'], job['supabase_table'])
+                local_vector_index.mark_stale(supabase_credentials, job['supabase_table'], job.get('document_id'))
+                await self._update_batch(batch['id'], 'stored')
+                await self._update_job(job_id, stage='store', completed_batches=await self._stored_batches(job_id))
+                os.unlink(embeddings_path)
+                if os.path.exists(unsent_path):
+                    os.unlink(unsent_path)
+                return True
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(
+                    f"Ingestion job {job_id} batch {batch['batch_index']} attempt "
+                    f"{attempt}/{self.batch_max_attempts} failed: {str(e)}"
+                )
+                if attempt == self.batch_max_attempts:
+                    await self._update_batch(batch['id'], 'failed', str(e))
+                    return False
+                await asyncio.sleep(2 ** (attempt - 1))
+        return False
+
+    async def _update_batch(self, batch_id: int, status: str, error_message: Optional[str] = None):
+        await db.execute(
+            "UPDATE ingestion_job_batches SET status = %s, attempts = attempts + %s, error_message = %s "
+            "WHERE id = %s",
+            (status, 1 if status == 'failed' else 0, error_message, batch_id)
+        )
+
+    async def _stored_batches(self, job_id: int) -> int:
+        result = await db.execute(
+            "SELECT COUNT(*) AS count FROM ingestion_job_batches WHERE job_id = %s AND status = 'stored'",
+            (job_id,)
+        )
+        return result[0]['count'] if result else 0
+
+    def _document_metadata(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        if job['source'] == 'google_drive':
+            # ingestion_job tells this version's rows apart from those of earlier ingestions
+            return {"document_id": job['document_id'], "title": job.get('filename'), "ingestion_job": job['job_key']}
+        return {"filename": job.get('filename'), "size": job.get('size')}
+
+    async def _finalize(self, job: Dict[str, Any]):
+        job_id = job['id']
+        chunk_count = (await self.get_job(job_id) or {}).get('chunk_count') or 0
+
+        if job['source'] == 'google_drive' and job.get('document_id'):
+            await self._replace_previous_version(job)
+
+        # Log the vectorization in the database
+        log_query = """
+            INSERT INTO knowledge_base_documents
+            (document_id, filename, source, user_id, supabase_table, size, chunk_count)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """
+        await db.execute(
+            log_query,
+            (
+                job.get('document_id'),
+                job.get('filename'),
+                job['source'],
+                job['user_id'],
+                job['supabase_table'],
+                job.get('size'),
+                chunk_count
+            )
+        )
+        if job['source'] == 'google_drive':
+            await db.execute(
+                "UPDATE drive_sync_files SET ingested_version = queued_version "
+                "WHERE user_id = %s AND file_id = %s AND last_job_id = %s",
+                (job['user_id'], job['document_id'], job_id)
+            )
+        await self._update_job(job_id, status='completed', stage='done', error_message=None, finished_at=NOW)
+        shutil.rmtree(self.staging_path(job_id), ignore_errors=True)
+        logger.info(f"Ingestion job {job_id} completed with {chunk_count} chunks")
+
+    async def _replace_previous_version(self, job: Dict[str, Any]):
+        """Re-ingested Drive document: drop rows of the old version that this job did not overwrite"""
+        supabase_credentials = await get_service_credentials(job['user_id'], 'Supabase')
+        if not supabase_credentials:
+            raise Exception("Supabase not connected for this user")
+        await supabase_service.delete_document(
+            supabase_credentials,
+            job['supabase_table'],
+            job['document_id'],
+            keep_ingestion_job=job['job_key']
+        )
+        search_cache.invalidate_table(job['user_id'], job['supabase_table'])
+        local_vector_index.mark_stale(supabase_credentials, job['supabase_table'])
+        await db.execute(
+            "DELETE FROM knowledge_base_documents WHERE user_id = %s AND document_id = %s AND supabase_table = %s",
+            (job['user_id'], job['document_id'], job['supabase_table'])
+        )
+
+ingestion_job_queue = IngestionJobQueue()
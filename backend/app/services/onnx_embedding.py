@@ -0,0 +1,155 @@
+# backend/app/services/onnx_embedding.py
+
+import json
+import logging
+import os
+from typing import List, Union
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MODEL_FILE = "model.int8.onnx"
+CONFIG_FILE = "embedding_config.json"
+
+def export_quantized_model(model_name: str, output_dir: str):
+    """
+    Export a SentenceTransformer's transformer to ONNX and quantize its weights to int8.
+    Needs torch and sentence-transformers; runs once per model and is cached on disk.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    st_model = SentenceTransformer(model_name, device='cpu')
+    transformer = st_model[0].auto_model
+    tokenizer = st_model.tokenizer
+    modules = [type(module).__name__ for module in st_model]
+    pooling = st_model[1].get_pooling_mode_str() if 'Pooling' in modules else 'mean'
+    if pooling not in ('mean', 'cls'):
+        raise Exception(f"Unsupported pooling mode for ONNX export: {pooling}")
+
+    class Encoder(torch.nn.Module):
+        """Expose only last_hidden_state so the graph has a single, stable output"""
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids=None):
+            return self.model(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                token_type_ids=token_type_ids
+            ).last_hidden_state
+
+    os.makedirs(output_dir, exist_ok=True)
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]}
+
+    fp32_path = os.path.join(output_dir, "model.fp32.onnx")
+    transformer.eval()
+    with torch.no_grad():
+        torch.onnx.export(
+            Encoder(transformer),
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+            do_constant_folding=True
+        )
+
+    # Dynamic quantization: int8 weights, activations quantized on the fly per batch
+    quantize_dynamic(fp32_path, os.path.join(output_dir, MODEL_FILE), weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+
+    tokenizer.save_pretrained(output_dir)
+    config = {
+        "model_name": model_name,
+        "pooling": pooling,
+        "normalize": 'Normalize' in modules,
+        "max_seq_length": st_model.max_seq_length,
+        "dimension": st_model.get_sentence_embedding_dimension()
+    }
+    with open(os.path.join(output_dir, CONFIG_FILE), 'w') as f:
+        json.dump(config, f)
+    logger.info(f"Exported int8 ONNX embedding model for {model_name} to {output_dir}")
+
+class OnnxEmbeddingModel:
+    """
+    int8 ONNX embedding model run through onnxruntime on CPU.
+    Implements the subset of the SentenceTransformer interface the app uses
+    (encode, tokenizer, max_seq_length, get_sentence_embedding_dimension).
+    """
+
+    def __init__(self, model_dir: str, threads: int = 0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(model_dir, CONFIG_FILE)) as f:
+            self.config = json.load(f)
+        self.model_path = os.path.join(model_dir, MODEL_FILE)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_seq_length = self.config["max_seq_length"]
+
+    @classmethod
+    def load(cls, model_name: str, cache_dir: str, threads: int = 0) -> "OnnxEmbeddingModel":
+        """Load the quantized model for model_name, exporting it on first use"""
+        model_dir = os.path.join(cache_dir, model_name.replace('/', '__'))
+        if not os.path.exists(os.path.join(model_dir, CONFIG_FILE)):
+            export_quantized_model(model_name, model_dir)
+        return cls(model_dir, threads)
+
+    @property
+    def size_bytes(self) -> int:
+        return os.path.getsize(self.model_path)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config["dimension"]
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False,
+        show_progress_bar: bool = False
+    ) -> np.ndarray:
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        embeddings = np.empty((len(sentences), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        for start in range(0, len(sentences), batch_size):
+            batch = sentences[start:start + batch_size]
+            encoded = self.tokenizer(
+                batch,
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np"
+            )
+            feeds = {name: encoded[name].astype(np.int64) for name in self.input_names if name in encoded}
+            if "token_type_ids" in self.input_names and "token_type_ids" not in feeds:
+                feeds["token_type_ids"] = np.zeros_like(feeds["input_ids"])
+            hidden = self.session.run(["last_hidden_state"], feeds)[0]
+            embeddings[start:start + len(batch)] = self._pool(hidden, encoded["attention_mask"])
+
+        if normalize_embeddings or self.config.get("normalize"):
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings /= np.maximum(norms, 1e-12)
+        return embeddings[0] if single else embeddings
+
+    def _pool(self, hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        if self.config["pooling"] == 'cls':
+            return hidden[:, 0]
+        mask = attention_mask[..., None].astype(np.float32)
+        return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
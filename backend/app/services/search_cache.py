@@ -0,0 +1,169 @@
+# backend/app/services/search_cache.py
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+from ..config import settings
+from ..monitoring.metrics import search_cache_hits_total, search_cache_misses_total
+from .embedding_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries also expire after ttl seconds.
+    Not thread-safe: meant to be used from the event loop only.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                search_cache_hits_total.labels(cache=self.name).inc()
+                return value
+            del self._entries[key]
+        self.misses += 1
+        search_cache_misses_total.labels(cache=self.name).inc()
+        return _MISSING
+
+    def set(self, key: Hashable, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one execution"""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda finished: self._finish(key, finished))
+        else:
+            self.coalesced += 1
+        # shield: one caller disconnecting must not cancel the call the others wait on
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception so it is not reported as unhandled when every caller went away
+        if not task.cancelled():
+            task.exception()
+
+class SearchCache:
+    """
+    Caches query embeddings and final search results for the knowledge base search.
+    Result keys carry a per-(user, table) generation that is bumped when the
+    table is re-ingested, so stale results are never served after new data lands.
+    """
+
+    def __init__(self):
+        self.query_embeddings = TTLCache(
+            "query_embedding",
+            settings.search_query_cache_size,
+            settings.search_query_cache_ttl
+        )
+        self.results = TTLCache(
+            "results",
+            settings.search_result_cache_size,
+            settings.search_result_cache_ttl
+        )
+        self._embedding_flights = SingleFlight()
+        self._result_flights = SingleFlight()
+        self._generations: Dict[Tuple[Any, str], int] = {}
+
+    async def get_query_embedding(
+        self,
+        model_name: str,
+        query: str,
+        compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        key = (model_name, normalize_text(query))
+        embedding = self.query_embeddings.get(key)
+        if embedding is not _MISSING:
+            return embedding
+
+        async def load():
+            embedding = await compute()
+            self.query_embeddings.set(key, embedding)
+            return embedding
+
+        return await self._embedding_flights.do(key, load)
+
+    async def get_results(
+        self,
+        user_id: Any,
+        table_name: str,
+        query: str,
+        top_k: int,
+        similarity_threshold: float,
+        compute: Callable[[], Awaitable[Any]],
+        use_hybrid_search: bool = False
+    ) -> Any:
+        generation = self._generations.get((user_id, table_name), 0)
+        key = (
+            user_id, table_name, generation, normalize_text(query),
+            top_k, similarity_threshold, use_hybrid_search
+        )
+        results = self.results.get(key)
+        if results is not _MISSING:
+            return results
+
+        async def load():
+            results = await compute()
+            # Skip caching if the table was re-ingested while the search was running
+            if self._generations.get((user_id, table_name), 0) == generation:
+                self.results.set(key, results)
+            return results
+
+        return await self._result_flights.do(key, load)
+
+    def invalidate_table(self, user_id: Any, table_name: str):
+        """Drop cached results for a table whose contents changed"""
+        self._generations[(user_id, table_name)] = self._generations.get((user_id, table_name), 0) + 1
+        logger.debug(f"Invalidated search cache for table {table_name} of user {user_id}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "query_embeddings": self.query_embeddings.stats(),
+            "results": self.results.stats(),
+            "coalesced_requests": self._embedding_flights.coalesced + self._result_flights.coalesced
+        }
+
+search_cache = SearchCache()
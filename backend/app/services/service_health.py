@@ -0,0 +1,142 @@
+# backend/app/services/service_health.py
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import httpx
+from ..config import settings
+from ..monitoring.metrics import service_health_check_duration_seconds, service_health_up
+from .credential_validator import credential_validator
+
+logger = logging.getLogger(__name__)
+
+SERVICES = ["Twilio", "Supabase", "Google Calendar", "Ultravox", "SERP API", "Airtable", "Gmail", "Google Drive"]
+GOOGLE_SERVICES = {"Google Calendar", "Gmail", "Google Drive"}
+
+def configured_credentials(service: str) -> Optional[Dict[str, Any]]:
+    """The application-level credentials for a service, or None when it is not configured"""
+    credentials = {
+        "Twilio": {'accountSid': settings.twilio_account_sid, 'authToken': settings.twilio_auth_token},
+        "Supabase": {'url': settings.supabase_url, 'apiKey': settings.supabase_key},
+        "Ultravox": {'apiKey': settings.ultravox_api_key},
+        "SERP API": {'apiKey': os.getenv('SERP_API_KEY', '')},
+        "Airtable": {'apiKey': os.getenv('AIRTABLE_API_KEY', ''), 'baseId': os.getenv('AIRTABLE_BASE_ID', '')},
+    }.get(service)
+    if service in GOOGLE_SERVICES:
+        credentials = {'clientId': settings.google_client_id, 'clientSecret': settings.google_client_secret}
+    if not credentials or not all(credentials.values()):
+        return None
+    return credentials
+
+class ServiceHealthProber:
+    """
+    Validates every configured service in the background, concurrently and with
+    non-blocking HTTP, and caches the results. Status reads never touch the network:
+    they return the cached result, and a missing or expired one starts a refresh
+    in the background.
+    """
+
+    def __init__(self):
+        self.interval = settings.service_health_interval
+        self.ttl = settings.service_health_ttl
+        self.timeout = settings.service_health_timeout
+        # service -> (checked at, status)
+        self._results: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._refresh: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def get_status(self, service: str) -> Dict[str, Any]:
+        if service not in SERVICES:
+            return self._status(service, False, "not_configured", f"No health check for {service}")
+        entry = self._results.get(service)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            self.refresh()
+        if entry is None:
+            return self._status(service, False, "pending", f"{service} has not been checked yet")
+        return dict(entry[1], stale=time.monotonic() - entry[0] > self.ttl)
+
+    def get_all(self) -> List[Dict[str, Any]]:
+        return [self.get_status(service) for service in SERVICES]
+
+    def refresh(self) -> asyncio.Task:
+        """Start a probe of every service unless one is already running"""
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.ensure_future(self.probe_all())
+        return self._refresh
+
+    async def probe_all(self) -> Dict[str, Dict[str, Any]]:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        started = time.monotonic()
+        statuses = await asyncio.gather(*(self._probe(service) for service in SERVICES))
+        logger.debug(f"Probed {len(SERVICES)} services in {(time.monotonic() - started) * 1000:.0f}ms")
+        return {status['service']: status for status in statuses}
+
+    async def _probe(self, service: str) -> Dict[str, Any]:
+        started = time.monotonic()
+        credentials = configured_credentials(service)
+        try:
+            if credentials is None:
+                status = self._status(service, False, "not_configured", f"{service} is not configured")
+            elif service in GOOGLE_SERVICES:
+                # Google access is per user through OAuth; the app only needs its OAuth client
+                status = self._status(service, True, "configured", f"{service} OAuth client is configured")
+            else:
+                result = await asyncio.wait_for(
+                    credential_validator.validate_credentials_async(service, credentials, self._client, self.timeout),
+                    timeout=self.timeout + 1
+                )
+                if result.get('valid'):
+                    status = self._status(service, True, "configured", f"{service} is successfully configured")
+                else:
+                    status = self._status(service, False, "invalid", result.get('error') or f"{service} credentials are invalid")
+        except Exception as e:
+            logger.warning(f"Health check for {service} failed: {str(e)}")
+            status = self._status(service, False, "error", f"Error checking {service} connection")
+
+        elapsed = time.monotonic() - started
+        status['latency_ms'] = round(elapsed * 1000, 1)
+        service_health_check_duration_seconds.labels(service=service).observe(elapsed)
+        service_health_up.labels(service=service).set(1 if status['connected'] else 0)
+        self._results[service] = (time.monotonic(), status)
+        return status
+
+    @staticmethod
+    def _status(service: str, connected: bool, status: str, message: str) -> Dict[str, Any]:
+        return {
+            "service": service,
+            "connected": connected,
+            "status": status,
+            "message": message,
+            "last_checked": datetime.utcnow().isoformat() if status != "pending" else None
+        }
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._probe_loop())
+            logger.info(f"Service health prober started (every {self.interval}s)")
+
+    async def stop(self):
+        tasks = [task for task in (self._task, self._refresh) if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+
+    async def _probe_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Service health probe error: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+service_health = ServiceHealthProber()
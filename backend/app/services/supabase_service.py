@@ -1,45 +1,162 @@
 import logging
 import json
+import hashlib
+import io
+import random
+import uuid
 import httpx
 import asyncio
-from datetime import datetime
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Union
+import numpy as np
 from fastapi import HTTPException
+from ..config import settings
+from .http_client_pool import HttpClientPool, credential_fingerprint, supabase_client_pool
 
 logger = logging.getLogger(__name__)
 
+# float32 carries about 7 significant decimal digits
+VECTOR_SIGNIFICANT_DIGITS = 7
+
 class SupabaseService:
-    def __init__(self):
-        self.client_cache = {}  # Cache for httpx clients to reuse connections
-        self.timeout = httpx.Timeout(30.0, connect=10.0)  # Longer timeout for large vector operations
+    def __init__(self, client_pool: Optional[HttpClientPool] = None):
+        self.client_pool = client_pool or supabase_client_pool  # Shared app-lifetime clients
+        self.legacy_tables = set()  # Tables without the chunk_id upsert key
         
+    @staticmethod
+    def _pool_key(supabase_url: str, api_key: str) -> Tuple[str, str]:
+        # Callers pass the project URL with or without /rest/v1; both share one client
+        project_url = supabase_url.rstrip('/')
+        if project_url.endswith('/rest/v1'):
+            project_url = project_url[:-len('/rest/v1')]
+        return (project_url, credential_fingerprint(api_key))
+
+    @staticmethod
+    def _client_headers(api_key: str) -> Dict[str, str]:
+        return {
+            "apikey": api_key,
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+
     async def get_client(self, supabase_url: str, api_key: str) -> httpx.AsyncClient:
-        """Get or create an httpx client for the given Supabase URL"""
-        cache_key = f"{supabase_url}:{api_key[:5]}"  # Use part of API key for the cache key
-        
-        if cache_key not in self.client_cache:
-            logger.debug(f"Creating new httpx client for {supabase_url}")
-            self.client_cache[cache_key] = httpx.AsyncClient(
-                timeout=self.timeout,
-                headers={
-                    "apikey": api_key,
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json"
-                }
-            )
-        
-        return self.client_cache[cache_key]
+        """Get the pooled httpx client for a Supabase project and API key, for a single request"""
+        return self.client_pool.get(self._pool_key(supabase_url, api_key), headers=self._client_headers(api_key))
+
+    def lease_client(self, supabase_url: str, api_key: str):
+        """The pooled client for a project, kept open for a block making many requests"""
+        return self.client_pool.lease(self._pool_key(supabase_url, api_key), headers=self._client_headers(api_key))
+
+    @staticmethod
+    def chunk_id(document_key: str, chunk_index: int) -> str:
+        """Stable row key for a chunk, so re-sending it updates the row instead of duplicating it"""
+        return hashlib.sha1(f"{document_key}\0{chunk_index}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _vector_literals(embeddings: Union[List[List[float]], np.ndarray]) -> List[str]:
+        """pgvector text literals ("[0.1,0.2]") with float32 precision, much smaller than JSON floats"""
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2 or not len(matrix):
+            return []
+        buffer = io.StringIO()
+        np.savetxt(buffer, matrix, fmt=f"%.{VECTOR_SIGNIFICANT_DIGITS}g", delimiter=",")
+        return [f"[{line}]" for line in buffer.getvalue().splitlines()]
+
+    def _build_batches(
+        self,
+        text_chunks: List[str],
+        vectors: List[str],
+        metadata: Dict[str, Any],
+        chunk_offset: int,
+        document_key: str,
+        upsert: bool
+    ):
+        """Yield (first chunk position, row count, JSON body) batches capped by payload size"""
+        max_bytes = settings.supabase_upload_batch_bytes
+        max_rows = settings.supabase_upload_batch_rows
+        encoded_rows: List[bytes] = []
+        size = 0
+        first = 0
+
+        for i, (chunk, vector) in enumerate(zip(text_chunks, vectors)):
+            chunk_index = chunk_offset + i
+            row = {
+                "content": chunk,
+                "embedding": vector,
+                # Fresh dict per row; the caller's metadata is never modified
+                "metadata": {**metadata, "chunk_index": chunk_index}
+            }
+            if upsert:
+                row["chunk_id"] = self.chunk_id(document_key, chunk_index)
+            encoded = json.dumps(row, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+            if encoded_rows and (size + len(encoded) > max_bytes or len(encoded_rows) >= max_rows):
+                yield first, len(encoded_rows), b"[" + b",".join(encoded_rows) + b"]"
+                encoded_rows, size, first = [], 0, i
+            encoded_rows.append(encoded)
+            size += len(encoded) + 1
+
+        if encoded_rows:
+            yield first, len(encoded_rows), b"[" + b",".join(encoded_rows) + b"]"
+
+    @staticmethod
+    def _rejects_upsert_key(response: httpx.Response) -> bool:
+        """
+        Whether the table cannot take chunk_id upserts: the column is missing
+        (42703, or PGRST204 from the schema cache) or has no unique constraint
+        for ON CONFLICT to use (42P10, whose message does not name the column)
+        """
+        try:
+            error = response.json()
+        except ValueError:
+            return False
+        return isinstance(error, dict) and error.get('code') in ('42703', 'PGRST204', '42P10')
+
+    async def _post_batch(self, client: httpx.AsyncClient, url: str, body: bytes, upsert: bool):
+        """POST one batch, retrying rate limits, server errors and network failures with backoff"""
+        params = {"on_conflict": "chunk_id"} if upsert else None
+        prefer = "resolution=merge-duplicates,return=minimal" if upsert else "return=minimal"
+        max_attempts = settings.supabase_upload_max_attempts
+
+        for attempt in range(1, max_attempts + 1):
+            try:
+                response = await client.post(
+                    url,
+                    content=body,
+                    params=params,
+                    headers={"Prefer": prefer, "Content-Type": "application/json"}
+                )
+                if response.status_code < 400:
+                    return
+                if response.status_code != 429 and response.status_code < 500:
+                    # Client errors will not succeed on retry
+                    response.raise_for_status()
+                error = Exception(f"HTTP {response.status_code}: {response.text[:200]}")
+            except httpx.TransportError as e:
+                error = e
+
+            if attempt == max_attempts:
+                raise error
+            delay = settings.supabase_upload_retry_delay * 2 ** (attempt - 1)
+            await asyncio.sleep(delay * (0.5 + random.random()))
 
     async def store_embeddings(
         self,
         credentials: Dict[str, Any],
         table_name: str,
         text_chunks: List[str],
-        embeddings: List[List[float]],
-        metadata: Dict[str, Any] = {}
+        embeddings: Union[List[List[float]], np.ndarray],
+        metadata: Dict[str, Any] = {},
+        chunk_offset: int = 0,
+        document_key: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Store text chunks and their embeddings in Supabase
+        Store text chunks and their embeddings in Supabase.
+        chunk_offset is the position of the first chunk within the whole document, and
+        document_key identifies the document so a retried upload upserts the same rows.
+
+        Batches are sized by payload bytes and uploaded by a bounded pool of workers,
+        each retrying its batch independently; the result reports how many chunks
+        were actually stored.
         """
         try:
             supabase_url = credentials.get('url')
@@ -52,74 +169,142 @@ class SupabaseService:
             if not supabase_url.endswith('/rest/v1'):
                 supabase_url = f"{supabase_url.rstrip('/')}/rest/v1"
                 
-            # Prepare data for insertion
-            rows = []
-            for i, (chunk, embedding) in enumerate(zip(text_chunks, embeddings)):
-                row = {
-                    "content": chunk,
-                    "embedding": embedding,
-                    "metadata": metadata
-                }
-                rows.append(row)
-                
-            client = await self.get_client(supabase_url, api_key)
-            
-            # Insert rows in batches to avoid hitting request size limits
-            BATCH_SIZE = 50  # Increased from 20 for better performance
-            results = []
-            tasks = []
-            
-            # Prepare metadata with additional information
-            enhanced_metadata = {
-                **metadata,
-                "timestamp": datetime.now().isoformat(),
-                "chunk_count": len(text_chunks),
-                "embedding_model": "paraphrase-multilingual-MiniLM-L12-v2"
-            }
-            
-            # Process batches
-            for i in range(0, len(rows), BATCH_SIZE):
-                batch = rows[i:i+BATCH_SIZE]
-                
-                # Add batch index to individual row metadata
-                for j, row in enumerate(batch):
-                    row_metadata = row.get("metadata", {}).copy()
-                    row_metadata.update({
-                        "batch_index": i // BATCH_SIZE,
-                        "chunk_index": i + j
-                    })
-                    row["metadata"] = row_metadata
-                
-                # Add to tasks for concurrent execution
-                tasks.append(
-                    client.post(
-                        f"{supabase_url}/{table_name}",
-                        json=batch,
-                        headers={"Prefer": "return=minimal"}
-                    )
-                )
-                
-                # Execute in batches of 3 concurrent requests to avoid overwhelming the server
-                if len(tasks) >= 3 or i + BATCH_SIZE >= len(rows):
-                    for response in await asyncio.gather(*tasks, return_exceptions=True):
-                        if isinstance(response, Exception):
-                            logger.error(f"Batch insertion error: {response}")
-                            results.append(False)
-                        else:
-                            response.raise_for_status()
-                            results.append(response.status_code == 200 or response.status_code == 201)
-                    tasks = []
-                    
+            table_url = f"{supabase_url}/{table_name}"
+            document_key = document_key or metadata.get('document_id') or metadata.get('filename') or uuid.uuid4().hex
+            vectors = self._vector_literals(embeddings)
+            if len(vectors) != len(text_chunks):
+                raise ValueError(f"Got {len(vectors)} embeddings for {len(text_chunks)} chunks")
+
+            async with self.lease_client(supabase_url, api_key) as client:
+                upload_args = (client, table_url, text_chunks, vectors, metadata, chunk_offset, document_key)
+                stored = await self._upload(*upload_args, upsert=table_url not in self.legacy_tables)
+                if stored is None:
+                    # Table predates the chunk_id column: fall back to plain inserts
+                    logger.warning(f"Table {table_name} has no chunk_id upsert key; uploads are not idempotent")
+                    self.legacy_tables.add(table_url)
+                    stored = await self._upload(*upload_args, upsert=False)
+
+            stored_chunks, failed_ranges, errors = stored
+            failed_chunks = len(text_chunks) - stored_chunks
+            if failed_chunks:
+                logger.error(f"Failed to store {failed_chunks} of {len(text_chunks)} chunks in {table_name}: {errors[0]}")
             return {
-                "success": True,
-                "chunks_stored": len(text_chunks),
+                "success": failed_chunks == 0,
+                "chunks_stored": stored_chunks,
+                "chunks_failed": failed_chunks,
+                "failed_batches": [start for start, _ in failed_ranges],
+                # [start, end) chunk positions that were not stored
+                "failed_ranges": failed_ranges,
+                # False on legacy tables: resending stored chunks would duplicate their rows
+                "idempotent": table_url not in self.legacy_tables,
+                "errors": errors[:5],
                 "table": table_name
             }
             
         except Exception as e:
             logger.error(f"Error storing embeddings in Supabase: {str(e)}")
             raise Exception(f"Supabase API error: {str(e)}")
+
+    async def _upload(
+        self,
+        client: httpx.AsyncClient,
+        table_url: str,
+        text_chunks: List[str],
+        vectors: List[str],
+        metadata: Dict[str, Any],
+        chunk_offset: int,
+        document_key: str,
+        upsert: bool
+    ) -> Optional[Tuple[int, List[int], List[str]]]:
+        """
+        Producer/consumer upload. Returns (chunks stored, failed [start, end) chunk
+        ranges, errors), or None if the table rejects the upsert key.
+        """
+        concurrency = settings.supabase_upload_concurrency
+        queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+        stored = 0
+        failed_ranges: List[Tuple[int, int]] = []
+        errors: List[str] = []
+        missing_upsert_key = False
+
+        async def consumer():
+            nonlocal stored, missing_upsert_key
+            while True:
+                item = await queue.get()
+                try:
+                    if item is None:
+                        return
+                    first, count, body = item
+                    if missing_upsert_key:
+                        continue
+                    try:
+                        await self._post_batch(client, table_url, body, upsert)
+                        stored += count
+                    except httpx.HTTPStatusError as e:
+                        if upsert and self._rejects_upsert_key(e.response):
+                            missing_upsert_key = True
+                        failed_ranges.append((chunk_offset + first, chunk_offset + first + count))
+                        errors.append(f"{e.response.status_code}: {e.response.text[:200]}")
+                    except Exception as e:
+                        failed_ranges.append((chunk_offset + first, chunk_offset + first + count))
+                        errors.append(str(e))
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(consumer()) for _ in range(concurrency)]
+        try:
+            # The bounded queue makes the producer wait while every worker is busy
+            for batch in self._build_batches(text_chunks, vectors, metadata, chunk_offset, document_key, upsert):
+                await queue.put(batch)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        except BaseException:
+            for worker in workers:
+                worker.cancel()
+            raise
+
+        if missing_upsert_key and stored == 0:
+            return None
+        return stored, sorted(failed_ranges), errors
+
+    async def delete_document(
+        self,
+        credentials: Dict[str, Any],
+        table_name: str,
+        document_id: str,
+        keep_ingestion_job: Optional[str] = None
+    ):
+        """
+        Delete the rows of a document. With keep_ingestion_job, rows written by that
+        ingestion job are kept, which drops chunks left over from an older version.
+        """
+        try:
+            supabase_url = credentials.get('url')
+            api_key = credentials.get('apiKey')
             
+            if not supabase_url or not api_key:
+                raise ValueError("Invalid Supabase credentials")
+                
+            if not supabase_url.endswith('/rest/v1'):
+                supabase_url = f"{supabase_url.rstrip('/')}/rest/v1"
+                
+            params = {"metadata->>document_id": f"eq.{document_id}"}
+            if keep_ingestion_job:
+                params["or"] = f"(metadata->>ingestion_job.is.null,metadata->>ingestion_job.neq.{keep_ingestion_job})"
+            
+            client = await self.get_client(supabase_url, api_key)
+            response = await client.delete(
+                f"{supabase_url}/{table_name}",
+                params=params,
+                headers={"Prefer": "return=minimal"}
+            )
+            response.raise_for_status()
+            
+        except Exception as e:
+            logger.error(f"Error deleting document {document_id} from Supabase: {str(e)}")
+            raise Exception(f"Supabase API error: {str(e)}")
+
     async def search_embeddings(
         self,
         credentials: Dict[str, Any],
@@ -150,13 +335,14 @@ class SupabaseService:
             client = await self.get_client(supabase_url, api_key)
             
             if use_hybrid_search and query_text:
-                # Use hybrid search combining vector similarity with text search
+                # Hybrid search: ANN and full-text candidates merged with reciprocal-rank fusion
                 search_payload = {
                     "query_embedding": query_embedding,
                     "query_text": query_text,
                     "match_threshold": similarity_threshold,
                     "match_count": top_k,
-                    "table_name": table_name
+                    "table_name": table_name,
+                    "candidate_count": max(settings.search_candidate_count, top_k)
                 }
                 
                 response = await client.post(
@@ -177,19 +363,24 @@ class SupabaseService:
                     json=search_payload
                 )
                 
-                response.raise_for_status()
-                results = response.json()
+            response.raise_for_status()
+            results = response.json()
+            
+            # Format the results
+            formatted_results = []
+            for result in results:
+                formatted_result = {
+                    "text": result.get("content", ""),
+                    # Rows found only by full-text search have no vector similarity
+                    "similarity_score": result.get("similarity") or 0,
+                    "metadata": result.get("metadata", {})
+                }
+                if "score" in result:
+                    formatted_result["text_score"] = result.get("text_similarity") or 0
+                    formatted_result["rrf_score"] = result.get("score")
+                formatted_results.append(formatted_result)
                 
-                # Format the results
-                formatted_results = []
-                for result in results:
-                    formatted_results.append({
-                        "text": result.get("content", ""),
-                        "similarity_score": result.get("similarity", 0),
-                        "metadata": result.get("metadata", {})
-                    })
-                    
-                return formatted_results
+            return formatted_results
                 
         except Exception as e:
             logger.error(f"Error searching embeddings in Supabase: {str(e)}")
@@ -212,57 +403,49 @@ class SupabaseService:
             else:
                 tables_url = f"{supabase_url}/"
                 
-            # Use httpx for async requests
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    tables_url,
-                    headers={
-                        "apikey": api_key,
-                        "Authorization": f"Bearer {api_key}"
-                    }
-                )
-                
-                response.raise_for_status()
-                
-                # Parse the response, which should be a list of tables
-                tables = []
-                result = response.json()
-                
-                if isinstance(result, dict) and 'tables' in result:
-                    tables = [table.get('name') for table in result.get('tables', [])]
-                elif isinstance(result, dict) and 'paths' in result:
-                    tables = list(result.get('paths', {}).keys())
-                elif isinstance(result, list):
-                    tables = result
-                
-                return tables
+            client = await self.get_client(supabase_url, api_key)
+            response = await client.get(tables_url)
+            
+            response.raise_for_status()
+            
+            # Parse the response, which should be a list of tables
+            tables = []
+            result = response.json()
+            
+            if isinstance(result, dict) and 'tables' in result:
+                tables = [table.get('name') for table in result.get('tables', [])]
+            elif isinstance(result, dict) and 'paths' in result:
+                tables = list(result.get('paths', {}).keys())
+            elif isinstance(result, list):
+                tables = result
+            
+            return tables
                 
         except Exception as e:
             logger.error(f"Error listing Supabase tables: {str(e)}")
             raise Exception(f"Supabase API error: {str(e)}")
     
-    async def create_embeddings_table(
-        self,
-        credentials: Dict[str, Any],
-        table_name: str,
-        dimension: int = 384,
-        use_hnsw: bool = True
-    ) -> Dict[str, Any]:
+    def embeddings_table_sql(self, table_name: str, dimension: int = 384, use_hnsw: bool = True) -> str:
         """
-        Create a new table for storing embeddings in Supabase with improved indexing
+        SQL creating an embeddings table, its vector and text search indexes and the search functions
         """
-        try:
-            # This would typically be done through Supabase's SQL editor or management tools,
-            # but we can do it programmatically using the REST API's SQL endpoint
-            
-            supabase_url = credentials.get('url')
-            api_key = credentials.get('apiKey')
-            
-            if not supabase_url or not api_key:
-                raise ValueError("Invalid Supabase credentials")
-                
-            # Define the SQL to create the table and functions with modern indexing
-            sql = f"""
+        # Create vector index (HNSW is better for larger datasets)
+        if use_hnsw:
+            vector_index_sql = f"""
+            CREATE INDEX IF NOT EXISTS {table_name}_embedding_hnsw_idx ON {table_name} 
+            USING hnsw (embedding vector_cosine_ops) 
+            WITH (m = 16, ef_construction = 64);
+            """
+        else:
+            vector_index_sql = f"""
+            CREATE INDEX IF NOT EXISTS {table_name}_embedding_idx ON {table_name} 
+            USING ivfflat (embedding vector_cosine_ops) 
+            WITH (lists = 100);
+            """
+
+        # Both search functions fetch ANN candidates with ORDER BY distance LIMIT n, the
+        # only shape the HNSW/IVFFlat index can serve, and apply the threshold afterwards
+        return f"""
             -- Enable the pgvector extension if not already enabled
             CREATE EXTENSION IF NOT EXISTS vector;
             
@@ -272,20 +455,17 @@ class SupabaseService:
                 content TEXT,
                 embedding VECTOR({dimension}),
                 metadata JSONB,
+                chunk_id TEXT,
                 ts_content TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', content)) STORED,
                 created_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc', NOW())
             );
             
+            -- Upsert key for idempotent uploads (added to tables created before it existed)
+            ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS chunk_id TEXT;
+            CREATE UNIQUE INDEX IF NOT EXISTS {table_name}_chunk_id_idx ON {table_name} (chunk_id);
+            
             -- Create vector index (HNSW is better for larger datasets)
-            {f"""
-            CREATE INDEX IF NOT EXISTS {table_name}_embedding_hnsw_idx ON {table_name} 
-            USING hnsw (embedding vector_cosine_ops) 
-            WITH (m = 16, ef_construction = 64);
-            """ if use_hnsw else f"""
-            CREATE INDEX IF NOT EXISTS {table_name}_embedding_idx ON {table_name} 
-            USING ivfflat (embedding vector_cosine_ops) 
-            WITH (lists = 100);
-            """}
+            {vector_index_sql}
             
             -- Create text search index
             CREATE INDEX IF NOT EXISTS {table_name}_ts_idx ON {table_name} USING GIN (ts_content);
@@ -305,90 +485,138 @@ class SupabaseService:
             )
             LANGUAGE plpgsql
             AS $$
-            DECLARE
-                table_query TEXT;
             BEGIN
-                table_query := format('
-                    SELECT
-                        id,
-                        content,
-                        metadata,
-                        1 - (embedding <=> %L) as similarity
-                    FROM %I
-                    WHERE 1 - (embedding <=> %L) > %L
-                    ORDER BY similarity DESC
-                    LIMIT %L
-                ', query_embedding, table_name, query_embedding, match_threshold, match_count);
+                -- HNSW returns at most ef_search rows per scan
+                PERFORM set_config('hnsw.ef_search', GREATEST(match_count, 40)::TEXT, true);
                 
-                RETURN QUERY EXECUTE table_query;
+                RETURN QUERY EXECUTE format('
+                    SELECT c.id, c.content, c.metadata, (1 - c.distance)::FLOAT AS similarity
+                    FROM (
+                        SELECT t.id, t.content, t.metadata, t.embedding <=> $1 AS distance
+                        FROM %I t
+                        ORDER BY t.embedding <=> $1
+                        LIMIT $3
+                    ) c
+                    WHERE 1 - c.distance > $2
+                    ORDER BY c.distance
+                ', table_name)
+                USING query_embedding, match_threshold, match_count;
             END;
             $$;
             
-            -- Create function for hybrid search (vector + text)
+            -- The hybrid function's signature and result changed; drop the old version
+            DROP FUNCTION IF EXISTS hybrid_search_documents(VECTOR({dimension}), TEXT, FLOAT, INT, TEXT);
+            
+            -- Create function for hybrid search: ANN candidates and full-text candidates
+            -- merged with reciprocal-rank fusion
             CREATE OR REPLACE FUNCTION hybrid_search_documents(
                 query_embedding VECTOR({dimension}),
                 query_text TEXT,
                 match_threshold FLOAT,
                 match_count INT,
-                table_name TEXT
+                table_name TEXT,
+                candidate_count INT DEFAULT 50,
+                rrf_k INT DEFAULT 60
             )
             RETURNS TABLE (
                 id BIGINT,
                 content TEXT,
                 metadata JSONB,
                 similarity FLOAT,
-                text_similarity FLOAT
+                text_similarity FLOAT,
+                score FLOAT
             )
             LANGUAGE plpgsql
             AS $$
-            DECLARE
-                table_query TEXT;
             BEGIN
-                table_query := format('
-                    SELECT
-                        id,
-                        content,
-                        metadata,
-                        1 - (embedding <=> %L) as similarity,
-                        ts_rank(ts_content, websearch_to_tsquery(%L)) as text_similarity
-                    FROM %I
-                    WHERE 
-                        1 - (embedding <=> %L) > %L
-                        OR ts_content @@ websearch_to_tsquery(%L)
-                    ORDER BY (1 - (embedding <=> %L)) * 0.7 + ts_rank(ts_content, websearch_to_tsquery(%L)) * 0.3 DESC
-                    LIMIT %L
-                ', 
-                query_embedding, query_text, table_name, 
-                query_embedding, match_threshold, query_text,
-                query_embedding, query_text, match_count);
+                PERFORM set_config('hnsw.ef_search', GREATEST(candidate_count, 40)::TEXT, true);
                 
-                RETURN QUERY EXECUTE table_query;
+                RETURN QUERY EXECUTE format('
+                    WITH semantic_candidates AS (
+                        SELECT t.id, t.embedding <=> $1 AS distance
+                        FROM %1$I t
+                        ORDER BY t.embedding <=> $1
+                        LIMIT $5
+                    ),
+                    semantic AS (
+                        SELECT s.id, s.distance, row_number() OVER (ORDER BY s.distance) AS rank
+                        FROM semantic_candidates s
+                        WHERE 1 - s.distance > $3
+                    ),
+                    lexical_candidates AS (
+                        SELECT t.id, ts_rank_cd(t.ts_content, q.query) AS text_rank
+                        FROM %1$I t, websearch_to_tsquery(''english'', $2) AS q(query)
+                        WHERE t.ts_content @@ q.query
+                        ORDER BY text_rank DESC
+                        LIMIT $5
+                    ),
+                    lexical AS (
+                        SELECT l.id, l.text_rank, row_number() OVER (ORDER BY l.text_rank DESC) AS rank
+                        FROM lexical_candidates l
+                    ),
+                    fused AS (
+                        SELECT
+                            COALESCE(s.id, l.id) AS id,
+                            1 - s.distance AS similarity,
+                            l.text_rank AS text_similarity,
+                            COALESCE(1.0 / ($6 + s.rank), 0) + COALESCE(1.0 / ($6 + l.rank), 0) AS score
+                        FROM semantic s
+                        FULL OUTER JOIN lexical l ON l.id = s.id
+                        ORDER BY score DESC
+                        LIMIT $4
+                    )
+                    SELECT t.id, t.content, t.metadata,
+                        f.similarity::FLOAT, f.text_similarity::FLOAT, f.score::FLOAT
+                    FROM fused f
+                    JOIN %1$I t ON t.id = f.id
+                    ORDER BY f.score DESC
+                ', table_name)
+                USING query_embedding, query_text, match_threshold, match_count, candidate_count, rrf_k;
             END;
             $$;
             """
+
+    async def create_embeddings_table(
+        self,
+        credentials: Dict[str, Any],
+        table_name: str,
+        dimension: int = 384,
+        use_hnsw: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Create a new table for storing embeddings in Supabase with improved indexing
+        """
+        try:
+            # This would typically be done through Supabase's SQL editor or management tools,
+            # but we can do it programmatically using the REST API's SQL endpoint
+            
+            supabase_url = credentials.get('url')
+            api_key = credentials.get('apiKey')
+            
+            if not supabase_url or not api_key:
+                raise ValueError("Invalid Supabase credentials")
+                
+            sql = self.embeddings_table_sql(table_name, dimension, use_hnsw)
             
             # Use the SQL endpoint to execute the query
             sql_url = f"{supabase_url.rstrip('/')}/rest/v1/sql"
             
-            # Use httpx for async requests
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    sql_url,
-                    json={"query": sql},
-                    headers={
-                        "apikey": api_key,
-                        "Authorization": f"Bearer {api_key}",
-                        "Content-Type": "application/json"
-                    }
-                )
-                
-                response.raise_for_status()
-                
-                return {
-                    "success": True,
-                    "table_created": table_name
-                }
+            client = await self.get_client(supabase_url, api_key)
+            response = await client.post(sql_url, json={"query": sql})
+            
+            response.raise_for_status()
+            
+            return {
+                "success": True,
+                "table_created": table_name
+            }
                 
         except Exception as e:
             logger.error(f"Error creating embeddings table in Supabase: {str(e)}")
             raise Exception(f"Supabase API error: {str(e)}")
+
+supabase_service = SupabaseService()
+
+def get_supabase_service() -> SupabaseService:
+    """FastAPI dependency returning the shared Supabase service"""
+    return supabase_service
@@ -0,0 +1,120 @@
+# backend/app/services/twilio_http.py
+
+import asyncio
+import base64
+import logging
+import re
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+from aiohttp import ClientSession, ClientTimeout, ConnectionTimeoutError, TCPConnector
+from twilio.http.async_http_client import AsyncTwilioHttpClient
+from twilio.http.response import Response
+from ..monitoring.metrics import twilio_request_duration_seconds, twilio_requests_total
+
+logger = logging.getLogger(__name__)
+
+# Account, call, recording... SIDs: two letters and 32 hex digits
+_SID_PATTERN = re.compile(r"/[A-Z]{2}[0-9a-fA-F]{32}")
+
+class TwilioRequestTimeout(asyncio.TimeoutError):
+    """A Twilio request timed out; request_sent is False if it timed out while connecting"""
+
+    def __init__(self, method: str, endpoint: str, request_sent: bool):
+        super().__init__(f"Twilio request timed out {'waiting for the response' if request_sent else 'connecting'}: {method} {endpoint}")
+        self.request_sent = request_sent
+
+def endpoint_label(url: str) -> str:
+    """Metric label for a Twilio URL, with SIDs replaced so labels stay bounded"""
+    path = _SID_PATTERN.sub("/{sid}", urlsplit(url).path)
+    return path[:-5] if path.endswith(".json") else path
+
+class PooledTwilioHttpClient(AsyncTwilioHttpClient):
+    """
+    Twilio's aiohttp transport with a bounded keep-alive connection pool, a
+    default timeout on every request (the stock client sends none) and
+    per-endpoint latency metrics. The session is opened on first use, so it
+    belongs to the running event loop.
+    """
+
+    def __init__(self, timeout: float, connect_timeout: float, max_connections: int, keepalive: float):
+        super().__init__(pool_connections=False, timeout=timeout)
+        self.client_timeout = ClientTimeout(total=timeout, connect=connect_timeout)
+        self.max_connections = max_connections
+        self.keepalive = keepalive
+        self.session: Optional[ClientSession] = None
+        self.requests = 0
+        self.errors = 0
+
+    def _session(self) -> ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = ClientSession(
+                connector=TCPConnector(
+                    limit=self.max_connections,
+                    keepalive_timeout=self.keepalive,
+                    ttl_dns_cache=300
+                ),
+                timeout=self.client_timeout
+            )
+        return self.session
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, object]] = None,
+        data: Optional[Dict[str, object]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        auth: Optional[Tuple[str, str]] = None,
+        timeout: Optional[float] = None,
+        allow_redirects: bool = False,
+    ) -> Response:
+        method = method.upper()
+        endpoint = endpoint_label(url)
+        if auth is not None:
+            token = base64.b64encode(f"{auth[0]}:{auth[1]}".encode("utf-8")).decode("ascii")
+            headers = {**(headers or {}), "Authorization": f"Basic {token}"}
+        kwargs = {
+            "method": method,
+            "url": url,
+            "params": params,
+            "data": data,
+            "headers": headers,
+            "timeout": ClientTimeout(total=timeout, connect=self.client_timeout.connect) if timeout else self.client_timeout,
+            "allow_redirects": allow_redirects,
+        }
+        self.log_request(kwargs)
+        self.requests += 1
+        started = time.monotonic()
+        status = "error"
+        try:
+            async with self._session().request(**kwargs) as response:
+                status = str(response.status)
+                self.log_response(response.status, response)
+                return Response(response.status, await response.text(), response.headers)
+        except asyncio.TimeoutError as e:
+            status = "timeout"
+            self.errors += 1
+            raise TwilioRequestTimeout(method, endpoint, request_sent=not isinstance(e, ConnectionTimeoutError)) from e
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            twilio_request_duration_seconds.labels(method=method, endpoint=endpoint).observe(time.monotonic() - started)
+            twilio_requests_total.labels(method=method, endpoint=endpoint, status=status).inc()
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def stats(self) -> Dict[str, object]:
+        connector = self.session.connector if self.session is not None else None
+        return {
+            "open": connector is not None and not self.session.closed,
+            "max_connections": self.max_connections,
+            "keepalive_seconds": self.keepalive,
+            "timeout_seconds": self.client_timeout.total,
+            "requests": self.requests,
+            "errors": self.errors
+        }
@@ -4,10 +4,14 @@ from twilio.rest import Client
 from twilio.base.exceptions import TwilioRestException
 from twilio.twiml.voice_response import VoiceResponse, Connect, Stream
 from typing import Optional, Dict, List
+import asyncio
 import logging
 from datetime import datetime
 from ..config import settings
 from ..database import db
+from .call_dialer import CallDialer, TERMINAL_CALL_STATUSES
+from .call_metrics import call_metrics
+from .twilio_http import PooledTwilioHttpClient
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +19,13 @@ class TwilioService:
     def __init__(self):
         self.account_sid = settings.twilio_account_sid  # or settings.TWILIO_ACCOUNT_SID
         self.auth_token = settings.twilio_auth_token    # or settings.TWILIO_AUTH_TOKEN
+        # Every Twilio REST call goes through one pooled async transport, off the event loop's critical path
+        self.http_client = PooledTwilioHttpClient(
+            timeout=settings.twilio_http_timeout,
+            connect_timeout=settings.twilio_http_connect_timeout,
+            max_connections=settings.twilio_http_max_connections,
+            keepalive=settings.twilio_http_keepalive
+        )
         
         # Validate Twilio credentials
         if not self.account_sid or not self.auth_token or \
@@ -23,7 +34,18 @@ class TwilioService:
             self.credentials_valid = False
         else:
             self.credentials_valid = True
-            self.client = Client(self.account_sid, self.auth_token)
+            self.client = Client(self.account_sid, self.auth_token, http_client=self.http_client)
+
+        # Bulk calls share one dialer: its rate and live-call limits are per Twilio account
+        self.dialer = CallDialer(
+            self.create_call,
+            calls_per_second=settings.dialer_calls_per_second,
+            max_live=settings.dialer_max_live_calls,
+            workers=settings.dialer_workers,
+            max_attempts=settings.dialer_max_attempts,
+            retry_delay=settings.dialer_retry_delay,
+            max_call_seconds=settings.dialer_max_call_seconds
+        )
 
         # Build callback URLs
         self.webhook_url = f"https://{settings.server_domain}/api/calls/incoming-call"
@@ -46,69 +68,15 @@ class TwilioService:
             raise Exception(error_msg)
             
         try:
-            if ultravox_url:
-                # Log the Ultravox URL we're using
-                logger.info(f"Making call with Ultravox integration. URL: {ultravox_url}")
-                
-                # Create TwiML with <Connect><Stream> for Ultravox
-                twiml = VoiceResponse()
-                connect = Connect()
-                
-                # Format URL if needed
-                if ultravox_url.startswith('http'):
-                    # Convert to WebSocket if it's an HTTP URL
-                    ultravox_url = ultravox_url.replace('https://', 'wss://')
-                
-                stream = Stream(url=ultravox_url)
-                # Add parameters for better media streaming
-                stream.parameter(name="format", value="audio/x-raw")
-                stream.parameter(name="sampleRate", value="16000")
-                
-                connect.append(stream)
-                twiml.append(connect)
-                
-                # Log the TwiML we're sending
-                twiml_str = str(twiml)
-                logger.debug(f"Using TwiML: {twiml_str}")
-                
-                # Make the call with explicit content-type headers
-                extra_params = {
-                    'twiml': twiml_str,
-                    'status_callback': self.status_callback,
-                    'status_callback_event': ['initiated', 'ringing', 'answered', 'completed'],
-                    'status_callback_method': 'POST',
-                    'record': True
-                }
-                
-                # Create the call with proper headers
-                call = self.client.calls.create(
-                    to=to_number,
-                    from_=from_number,
-                    **extra_params
-                )
-                logger.info(f"Twilio call with Ultravox created. SID: {call.sid}")
-
-            else:
-                # Standard Twilio call (hits your incoming-call endpoint)
-                logger.info(f"Making standard Twilio call to webhook: {self.webhook_url}")
-                call = self.client.calls.create(
-                    to=to_number,
-                    from_=from_number,
-                    url=self.webhook_url,
-                    status_callback=self.status_callback,
-                    status_callback_event=['initiated', 'ringing', 'answered', 'completed'],
-                    status_callback_method='POST',
-                    record=True
-                )
-                logger.info(f"Standard Twilio call created. SID: {call.sid}")
+            call = await self.create_call(to_number, from_number, ultravox_url)
 
             # Note: Call record will be inserted by the route handler instead of here
             # to avoid duplicate entries and ensure consistency
 
             return {
                 "status": "success",
-                "call_sid": call.sid,
-                "call_status": call.status,
+                "call_sid": call["call_sid"],
+                "call_status": call["call_status"],
                 "message": "Call initiated successfully"
             }
 
@@ -137,9 +105,61 @@ class TwilioService:
             logger.error(f"Unexpected error making call: {str(e)}", exc_info=True)
             raise Exception(f"Failed to initiate call: {str(e)}")
 
+    async def create_call(self, to_number: str, from_number: str, ultravox_url: str = None) -> Dict:
+        """
+        Place one call through the pooled Twilio transport. Twilio errors are raised
+        as they are, so callers can tell rate limits from rejected numbers.
+        """
+        if ultravox_url:
+            # Log the Ultravox URL we're using
+            logger.info(f"Making call with Ultravox integration. URL: {ultravox_url}")
+            
+            # Create TwiML with <Connect><Stream> for Ultravox
+            twiml = VoiceResponse()
+            connect = Connect()
+            
+            # Format URL if needed
+            if ultravox_url.startswith('http'):
+                # Convert to WebSocket if it's an HTTP URL
+                ultravox_url = ultravox_url.replace('https://', 'wss://')
+            
+            stream = Stream(url=ultravox_url)
+            # Add parameters for better media streaming
+            stream.parameter(name="format", value="audio/x-raw")
+            stream.parameter(name="sampleRate", value="16000")
+            
+            connect.append(stream)
+            twiml.append(connect)
+            
+            # Log the TwiML we're sending
+            twiml_str = str(twiml)
+            logger.debug(f"Using TwiML: {twiml_str}")
+            target = {'twiml': twiml_str}
+        else:
+            # Standard Twilio call (hits your incoming-call endpoint)
+            logger.info(f"Making standard Twilio call to webhook: {self.webhook_url}")
+            target = {'url': self.webhook_url}
+
+        call = await self.client.calls.create_async(
+            to=to_number,
+            from_=from_number,
+            status_callback=self.status_callback,
+            status_callback_event=['initiated', 'ringing', 'answered', 'completed'],
+            status_callback_method='POST',
+            record=True,
+            **target
+        )
+        logger.info(f"Twilio call created. SID: {call.sid}")
+        return {"call_sid": call.sid, "call_status": call.status}
+
+    async def aclose(self):
+        """Close the pooled Twilio connections; called on application shutdown"""
+        await self.http_client.close()
+
     async def bulk_calls(self, numbers: List[str], from_number: str) -> List[Dict]:
         """
-        Initiate multiple calls in bulk.
+        Initiate multiple calls in bulk, concurrently within the dialer's rate limits.
+        Results come back in the order of numbers.
         """
         # Check if credentials are valid before attempting to make calls
         if not self.credentials_valid:
@@ -151,23 +171,35 @@ class TwilioService:
                 "error": error_msg
             } for number in numbers]
             
-        results = []
-        for number in numbers:
-            try:
-                result = await self.make_call(number, from_number)
-                results.append({
-                    "number": number,
-                    "status": "success",
-                    "call_sid": result["call_sid"]
-                })
-            except Exception as e:
-                results.append({
-                    "number": number,
-                    "status": "failed",
-                    "error": str(e)
-                })
+        results = [None] * len(numbers)
+        async for result in self.dialer.dial(numbers, from_number):
+            results[result["index"]] = result
         return results
 
+    async def record_outbound_calls(self, results: List[Dict], from_number: str):
+        """Save the placed calls of a batch of dialer results in one insert"""
+        placed = [result for result in results if result["status"] == "success"]
+        if not placed:
+            return
+        now = datetime.now()
+        placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(placed))
+        values = []
+        for result in placed:
+            values.extend((result["call_sid"], from_number, result["number"], "outbound",
+                           result.get("call_status") or "queued", now, now))
+        try:
+            await db.execute(
+                f"""
+                INSERT INTO calls
+                (call_sid, from_number, to_number, direction, status, start_time, created_at)
+                VALUES {placeholders}
+                """,
+                values
+            )
+            call_metrics.mark_dirty(now)
+        except Exception as db_error:
+            logger.error(f"Failed to save {len(placed)} outbound calls to database: {str(db_error)}")
+
     async def get_call_details(self, call_sid: str) -> Dict:
         """
         Get detailed information about a specific call from Twilio.
@@ -184,8 +216,10 @@ class TwilioService:
             raise Exception(error_msg)
             
         try:
-            call = self.client.calls(call_sid).fetch()
-            recordings = self.client.recordings.list(call_sid=call_sid)
+            call, recordings = await asyncio.gather(
+                self.client.calls(call_sid).fetch_async(),
+                self.client.recordings.list_async(call_sid=call_sid)
+            )
 
             cost = 0.0
             if call.price:
@@ -193,7 +227,7 @@ class TwilioService:
 
             details = {
                 "call_sid": call.sid,
-                "from_number": call.from_,
+                "from_number": call._from,
                 "to_number": call.to,
                 "status": call.status,
                 "duration": call.duration,
@@ -205,7 +239,7 @@ class TwilioService:
                     {
                         "recording_sid": rec.sid,
                         "duration": rec.duration,
-                        "url": rec.url
+                        "url": self._recording_url(rec)
                     }
                     for rec in recordings
                 ]
@@ -241,11 +275,10 @@ class TwilioService:
         """
         Handle Twilio status callback events (e.g. initiated, ringing, answered, completed).
         """
+        call_sid = data.get('CallSid')
+        status = data.get('CallStatus')
+        duration = data.get('CallDuration')
         try:
-            call_sid = data.get('CallSid')
-            status = data.get('CallStatus')
-            duration = data.get('CallDuration')
-
             query = """
                 UPDATE calls
                 SET status = %s,
@@ -258,50 +291,58 @@ class TwilioService:
 
             values = (status, duration, end_time, call_sid)
             await db.execute(query, values)
-
             logger.info(f"Updated call status for {call_sid} => {status}")
 
         except Exception as e:
             logger.error(f"Error handling status callback: {str(e)}")
             raise Exception(f"Failed to handle status callback: {str(e)}")
+        finally:
+            if status in TERMINAL_CALL_STATUSES:
+                # Frees the call's slot under the dialer's live-call cap, even if the update failed
+                self.dialer.live_calls.finish(call_sid)
 
     async def get_call_recording(self, call_sid: str) -> Optional[str]:
         """
         Return the first recording URL for a call, if any.
         """
+        if not self.credentials_valid:
+            return None
         try:
-            recordings = self.client.recordings.list(call_sid=call_sid)
+            recordings = await self.client.recordings.list_async(call_sid=call_sid, limit=1)
             if recordings:
-                return recordings[0].url
+                return self._recording_url(recordings[0])
             return None
         except TwilioRestException as e:
             logger.error(f"Error fetching recording: {str(e)}")
             return None
 
+    @staticmethod
+    def _recording_url(recording) -> Optional[str]:
+        # Recordings carry their API resource path; the media is served at the same path without .json
+        if not recording.uri:
+            return None
+        return f"https://api.twilio.com{recording.uri[:-5] if recording.uri.endswith('.json') else recording.uri}"
+
     async def get_call_metrics(self, start_date: datetime, end_date: datetime) -> Dict:
         """
         Return aggregated call metrics (count, duration, cost, etc.) over a date range.
+        Served from the local call rollups; Twilio is not called.
         """
-        try:
-            calls = self.client.calls.list(
-                start_time_after=start_date,
-                start_time_before=end_date
-            )
-            total_calls = len(calls)
-            total_duration = sum(int(call.duration or 0) for call in calls)
-            total_cost = sum(float(call.price or 0) for call in calls)
-
-            return {
-                "total_calls": total_calls,
-                "total_duration": total_duration,
-                "total_cost": total_cost,
-                "average_duration": (total_duration / total_calls) if total_calls > 0 else 0.0,
-                "average_cost": (total_cost / total_calls) if total_calls > 0 else 0.0
-            }
+        return await call_metrics.get_metrics(start_date, end_date)
 
-        except TwilioRestException as e:
-            logger.error(f"Error fetching call metrics: {str(e)}")
-            raise Exception(f"Failed to fetch call metrics: {str(e)}")
+    async def list_call_prices(self, since: datetime) -> List[tuple]:
+        """
+        (call SID, cost) for the completed calls since a date that Twilio has priced.
+        Twilio reports prices as negative amounts charged.
+        """
+        if not self.credentials_valid:
+            raise Exception("Cannot list call prices: Twilio credentials are missing or invalid")
+        calls = await self.client.calls.list_async(
+            start_time_after=since,
+            status='completed',
+            page_size=1000
+        )
+        return [(call.sid, abs(float(call.price))) for call in calls if call.price is not None]
 
 
 # Singleton instance
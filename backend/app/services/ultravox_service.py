@@ -16,9 +16,18 @@ from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_excep
 import backoff
 from ..config import settings
 from ..database import db
+from .call_metrics import call_metrics
 
 logger = logging.getLogger(__name__)
 
+def twilio_payload_to_pcm(payload: str) -> bytes:
+    """Decode a base64 µ-law Twilio media payload into 16-bit linear PCM"""
+    return audioop.ulaw2lin(base64.b64decode(payload), 2)
+
+def pcm_to_twilio_payload(pcm_data: bytes) -> str:
+    """Encode 16-bit linear PCM as a base64 µ-law Twilio media payload"""
+    return base64.b64encode(audioop.lin2ulaw(pcm_data, 2)).decode('ascii')
+
 class UltravoxService:
     def __init__(self):
         self.api_key = settings.ultravox_api_key
@@ -30,6 +39,8 @@ class UltravoxService:
             "X-API-Key": self.api_key,
             "Content-Type": "application/json"
         }
+        # Media streams currently bridged to Ultravox; campaign pacing reads this
+        self.active_sessions = 0
 
     def is_valid_url(self, url: str) -> bool:
         """
@@ -171,6 +182,7 @@ class UltravoxService:
         transcription = []
         call_duration = 0
         start_time = datetime.now()
+        self.active_sessions += 1
 
         try:
             # Connect to Ultravox WebSocket
@@ -208,12 +220,11 @@ class UltravoxService:
                     async for message in ultravox_ws:
                         if isinstance(message, bytes):
                             # Handle audio data from Ultravox
-                            mu_law_audio = audioop.lin2ulaw(message, 2)
                             payload = {
                                 "event": "media",
                                 "streamSid": session_id,
                                 "media": {
-                                    "payload": base64.b64encode(mu_law_audio).decode('ascii')
+                                    "payload": pcm_to_twilio_payload(message)
                                 }
                             }
                             try:
@@ -249,8 +260,7 @@ class UltravoxService:
                         data = json.loads(message)
                         if data.get("event") == "media":
                             # Convert Twilio µ-law to PCM
-                            audio_data = base64.b64decode(data["media"]["payload"])
-                            pcm_data = audioop.ulaw2lin(audio_data, 2)
+                            pcm_data = twilio_payload_to_pcm(data["media"]["payload"])
                             
                             # Send to Ultravox
                             if ultravox_ws and ultravox_ws.open:
@@ -270,6 +280,7 @@ class UltravoxService:
         except Exception as e:
             logger.error(f"Error in media stream processing: {str(e)}")
         finally:
+            self.active_sessions -= 1
             if ultravox_ws:
                 try:
                     await ultravox_ws.close()
@@ -660,6 +671,7 @@ class UltravoxService:
                 call_sid
             )
             await db.execute(query, values)
+            await call_metrics.touch_call(call_sid)
         except Exception as e:
             logger.error(f"Error updating call record: {str(e)}")
 
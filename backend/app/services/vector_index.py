@@ -0,0 +1,592 @@
+# backend/app/services/vector_index.py
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from ..config import settings
+from ..monitoring.metrics import vector_search_duration_seconds
+from .supabase_service import supabase_service
+
+logger = logging.getLogger(__name__)
+
+SYNC_PAGE_SIZE = 1000
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_SIZE = 50000
+# Table names are used as index directory names, so only plain Postgres identifiers are accepted
+TABLE_NAME_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+def _parse_vector(value: Any) -> np.ndarray:
+    # pgvector columns come back from PostgREST as "[0.1,0.2,...]"
+    if isinstance(value, str):
+        return np.array(value.strip("[]").split(","), dtype=np.float32)
+    return np.asarray(value, dtype=np.float32)
+
+class LocalVectorIndex:
+    """
+    On-disk cosine-similarity index for one Supabase table.
+
+    Vectors are L2-normalized float32 rows appended to a raw file that is read
+    through a memory map; content and metadata live in a SQLite sidecar. Small
+    tables are scanned exactly; once a table reaches vector_index_ivf_min_rows
+    an IVF (inverted file) index is trained with spherical k-means and only the
+    nprobe closest lists are scanned. New rows are assigned to the existing
+    lists as they arrive and the lists are retrained when the table doubles.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(os.path.join(directory, "payloads.sqlite3"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS rows (
+                pos INTEGER PRIMARY KEY,
+                remote_id INTEGER UNIQUE,
+                content TEXT,
+                metadata TEXT
+            )
+        """)
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._db.commit()
+
+        self.dimension: Optional[int] = self._get_meta("dimension", int)
+        self.watermark: int = self._get_meta("watermark", int) or 0
+        self.trained_rows: int = self._get_meta("trained_rows", int) or 0
+        self.last_synced_at: Optional[float] = self._get_meta("last_synced_at", float)
+        self._vectors: Optional[np.ndarray] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments: Optional[np.ndarray] = None
+        self._list_order: Optional[np.ndarray] = None
+        self._list_offsets: Optional[np.ndarray] = None
+        self._load()
+
+    @property
+    def vectors_path(self) -> str:
+        return os.path.join(self.directory, "vectors.f32")
+
+    @property
+    def count(self) -> int:
+        return 0 if self._vectors is None else len(self._vectors)
+
+    def _get_meta(self, key: str, cast):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return cast(row[0]) if row else None
+
+    def _set_meta(self, **values):
+        self._db.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [(key, str(value)) for key, value in values.items()]
+        )
+
+    def _load(self):
+        if self.dimension and os.path.exists(self.vectors_path):
+            rows = os.path.getsize(self.vectors_path) // (4 * self.dimension)
+            if rows:
+                self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(rows, self.dimension))
+        # A crash between writing vectors and payloads leaves them out of step; start over
+        if self.count != self._db.execute("SELECT COUNT(*) FROM rows").fetchone()[0]:
+            logger.warning(f"Local vector index in {self.directory} is inconsistent; rebuilding it")
+            self.reset()
+            return
+        centroids_path = os.path.join(self.directory, "centroids.npy")
+        assignments_path = os.path.join(self.directory, "assignments.npy")
+        if os.path.exists(centroids_path) and os.path.exists(assignments_path):
+            self._centroids = np.load(centroids_path)
+            self._assignments = np.load(assignments_path)
+            # Rows appended after the last save have no list yet
+            if len(self._assignments) != self.count:
+                self._centroids = None
+                self._assignments = None
+                self.trained_rows = 0
+            else:
+                self._list_order, self._list_offsets = self._build_lists(self._centroids, self._assignments)
+
+    def add(self, remote_ids: List[int], vectors: np.ndarray, contents: List[str], metadatas: List[Any]):
+        """Append rows synced from Supabase; remote_ids must be increasing"""
+        if not remote_ids:
+            return
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = vectors.shape[1]
+            elif vectors.shape[1] != self.dimension:
+                raise ValueError(f"Vector dimension {vectors.shape[1]} does not match index dimension {self.dimension}")
+
+            start = self.count
+            with open(self.vectors_path, 'ab') as f:
+                f.write(np.ascontiguousarray(vectors).tobytes())
+            self._db.executemany(
+                "INSERT OR REPLACE INTO rows (pos, remote_id, content, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (start + i, remote_id, content, json.dumps(metadata or {}))
+                    for i, (remote_id, content, metadata) in enumerate(zip(remote_ids, contents, metadatas))
+                ]
+            )
+            self.watermark = max(self.watermark, max(remote_ids))
+            self._set_meta(dimension=self.dimension, watermark=self.watermark)
+            self._db.commit()
+            self._vectors = np.memmap(
+                self.vectors_path, dtype=np.float32, mode='r', shape=(start + len(vectors), self.dimension)
+            )
+            all_vectors = self._vectors
+            centroids, assignments = self._centroids, self._assignments
+
+        # Only the sync thread writes, so lists can be rebuilt without holding the lock;
+        # searches keep using the previous lists (which simply miss the newest rows) meanwhile
+        if len(all_vectors) >= settings.vector_index_ivf_min_rows and len(all_vectors) >= 2 * self.trained_rows:
+            centroids = self._train(all_vectors)
+            assignments = np.concatenate([
+                self._assign(centroids, np.asarray(all_vectors[i:i + 65536]))
+                for i in range(0, len(all_vectors), 65536)
+            ])
+            trained_rows = len(all_vectors)
+        elif centroids is not None:
+            assignments = np.concatenate([assignments, self._assign(centroids, vectors)])
+            trained_rows = self.trained_rows
+        else:
+            return
+
+        order, offsets = self._build_lists(centroids, assignments)
+        np.save(os.path.join(self.directory, "centroids.npy"), centroids)
+        np.save(os.path.join(self.directory, "assignments.npy"), assignments)
+        with self._lock:
+            self._centroids, self._assignments = centroids, assignments
+            self._list_order, self._list_offsets = order, offsets
+            if trained_rows != self.trained_rows:
+                self.trained_rows = trained_rows
+                self._set_meta(trained_rows=trained_rows)
+                self._db.commit()
+
+    def update(self, remote_ids: List[int], vectors: np.ndarray, contents: List[str], metadatas: List[Any]) -> int:
+        """
+        Overwrite rows already in the index in place, e.g. chunks of a re-ingested
+        document that were upserted under their old id; returns the rows updated
+        """
+        if not remote_ids:
+            return 0
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+        with self._lock:
+            if self._vectors is None:
+                return 0
+            if vectors.shape[1] != self.dimension:
+                raise ValueError(f"Vector dimension {vectors.shape[1]} does not match index dimension {self.dimension}")
+            placeholders = ", ".join("?" * len(remote_ids))
+            positions = dict(self._db.execute(
+                f"SELECT remote_id, pos FROM rows WHERE remote_id IN ({placeholders})", remote_ids
+            ).fetchall())
+            updates = [(i, positions[remote_id]) for i, remote_id in enumerate(remote_ids) if remote_id in positions]
+            if not updates:
+                return 0
+
+            row_bytes = 4 * self.dimension
+            with open(self.vectors_path, 'r+b') as f:
+                for i, pos in updates:
+                    f.seek(pos * row_bytes)
+                    f.write(np.ascontiguousarray(vectors[i]).tobytes())
+            self._db.executemany(
+                "UPDATE rows SET content = ?, metadata = ? WHERE pos = ?",
+                [(contents[i], json.dumps(metadatas[i] or {}), pos) for i, pos in updates]
+            )
+            self._db.commit()
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=self._vectors.shape)
+
+            # A changed vector may belong to another list now
+            if self._centroids is not None:
+                moved = np.array([pos for _, pos in updates])
+                assignments = self._assignments.copy()
+                assignments[moved] = self._assign(self._centroids, vectors[[i for i, _ in updates]])
+                np.save(os.path.join(self.directory, "assignments.npy"), assignments)
+                self._assignments = assignments
+                self._list_order, self._list_offsets = self._build_lists(self._centroids, assignments)
+            return len(updates)
+
+    def mark_synced(self):
+        with self._lock:
+            self.last_synced_at = time.time()
+            self._set_meta(last_synced_at=self.last_synced_at)
+            self._db.commit()
+
+    def reset(self):
+        """Drop every row, e.g. after rows were deleted in Supabase"""
+        with self._lock:
+            self._vectors = None
+            self._centroids = None
+            self._assignments = None
+            self._list_order = None
+            self._list_offsets = None
+            self.watermark = 0
+            self.trained_rows = 0
+            # Searches go back to Supabase until the rebuild has finished
+            self.last_synced_at = None
+            for name in ("vectors.f32", "centroids.npy", "assignments.npy"):
+                path = os.path.join(self.directory, name)
+                if os.path.exists(path):
+                    os.unlink(path)
+            self._db.execute("DELETE FROM rows")
+            self._db.execute("DELETE FROM meta")
+            self._db.commit()
+            self.dimension = None
+
+    def _train(self, vectors: np.ndarray) -> np.ndarray:
+        """Spherical k-means over a sample of the rows; returns the list centroids"""
+        n_lists = int(min(4096, max(16, 2 * np.sqrt(len(vectors)))))
+        rng = np.random.default_rng(0)
+        sample_size = min(len(vectors), max(KMEANS_SAMPLE_SIZE, 40 * n_lists))
+        sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))])
+
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=n_lists)
+            # Empty lists keep their previous centroid
+            filled = counts > 0
+            centroids[filled] = _normalize(sums[filled])
+
+        logger.info(f"Trained IVF index with {n_lists} lists over {len(vectors)} rows in {self.directory}")
+        return centroids.astype(np.float32)
+
+    @staticmethod
+    def _assign(centroids: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ centroids.T, axis=1).astype(np.int32)
+
+    @staticmethod
+    def _build_lists(centroids: np.ndarray, assignments: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Row positions grouped by list, and where each list starts"""
+        order = np.argsort(assignments, kind='stable').astype(np.int64)
+        offsets = np.searchsorted(assignments[order], np.arange(len(centroids) + 1))
+        return order, offsets
+
+    def search(self, query_embedding: List[float], top_k: int, similarity_threshold: float) -> List[Dict[str, Any]]:
+        """Top-k rows by cosine similarity above the threshold, formatted like Supabase results"""
+        with self._lock:
+            vectors = self._vectors
+            if vectors is None or top_k <= 0:
+                return []
+            query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+
+            if self._centroids is not None:
+                n_probe = min(settings.vector_index_nprobe, len(self._centroids))
+                probes = np.argpartition(-(self._centroids @ query), n_probe - 1)[:n_probe]
+                candidates = np.concatenate([
+                    self._list_order[self._list_offsets[c]:self._list_offsets[c + 1]] for c in probes
+                ])
+                candidates.sort()
+                scores = vectors[candidates] @ query
+            else:
+                candidates = None
+                scores = vectors @ query
+
+            k = min(top_k, len(scores))
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+            best = best[scores[best] > similarity_threshold]
+            positions = best if candidates is None else candidates[best]
+
+            payloads = self._payloads([int(pos) for pos in positions])
+            return [
+                {
+                    "text": payloads[int(pos)][0],
+                    "similarity_score": float(scores[i]),
+                    "metadata": payloads[int(pos)][1]
+                }
+                for pos, i in zip(positions, best)
+                if int(pos) in payloads
+            ]
+
+    def _payloads(self, positions: List[int]) -> Dict[int, Tuple[str, Any]]:
+        if not positions:
+            return {}
+        placeholders = ", ".join("?" * len(positions))
+        rows = self._db.execute(
+            f"SELECT pos, content, metadata FROM rows WHERE pos IN ({placeholders})", positions
+        ).fetchall()
+        return {pos: (content, json.loads(metadata)) for pos, content, metadata in rows}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rows": self.count,
+            "dimension": self.dimension,
+            "watermark": self.watermark,
+            "ivf_lists": None if self._centroids is None else len(self._centroids),
+            "trained_rows": self.trained_rows,
+            "last_synced_at": self.last_synced_at
+        }
+
+class LocalVectorIndexService:
+    """
+    Serves knowledge base searches from local indexes with the same interface as
+    SupabaseService.search_embeddings. A table gets a local index the first time
+    it is searched; until its first sync completes, searches go to Supabase.
+    A background loop keeps every index in step with its Supabase table by
+    pulling rows above the last synced id, re-reads the rows of documents that
+    were re-ingested in place, and rebuilds an index if rows were deleted remotely.
+    """
+
+    def __init__(self, base_dir: str = None):
+        self.base_dir = base_dir or settings.vector_index_dir
+        self._indexes: Dict[Tuple[str, str], LocalVectorIndex] = {}
+        self._opening: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._credentials: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._stale: set = set()
+        self._stale_documents: Dict[Tuple[str, str], set] = {}
+        self._sync_locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @staticmethod
+    def _key(credentials: Dict[str, Any], table_name: str) -> Tuple[str, str]:
+        return (credentials.get('url', '').rstrip('/'), table_name)
+
+    async def _get_index(self, key: Tuple[str, str]) -> LocalVectorIndex:
+        index = self._indexes.get(key)
+        if index is not None:
+            return index
+        if not TABLE_NAME_PATTERN.match(key[1]):
+            raise ValueError(f"Invalid table name: {key[1]!r}")
+        # Opening reads SQLite and maps the vector file, so it runs off the event loop,
+        # once per table however many searches arrive meanwhile
+        opening = self._opening.get(key)
+        if opening is None:
+            project = hashlib.sha1(key[0].encode('utf-8')).hexdigest()[:16]
+            opening = asyncio.get_running_loop().run_in_executor(
+                None, LocalVectorIndex, os.path.join(self.base_dir, project, key[1])
+            )
+            self._opening[key] = opening
+            opening.add_done_callback(lambda future: self._opened(key, future))
+        return await asyncio.shield(opening)
+
+    def _opened(self, key: Tuple[str, str], future: asyncio.Future):
+        del self._opening[key]
+        if not future.cancelled() and future.exception() is None:
+            self._indexes[key] = future.result()
+
+    async def search_embeddings(
+        self,
+        credentials: Dict[str, Any],
+        table_name: str,
+        query_embedding: List[float],
+        top_k: int = 5,
+        similarity_threshold: float = 0.7,
+        use_hybrid_search: bool = True,
+        query_text: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search the local index for a table, falling back to Supabase while it is
+        being built and for hybrid (full-text) searches
+        """
+        key = self._key(credentials, table_name)
+        self._credentials[key] = credentials
+        index = await self._get_index(key)
+
+        if index.last_synced_at is None or (use_hybrid_search and query_text):
+            if index.last_synced_at is None:
+                self.mark_stale(credentials, table_name)
+            return await supabase_service.search_embeddings(
+                credentials, table_name, query_embedding, top_k, similarity_threshold,
+                use_hybrid_search, query_text
+            )
+
+        start = time.perf_counter()
+        try:
+            # The search takes the index lock, which sync threads hold during disk writes
+            return await asyncio.get_running_loop().run_in_executor(
+                None, index.search, query_embedding, top_k, similarity_threshold
+            )
+        finally:
+            vector_search_duration_seconds.labels(backend='local').observe(time.perf_counter() - start)
+
+    def mark_stale(self, credentials: Dict[str, Any], table_name: str, document_id: Optional[str] = None):
+        """
+        Ask the sync loop to pull new rows for a table (only tables searched locally
+        are tracked). With document_id, the document's existing rows are re-read too,
+        since upserts by chunk_id rewrite them under the same id.
+        """
+        key = self._key(credentials, table_name)
+        if key in self._indexes:
+            self._credentials[key] = credentials
+            self._stale.add(key)
+            if document_id:
+                self._stale_documents.setdefault(key, set()).add(document_id)
+            if self._wakeup is not None:
+                self._wakeup.set()
+
+    async def sync_table(
+        self,
+        credentials: Dict[str, Any],
+        table_name: str,
+        document_ids: Optional[List[str]] = None
+    ) -> int:
+        """
+        Pull rows newer than the index watermark, then refresh the already synced
+        rows of document_ids; returns the number of rows added
+        """
+        key = self._key(credentials, table_name)
+        index = await self._get_index(key)
+        lock = self._sync_locks.setdefault(key, asyncio.Lock())
+        loop = asyncio.get_running_loop()
+        supabase_url = credentials.get('url', '').rstrip('/')
+        if not supabase_url.endswith('/rest/v1'):
+            supabase_url = f"{supabase_url}/rest/v1"
+
+        # Paging a large table can outlast the pool's idle TTL, so the client is leased
+        async with lock, supabase_service.lease_client(supabase_url, credentials.get('apiKey')) as client:
+            # Every synced row has an id at or below the watermark, so the remote count
+            # there only differs from the local one if synced rows were deleted (or rows
+            # were committed out of id order); new rows above the watermark cannot mask it
+            if index.watermark:
+                remote_count = await self._remote_count(
+                    client, f"{supabase_url}/{table_name}", {"id": f"lte.{index.watermark}"}
+                )
+                if remote_count is not None and remote_count != index.count:
+                    logger.info(f"Synced rows of {table_name} changed remotely; rebuilding its local index")
+                    await loop.run_in_executor(None, index.reset)
+
+            added = 0
+            while True:
+                response = await client.get(
+                    f"{supabase_url}/{table_name}",
+                    params={
+                        "select": "id,content,embedding,metadata",
+                        "id": f"gt.{index.watermark}",
+                        "order": "id.asc",
+                        "limit": str(SYNC_PAGE_SIZE)
+                    }
+                )
+                response.raise_for_status()
+                rows = response.json()
+                if not rows:
+                    break
+                await loop.run_in_executor(None, self._add_rows, index, rows)
+                added += len(rows)
+                if len(rows) < SYNC_PAGE_SIZE:
+                    break
+
+            for document_id in document_ids or []:
+                await self._refresh_document(client, f"{supabase_url}/{table_name}", index, document_id)
+
+            index.mark_synced()
+            if added:
+                logger.info(f"Synced {added} rows into the local index for {table_name}")
+            return added
+
+    @staticmethod
+    async def _refresh_document(client, table_url: str, index: LocalVectorIndex, document_id: str):
+        """Overwrite the synced rows of a document with their current content and vectors"""
+        loop = asyncio.get_running_loop()
+        last_id = 0
+        while True:
+            response = await client.get(
+                table_url,
+                params={
+                    "select": "id,content,embedding,metadata",
+                    "metadata->>document_id": f"eq.{document_id}",
+                    # Rows above the watermark are new and come in with the next pull
+                    "and": f"(id.gt.{last_id},id.lte.{index.watermark})",
+                    "order": "id.asc",
+                    "limit": str(SYNC_PAGE_SIZE)
+                }
+            )
+            response.raise_for_status()
+            rows = response.json()
+            if not rows:
+                return
+            await loop.run_in_executor(
+                None,
+                index.update,
+                [row['id'] for row in rows],
+                np.vstack([_parse_vector(row['embedding']) for row in rows]),
+                [row.get('content') or "" for row in rows],
+                [row.get('metadata') for row in rows]
+            )
+            if len(rows) < SYNC_PAGE_SIZE:
+                return
+            last_id = rows[-1]['id']
+
+    @staticmethod
+    def _add_rows(index: LocalVectorIndex, rows: List[Dict[str, Any]]):
+        index.add(
+            [row['id'] for row in rows],
+            np.vstack([_parse_vector(row['embedding']) for row in rows]),
+            [row.get('content') or "" for row in rows],
+            [row.get('metadata') for row in rows]
+        )
+
+    @staticmethod
+    async def _remote_count(client, table_url: str, filters: Optional[Dict[str, str]] = None) -> Optional[int]:
+        response = await client.get(
+            table_url,
+            params={"select": "id", "limit": "1", **(filters or {})},
+            headers={"Prefer": "count=exact"}
+        )
+        response.raise_for_status()
+        # Content-Range: 0-0/1234
+        total = response.headers.get("content-range", "").rsplit("/", 1)[-1]
+        return int(total) if total.isdigit() else None
+
+    def start(self):
+        """Start the background sync loop"""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._sync_loop())
+            logger.info("Started local vector index sync loop")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _sync_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.vector_index_sync_interval)
+            except asyncio.TimeoutError:
+                # Periodic pass over every table to pick up rows written by other processes
+                self._stale.update(self._indexes.keys())
+            self._wakeup.clear()
+
+            stale, self._stale = self._stale, set()
+            for key in stale:
+                credentials = self._credentials.get(key)
+                if not credentials:
+                    continue
+                document_ids = self._stale_documents.pop(key, set())
+                try:
+                    await self.sync_table(credentials, key[1], sorted(document_ids))
+                except asyncio.CancelledError:
+                    self._stale_documents.setdefault(key, set()).update(document_ids)
+                    raise
+                except Exception as e:
+                    # New rows come back with the periodic pass, refreshed documents would not
+                    self._stale_documents.setdefault(key, set()).update(document_ids)
+                    logger.error(f"Failed to sync local vector index for {key[1]}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tables": {f"{url}/{table}": index.stats() for (url, table), index in self._indexes.items()},
+            "sync_running": self._task is not None
+        }
+
+local_vector_index = LocalVectorIndexService()
+
+def get_search_backend():
+    """Search backend selected by SEARCH_BACKEND: "supabase" (default) or "local" """
+    return local_vector_index if settings.search_backend == 'local' else supabase_service
@@ -1,85 +1,86 @@
-import os
-import magic
-from sentence_transformers import SentenceTransformer
-import PyPDF2
-import docx
-import pandas as pd
+import numpy as np
 import logging
-import tiktoken
+from typing import Iterable, Iterator, List, Optional
+from ..config import settings
+from . import extractors
+from .chunking import TextChunker, model_token_counter
+from .extractors import Source
+from .embedding_models import ModelRegistry, get_model_registry
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 class VectorizationService:
-    def __init__(self):
-        # Use a better model - gte-small is more efficient and performs better
-        self.model = SentenceTransformer('paraphrase-MiniLM-L6-v2')
-        # Fallback to the old model if the new one fails to load
-        try:
-            # Try to load GTE-Small model (better for semantic search)
-            self.model = SentenceTransformer('sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2')
-            self.embedding_dimension = 384  # GTE-Small is 384 dimensions
-            self.model_name = 'paraphrase-multilingual-MiniLM-L12-v2'
-            logger.info("Using paraphrase-multilingual-MiniLM-L12-v2 embedding model with 384 dimensions")
-        except Exception as e:
-            # Fall back to MiniLM if GTE-Small fails
-            logger.warning(f"Failed to load preferred embedding model: {e}. Using fallback model.")
-            self.model = SentenceTransformer('all-MiniLM-L6-v2')
-            self.embedding_dimension = 384  # MiniLM is also 384 dimensions
-            self.model_name = 'all-MiniLM-L6-v2'
+    def __init__(self, registry: Optional[ModelRegistry] = None, backend: Optional[str] = None):
+        # The model itself lives in a process-wide registry and is loaded lazily;
+        # backend selects "torch" or "onnx" inference, defaulting to EMBEDDING_BACKEND
+        self.registry = registry or get_model_registry(backend)
+
+    @property
+    def model(self):
+        return self.registry.get_model()
+
+    @property
+    def model_name(self):
+        return self.registry.model_name
+
+    @property
+    def configured_model_name(self) -> str:
+        """Preferred model and backend; unlike model_name it is known before the model loads"""
+        return f"{self.registry.model_names[0]}:{self.registry.backend}"
+
+    @property
+    def embedding_dimension(self):
+        return self.registry.embedding_dimension
+
+    @property
+    def max_chunk_tokens(self) -> int:
+        """Longest input the model embeds without truncation, excluding special tokens"""
+        model = self.model
+        return model.max_seq_length - model.tokenizer.num_special_tokens_to_add()
+
+    def chunker(self, chunk_size: Optional[int] = None, chunk_overlap: int = 0) -> TextChunker:
+        """
+        Chunker measuring chunks with the model's own tokenizer.
+        chunk_size and chunk_overlap are in tokens; chunk_size is capped at the model limit.
+        """
+        max_tokens = self.max_chunk_tokens
+        if chunk_size:
+            max_tokens = min(chunk_size, max_tokens)
+        return TextChunker(max_tokens, chunk_overlap, model_token_counter(self.model.tokenizer))
 
-    def detect_file_type(self, file_path):
+    def detect_file_type(self, source: Source):
         """
         Detect MIME type of the file
         """
-        mime = magic.Magic(mime=True)
-        return mime.from_file(file_path)
+        return extractors.detect_file_type(source)
 
-    def extract_content(self, file_path):
+    def extract_blocks(self, source: Source) -> Iterator[str]:
         """
-        Extract text content from various file types
+        Lazily yield the text of a file page by page, paragraph group or row group
         """
-        file_type = self.detect_file_type(file_path)
-        
         try:
-            if 'pdf' in file_type:
-                return self._extract_pdf(file_path)
-            elif 'word' in file_type or 'document' in file_type:
-                return self._extract_docx(file_path)
-            elif 'sheet' in file_type or 'excel' in file_type:
-                return self._extract_excel(file_path)
-            elif 'text' in file_type:
-                with open(file_path, 'r') as f:
-                    return f.read()
-            else:
-                raise ValueError(f"Unsupported file type: {file_type}")
+            yield from extractors.iter_blocks(source)
         except Exception as e:
             raise ValueError(f"Content extraction failed: {str(e)}")
 
-    def _extract_pdf(self, file_path):
+    def extract_content(self, source: Source):
         """
-        Extract text from PDF files
+        Extract text content from various file types
         """
-        with open(file_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            text = ''
-            for page in reader.pages:
-                text += page.extract_text() + '\n'
-            return text
+        return "\n".join(self.extract_blocks(source))
 
-    def _extract_docx(self, file_path):
+    def chunk_blocks(self, blocks: Iterable[str], chunk_size: Optional[int] = None, chunk_overlap: int = 0) -> Iterator[str]:
         """
-        Extract text from Word documents
+        Lazily chunk a sequence of text blocks
         """
-        doc = docx.Document(file_path)
-        return '\n'.join([paragraph.text for paragraph in doc.paragraphs])
+        return self.chunker(chunk_size, chunk_overlap).chunks(blocks)
 
-    def _extract_excel(self, file_path):
+    def chunk_file(self, source: Source, chunk_size: Optional[int] = None, chunk_overlap: int = 0) -> Iterator[str]:
         """
-        Extract text from Excel files
+        Lazily extract and chunk a file
         """
-        df = pd.read_excel(file_path)
-        return df.to_string()
+        return self.chunk_blocks(self.extract_blocks(source), chunk_size, chunk_overlap)
 
     def vectorize(self, content: str):
         """
@@ -87,34 +88,52 @@ class VectorizationService:
         """
         if not content or not content.strip():
             logger.warning("Empty content provided for vectorization")
-            # Return zero vector of appropriate dimension
+            # Return zero vector of appropriate dimension, which is known once the model is loaded
+            self.model
             return [0.0] * self.embedding_dimension
         
         try:
-            # Truncate content if too long to prevent memory issues
-            # Use tiktoken for accurate tokenization if available
-            try:
-                import tiktoken
-                encoding = tiktoken.get_encoding("cl100k_base")
-                tokens = encoding.encode(content)
-                # Limit to 8K tokens for transformer models
-                if len(tokens) > 8000:
-                    # Decode truncated tokens back to text
-                    truncated_content = encoding.decode(tokens[:8000])
-                    logger.info(f"Content truncated from {len(tokens)} to 8000 tokens")
-                else:
-                    truncated_content = content
-            except (ImportError, Exception) as e:
-                # Fallback to character-based truncation
-                max_chars = 10000
-                truncated_content = content[:max_chars]
-                if len(content) > max_chars:
-                    logger.info(f"Content truncated from {len(content)} to {max_chars} characters")
-            
-            # Generate embedding
-            vector = self.model.encode(truncated_content).tolist()
+            # Inputs longer than the model limit are truncated by the model itself;
+            # documents should go through the chunker first
+            vector = self.model.encode(content).tolist()
             return vector
         except Exception as e:
             logger.error(f"Error generating embedding: {e}")
             # Return zero vector on error
             return [0.0] * self.embedding_dimension
+
+    def vectorize_batch(self, contents: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        Generate embeddings for many text chunks in one pass.
+        Returns a contiguous float32 matrix with one L2-normalized row per chunk,
+        so cosine similarity is a plain dot product. Empty chunks map to zero rows.
+        """
+        # Load the model first: the dimension is only known once it is loaded
+        model = self.model
+        matrix = np.zeros((len(contents), self.embedding_dimension), dtype=np.float32)
+
+        # Encode longest chunks first so each batch holds similarly sized inputs
+        # and the tokenizer pads as little as possible
+        order = sorted(
+            (i for i, content in enumerate(contents) if content and content.strip()),
+            key=lambda i: len(contents[i]),
+            reverse=True
+        )
+        if not order:
+            return matrix
+
+        embeddings = model.encode(
+            [contents[i] for i in order],
+            batch_size=batch_size or settings.embedding_batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        matrix[order] = embeddings.astype(np.float32, copy=False)
+        return matrix
+
+vectorization_service = VectorizationService()
+
+def get_vectorization_service() -> VectorizationService:
+    """FastAPI dependency returning the shared vectorization service"""
+    return vectorization_service
@@ -5,6 +5,7 @@ import json
 import asyncio
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from ..services.ultravox_service import ultravox_service
+from ..services.call_metrics import call_metrics
 from ..database import db
 from datetime import datetime
 
@@ -53,15 +54,17 @@ async def media_stream(websocket: WebSocket):
                 )
                 VALUES (%s, %s, %s, %s, %s, %s)
             """
+            started_at = datetime.utcnow()
             values = (
                 call_sid,
                 caller_number or "Unknown",
                 "Inbound Call",  # This is an inbound call
                 "in-progress",
-                datetime.utcnow(),
+                started_at,
                 'inbound'
             )
             await db.execute(query, values)
+            call_metrics.mark_dirty(started_at)
         
         # Process the media stream between Twilio and Ultravox
         await ultravox_service.process_media_stream(
@@ -86,6 +89,7 @@ async def media_stream(websocket: WebSocket):
                 """
                 values = ("completed", datetime.utcnow(), call_sid)
                 await db.execute(query, values)
+                await call_metrics.touch_call(call_sid)
                 logger.info(f"Call {call_sid} marked as completed")
             except Exception as e:
                 logger.error(f"Error updating call status: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,32 @@
+# backend/benchmarks/bench_audio.py
+
+import base64
+import random
+
+import pytest
+
+ultravox_service = pytest.importorskip("app.services.ultravox_service")
+
+# 20 ms of 8 kHz µ-law audio, the frame size Twilio media streams deliver
+FRAME_BYTES = 160
+
+
+@pytest.fixture(scope="module")
+def twilio_frame():
+    rng = random.Random(1234)
+    return base64.b64encode(bytes(rng.getrandbits(8) for _ in range(FRAME_BYTES))).decode("ascii")
+
+
+@pytest.fixture(scope="module")
+def pcm_frame(twilio_frame):
+    return ultravox_service.twilio_payload_to_pcm(twilio_frame)
+
+
+def bench_twilio_payload_to_pcm(benchmark, twilio_frame):
+    pcm = benchmark(ultravox_service.twilio_payload_to_pcm, twilio_frame)
+    assert len(pcm) == FRAME_BYTES * 2
+
+
+def bench_pcm_to_twilio_payload(benchmark, pcm_frame):
+    payload = benchmark(ultravox_service.pcm_to_twilio_payload, pcm_frame)
+    assert len(base64.b64decode(payload)) == FRAME_BYTES
@@ -0,0 +1,29 @@
+# backend/benchmarks/bench_call_history.py
+
+import pytest
+
+calls_routes = pytest.importorskip("app.routes.calls")
+
+
+def bench_call_history_first_page(benchmark, run_async, seeded_mysql):
+    rows = benchmark(
+        run_async,
+        lambda: calls_routes.get_call_history(page=1, limit=10, status=None, user={})
+    )
+    assert len(rows) == 10
+
+
+def bench_call_history_deep_page(benchmark, run_async, seeded_mysql):
+    rows = benchmark(
+        run_async,
+        lambda: calls_routes.get_call_history(page=500, limit=10, status=None, user={})
+    )
+    assert rows is not None
+
+
+def bench_call_history_status_filter(benchmark, run_async, seeded_mysql):
+    rows = benchmark(
+        run_async,
+        lambda: calls_routes.get_call_history(page=1, limit=50, status="completed", user={})
+    )
+    assert all(row.status == "completed" for row in rows)
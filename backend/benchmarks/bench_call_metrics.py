@@ -0,0 +1,184 @@
+# backend/benchmarks/bench_call_metrics.py
+
+import asyncio
+import contextlib
+from datetime import date, datetime
+
+import pytest
+
+from app.services import call_metrics as call_metrics_module
+from app.services.call_metrics import CallMetricsService, bucket_ranges, contiguous_runs
+
+SEED_START = datetime(2024, 1, 1)
+SEED_END = datetime(2024, 1, 29)
+
+
+def bench_bucket_ranges():
+    # Inside one day: hourly buckets only, widened to whole hours
+    assert bucket_ranges(datetime(2024, 1, 2, 9, 30), datetime(2024, 1, 2, 17, 10)) == [
+        ("call_metrics_hourly", datetime(2024, 1, 2, 9), datetime(2024, 1, 2, 18))
+    ]
+    # Partial days at the edges come from the hourly rollup, whole days from the daily one
+    assert bucket_ranges(datetime(2024, 1, 2, 20), datetime(2024, 1, 10, 6)) == [
+        ("call_metrics_hourly", datetime(2024, 1, 2, 20), datetime(2024, 1, 3)),
+        ("call_metrics_daily", date(2024, 1, 3), date(2024, 1, 10)),
+        ("call_metrics_hourly", datetime(2024, 1, 10), datetime(2024, 1, 10, 6)),
+    ]
+    # Midnight-aligned ranges are whole days only
+    assert bucket_ranges(datetime(2024, 1, 1), datetime(2024, 2, 1)) == [
+        ("call_metrics_daily", date(2024, 1, 1), date(2024, 2, 1))
+    ]
+    assert bucket_ranges(datetime(2024, 1, 2), datetime(2024, 1, 1)) == []
+
+
+def bench_contiguous_runs():
+    hours = [datetime(2024, 1, 1, h) for h in (5, 3, 4, 9, 4)]
+    assert contiguous_runs(hours) == [
+        (datetime(2024, 1, 1, 3), datetime(2024, 1, 1, 6)),
+        (datetime(2024, 1, 1, 9), datetime(2024, 1, 1, 10)),
+    ]
+
+
+class FakeCursor:
+    def __init__(self, priced):
+        self.priced = priced
+        self.rowcount = 0
+
+    async def execute(self, query, params):
+        sids = params[::2]
+        self.rowcount = sum(1 for sid in sids if sid not in self.priced)
+        self.priced.update(sids)
+
+
+class FakeDB:
+    def __init__(self, fail=False, first_call=None, has_rollups=False):
+        self.fail = fail
+        self.first_call = first_call
+        self.has_rollups = has_rollups
+        self.priced = set()
+        self.transactions = []
+
+    async def execute(self, query, params=None):
+        if "FROM call_metrics_hourly" in query:
+            return [{"1": 1}] if self.has_rollups else []
+        if "MIN(start_time)" in query:
+            return [{"first_call": self.first_call}]
+        return []
+
+    async def execute_transaction(self, queries):
+        self.transactions.append([query["params"] for query in queries])
+        return not self.fail
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        yield FakeCursor(self.priced)
+
+
+def bench_flush_coalesces_dirty_hours(monkeypatch):
+    fake = FakeDB()
+    monkeypatch.setattr(call_metrics_module, "db", fake)
+    service = CallMetricsService()
+    for minute in range(0, 60, 5):
+        service.mark_dirty(datetime(2024, 1, 1, 10, minute))
+    service.mark_dirty(datetime(2024, 1, 1, 11, 59))
+    service.mark_dirty(datetime(2024, 1, 1, 23, 1))
+    asyncio.run(service.flush())
+    # Two runs of consecutive hours, one recompute each
+    assert [params[0] for params in fake.transactions] == [
+        (datetime(2024, 1, 1, 10), datetime(2024, 1, 1, 12)),
+        (datetime(2024, 1, 1, 23), datetime(2024, 1, 2, 0)),
+    ]
+    # Each recompute also re-sums the days it touched
+    assert fake.transactions[0][2] == (date(2024, 1, 1), date(2024, 1, 2))
+
+    fake.fail = True
+    service.mark_dirty(datetime(2024, 1, 3, 8))
+    with pytest.raises(Exception):
+        asyncio.run(service.flush())
+    # Failed hours stay dirty for the next flush
+    assert service._dirty == {datetime(2024, 1, 3, 8)}
+
+
+def bench_rebuild_backfills_empty_rollups(monkeypatch):
+    fake = FakeDB(first_call=datetime(2024, 1, 1, 15, 20))
+    monkeypatch.setattr(call_metrics_module, "db", fake)
+    monkeypatch.setattr(call_metrics_module, "datetime", _FrozenDatetime)
+    asyncio.run(CallMetricsService().rebuild())
+    # Empty rollups: everything from the first call's day, a week at a time
+    assert [params[0] for params in fake.transactions] == [
+        (datetime(2024, 1, 1), datetime(2024, 1, 8)),
+        (datetime(2024, 1, 8), datetime(2024, 1, 10, 13)),
+    ]
+
+    # Existing rollups: only the recent window, widened to whole days
+    fake = FakeDB(has_rollups=True)
+    monkeypatch.setattr(call_metrics_module, "db", fake)
+    service = CallMetricsService()
+    service.rebuild_hours = 30
+    asyncio.run(service.rebuild())
+    assert [params[0] for params in fake.transactions] == [
+        (datetime(2024, 1, 9), datetime(2024, 1, 10, 13)),
+    ]
+
+
+def bench_reconcile_counts_changed_rows(monkeypatch):
+    fake = FakeDB()
+    monkeypatch.setattr(call_metrics_module, "db", fake)
+    service = CallMetricsService()
+    prices = [("CA1", 0.01), ("CA2", 0.02)]
+
+    async def fetch_prices(since):
+        return prices
+
+    before = call_metrics_module.call_prices_reconciled_total._value.get()
+    asyncio.run(service.reconcile_prices(fetch_prices))
+    assert call_metrics_module.call_prices_reconciled_total._value.get() - before == 2
+    assert len(fake.transactions) == 1
+
+    # Nothing new to price: no count and no recompute
+    asyncio.run(service.reconcile_prices(fetch_prices))
+    assert call_metrics_module.call_prices_reconciled_total._value.get() - before == 2
+    assert len(fake.transactions) == 1
+
+
+class _FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return datetime(2024, 1, 10, 12, 30)
+
+
+def _raw_metrics(run_async, db):
+    async def query():
+        rows = await db.execute(
+            """
+            SELECT COUNT(*) AS total_calls, SUM(duration) AS total_duration, SUM(cost) AS total_cost
+            FROM calls WHERE start_time >= %s AND start_time < %s
+            """,
+            (SEED_START, SEED_END)
+        )
+        return rows[0]
+    return run_async(query)
+
+
+def bench_rollups_match_calls(run_async, seeded_mysql):
+    service = CallMetricsService()
+    run_async(lambda: service.recompute(SEED_START, SEED_END))
+    # Recomputing is idempotent
+    run_async(lambda: service.recompute(SEED_START, SEED_END))
+    metrics = run_async(lambda: service.get_metrics(SEED_START, SEED_END))
+    raw = _raw_metrics(run_async, seeded_mysql)
+    assert metrics["total_calls"] == raw["total_calls"]
+    assert metrics["total_duration"] == int(raw["total_duration"])
+    assert metrics["total_cost"] == pytest.approx(float(raw["total_cost"]))
+
+
+def bench_metrics_from_calls_table(benchmark, run_async, seeded_mysql):
+    """Baseline: aggregate every call in the range"""
+    benchmark(_raw_metrics, run_async, seeded_mysql)
+
+
+def bench_metrics_from_rollups(benchmark, run_async, seeded_mysql):
+    service = CallMetricsService()
+    run_async(lambda: service.recompute(SEED_START, SEED_END))
+    metrics = benchmark(run_async, lambda: service.get_metrics(datetime(2024, 1, 1, 7), datetime(2024, 1, 28, 19)))
+    assert metrics["total_calls"] > 0
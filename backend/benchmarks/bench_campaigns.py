@@ -0,0 +1,93 @@
+# backend/benchmarks/bench_campaigns.py
+
+from datetime import datetime, time, timedelta, timezone
+
+from app.services.campaign_scheduler import dial_budget, in_call_window
+
+CAMPAIGN = {"call_days": "0,1,2,3,4", "window_start": time(9, 0), "window_end": time(18, 0)}
+# A Wednesday, 15:00 UTC
+NOW = datetime(2026, 10, 14, 15, 0, tzinfo=timezone.utc)
+ZONES = ["UTC", "Europe/Paris", "America/New_York", "America/Los_Angeles", "Asia/Tokyo", "Australia/Sydney"]
+
+
+def bench_dial_budget_fills_free_agents():
+    # 10 free agents at a 50% answer rate: 20 calls should be ringing
+    assert dial_budget(10, 0, 0.5, 2.5) == 20
+    assert dial_budget(10, 15, 0.5, 2.5) == 5
+    assert dial_budget(10, 30, 0.5, 2.5) == 0
+
+
+def bench_dial_budget_never_over_dials():
+    # Everyone answers: one call per free agent
+    assert dial_budget(10, 0, 1.0, 2.5) == 10
+    # A very low answer rate is capped at the max dial ratio
+    assert dial_budget(10, 0, 0.01, 2.5) == 25
+    assert dial_budget(0, 0, 0.5, 2.5) == 0
+
+
+def bench_call_window_is_local_to_each_zone():
+    allowed = {zone: in_call_window(CAMPAIGN, zone, NOW) for zone in ZONES}
+    assert allowed == {
+        "UTC": True,
+        "Europe/Paris": True,          # 17:00
+        "America/New_York": True,      # 11:00
+        "America/Los_Angeles": False,  # 08:00, before the window opens
+        "Asia/Tokyo": False,           # 00:00 Thursday
+        "Australia/Sydney": False,     # 02:00 Thursday
+    }
+
+
+def bench_call_window_skips_weekends():
+    saturday = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+    assert not in_call_window(CAMPAIGN, "UTC", saturday)
+    assert in_call_window({**CAMPAIGN, "call_days": "5,6"}, "UTC", saturday)
+
+
+def bench_call_window_crossing_midnight_and_mysql_times():
+    # aiomysql returns TIME columns as timedeltas
+    night = {"call_days": "0,1,2,3,4,5,6", "window_start": timedelta(hours=22), "window_end": timedelta(hours=2)}
+    assert in_call_window(night, "UTC", NOW.replace(hour=23))
+    assert in_call_window(night, "UTC", NOW.replace(hour=1))
+    assert not in_call_window(night, "UTC", NOW.replace(hour=2))
+    assert not in_call_window(night, "UTC", NOW)
+
+
+def bench_call_window(benchmark):
+    zones = ZONES * 200
+    benchmark(lambda: [in_call_window(CAMPAIGN, zone, NOW) for zone in zones])
+
+
+def bench_status_callback_requires_twilio_signature(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from twilio.request_validator import RequestValidator
+
+    from app.config import settings
+    from app.routes import calls
+
+    monkeypatch.setattr(settings, "twilio_auth_token", "bench-token")
+    monkeypatch.setattr(calls.twilio_service, "status_callback", "https://example.com/api/calls/status")
+    handled = []
+
+    async def record(*args):
+        handled.append(args)
+
+    monkeypatch.setattr(calls.twilio_service, "handle_status_callback", record)
+    monkeypatch.setattr(calls.campaign_scheduler, "record_call_status", record)
+    monkeypatch.setattr(calls.call_metrics, "touch_call", record)
+    app = FastAPI()
+    app.include_router(calls.router, prefix="/api/calls")
+    client = TestClient(app)
+    params = {"CallSid": "CA1", "CallStatus": "completed", "CallDuration": "42"}
+
+    # Unsigned, or signed for other parameters: a forged outcome is rejected
+    assert client.post("/api/calls/status", data=params).status_code == 403
+    forged = RequestValidator("bench-token").compute_signature(
+        calls.twilio_service.status_callback, {**params, "CallStatus": "busy"}
+    )
+    assert client.post("/api/calls/status", data=params, headers={"X-Twilio-Signature": forged}).status_code == 403
+    assert handled == []
+
+    signature = RequestValidator("bench-token").compute_signature(calls.twilio_service.status_callback, params)
+    assert client.post("/api/calls/status", data=params, headers={"X-Twilio-Signature": signature}).status_code == 204
+    assert len(handled) == 3
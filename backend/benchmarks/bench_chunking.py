@@ -0,0 +1,58 @@
+# backend/benchmarks/bench_chunking.py
+
+import random
+
+import pytest
+
+chunking = pytest.importorskip("app.services.chunking")
+
+WORDS = ("call", "agent", "voice", "customer", "product", "support", "order",
+         "pricing", "meeting", "document", "knowledge", "answer", "question")
+
+
+@pytest.fixture(scope="module")
+def document_pages():
+    """Roughly 1 MB of sentence-like text split into pages of paragraphs"""
+    rng = random.Random(42)
+    pages = []
+    size = 0
+    while size < 1_000_000:
+        paragraphs = []
+        for _ in range(rng.randint(3, 8)):
+            sentences = [
+                " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 24))).capitalize() + "."
+                for _ in range(rng.randint(2, 10))
+            ]
+            paragraphs.append(" ".join(sentences))
+        page = "\n\n".join(paragraphs)
+        pages.append(page)
+        size += len(page)
+    return pages
+
+
+def bench_split_text_into_chunks(benchmark, document_pages):
+    text = "\n\n".join(document_pages)
+    chunks = benchmark(chunking.split_text_into_chunks, text, 128, 16)
+    assert chunks
+    assert max(chunking.approximate_token_counter(chunks)) <= 128
+
+
+def bench_stream_chunks_from_pages(benchmark, document_pages):
+    def run():
+        chunker = chunking.TextChunker(128, 16)
+        return sum(1 for _ in chunker.chunks(iter(document_pages)))
+
+    assert benchmark(run) > 0
+
+
+def bench_overlap_fills_from_partial_units():
+    # An over-long sentence is packed so consecutive chunks share words
+    assert list(chunking.TextChunker(4, 2).chunks(["a b c d e f g h i j"])) == [
+        "a b c d", "c d e f", "e f g h", "g h i j"
+    ]
+    # Paragraphs larger than the overlap still carry their last sentences over: 4 of 7 tokens each
+    paragraph = " ".join(f"Sentence {i} has exactly seven tokens ." for i in range(6))
+    chunks = list(chunking.TextChunker(100, 32).chunks(["\n\n".join([paragraph] * 4)]))
+    assert max(chunking.approximate_token_counter(chunks)) <= 100
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.startswith(" ".join(previous.split(" ")[-28:]))
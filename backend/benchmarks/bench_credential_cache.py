@@ -0,0 +1,99 @@
+# backend/benchmarks/bench_credential_cache.py
+
+import asyncio
+import json
+
+from app.services.credential_cache import CredentialCache
+
+# Simulated service_credentials round trip
+DB_LATENCY = 0.001
+LOOKUPS = 200
+ROW = json.dumps({"url": "https://project.supabase.co", "apiKey": "k" * 200})
+
+
+class FakeStore:
+    def __init__(self):
+        self.queries = 0
+        self.row = ROW
+
+    async def load(self):
+        self.queries += 1
+        row = self.row
+        await asyncio.sleep(DB_LATENCY)
+        return json.loads(row) if row else None
+
+
+def bench_uncached_lookups(benchmark):
+    """What each authenticated request paid: one query and JSON parse per lookup"""
+    async def lookups():
+        store = FakeStore()
+        for _ in range(LOOKUPS):
+            await store.load()
+        return store.queries
+
+    assert benchmark.pedantic(lambda: asyncio.run(lookups()), rounds=3) == LOOKUPS
+
+
+def bench_cached_lookups(benchmark):
+    async def lookups():
+        cache, store = CredentialCache(max_entries=16, ttl=30.0), FakeStore()
+        for _ in range(LOOKUPS):
+            await cache.get(1, "Supabase", store.load)
+        return cache, store
+
+    cache, store = benchmark.pedantic(lambda: asyncio.run(lookups()), rounds=3)
+    assert store.queries == 1
+    assert cache.stats()["hits"] == LOOKUPS - 1
+
+
+def bench_concurrent_misses_share_one_load():
+    async def run():
+        cache, store = CredentialCache(max_entries=16, ttl=30.0), FakeStore()
+        results = await asyncio.gather(*(cache.get(1, "Supabase", store.load) for _ in range(50)))
+        return cache, store, results
+
+    cache, store, results = asyncio.run(run())
+    assert store.queries == 1
+    assert all(result == results[0] for result in results)
+    assert cache.stats()["coalesced"] == 49
+
+
+def bench_invalidation_wins_over_running_load():
+    async def run():
+        cache, store = CredentialCache(max_entries=16, ttl=30.0), FakeStore()
+        pending = asyncio.ensure_future(cache.get(1, "Supabase", store.load))
+        await asyncio.sleep(DB_LATENCY / 2)
+        # Credentials rewritten while the old row was being read
+        store.row = json.dumps({"url": "https://other.supabase.co", "apiKey": "new"})
+        cache.invalidate(1, "Supabase")
+        stale = await pending
+        fresh = await cache.get(1, "Supabase", store.load)
+        again = await cache.get(1, "Supabase", store.load)
+        return stale, fresh, again, store
+
+    stale, fresh, again, store = asyncio.run(run())
+    assert stale["url"] == "https://project.supabase.co"
+    assert fresh["url"] == again["url"] == "https://other.supabase.co"
+    assert store.queries == 2
+
+
+def bench_missing_credentials_are_not_cached():
+    async def run():
+        cache, store = CredentialCache(max_entries=16, ttl=30.0), FakeStore()
+        store.row = None
+        assert await cache.get(1, "Google Drive", store.load) is None
+        store.row = ROW
+        return await cache.get(1, "Google Drive", store.load)
+
+    assert asyncio.run(run())["url"] == "https://project.supabase.co"
+
+
+def bench_entries_expire():
+    async def run():
+        cache, store = CredentialCache(max_entries=16, ttl=0.01), FakeStore()
+        await cache.get(1, "Supabase", store.load)
+        await asyncio.sleep(0.02)
+        await cache.get(1, "Supabase", store.load)
+        return store.queries
+
+    assert asyncio.run(run()) == 2
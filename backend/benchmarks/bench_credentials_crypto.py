@@ -0,0 +1,70 @@
+# backend/benchmarks/bench_credentials_crypto.py
+
+import asyncio
+
+import pytest
+from cryptography.fernet import Fernet
+
+from app.services.credential_validator import CredentialValidator, derive_encryption_key
+
+RECORDS = [
+    {"url": f"https://project{i}.supabase.co", "apiKey": f"key-{i}" * 20, "authToken": f"token-{i}"}
+    for i in range(200)
+]
+
+
+@pytest.fixture
+def key_file(tmp_path):
+    path = tmp_path / "credential.keys"
+    path.write_text(f"# newest first\n{Fernet.generate_key().decode()}\n")
+    return path
+
+
+def bench_per_call_key_derivation(benchmark):
+    """What every validator used to pay at import time, and on each new instance"""
+    benchmark.pedantic(derive_encryption_key, rounds=3)
+
+
+def bench_bulk_decrypt(benchmark, key_file):
+    validator = CredentialValidator(key_file=str(key_file))
+    encrypted = validator.encrypt_many(RECORDS)
+    assert benchmark(validator.decrypt_many, encrypted) == RECORDS
+
+
+def bench_async_bulk_roundtrip(key_file):
+    validator = CredentialValidator(key_file=str(key_file))
+
+    async def roundtrip():
+        encrypted = await validator.encrypt_many_async(RECORDS)
+        return encrypted, await validator.decrypt_many_async(encrypted)
+
+    encrypted, decrypted = asyncio.run(roundtrip())
+    assert encrypted[0]["url"] == RECORDS[0]["url"]
+    assert encrypted[0]["apiKey"] != RECORDS[0]["apiKey"]
+    assert decrypted == RECORDS
+
+
+def bench_key_rotation(key_file):
+    old = CredentialValidator(key_file=str(key_file))
+    encrypted = old.encrypt_many(RECORDS[:5])
+
+    new_key = Fernet.generate_key().decode()
+    key_file.write_text(f"{new_key}\n{key_file.read_text()}")
+    rotated_validator = CredentialValidator(key_file=str(key_file))
+    # Old ciphertexts still decrypt, and rotate re-encrypts them with the new primary key
+    assert rotated_validator.decrypt_many(encrypted) == RECORDS[:5]
+    rotated = rotated_validator.rotate_many(encrypted)
+    assert CredentialValidator(key_file=_single_key_file(key_file, new_key)).decrypt_many(rotated) == RECORDS[:5]
+    assert old.decrypt_many(rotated) == [None] * 5
+
+
+def bench_keys_are_loaded_lazily(tmp_path):
+    validator = CredentialValidator(key_file=str(tmp_path / "missing.keys"))
+    with pytest.raises(Exception):
+        validator.encrypt_credentials({"apiKey": "secret"})
+
+
+def _single_key_file(key_file, key):
+    path = key_file.parent / "new.keys"
+    path.write_text(key)
+    return str(path)
@@ -0,0 +1,138 @@
+# backend/benchmarks/bench_dialer.py
+
+import asyncio
+import time
+
+import aiohttp
+
+from app.services.call_dialer import CallDialer, TokenBucket, is_retryable_call_error
+
+CREATE_LATENCY = 0.02
+NUMBERS = [f"+1555{i:07d}" for i in range(100)]
+
+
+class TwilioError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+class FakeTwilio:
+    def __init__(self, failures=None):
+        self.failures = failures or {}
+        self.attempts = {}
+        self.placed = []
+
+    async def create_call(self, to_number, from_number, ultravox_url=None):
+        attempt = self.attempts[to_number] = self.attempts.get(to_number, 0) + 1
+        await asyncio.sleep(CREATE_LATENCY)
+        status = self.failures.get((to_number, attempt))
+        if status:
+            raise TwilioError(status)
+        self.placed.append(time.monotonic())
+        return {"call_sid": f"CA{to_number[1:]}-{attempt}", "call_status": "queued"}
+
+
+def _dialer(twilio, calls_per_second=1000.0, max_live=1000, workers=20):
+    return CallDialer(
+        twilio.create_call,
+        calls_per_second=calls_per_second,
+        max_live=max_live,
+        workers=workers,
+        max_attempts=3,
+        retry_delay=0.01,
+        max_call_seconds=60
+    )
+
+
+async def _collect(dialer, numbers):
+    return [result async for result in dialer.dial(numbers, "+15550000000")]
+
+
+def bench_serial_calls(benchmark):
+    """What bulk_calls did: one create request after another"""
+    async def dial_all():
+        twilio = FakeTwilio()
+        for number in NUMBERS:
+            await twilio.create_call(number, "+15550000000")
+        return twilio.placed
+
+    assert len(benchmark.pedantic(lambda: asyncio.run(dial_all()), rounds=1)) == len(NUMBERS)
+
+
+def bench_concurrent_dialer(benchmark):
+    async def dial_all():
+        return await _collect(_dialer(FakeTwilio()), NUMBERS)
+
+    results = benchmark.pedantic(lambda: asyncio.run(dial_all()), rounds=3)
+    assert sorted(result["index"] for result in results) == list(range(len(NUMBERS)))
+    assert all(result["status"] == "success" for result in results)
+
+
+def bench_calls_per_second_limit():
+    async def run():
+        twilio = FakeTwilio()
+        await _collect(_dialer(twilio, calls_per_second=50.0), NUMBERS)
+        return twilio.placed
+
+    placed = sorted(asyncio.run(run()))
+    # A burst of one second's tokens, then 50 calls per second
+    assert placed[-1] - placed[0] >= 0.9
+
+
+def bench_live_call_cap():
+    async def run():
+        twilio = FakeTwilio()
+        dialer = _dialer(twilio, max_live=5)
+        results = []
+
+        async def consume():
+            async for result in dialer.dial(NUMBERS[:10], "+15550000000"):
+                results.append(result)
+
+        task = asyncio.ensure_future(consume())
+        await asyncio.sleep(CREATE_LATENCY * 5)
+        capped = len(results)
+        # Status callbacks report the first calls finished
+        for result in list(results):
+            dialer.live_calls.finish(result["call_sid"])
+        await asyncio.wait_for(task, 1)
+        return capped, dialer.live_calls.live
+
+    capped, live = asyncio.run(run())
+    assert capped == 5
+    assert live == 5
+
+
+def bench_retries_and_rejections():
+    twilio = FakeTwilio(failures={
+        (NUMBERS[1], 1): 429,                       # rate limited once
+        (NUMBERS[2], 1): 429, (NUMBERS[2], 2): 429,  # rate limited twice, then placed
+        (NUMBERS[3], 1): 400,                       # rejected number: not retried
+        (NUMBERS[4], 1): 503,                       # the call may exist: not retried
+    })
+    numbers = NUMBERS[:5] + ["555-0100", NUMBERS[0]]
+    results = {result["index"]: result for result in asyncio.run(_collect(_dialer(twilio), numbers))}
+
+    assert [results[i]["status"] for i in range(7)] == ["success", "success", "success", "failed", "failed", "failed", "skipped"]
+    assert [results[i]["attempts"] for i in range(5)] == [1, 2, 3, 1, 1]
+    assert twilio.attempts[NUMBERS[3]] == 1
+
+
+def bench_only_unsent_requests_are_retried():
+    refused = aiohttp.ClientConnectorError(None, ConnectionRefusedError(111, "Connection refused"))
+    assert is_retryable_call_error(refused)
+    assert is_retryable_call_error(aiohttp.ConnectionTimeoutError())
+    # Sent, but the outcome is unknown
+    assert not is_retryable_call_error(aiohttp.SocketTimeoutError())
+    assert not is_retryable_call_error(aiohttp.ServerDisconnectedError())
+    assert not is_retryable_call_error(TwilioError(500))
+
+
+def bench_token_bucket_acquire(benchmark):
+    bucket = TokenBucket(rate=1e9)
+    loop = asyncio.new_event_loop()
+    try:
+        benchmark(lambda: loop.run_until_complete(bucket.acquire()))
+    finally:
+        loop.close()
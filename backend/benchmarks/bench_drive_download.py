@@ -0,0 +1,128 @@
+# backend/benchmarks/bench_drive_download.py
+
+import hashlib
+import io
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+drive_module = pytest.importorskip("app.services.google_drive_service")
+from app.config import settings
+
+FILE_SIZE = 24 * 1024 * 1024
+# Per-request latency of the stub, standing in for the round trip to Google
+LATENCY = 0.05
+CONTENT = os.urandom(FILE_SIZE)
+EXPORT_TEXT = ("Exported Google Doc paragraph.\n\n" * 2000).encode()
+
+
+class StubDriveHandler(BaseHTTPRequestHandler):
+    """Serves /files/<id>?alt=media with Range support and /files/<id>/export"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        time.sleep(LATENCY)
+        with server.lock:
+            server.requests += 1
+            fail = server.fail_next > 0
+            server.fail_next -= 1 if fail else 0
+        if fail:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body, status = (EXPORT_TEXT, 200) if "/export" in self.path else (CONTENT, 200)
+        byte_range = re.match(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+        if byte_range:
+            start, end = int(byte_range.group(1)), int(byte_range.group(2))
+            body, status = body[start:end + 1], 206
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def stub_drive():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubDriveHandler)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.fail_next = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def drive(stub_drive, monkeypatch, run_async):
+    """GoogleDriveService wired to the stub server with valid fake credentials"""
+    monkeypatch.setattr(drive_module, "DRIVE_FILES_URL", f"http://127.0.0.1:{stub_drive.server_address[1]}/files")
+    pool = drive_module.HttpClientPool(
+        "bench_drive", max_clients=1, idle_ttl=60.0, max_connections_per_host=16,
+        max_keepalive_connections=16, keepalive_expiry=60.0, timeout=httpx.Timeout(30.0), http2=False
+    )
+    monkeypatch.setattr(drive_module, "drive_download_pool", pool)
+    monkeypatch.setattr(settings, "drive_download_chunk_bytes", 4 * 1024 * 1024)
+    stub_drive.fail_next = 0
+    yield SimpleNamespace(service=drive_module.google_drive_service, client=SimpleNamespace(
+        credentials=SimpleNamespace(valid=True, token="token")
+    ))
+    run_async(pool.aclose)
+
+
+def _download(run_async, drive):
+    file = {"id": "doc", "mimeType": "application/pdf", "size": str(FILE_SIZE)}
+    sink = io.BytesIO()
+    run_async(lambda: drive.service.fetch_content(drive.client, file, sink))
+    return sink.getvalue()
+
+
+def bench_download_sequential(benchmark, run_async, drive, monkeypatch):
+    monkeypatch.setattr(settings, "drive_download_parallelism", 1)
+    data = benchmark.pedantic(_download, args=(run_async, drive), rounds=3)
+    assert data == CONTENT
+
+
+def bench_download_parallel_ranges(benchmark, run_async, drive, monkeypatch):
+    monkeypatch.setattr(settings, "drive_download_parallelism", 6)
+    data = benchmark.pedantic(_download, args=(run_async, drive), rounds=3)
+    assert hashlib.md5(data).digest() == hashlib.md5(CONTENT).digest()
+
+
+def bench_download_retries_ranges(benchmark, run_async, drive, stub_drive, monkeypatch):
+    monkeypatch.setattr(settings, "drive_download_parallelism", 6)
+
+    def run():
+        stub_drive.fail_next = 2
+        return _download(run_async, drive)
+
+    assert benchmark.pedantic(run, rounds=2) == CONTENT
+
+
+def bench_export_google_doc(benchmark, run_async, drive):
+    file = {"id": "gdoc", "mimeType": "application/vnd.google-apps.document"}
+
+    def export():
+        sink = io.BytesIO()
+        exported = run_async(lambda: drive.service.fetch_content(drive.client, file, sink))
+        return exported, sink.getvalue()
+
+    exported, data = benchmark.pedantic(export, rounds=3)
+    assert exported["mimeType"] == "text/plain"
+    assert exported["size"] == len(EXPORT_TEXT)
+    assert data == EXPORT_TEXT
@@ -0,0 +1,75 @@
+# backend/benchmarks/bench_drive_sync.py
+
+import random
+from collections import Counter
+from datetime import datetime
+
+import pytest
+
+drive_sync = pytest.importorskip("app.services.drive_sync")
+
+CHANGE_COUNT = 100_000
+PDF = "application/pdf"
+
+
+@pytest.fixture(scope="module")
+def changes_and_known():
+    """A Changes API page mix: mostly unchanged files, some edits, removals and unsupported types"""
+    rng = random.Random(11)
+    changes, known = [], {}
+    for i in range(CHANGE_COUNT):
+        file_id = f"file-{i}"
+        file = {
+            "id": file_id,
+            "mimeType": PDF if rng.random() < 0.9 else "image/png",
+            "md5Checksum": f"md5-{i}",
+            "modifiedTime": "2024-03-01T12:00:00.000Z"
+        }
+        roll = rng.random()
+        if roll < 0.6:
+            known[file_id] = {"indexed_at": datetime(2024, 3, 2), "ingested_version": f"md5-{i}"}
+        elif roll < 0.8:
+            known[file_id] = {"indexed_at": datetime(2024, 3, 2), "ingested_version": f"md5-old-{i}"}
+        elif roll < 0.85:
+            known[file_id] = {"job_status": "running", "queued_version": f"md5-old-{i}"}
+        if rng.random() < 0.05:
+            changes.append({"fileId": file_id, "removed": True})
+        else:
+            changes.append({"fileId": file_id, "removed": False, "file": file})
+    return changes, known
+
+
+def bench_classify_changes(benchmark, changes_and_known):
+    changes, known = changes_and_known
+
+    def classify():
+        return Counter(drive_sync.classify_change(change, known.get(change["fileId"])) for change in changes)
+
+    actions = benchmark(classify)
+    assert sum(actions.values()) == CHANGE_COUNT
+    # Unchanged files and files with a running job never queue work
+    assert actions["skip"] > CHANGE_COUNT // 2
+    assert actions["ingest"] < CHANGE_COUNT // 2
+    assert actions["remove"] > 0
+
+
+def bench_classify_change_decisions(benchmark):
+    indexed = {"indexed_at": datetime(2024, 3, 2)}
+    file = {"id": "a", "mimeType": PDF, "md5Checksum": "m1", "modifiedTime": "2024-03-01T12:00:00.000Z"}
+    cases = [
+        ({"fileId": "a", "file": file}, None, "ingest"),
+        ({"fileId": "a", "file": file}, {**indexed, "ingested_version": "m1"}, "skip"),
+        ({"fileId": "a", "file": file}, {**indexed, "ingested_version": "m0"}, "ingest"),
+        # Indexed before sync was enabled and not modified since
+        ({"fileId": "a", "file": file}, indexed, "adopt"),
+        ({"fileId": "a", "file": {**file, "modifiedTime": "2024-03-03T00:00:00Z"}}, indexed, "ingest"),
+        ({"fileId": "a", "file": file}, {"job_status": "queued", "queued_version": "m0"}, "skip"),
+        ({"fileId": "a", "removed": True}, indexed, "remove"),
+        ({"fileId": "a", "removed": True}, None, "skip"),
+        ({"fileId": "a", "file": {**file, "trashed": True}}, indexed, "remove"),
+    ]
+
+    def classify():
+        return [drive_sync.classify_change(change, known) for change, known, _ in cases]
+
+    assert benchmark(classify) == [expected for _, _, expected in cases]
@@ -0,0 +1,44 @@
+# backend/benchmarks/bench_embedding_cache.py
+
+import numpy as np
+
+from app.services.embedding_cache import EmbeddingCache
+
+DIMENSION = 384
+BATCH = 256
+
+
+def _batch(rng, start):
+    texts = [f"chunk {i}" for i in range(start, start + BATCH)]
+    return texts, rng.standard_normal((BATCH, DIMENSION)).astype(np.float32)
+
+
+def _stored_bytes(cache):
+    return cache._connection().execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+
+
+def bench_put_many_with_eviction(benchmark, tmp_path):
+    rng = np.random.default_rng(0)
+    # Room for about ten batches, so most rounds also evict
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite3"), max_bytes=10 * BATCH * DIMENSION * 4)
+    counter = iter(range(0, 10**9, BATCH))
+
+    benchmark(lambda: cache.put_many("model", *_batch(rng, next(counter))))
+    assert cache._total_bytes <= cache.max_bytes
+    assert cache._total_bytes == _stored_bytes(cache)
+
+
+def bench_total_bytes_tracks_rewrites(tmp_path):
+    rng = np.random.default_rng(1)
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite3"), max_bytes=10**9)
+    texts, vectors = _batch(rng, 0)
+    cache.put_many("model", texts, vectors)
+    # Stored chunks again, with duplicates inside the batch, add nothing
+    cache.put_many("model", texts + texts[:10], np.vstack([vectors, vectors[:10]]))
+    assert cache._total_bytes == BATCH * DIMENSION * 4 == _stored_bytes(cache)
+    assert len(cache.get_many("model", texts)) == BATCH
+
+    # A reopened cache starts from what is on disk
+    reopened = EmbeddingCache(cache.path, max_bytes=10**9)
+    reopened._connection()
+    assert reopened._total_bytes == cache._total_bytes
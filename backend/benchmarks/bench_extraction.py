@@ -0,0 +1,41 @@
+# backend/benchmarks/bench_extraction.py
+
+import pytest
+
+extractors = pytest.importorskip("app.services.extractors")
+
+
+@pytest.fixture(scope="module")
+def text_file(tmp_path_factory):
+    """About 8 MB of plain text in paragraphs"""
+    path = tmp_path_factory.mktemp("extraction") / "document.txt"
+    paragraph = "The agent answered the customer question about pricing and order status.\n" * 20 + "\n"
+    with open(path, "w") as f:
+        for _ in range(5000):
+            f.write(paragraph)
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def spreadsheet_file(tmp_path_factory):
+    """A 50,000-row workbook"""
+    openpyxl = pytest.importorskip("openpyxl")
+    path = tmp_path_factory.mktemp("extraction") / "sheet.xlsx"
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("Calls")
+    for i in range(50_000):
+        sheet.append([i, f"+1555{i:07d}", "completed", i % 300, "Follow up about the order"])
+    workbook.save(path)
+    return str(path)
+
+
+def _consume(source):
+    return sum(len(block) for block in extractors.iter_blocks(source))
+
+
+def bench_stream_text_blocks(benchmark, text_file):
+    assert benchmark(_consume, text_file) > 0
+
+
+def bench_stream_spreadsheet_rows(benchmark, spreadsheet_file):
+    assert benchmark.pedantic(_consume, args=(spreadsheet_file,), rounds=3) > 0
@@ -0,0 +1,164 @@
+# backend/benchmarks/bench_google_batch.py
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("googleapiclient")
+import httplib2
+from googleapiclient.errors import HttpError
+
+from app.services import google_service as google_service_module
+from app.services.google_service import GoogleService
+
+ROUND_TRIP = 0.005
+ITEMS = 100
+
+
+def _error(status, reason="backendError"):
+    content = json.dumps({"error": {"errors": [{"reason": reason}]}}).encode()
+    return HttpError(httplib2.Response({"status": status}), content)
+
+
+class FakeRequest:
+    def __init__(self, body):
+        self.body = body
+        self.methodId = "calendar.events.insert"
+
+
+class FakeClient:
+    """One simulated round trip per execute/execute_batch call; failures are scripted per item and attempt"""
+
+    def __init__(self, failures=None):
+        self.failures = failures or {}
+        self.calls = 0
+        self.seen = {}
+
+    def events(self):
+        return self
+
+    def insert(self, calendarId, body, conferenceDataVersion):
+        return FakeRequest(body)
+
+    def _respond(self, request):
+        title = request.body["summary"]
+        attempt = self.seen[title] = self.seen.get(title, 0) + 1
+        error = self.failures.get((title, attempt))
+        if error is not None:
+            return None, error
+        return dict(request.body, status="confirmed", hangoutLink=f"https://meet/{request.body['id']}"), None
+
+    async def execute(self, request):
+        self.calls += 1
+        await asyncio.sleep(ROUND_TRIP)
+        response, error = self._respond(request)
+        if error is not None:
+            raise error
+        return response
+
+    async def execute_batch(self, requests):
+        self.calls += 1
+        await asyncio.sleep(ROUND_TRIP)
+        return [self._respond(request) for request in requests]
+
+
+def _meetings(count):
+    from datetime import datetime, timedelta
+    start = datetime(2026, 1, 5, 9, 0)
+    return [
+        {"title": f"Follow-up {i}", "start_time": start, "end_time": start + timedelta(minutes=30),
+         "attendees": [f"lead{i}@example.com"]}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = GoogleService()
+    stored = []
+
+    async def get_credentials(user_id):
+        return object()
+
+    async def store_meetings(user_id, events):
+        stored.extend(events)
+
+    async def no_sleep(delay):
+        pass
+
+    service.get_credentials = get_credentials
+    service._store_meetings = store_meetings
+    service.stored = stored
+    monkeypatch.setattr(google_service_module.asyncio, "sleep", no_sleep, raising=False)
+    return service
+
+
+def _use_client(monkeypatch, client):
+    monkeypatch.setattr(google_service_module.google_client_factory, "client", lambda *args: client)
+
+
+def bench_single_inserts(benchmark):
+    """What a post-campaign fan-out costs with one round trip per event"""
+    service = GoogleService()
+
+    async def insert_all():
+        client = FakeClient()
+        events = [dict(service._event_body(**m), id=f"e{i}") for i, m in enumerate(_meetings(ITEMS))]
+        return [await client.execute(service._insert_event_request(client, event)) for event in events]
+
+    assert len(benchmark.pedantic(lambda: asyncio.run(insert_all()), rounds=3)) == ITEMS
+
+
+def bench_batched_inserts(benchmark, service, monkeypatch):
+    async def insert_all():
+        client = FakeClient()
+        _use_client(monkeypatch, client)
+        results = await service.create_meetings(1, _meetings(ITEMS))
+        return results, client
+
+    results, client = benchmark.pedantic(lambda: asyncio.run(insert_all()), rounds=3)
+    assert all(result["success"] for result in results)
+    assert client.calls == 2
+
+
+def bench_partial_failures_are_retried_per_item(service, monkeypatch):
+    client = FakeClient()
+    _use_client(monkeypatch, client)
+
+    client.failures = {
+        ("Follow-up 1", 1): _error(503),                               # transient, succeeds on retry
+        ("Follow-up 2", 1): _error(500), ("Follow-up 2", 2): _error(409),  # created, response lost
+        ("Follow-up 3", 1): _error(403, "forbidden"),                  # permanent
+        ("Follow-up 4", 1): _error(403, "rateLimitExceeded"),          # quota, succeeds on retry
+        ("Follow-up 5", 1): _error(400),                               # permanent
+    }
+    results = asyncio.run(service.create_meetings(1, _meetings(6)))
+
+    assert [result["success"] for result in results] == [True, True, True, False, True, False]
+    assert [result["index"] for result in results] == list(range(6))
+    assert {event["summary"] for event in service.stored} == {"Follow-up 0", "Follow-up 1", "Follow-up 2", "Follow-up 4"}
+    assert client.seen == {f"Follow-up {i}": attempts for i, attempts in enumerate([1, 2, 2, 1, 2, 1])}
+
+
+def bench_email_sends_retry_only_rate_limits(service, monkeypatch):
+    client = FakeClient()
+    _use_client(monkeypatch, client)
+    service._send_email_request = lambda gmail, to, subject, body, html=False: FakeRequest(
+        {"summary": to, "id": f"m-{to}", "threadId": f"t-{to}"}
+    )
+
+    async def store_emails(user_id, sent):
+        service.stored.extend(sent)
+
+    service._store_emails = store_emails
+    client.failures = {
+        ("lead1@example.com", 1): _error(429),                        # rate limited, sent on retry
+        ("lead2@example.com", 1): _error(403, "rateLimitExceeded"),   # quota, sent on retry
+        ("lead3@example.com", 1): _error(503),                        # may have been sent: not retried
+    }
+    emails = [{"to": f"lead{i}@example.com", "subject": "Thanks", "body": "..."} for i in range(4)]
+    results = asyncio.run(service.send_emails(1, emails))
+
+    assert [result["success"] for result in results] == [True, True, True, False]
+    assert client.seen == {"lead0@example.com": 1, "lead1@example.com": 2, "lead2@example.com": 2, "lead3@example.com": 1}
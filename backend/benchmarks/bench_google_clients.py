@@ -0,0 +1,48 @@
+# backend/benchmarks/bench_google_clients.py
+
+import pytest
+
+pytest.importorskip("googleapiclient")
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+
+from app.services.google_clients import GoogleClientFactory
+
+APIS = [("drive", "v3"), ("calendar", "v3"), ("gmail", "v1")]
+
+
+@pytest.fixture
+def credentials():
+    return Credentials(token="token", refresh_token="refresh", client_id="client", client_secret="secret")
+
+
+@pytest.fixture
+def factory():
+    factory = GoogleClientFactory(max_clients=16, max_workers=2, timeout=10.0)
+    yield factory
+    factory.shutdown()
+
+
+def bench_build_per_request(benchmark, credentials):
+    """What every Google call used to pay: parse the discovery document again"""
+    def build_all():
+        return [build(api, version, credentials=credentials, static_discovery=True, cache_discovery=False)
+                for api, version in APIS]
+
+    assert len(benchmark(build_all)) == len(APIS)
+
+
+def bench_cached_client(benchmark, factory, credentials):
+    def lookup_all():
+        return [factory.client(api, version, credentials) for api, version in APIS]
+
+    clients = benchmark(lookup_all)
+    assert len(clients) == len(APIS)
+    assert factory.stats()["misses"] == len(APIS)
+
+
+def bench_client_cache_is_per_identity(factory, credentials):
+    other = Credentials(token="token", refresh_token="other", client_id="client", client_secret="secret")
+    first = factory.client("drive", "v3", credentials)
+    assert factory.client("drive", "v3", credentials) is first
+    assert factory.client("drive", "v3", other) is not first
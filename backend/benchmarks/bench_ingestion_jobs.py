@@ -0,0 +1,65 @@
+# backend/benchmarks/bench_ingestion_jobs.py
+
+import asyncio
+
+import numpy as np
+
+from app.services import ingestion_jobs as ingestion_jobs_module
+from app.services.ingestion_jobs import IngestionJobQueue
+
+JOB = {"id": 1, "user_id": 1, "supabase_table": "documents", "source": "upload",
+       "filename": "doc.txt", "size": 10, "document_id": None, "job_key": "job-1"}
+BATCH = {"id": 7, "batch_index": 0, "chunk_start": 10, "chunk_end": 20}
+
+
+class LegacyTable:
+    """Plain-insert table: every row sent is stored, except in the ranges told to fail"""
+
+    def __init__(self, fail_ranges):
+        self.fail_ranges = list(fail_ranges)
+        self.stored = []
+
+    async def store_embeddings(self, credentials, table_name, text_chunks, embeddings, metadata,
+                               chunk_offset=0, document_key=None):
+        failed = []
+        for i, chunk in enumerate(text_chunks):
+            position = chunk_offset + i
+            if any(start <= position < end for start, end in self.fail_ranges):
+                failed.append(position)
+            else:
+                self.stored.append(chunk)
+        self.fail_ranges = []
+        ranges = [(start, start + 1) for start in failed]
+        return {"success": not failed, "failed_ranges": ranges, "errors": ["503"] * bool(failed),
+                "idempotent": False, "chunks_failed": len(failed)}
+
+
+def bench_failed_chunks_are_resent_alone(tmp_path, monkeypatch):
+    queue = IngestionJobQueue()
+    queue.staging_dir = str(tmp_path)
+    queue.batch_max_attempts = 3
+    (tmp_path / "job_1").mkdir()
+    table = LegacyTable([(12, 14), (17, 18)])
+    batches = []
+
+    async def noop(*args, **kwargs):
+        return 0
+
+    async def record_batch(batch_id, status, error_message=None):
+        batches.append(status)
+
+    async def embed(chunks):
+        return np.zeros((len(chunks), 4), dtype=np.float32)
+
+    monkeypatch.setattr(ingestion_jobs_module, "supabase_service", table)
+    monkeypatch.setattr(ingestion_jobs_module.ingestion_executor, "embed", embed)
+    monkeypatch.setattr(queue, "_update_batch", record_batch)
+    monkeypatch.setattr(queue, "_update_job", noop)
+    monkeypatch.setattr(queue, "_stored_batches", noop)
+    chunks = [f"chunk {i}" for i in range(30)]
+
+    assert asyncio.run(queue._process_batch(JOB, BATCH, chunks, {"url": "https://x", "apiKey": "k"}))
+    # Every chunk of the batch stored exactly once, despite the partial failure
+    assert sorted(table.stored) == sorted(chunks[10:20])
+    assert batches[-1] == "stored"
+    assert not list((tmp_path / "job_1").iterdir())
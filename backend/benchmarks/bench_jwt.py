@@ -0,0 +1,23 @@
+# backend/benchmarks/bench_jwt.py
+
+import pytest
+
+jwt = pytest.importorskip("jose.jwt")
+auth_routes = pytest.importorskip("app.routes.auth")
+
+SECRET = auth_routes.SECRET_KEY or "benchmark-secret"
+
+
+@pytest.fixture(scope="module")
+def token():
+    return jwt.encode({"sub": "admin", "exp": 4102444800}, SECRET, algorithm=auth_routes.ALGORITHM)
+
+
+def bench_jwt_verify(benchmark, token):
+    payload = benchmark(jwt.decode, token, SECRET, algorithms=[auth_routes.ALGORITHM])
+    assert payload["sub"] == "admin"
+
+
+def bench_jwt_create(benchmark):
+    token = benchmark(auth_routes.create_access_token, {"sub": "admin"})
+    assert token
@@ -0,0 +1,86 @@
+# backend/benchmarks/bench_onnx.py
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("onnxruntime")
+from app.services.vectorization_service import VectorizationService
+
+QUERIES = [
+    "What does the premium subscription include?",
+    "Which operating systems are supported?",
+    "How do I reset my password?",
+    "Can I get a refund after 30 days?",
+    "What are your support hours?",
+    "How long does shipping take?",
+]
+
+PASSAGES = [
+    "The premium subscription costs $49.99 per month and includes all features.",
+    "Product XYZ supports Windows, macOS and Linux.",
+    "To reset your password, click 'Forgot password' on the login page.",
+    "Refunds are available within 30 days of purchase.",
+    "Our support team is available Monday to Friday, 9am to 6pm.",
+    "Orders ship within two business days and arrive in 3-5 days.",
+    "The basic plan includes email support and up to three users.",
+    "Enterprise customers get a dedicated account manager.",
+    "You can export call recordings as MP3 files from the dashboard.",
+    "Two-factor authentication can be enabled in account settings.",
+    "Invoices are emailed on the first day of each billing cycle.",
+    "The mobile app is available for iOS and Android.",
+]
+
+CHUNK = ("Product XYZ supports all major operating systems including Windows, macOS and Linux. "
+         "The premium subscription costs $49.99 per month and includes all features. ") * 6
+
+
+@pytest.fixture(scope="module")
+def torch_service():
+    service = VectorizationService(backend="torch")
+    service.registry.warmup()
+    return service
+
+
+@pytest.fixture(scope="module")
+def onnx_service():
+    service = VectorizationService(backend="onnx")
+    service.registry.warmup()
+    if service.registry.stats()["backend"] != "onnx":
+        pytest.skip("ONNX backend could not be loaded")
+    return service
+
+
+def _rankings(service):
+    passages = service.vectorize_batch(PASSAGES)
+    queries = service.vectorize_batch(QUERIES)
+    return np.argsort(-(queries @ passages.T), axis=1)
+
+
+def bench_onnx_ranking_parity(benchmark, torch_service, onnx_service):
+    """Quantized rankings must match full precision: same top hit, near-identical top 3"""
+    expected = _rankings(torch_service)
+    actual = benchmark.pedantic(_rankings, args=(onnx_service,), rounds=5)
+
+    assert (expected[:, 0] == actual[:, 0]).all()
+    overlap = np.mean([len(set(e[:3]) & set(a[:3])) / 3 for e, a in zip(expected, actual)])
+    assert overlap >= 0.8
+
+    torch_vectors = torch_service.vectorize_batch(PASSAGES)
+    onnx_vectors = onnx_service.vectorize_batch(PASSAGES)
+    assert np.min(np.sum(torch_vectors * onnx_vectors, axis=1)) > 0.95
+
+
+@pytest.mark.parametrize("backend", ["torch", "onnx"])
+def bench_backend_query_latency(benchmark, request, backend):
+    service = request.getfixturevalue(f"{backend}_service")
+    vector = benchmark(service.vectorize, QUERIES[0])
+    assert len(vector) == service.embedding_dimension
+
+
+@pytest.mark.parametrize("backend", ["torch", "onnx"])
+def bench_backend_batch_throughput(benchmark, request, backend):
+    service = request.getfixturevalue(f"{backend}_service")
+    chunks = [f"{i} {CHUNK}" for i in range(64)]
+    matrix = benchmark(service.vectorize_batch, chunks)
+    assert matrix.shape == (len(chunks), service.embedding_dimension)
@@ -0,0 +1,93 @@
+# backend/benchmarks/bench_search_cache.py
+
+import asyncio
+
+import pytest
+
+search_cache_module = pytest.importorskip("app.services.search_cache")
+
+RESULTS = [{"text": f"chunk {i}", "similarity_score": 0.9 - i / 100, "metadata": {}} for i in range(5)]
+
+
+@pytest.fixture
+def warm_cache(run_async):
+    cache = search_cache_module.SearchCache()
+
+    async def compute():
+        return RESULTS
+
+    run_async(lambda: cache.get_results(1, "documents", "What are your support hours?", 5, 0.7, compute))
+    return cache, compute
+
+
+def bench_cached_search_results(benchmark, run_async, warm_cache):
+    cache, compute = warm_cache
+    results = benchmark(
+        run_async,
+        lambda: cache.get_results(1, "documents", "What are your support hours?", 5, 0.7, compute)
+    )
+    assert results is RESULTS
+
+
+def bench_concurrent_misses_coalesce(run_async):
+    cache = search_cache_module.SearchCache()
+    calls = {"embed": 0, "search": 0}
+
+    async def embed():
+        calls["embed"] += 1
+        await asyncio.sleep(0.01)
+        return [0.1, 0.2]
+
+    async def compute():
+        calls["search"] += 1
+        await asyncio.sleep(0.01)
+        return RESULTS
+
+    async def search():
+        embedding = await cache.get_query_embedding("model", "What are your  support hours?", embed)
+        results = await cache.get_results(1, "documents", "what are your support hours?", 5, 0.7, compute)
+        return embedding, results
+
+    async def burst():
+        return await asyncio.gather(*(search() for _ in range(10)))
+
+    results = run_async(burst)
+    assert calls == {"embed": 1, "search": 1}
+    assert all(result == ([0.1, 0.2], RESULTS) for result in results)
+    assert cache.stats()["coalesced_requests"] == 18
+
+
+def bench_generation_bump_invalidates_results(run_async):
+    cache = search_cache_module.SearchCache()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        return RESULTS
+
+    def search():
+        return run_async(lambda: cache.get_results(1, "documents", "support hours", 5, 0.7, compute))
+
+    search()
+    search()
+    assert calls == 1
+
+    cache.invalidate_table(1, "documents")
+    search()
+    assert calls == 2
+    # Another table's results are untouched
+    cache.invalidate_table(1, "other")
+    search()
+    assert calls == 2
+
+    # A search running while the table is re-ingested is not cached
+    async def racing():
+        nonlocal calls
+        calls += 1
+        cache.invalidate_table(1, "documents")
+        return RESULTS
+
+    run_async(lambda: cache.get_results(1, "documents", "new query", 5, 0.7, racing))
+    run_async(lambda: cache.get_results(1, "documents", "new query", 5, 0.7, compute))
+    assert calls == 4
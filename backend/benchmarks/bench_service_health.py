@@ -0,0 +1,101 @@
+# backend/benchmarks/bench_service_health.py
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.services import service_health as service_health_module
+from app.services.credential_validator import credential_validator
+from app.services.service_health import ServiceHealthProber
+
+UPSTREAM_LATENCY = 0.05
+NETWORK_CHECKED = ["Supabase", "SERP API", "Airtable"]
+
+
+async def _slow_upstream(request):
+    await asyncio.sleep(UPSTREAM_LATENCY)
+    if "airtable" in request.url.host:
+        return httpx.Response(401)
+    return httpx.Response(200, json={})
+
+
+@pytest.fixture
+def configured(monkeypatch):
+    monkeypatch.setattr(settings, "supabase_url", "https://project.supabase.co")
+    monkeypatch.setattr(settings, "supabase_key", "key")
+    monkeypatch.setattr(settings, "twilio_account_sid", "AC" + "a" * 32)
+    monkeypatch.setattr(settings, "twilio_auth_token", "b" * 32)
+    monkeypatch.setattr(settings, "ultravox_api_key", "")
+    monkeypatch.setattr(settings, "google_client_id", "client.apps.googleusercontent.com")
+    monkeypatch.setattr(settings, "google_client_secret", "secret")
+    monkeypatch.setenv("SERP_API_KEY", "serp")
+    monkeypatch.setenv("AIRTABLE_API_KEY", "airtable")
+    monkeypatch.setenv("AIRTABLE_BASE_ID", "app123")
+
+
+def _prober():
+    prober = ServiceHealthProber()
+    prober._client = httpx.AsyncClient(transport=httpx.MockTransport(_slow_upstream))
+    return prober
+
+
+def bench_sequential_checks(benchmark, configured):
+    """What the status grid cost when each service was checked one after another"""
+    async def check_all():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(_slow_upstream)) as client:
+            return [
+                await credential_validator.validate_credentials_async(
+                    service, service_health_module.configured_credentials(service) or {}, client
+                )
+                for service in NETWORK_CHECKED
+            ]
+
+    assert len(benchmark.pedantic(lambda: asyncio.run(check_all()), rounds=3)) == len(NETWORK_CHECKED)
+
+
+def bench_concurrent_probe(benchmark, configured):
+    async def probe():
+        prober = _prober()
+        started = time.monotonic()
+        statuses = await prober.probe_all()
+        elapsed = time.monotonic() - started
+        await prober._client.aclose()
+        return statuses, elapsed
+
+    statuses, elapsed = benchmark.pedantic(lambda: asyncio.run(probe()), rounds=3)
+    assert elapsed < UPSTREAM_LATENCY * 2
+    assert statuses["Supabase"]["status"] == "configured"
+    assert statuses["SERP API"]["connected"] is True
+    assert statuses["Airtable"]["status"] == "invalid"
+    assert statuses["Twilio"]["connected"] is True
+    assert statuses["Ultravox"]["status"] == "not_configured"
+    assert statuses["Gmail"]["status"] == "configured"
+
+
+def bench_cached_status_read(benchmark, configured):
+    async def warm():
+        prober = _prober()
+        await prober.probe_all()
+        await prober._client.aclose()
+        return prober
+
+    prober = asyncio.run(warm())
+    status = benchmark(prober.get_status, "Supabase")
+    assert status["connected"] is True and status["stale"] is False
+
+
+def bench_missing_status_refreshes_in_background(configured):
+    async def run():
+        prober = _prober()
+        first = prober.get_status("Supabase")
+        await prober.refresh()
+        second = prober.get_status("Supabase")
+        await prober._client.aclose()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first["status"] == "pending"
+    assert second["status"] == "configured"
@@ -0,0 +1,195 @@
+# backend/benchmarks/bench_supabase.py
+
+import asyncio
+import random
+
+import httpx
+import pytest
+
+supabase_module = pytest.importorskip("app.services.supabase_service")
+from app.config import settings
+from app.services.http_client_pool import HttpClientPool
+
+CHUNK_COUNT = 500
+DIMENSION = 384
+
+
+@pytest.fixture(scope="module")
+def chunks_and_embeddings():
+    rng = random.Random(7)
+    chunks = [f"Chunk {i} " + "lorem ipsum " * 80 for i in range(CHUNK_COUNT)]
+    embeddings = [[rng.uniform(-1, 1) for _ in range(DIMENSION)] for _ in range(CHUNK_COUNT)]
+    return chunks, embeddings
+
+
+@pytest.fixture
+def client_pool(run_async):
+    # A pool per test: pooled connections are bound to the event loop that opened them
+    pool = HttpClientPool(
+        "bench",
+        max_clients=8,
+        idle_ttl=60.0,
+        max_connections_per_host=20,
+        max_keepalive_connections=10,
+        keepalive_expiry=60.0,
+        timeout=httpx.Timeout(30.0, connect=10.0),
+        http2=False
+    )
+    yield pool
+    run_async(pool.aclose)
+
+
+@pytest.fixture
+def service(client_pool):
+    return supabase_module.SupabaseService(client_pool=client_pool)
+
+
+@pytest.fixture
+def credentials(stub_postgrest):
+    return {
+        "url": f"http://127.0.0.1:{stub_postgrest.server_address[1]}",
+        "apiKey": "bench-key"
+    }
+
+
+def bench_store_embeddings(benchmark, run_async, stub_postgrest, service, credentials, chunks_and_embeddings):
+    chunks, embeddings = chunks_and_embeddings
+
+    result = benchmark(
+        run_async,
+        lambda: service.store_embeddings(
+            credentials, "documents", chunks, embeddings, {"filename": "bench.pdf"}
+        )
+    )
+    assert result["success"]
+    assert result["chunks_stored"] == CHUNK_COUNT
+    # Same document key on every round: rows are upserted, not duplicated
+    assert len(stub_postgrest.chunk_ids) == CHUNK_COUNT
+
+
+def bench_store_embeddings_with_retries(benchmark, run_async, stub_postgrest, service, credentials,
+                                        chunks_and_embeddings, monkeypatch):
+    """Transient 503s are retried per batch and the reported counts stay exact"""
+    chunks, embeddings = chunks_and_embeddings
+    monkeypatch.setattr(settings, "supabase_upload_retry_delay", 0.001)
+
+    def run():
+        stub_postgrest.fail_next = 3
+        return run_async(lambda: service.store_embeddings(
+            credentials, "documents", chunks, embeddings, {"document_id": "retry-doc"}
+        ))
+
+    result = benchmark.pedantic(run, rounds=5)
+    assert result["success"]
+    assert result["chunks_stored"] == CHUNK_COUNT
+    assert result["failed_batches"] == []
+
+
+def bench_store_embeddings_reports_failures(benchmark, run_async, stub_postgrest, service, credentials,
+                                            chunks_and_embeddings, monkeypatch):
+    chunks, embeddings = chunks_and_embeddings
+    monkeypatch.setattr(settings, "supabase_upload_retry_delay", 0.001)
+    monkeypatch.setattr(settings, "supabase_upload_max_attempts", 1)
+    monkeypatch.setattr(settings, "supabase_upload_concurrency", 1)
+
+    def run():
+        # With one worker the first batch fails and the rest succeed
+        stub_postgrest.fail_next = 1
+        return run_async(lambda: service.store_embeddings(
+            credentials, "documents", chunks, embeddings, {"document_id": "failing-doc"}
+        ))
+
+    result = benchmark.pedantic(run, rounds=3)
+    assert not result["success"]
+    assert result["failed_batches"] == [0]
+    assert result["chunks_stored"] + result["chunks_failed"] == CHUNK_COUNT
+    assert result["chunks_failed"] > 0
+
+
+def bench_vector_serialization(benchmark, chunks_and_embeddings):
+    _, embeddings = chunks_and_embeddings
+    literals = benchmark(supabase_module.SupabaseService._vector_literals, embeddings)
+    assert len(literals) == CHUNK_COUNT
+    assert literals[0].startswith("[") and literals[0].count(",") == DIMENSION - 1
+
+
+def bench_pooled_client_reuse(benchmark, run_async, stub_postgrest, service, client_pool, credentials):
+    """Many small requests over one warm pooled client, as list_tables/search traffic does"""
+    async def requests():
+        for _ in range(50):
+            await service.list_tables(credentials)
+
+    benchmark(run_async, requests)
+    stats = client_pool.stats()
+    assert stats["created"] == 1
+    assert stats["clients"] == 1
+
+
+def bench_client_pool_evicts_lru(run_async, client_pool):
+    async def churn():
+        for tenant in range(20):
+            client_pool.get(("http://tenant", tenant))
+        return client_pool.stats()
+
+    stats = run_async(churn)
+    assert stats["clients"] == client_pool.max_clients
+    assert stats["evicted"] == 20 - client_pool.max_clients
+
+
+def bench_store_and_search_share_a_client(run_async, stub_postgrest, service, client_pool, credentials,
+                                          chunks_and_embeddings):
+    chunks, embeddings = chunks_and_embeddings
+
+    async def requests():
+        await service.store_embeddings(credentials, "documents", chunks[:10], embeddings[:10], {"filename": "a.pdf"})
+        await service.list_tables(credentials)
+
+    run_async(requests)
+    # store_embeddings appends /rest/v1 to the URL; it must not get a client of its own
+    assert client_pool.stats()["created"] == 1
+
+
+def bench_leased_client_survives_idle_eviction(run_async):
+    pool = HttpClientPool(
+        "lease",
+        max_clients=8,
+        idle_ttl=0.05,
+        max_connections_per_host=1,
+        max_keepalive_connections=1,
+        keepalive_expiry=5.0,
+        timeout=httpx.Timeout(1.0),
+        http2=False
+    )
+
+    async def scenario():
+        async with pool.lease("long") as client:
+            await asyncio.sleep(0.1)
+            # Another tenant's lookup runs idle eviction while the lease is held
+            pool.get("other")
+            await asyncio.sleep(0)
+            assert not client.is_closed
+            await asyncio.sleep(0.1)
+            pool.get("other")
+            assert not client.is_closed
+        # Once released the client counts as just used, then ages out normally
+        await asyncio.sleep(0.1)
+        pool.get("other")
+        await asyncio.sleep(0)
+        assert client.is_closed
+        await pool.aclose()
+
+    run_async(scenario)
+
+
+@pytest.mark.parametrize("code", ["42703", "PGRST204", "42P10"])
+def bench_store_embeddings_falls_back_without_upsert_key(run_async, stub_postgrest, service, credentials,
+                                                         chunks_and_embeddings, monkeypatch, code):
+    chunks, embeddings = chunks_and_embeddings
+    # 42P10 (chunk_id without a unique constraint) does not mention the column
+    monkeypatch.setattr(stub_postgrest, "reject_upsert", code)
+
+    result = run_async(lambda: service.store_embeddings(
+        credentials, "documents", chunks[:20], embeddings[:20], {"document_id": "legacy-doc"}
+    ))
+    assert result["success"] and result["chunks_stored"] == 20
+    assert f"{credentials['url']}/rest/v1/documents" in service.legacy_tables
@@ -0,0 +1,163 @@
+# backend/benchmarks/bench_twilio_http.py
+
+import asyncio
+import threading
+import time
+
+import pytest
+from aiohttp import web
+from twilio.rest import Client
+
+from app.config import settings
+from app.services.call_dialer import is_retryable_call_error
+from app.services.twilio_http import PooledTwilioHttpClient, TwilioRequestTimeout, endpoint_label
+from app.services.twilio_service import TwilioService
+
+ACCOUNT_SID = "AC" + "a" * 32
+CALL_SID = "CA" + "b" * 32
+UPSTREAM_LATENCY = 0.02
+REQUESTS = 40
+
+
+class StubTwilio:
+    """Twilio REST API stub on its own thread, counting the TCP connections opened to it"""
+
+    def __init__(self):
+        self.connections = set()
+        self.slow = False
+        self.loop = asyncio.new_event_loop()
+        self.started = threading.Event()
+
+    async def _call(self, request):
+        self.connections.add(request.transport.get_extra_info("peername"))
+        await asyncio.sleep(1.0 if self.slow else UPSTREAM_LATENCY)
+        return web.json_response({
+            "sid": request.match_info["call"], "from": "+15550000000", "to": "+15550000001",
+            "status": "completed", "duration": "42", "direction": "outbound-api", "price": "-0.0130"
+        })
+
+    async def _recordings(self, request):
+        self.connections.add(request.transport.get_extra_info("peername"))
+        await asyncio.sleep(UPSTREAM_LATENCY)
+        recordings = [{"sid": "RE" + "c" * 32, "duration": "42", "uri": "/recording.json"}]
+        return web.json_response({"recordings": recordings, "next_page_uri": None})
+
+    def _serve(self):
+        asyncio.set_event_loop(self.loop)
+        app = web.Application()
+        app.router.add_get("/2010-04-01/Accounts/{account}/Calls/{call}.json", self._call)
+        app.router.add_get("/2010-04-01/Accounts/{account}/Recordings.json", self._recordings)
+        self.runner = web.AppRunner(app)
+        self.loop.run_until_complete(self.runner.setup())
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        self.loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self.started.set()
+        self.loop.run_forever()
+
+    def start(self):
+        threading.Thread(target=self._serve, daemon=True).start()
+        self.started.wait()
+        return f"http://127.0.0.1:{self.port}"
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+@pytest.fixture
+def stub():
+    server = StubTwilio()
+    base_url = server.start()
+    yield server, base_url
+    server.stop()
+
+
+def _service(monkeypatch, base_url, **overrides):
+    monkeypatch.setattr(settings, "twilio_account_sid", ACCOUNT_SID)
+    monkeypatch.setattr(settings, "twilio_auth_token", "b" * 32)
+    for name, value in overrides.items():
+        monkeypatch.setattr(settings, name, value)
+    service = TwilioService()
+    service.client.api.base_url = base_url
+    return service
+
+
+async def _max_loop_stall(work):
+    """Run work while a ticker measures the longest the event loop went unscheduled"""
+    stalls = []
+
+    async def ticker():
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(0.001)
+            stalls.append(time.monotonic() - before)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    result = await work()
+    # Let the ticker record the gap the work may have left
+    await asyncio.sleep(0.01)
+    task.cancel()
+    return result, max(stalls)
+
+
+def bench_blocking_client(benchmark, stub):
+    """Baseline: the synchronous Twilio client, called from a coroutine"""
+    _, base_url = stub
+    client = Client(ACCOUNT_SID, "b" * 32)
+    client.api.base_url = base_url
+
+    async def fetch_all():
+        return [client.calls(CALL_SID).fetch() for _ in range(REQUESTS)]
+
+    calls, stall = benchmark.pedantic(lambda: asyncio.run(_max_loop_stall(fetch_all)), rounds=1)
+    assert len(calls) == REQUESTS
+    # The loop is blocked for every request
+    assert stall >= REQUESTS * UPSTREAM_LATENCY
+
+
+def bench_pooled_call_details(benchmark, stub, monkeypatch):
+    server, base_url = stub
+    service = _service(monkeypatch, base_url, twilio_http_max_connections=8)
+
+    async def fetch_all():
+        try:
+            return await asyncio.gather(*(service.get_call_details(CALL_SID) for _ in range(REQUESTS)))
+        finally:
+            await service.aclose()
+
+    details, stall = benchmark.pedantic(lambda: asyncio.run(_max_loop_stall(fetch_all)), rounds=1)
+    assert len(details) == REQUESTS
+    assert details[0]["cost"] == -0.013 and len(details[0]["recordings"]) == 1
+    assert stall < UPSTREAM_LATENCY * 5
+    # Requests share the keep-alive pool instead of one connection each
+    assert len(server.connections) <= 8
+
+
+def bench_request_timeout(stub, monkeypatch):
+    server, base_url = stub
+    server.slow = True
+    service = _service(monkeypatch, base_url, twilio_http_timeout=0.2)
+
+    async def fetch():
+        try:
+            await service.client.calls(CALL_SID).fetch_async()
+        finally:
+            await service.aclose()
+
+    started = time.monotonic()
+    with pytest.raises(TwilioRequestTimeout) as timeout:
+        asyncio.run(fetch())
+    # Timed out after the request was sent: the dialer must not place the call again
+    assert timeout.value.request_sent
+    assert not is_retryable_call_error(timeout.value)
+    assert time.monotonic() - started < 0.6
+    assert service.http_client.stats()["errors"] == 1
+
+
+def bench_endpoint_labels():
+    client = PooledTwilioHttpClient(timeout=1, connect_timeout=1, max_connections=1, keepalive=1)
+    assert client.stats()["open"] is False
+    url = f"https://api.twilio.com/2010-04-01/Accounts/{ACCOUNT_SID}/Calls/{CALL_SID}.json"
+    assert endpoint_label(url) == "/2010-04-01/Accounts/{sid}/Calls/{sid}"
@@ -0,0 +1,180 @@
+# backend/benchmarks/bench_vector_index.py
+
+import asyncio
+import contextlib
+
+import numpy as np
+import pytest
+
+vector_index = pytest.importorskip("app.services.vector_index")
+
+DIMENSION = 384
+
+
+def _clustered_vectors(rng, count, clusters=200):
+    """Embedding-like data: points scattered around a few hundred topics"""
+    centers = rng.standard_normal((clusters, DIMENSION)).astype(np.float32)
+    labels = rng.integers(0, clusters, count)
+    return centers[labels] + 0.6 * rng.standard_normal((count, DIMENSION)).astype(np.float32)
+
+
+def _build(directory, vectors):
+    index = vector_index.LocalVectorIndex(str(directory))
+    for start in range(0, len(vectors), 5000):
+        part = vectors[start:start + 5000]
+        ids = list(range(start + 1, start + len(part) + 1))
+        index.add(ids, part, [f"chunk {i}" for i in ids], [{"chunk_index": i} for i in ids])
+    index.mark_synced()
+    return index
+
+
+@pytest.fixture(scope="module")
+def flat_index(tmp_path_factory):
+    rng = np.random.default_rng(7)
+    return _build(tmp_path_factory.mktemp("flat"), _clustered_vectors(rng, 10_000))
+
+
+@pytest.fixture(scope="module")
+def ivf_index(tmp_path_factory):
+    rng = np.random.default_rng(11)
+    vectors = _clustered_vectors(rng, 100_000)
+    return _build(tmp_path_factory.mktemp("ivf"), vectors), vectors
+
+
+@pytest.fixture(scope="module")
+def queries():
+    rng = np.random.default_rng(3)
+    return _clustered_vectors(rng, 50)
+
+
+def bench_flat_search_10k(benchmark, flat_index, queries):
+    results = benchmark(flat_index.search, queries[0], 5, -1.0)
+    assert len(results) == 5
+    assert results[0]["text"].startswith("chunk ")
+
+
+def bench_ivf_search_100k(benchmark, ivf_index, queries):
+    index, vectors = ivf_index
+    assert index.stats()["ivf_lists"]
+
+    results = benchmark(index.search, queries[0], 5, -1.0)
+    assert len(results) == 5
+
+    # Recall@5 of the IVF lists against an exact scan
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    hits = 0
+    for query in queries:
+        query = query / np.linalg.norm(query)
+        exact = set(np.argsort(-(normalized @ query))[:5] + 1)
+        found = {r["metadata"]["chunk_index"] for r in index.search(query, 5, -1.0)}
+        hits += len(exact & found)
+    assert hits / (5 * len(queries)) >= 0.9
+
+
+def bench_update_rewrites_rows_in_place(tmp_path):
+    rng = np.random.default_rng(5)
+    vectors = _clustered_vectors(rng, 1000)
+    index = _build(tmp_path, vectors)
+
+    # A re-ingested chunk keeps its id but gets new text and a new vector
+    replacement = rng.standard_normal((1, DIMENSION)).astype(np.float32)
+    assert index.update([10, 5000], replacement.repeat(2, axis=0), ["new text"] * 2, [{"chunk_index": 10}] * 2) == 1
+    assert index.count == 1000
+
+    results = index.search(replacement[0], 1, -1.0)
+    assert results[0]["text"] == "new text"
+    assert results[0]["similarity_score"] > 0.99
+    assert all(r["text"] != "chunk 10" for r in index.search(vectors[9], 5, -1.0))
+
+    # The rewrite survives reopening the index
+    reopened = vector_index.LocalVectorIndex(str(tmp_path))
+    assert reopened.search(replacement[0], 1, -1.0)[0]["text"] == "new text"
+
+
+def bench_rejects_table_names_outside_the_index_dir(tmp_path, run_async):
+    service = vector_index.LocalVectorIndexService(str(tmp_path / "indexes"))
+    credentials = {"url": "https://project.supabase.co", "apiKey": "key"}
+    for table_name in ("../../escape", "docs/x", "", "1documents"):
+        with pytest.raises(ValueError):
+            run_async(lambda: service.search_embeddings(credentials, table_name, [0.1] * DIMENSION))
+    assert not (tmp_path / "escape").exists()
+
+
+def bench_concurrent_searches_open_the_index_once(tmp_path, run_async, monkeypatch):
+    service = vector_index.LocalVectorIndexService(str(tmp_path / "indexes"))
+    credentials = {"url": "https://project.supabase.co", "apiKey": "key"}
+    opened = []
+    monkeypatch.setattr(service, "mark_stale", lambda *args: None)
+
+    class CountingIndex(vector_index.LocalVectorIndex):
+        def __init__(self, directory):
+            opened.append(directory)
+            super().__init__(directory)
+
+    async def unsynced(*args):
+        return []
+
+    monkeypatch.setattr(vector_index, "LocalVectorIndex", CountingIndex)
+    monkeypatch.setattr(vector_index.supabase_service, "search_embeddings", unsynced)
+
+    async def burst():
+        return await asyncio.gather(*(
+            service.search_embeddings(credentials, "documents", [0.1] * DIMENSION) for _ in range(10)
+        ))
+
+    assert run_async(burst) == [[]] * 10
+    assert len(opened) == 1
+
+
+class _FakeTable:
+    """In-memory Supabase table answering the queries sync_table makes"""
+
+    def __init__(self, rng, ids):
+        self.rows = {i: rng.standard_normal(DIMENSION).tolist() for i in ids}
+
+    async def get(self, url, params=None, headers=None):
+        ids = sorted(self.rows)
+        for key, condition in (params or {}).items():
+            if key == "id":
+                op, value = condition.split(".")
+                ids = [i for i in ids if (i > int(value) if op == "gt" else i <= int(value))]
+        return _FakeResponse(ids, self.rows, params)
+
+
+class _FakeResponse:
+    def __init__(self, ids, rows, params):
+        self.headers = {"content-range": f"0-0/{len(ids)}"}
+        self._rows = [
+            {"id": i, "content": f"chunk {i}", "embedding": rows[i], "metadata": {}}
+            for i in ids[:int(params.get("limit", len(ids)))]
+        ]
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._rows
+
+
+def bench_sync_notices_deletes_hidden_by_inserts(tmp_path, run_async, monkeypatch):
+    table = _FakeTable(np.random.default_rng(2), range(1, 11))
+
+    @contextlib.asynccontextmanager
+    async def lease_client(*args):
+        yield table
+
+    monkeypatch.setattr(vector_index.supabase_service, "lease_client", lease_client)
+    service = vector_index.LocalVectorIndexService(str(tmp_path / "indexes"))
+    credentials = {"url": "https://project.supabase.co", "apiKey": "key"}
+    assert run_async(lambda: service.sync_table(credentials, "documents")) == 10
+
+    # As many rows deleted as added: the table size is unchanged
+    for i in (3, 4):
+        del table.rows[i]
+    table.rows.update(_FakeTable(np.random.default_rng(3), (11, 12)).rows)
+    run_async(lambda: service.sync_table(credentials, "documents"))
+
+    index = service._indexes[service._key(credentials, "documents")]
+    assert index.count == 10
+    texts = {r["text"] for r in index.search(table.rows[1], 20, -1.0)}
+    assert "chunk 3" not in texts and "chunk 12" in texts
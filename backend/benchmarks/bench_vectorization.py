@@ -0,0 +1,39 @@
+# backend/benchmarks/bench_vectorization.py
+
+import pytest
+
+pytest.importorskip("sentence_transformers")
+from app.services.vectorization_service import vectorization_service as shared_service
+
+SHORT_QUERY = "What does the premium subscription include?"
+CHUNK = ("Product XYZ supports all major operating systems including Windows, macOS and Linux. "
+         "The premium subscription costs $49.99 per month and includes all features. ") * 6
+
+
+@pytest.fixture(scope="module")
+def vectorization_service():
+    shared_service.registry.warmup()
+    return shared_service
+
+
+def bench_vectorize_query(benchmark, vectorization_service):
+    vector = benchmark(vectorization_service.vectorize, SHORT_QUERY)
+    assert len(vector) == vectorization_service.embedding_dimension
+
+
+def bench_vectorize_chunk(benchmark, vectorization_service):
+    vector = benchmark(vectorization_service.vectorize, CHUNK)
+    assert len(vector) == vectorization_service.embedding_dimension
+
+
+def bench_vectorize_chunks_one_by_one(benchmark, vectorization_service):
+    chunks = [f"{i} {CHUNK}" for i in range(64)]
+    vectors = benchmark(lambda: [vectorization_service.vectorize(chunk) for chunk in chunks])
+    assert len(vectors) == len(chunks)
+
+
+def bench_vectorize_batch(benchmark, vectorization_service):
+    chunks = [f"{i} {CHUNK}" for i in range(64)]
+    matrix = benchmark(vectorization_service.vectorize_batch, chunks)
+    assert matrix.shape == (len(chunks), vectorization_service.embedding_dimension)
+    assert matrix.flags["C_CONTIGUOUS"]
@@ -0,0 +1,170 @@
+# backend/benchmarks/conftest.py
+
+import asyncio
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Make the ``app`` package importable when running ``pytest benchmarks`` from backend/
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+SEED_CALL_ROWS = int(os.environ.get("BENCH_SEED_CALLS", "10000"))
+
+
+@pytest.fixture(scope="session")
+def run_async():
+    """Run a coroutine factory to completion on a dedicated event loop"""
+    loop = asyncio.new_event_loop()
+
+    def runner(coro_factory):
+        return loop.run_until_complete(coro_factory())
+
+    yield runner
+    loop.close()
+
+
+class StubPostgRESTHandler(BaseHTTPRequestHandler):
+    """
+    Minimal PostgREST stand-in: accepts row inserts/upserts and RPC calls.
+    Set ``server.fail_next`` to answer the next N inserts with 503, and
+    ``server.reject_upsert`` to a PostgREST error code to refuse upserts.
+    """
+
+    # Keep-alive, so pooled clients reuse their connections
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        # The REST root serves the OpenAPI description, whose paths are the tables
+        payload = json.dumps({"paths": {"/": {}, "/documents": {}}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        server = self.server
+
+        if "/rpc/" in self.path:
+            payload = json.dumps(server.rpc_rows).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        if server.reject_upsert and "on_conflict=" in self.path:
+            # PostgREST's answer when the table cannot take chunk_id upserts
+            payload = json.dumps({"code": server.reject_upsert, "message": "upsert rejected"}).encode()
+            self.send_response(400)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        with server.lock:
+            server.requests += 1
+            if server.fail_next > 0:
+                server.fail_next -= 1
+                failed = True
+            else:
+                failed = False
+        if failed:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        rows = json.loads(body or b"[]")
+        rows = rows if isinstance(rows, list) else [rows]
+        with server.lock:
+            server.rows_received += len(rows)
+            server.bytes_received += length
+            for row in rows:
+                if "chunk_id" in row:
+                    server.chunk_ids.add(row["chunk_id"])
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="session")
+def stub_postgrest():
+    """Local HTTP server that mimics the Supabase REST endpoints"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubPostgRESTHandler)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.rows_received = 0
+    server.bytes_received = 0
+    server.rpc_rows = []
+    server.fail_next = 0
+    server.chunk_ids = set()
+    server.reject_upsert = None
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="session")
+def seeded_mysql(run_async):
+    """
+    Seed a local MySQL database with synthetic call history.
+    Configure it with BENCH_DB_HOST / BENCH_DB_USER / BENCH_DB_PASSWORD / BENCH_DB_DATABASE.
+    """
+    host = os.environ.get("BENCH_DB_HOST")
+    if not host:
+        pytest.skip("BENCH_DB_HOST not set; skipping MySQL benchmarks")
+
+    from app.config import settings
+    settings.db_host = host
+    settings.db_user = os.environ.get("BENCH_DB_USER", "root")
+    settings.db_password = os.environ.get("BENCH_DB_PASSWORD", "")
+    settings.db_database = os.environ.get("BENCH_DB_DATABASE", "voice_call_ai_bench")
+    settings.debug = True
+
+    from app.database import db, create_tables
+
+    async def seed():
+        await db.connect()
+        if not db.connected:
+            pytest.skip(f"Could not connect to MySQL at {host}")
+        await create_tables()
+        await db.execute("DELETE FROM calls WHERE call_sid LIKE 'BENCH%%'")
+        statuses = ["completed", "no-answer", "busy", "failed", "in-progress"]
+        batch = []
+        for i in range(SEED_CALL_ROWS):
+            batch.append((
+                f"BENCH{i:010d}", "+15550000000", f"+1555{i:07d}",
+                "outbound", statuses[i % len(statuses)],
+                f"2024-01-{(i % 28) + 1:02d} {i % 24:02d}:00:00",
+                i % 600, round((i % 600) * 0.0085, 4)
+            ))
+            if len(batch) == 1000 or i == SEED_CALL_ROWS - 1:
+                placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s)"] * len(batch))
+                await db.execute(
+                    f"""
+                    INSERT INTO calls
+                    (call_sid, from_number, to_number, direction, status, start_time, duration, cost)
+                    VALUES {placeholders}
+                    """,
+                    [value for row in batch for value in row]
+                )
+                batch = []
+
+    run_async(seed)
+    yield db
+    run_async(db.close)